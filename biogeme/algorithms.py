@@ -20,6 +20,7 @@ Optimization algorithms.
 from abc import abstractmethod
 import numpy as np
 import scipy.linalg as la
+import scipy.linalg.lapack as lapack
 import biogeme.exceptions as excep
 import biogeme.messaging as msg
 
@@ -116,6 +117,177 @@ class functionToMinimize:
         :rtype: tuple float, numpy.array, numpy.array
         """
 
+    def hessianVectorProduct(self, x, v):
+        """Calculate the product of the second derivatives matrix at x
+        with a vector, without forming the matrix. By default, it is
+        approximated by central differences of the gradient, which
+        costs two gradient evaluations. The variables of the function
+        are modified.
+
+        :param x: point where the second derivatives are evaluated.
+        :type x: numpy.array
+
+        :param v: vector to be multiplied.
+        :type v: numpy.array
+
+        :return: product of the second derivatives matrix with v
+        :rtype: numpy.array
+        """
+        normv = np.linalg.norm(v)
+        if normv == 0:
+            return np.zeros(len(x))
+        step = (
+            np.finfo(float).eps ** (1.0 / 3.0)
+            * max(1.0, np.linalg.norm(x))
+            / normv
+        )
+        self.setVariables(np.asarray(x) + step * np.asarray(v))
+        _, gplus = self.f_g()
+        self.setVariables(np.asarray(x) - step * np.asarray(v))
+        _, gminus = self.f_g()
+        return (np.asarray(gplus) - np.asarray(gminus)) / (2.0 * step)
+
+    def f_g_twoPoints(self, x, y, batch=None):
+        """Calculate the value of the function and the gradient at two
+        points. For data driven functions, the same random batch must
+        be used for both points, as required by variance reduced
+        stochastic algorithms. The default implementation calls
+        :meth:`f_g` twice, and is valid only if batch is None. The
+        variables of the function are modified.
+
+        :param x: first point.
+        :type x: numpy.array
+
+        :param y: second point.
+        :type y: numpy.array
+
+        :param batch: share of the data used for the random batch, or
+            None for the full data set. Default: None.
+        :type batch: float
+
+        :return: value of the function and gradient at x, value of the
+            function and gradient at y.
+        :rtype: tuple float, numpy.array, float, numpy.array
+        """
+        self.setVariables(x)
+        fx, gx = self.f_g(batch=batch)
+        self.setVariables(y)
+        fy, gy = self.f_g(batch=batch)
+        return fx, gx, fy, gy
+
+    def saveOptimizationState(self, state):
+        """Called by the optimization algorithms at the end of each
+        iteration, with the information needed to resume the
+        algorithm. By default, the state is ignored.
+
+        :param state: state of the algorithm. It can be pickled, and
+            provided to the same algorithm to resume the iterations.
+        :type state: dict(str: object)
+        """
+
+
+def checkOptimizationState(state, algorithm, n):
+    """Verifies that the state of an algorithm can be used to resume
+    the iterations.
+
+    :param state: state saved by the algorithm.
+    :type state: dict(str: object)
+
+    :param algorithm: name of the algorithm that is resumed.
+    :type algorithm: str
+
+    :param n: number of variables.
+    :type n: int
+
+    :raises biogeme.exceptions.biogemeError: if the state has been
+        generated by another algorithm, or for another number of
+        variables.
+    """
+    if state.get('algorithm') != algorithm:
+        errorMsg = (
+            f'The state has been generated by algorithm '
+            f'{state.get("algorithm")}, and cannot be used to resume '
+            f'algorithm {algorithm}.'
+        )
+        raise excep.biogemeError(errorMsg)
+    if len(state['x']) != n:
+        errorMsg = (
+            f'The state has been generated for {len(state["x"])} '
+            f'variables, and not {n}.'
+        )
+        raise excep.biogemeError(errorMsg)
+
+
+class hessianVectorOperator:
+    """Second derivatives matrix that is never formed. It is only
+    available through its product with vectors, using the operator @,
+    so that it can replace the matrix in the conjugate gradient
+    algorithms.
+    """
+
+    def __init__(self, fct, x, selectedVariables=None):
+        """Constructor
+
+        :param fct: object to calculate the objective function and
+            the products of its second derivatives with vectors.
+        :type fct: algorithms.functionToMinimize
+
+        :param x: point where the second derivatives are evaluated.
+        :type x: numpy.array
+
+        :param selectedVariables: boolean vector. If not None, the
+            operator is restricted to the subspace of the variables
+            corresponding to True entries. Default: None.
+        :type selectedVariables: numpy.array(bool)
+        """
+        self.fct = fct  #: function to minimize
+        self.x = np.array(x, dtype=float)  #: point of evaluation
+        self.selectedVariables = selectedVariables  #: subspace, or None
+        n = (
+            len(self.x)
+            if selectedVariables is None
+            else int(np.sum(selectedVariables))
+        )
+        self.shape = (n, n)  #: dimensions of the matrix
+        self.numberOfProducts = 0
+        """Number of products calculated, including those in the
+        subspaces."""
+        self._parent = None
+
+    def __matmul__(self, v):
+        op = self
+        while op is not None:
+            op.numberOfProducts += 1
+            op = op._parent
+        if self.selectedVariables is None:
+            return self.fct.hessianVectorProduct(self.x, v)
+        full = np.zeros(len(self.x))
+        full[self.selectedVariables] = v
+        return self.fct.hessianVectorProduct(self.x, full)[
+            self.selectedVariables
+        ]
+
+    def subspace(self, selectedVariables):
+        """Operator restricted to a subspace.
+
+        :param selectedVariables: boolean vector. If an entry is True,
+                   the corresponding variables is considered.
+        :type selectedVariables: numpy.array(bool)
+
+        :return: operator for the selected variables
+        :rtype: hessianVectorOperator
+
+        :raises biogeme.exceptions.biogemeError: if the operator is
+            already restricted to a subspace.
+        """
+        if self.selectedVariables is not None:
+            raise excep.biogemeError(
+                'The operator is already restricted to a subspace.'
+            )
+        op = hessianVectorOperator(self.fct, self.x, selectedVariables)
+        op._parent = self
+        return op
+
 
 class bioBounds:
     """This class is designed for the management of simple bound constraints"""
@@ -579,11 +751,13 @@ def schnabelEskow(
     """
 
     def pivot(j):
+        # Rank one update of the trailing submatrix, performed on its
+        # lower triangular part and mirrored to keep it symmetric.
         A[j, j] = np.sqrt(A[j, j])
-        for i in range(j + 1, dim):
-            A[j, i] = A[i, j] = A[i, j] / A[j, j]
-            A[i, j + 1 : i + 1] -= A[i, j] * A[j + 1 : i + 1, j]
-            A[j + 1 : i + 1, i] = A[i, j + 1 : i + 1]
+        c = A[j + 1 :, j] / A[j, j]
+        A[j + 1 :, j] = A[j, j + 1 :] = c
+        T = np.tril(A[j + 1 :, j + 1 :]) - np.tril(np.outer(c, c))
+        A[j + 1 :, j + 1 :] = T + np.tril(T, -1).T
 
     def permute(i, j):
         A[[i, j]] = A[[j, i]]
@@ -603,6 +777,18 @@ def schnabelEskow(
     P = np.identity(dim)
     phaseOne = True
     gamma = abs(A.diagonal()).max()
+
+    # If the matrix is safely positive definite, phase one completes
+    # and the factorization is a Cholesky factorization with diagonal
+    # pivoting. It is first attempted with LAPACK, that stops as soon
+    # as the pivot falls below the same threshold as phase one.
+    if gamma > 0:
+        C, piv, rank, info = lapack.dpstrf(A, tol=taubar * gamma, lower=1)
+        if info == 0 and rank == dim:
+            P[:, :] = 0.0
+            P[piv - 1, np.arange(dim)] = 1.0
+            return np.tril(C), np.zeros((dim, dim)), P
+
     j = 0
     while j < dim and phaseOne is True:
         a_max = A.diagonal()[j:].max()
@@ -641,12 +827,8 @@ def schnabelEskow(
             g = np.zeros(dim)
             k = j - 1  # k = number of iterations performed in phase one
             # Calculate lower Gerschgorin bounds of A[k+1]
-            for i in range(k + 1, dim):
-                g[i] = (
-                    A[i, i]
-                    - abs(A[i, k + 1 : i]).sum()
-                    - abs(A[i + 1 : dim, i]).sum()
-                )
+            B = np.tril(abs(A[k + 1 :, k + 1 :]), -1)
+            g[k + 1 :] = A.diagonal()[k + 1 :] - B.sum(axis=1) - B.sum(axis=0)
             # Modified Cholesky Decomposition
             for j in range(k + 1, dim - 2):
                 # Pivot on maximum lower Gerschgorin bound estimate
@@ -886,7 +1068,7 @@ def newtonLineSearch(
         if relgrad <= eps:
             message = f'Relative gradient = {relgrad:.2g} <= {eps:.2g}'
             cont = False
-        if k == maxiter:
+        if k >= maxiter:
             message = f'Maximum number of iterations reached: {maxiter}'
             cont = False
         logger.detailed(
@@ -999,7 +1181,7 @@ def cauchyNewtonDogleg(g, H):
     return dc, dn, eta * dn
 
 
-def dogleg(g, H, delta):
+def dogleg(g, H, delta, points=None):
     """
     Find an approximation of the trust region subproblem using
     the dogleg method
@@ -1010,6 +1192,12 @@ def dogleg(g, H, delta):
     :type H: numpy.array
     :param delta: radius of the trust region.
     :type delta: float
+    :param points: Cauchy, Newton and dogleg points, as returned by
+        :func:`cauchyNewtonDogleg` for the same g and H. As they do not
+        depend on the radius, they can be calculated once and reused
+        when the radius is reduced, in order to avoid factorizing the
+        hessian again. If None, they are calculated. Default: None.
+    :type points: tuple(numpy.array, numpy.array, numpy.array)
 
     :return: d, diagnostic where
 
@@ -1027,7 +1215,9 @@ def dogleg(g, H, delta):
     :rtype: numpy.array, int
     """
 
-    dc, dn, dl = cauchyNewtonDogleg(g, H)
+    if points is None:
+        points = cauchyNewtonDogleg(g, H)
+    dc, dn, dl = points
 
     # Check if the model is convex along the gradient direction
 
@@ -1087,7 +1277,9 @@ def truncatedConjugateGradient(g, H, delta):
 
     :param g: gradient of the quadratic model.
     :type g: numpy.array
-    :param H: hessian of the quadrartic model.
+    :param H: hessian of the quadrartic model. It can also be a
+              :class:`hessianVectorOperator`, as only products with
+              vectors are needed.
     :type H: numpy.array
     :param delta: radius of the trust region.
     :type delta: float
@@ -1112,7 +1304,8 @@ def truncatedConjugateGradient(g, H, delta):
     dk = -gk
     for _ in range(n):
         try:
-            curv = np.inner(dk, H @ dk)
+            Hdk = H @ dk
+            curv = np.inner(dk, Hdk)
             if curv <= 0:
                 # Negative curvature has been detected
                 diagnostic = 3
@@ -1134,7 +1327,9 @@ def truncatedConjugateGradient(g, H, delta):
                 step = xk + ((-b + np.sqrt(rho)) / (2 * a)) * dk
                 return step, diagnostic
             xk = xkp1
-            gkp1 = H @ xk + g
+            # The residual H xk + g is updated, to perform only one
+            # product with H per iteration.
+            gkp1 = gk + alphak * Hdk
             betak = np.inner(gkp1, gkp1) / np.inner(gk, gk)
             dk = -gkp1 + betak * dk
             gk = gkp1
@@ -1165,6 +1360,7 @@ def newtonTrustRegion(
     maxiter=1000,
     eta1=0.01,
     eta2=0.9,
+    state=None,
 ):
     """Newton method with trust region
 
@@ -1197,6 +1393,12 @@ def newtonTrustRegion(
     :param eta2: threshold for very successful iterations. Default 0.9.
     :type eta2: float
 
+    :param state: state saved by a previous run of the algorithm (see
+        :meth:`functionToMinimize.saveOptimizationState`). If not
+        None, the iterations are resumed from this state, and the
+        starting point is ignored. Default: None.
+    :type state: dict(str: object)
+
     :return: tuple x, messages, where
 
             - x is the solution found,
@@ -1207,38 +1409,58 @@ def newtonTrustRegion(
 
     """
 
-    k = 0
-    xk = x0
-    fct.setVariables(xk)
-    f, g, H = fct.f_g_h()
-    nfev = 1
-    ngev = 1
-    nhev = 1
-    typx = np.ones(np.asarray(xk).shape)
-    typf = max(np.abs(f), 1.0)
-    relgrad = relativeGradient(xk, f, g, typx, typf)
-    if relgrad <= eps:
-        message = f'Relative gradient = {relgrad:.2g} <= {eps:.2g}'
-        messages = {
-            'Algorithm': 'Unconstrained Newton with trust region',
-            'Relative gradient': relgrad,
-            'Cause of termination': message,
-            'Number of iterations': 0,
-            'Number of function evaluations': nfev,
-            'Number of gradient evaluations': ngev,
-            'Number of hessian evaluations': nhev,
-        }
-        return xk, messages
-    delta = delta0
-    nfev = 0
+    if state is not None:
+        checkOptimizationState(state, 'newtonTrustRegion', len(x0))
+        k = state['k']
+        xk = state['x']
+        f = state['f']
+        g = state['g']
+        H = state['H']
+        delta = state['delta']
+        nfev = state['nfev']
+        ngev = state['ngev']
+        nhev = state['nhev']
+        typf = state['typf']
+        relgrad = state['relgrad']
+        typx = np.ones(np.asarray(xk).shape)
+    else:
+        k = 0
+        xk = x0
+        fct.setVariables(xk)
+        f, g, H = fct.f_g_h()
+        nfev = 1
+        ngev = 1
+        nhev = 1
+        typx = np.ones(np.asarray(xk).shape)
+        typf = max(np.abs(f), 1.0)
+        relgrad = relativeGradient(xk, f, g, typx, typf)
+        if relgrad <= eps:
+            message = f'Relative gradient = {relgrad:.2g} <= {eps:.2g}'
+            messages = {
+                'Algorithm': 'Unconstrained Newton with trust region',
+                'Relative gradient': relgrad,
+                'Cause of termination': message,
+                'Number of iterations': 0,
+                'Number of function evaluations': nfev,
+                'Number of gradient evaluations': ngev,
+                'Number of hessian evaluations': nhev,
+            }
+            return xk, messages
+        delta = delta0
+        nfev = 0
     cont = True
     maxDelta = np.finfo(float).max
     minDelta = np.finfo(float).eps
     rho = 0.0
+    points = None
     while cont:
         k += 1
         if dl:
-            step, _ = dogleg(g, H, delta)
+            if points is None:
+                # The factorization of the hessian is reused as long
+                # as the iterate does not change.
+                points = cauchyNewtonDogleg(g, H)
+            step, _ = dogleg(g, H, delta, points)
         else:
             step, _ = truncatedConjugateGradient(g, H, delta)
         xc = xk + step
@@ -1263,6 +1485,7 @@ def newtonTrustRegion(
             f = fc
             g = gc
             H = Hc
+            points = None
             if rho >= eta2:
                 # Enlarge the trust region
                 delta = min(2 * delta, maxDelta)
@@ -1276,7 +1499,7 @@ def newtonTrustRegion(
         if delta <= minDelta:
             message = f'Trust region is too small: {delta}'
             cont = False
-        if k == maxiter:
+        if k >= maxiter:
             message = f'Maximum number of iterations reached: {maxiter}'
             cont = False
         logger.detailed(
@@ -1284,6 +1507,22 @@ def newtonTrustRegion(
             f'delta={delta:6.2g} '
             f'rho={rho:6.2g} {status}'
         )
+        fct.saveOptimizationState(
+            {
+                'algorithm': 'newtonTrustRegion',
+                'k': k,
+                'x': xk,
+                'f': f,
+                'g': g,
+                'H': H,
+                'delta': delta,
+                'nfev': nfev,
+                'ngev': ngev,
+                'nhev': nhev,
+                'typf': typf,
+                'relgrad': relgrad,
+            }
+        )
 
     messages = {
         'Algorithm': 'Unconstrained Newton with trust region',
@@ -1453,7 +1692,7 @@ def bfgsLineSearch(
         if relgrad <= eps:
             message = f'Relative gradient = {relgrad:.2g} <= {eps:.2g}'
             cont = False
-        if k == maxiter:
+        if k >= maxiter:
             message = f'Maximum number of iterations reached: {maxiter}'
             cont = False
         logger.detailed(
@@ -1481,6 +1720,7 @@ def bfgsTrustRegion(
     maxiter=1000,
     eta1=0.01,
     eta2=0.9,
+    state=None,
 ):
     """BFGS method with trust region
 
@@ -1516,6 +1756,13 @@ def bfgsTrustRegion(
     :param eta2: threshold for very successful iterations. Default 0.9.
     :type eta2: float
 
+    :param state: state saved by a previous run of the algorithm (see
+        :meth:`functionToMinimize.saveOptimizationState`). If not
+        None, the iterations are resumed from this state, including
+        the BFGS approximation, and the starting point is
+        ignored. Default: None.
+    :type state: dict(str: object)
+
     :return: tuple x, messages, where
 
             - x is the solution found,
@@ -1529,47 +1776,66 @@ def bfgsTrustRegion(
               matrix initBfgs do not match the length of x0.
 
     """
-    k = 0
-    xk = x0
     n = len(x0)
-    fct.setVariables(xk)
-    f, g = fct.f_g()
-    nfev = 1
-    ngev = 1
-    if initBfgs is None:
-        H = np.identity(n)
+    if state is not None:
+        checkOptimizationState(state, 'bfgsTrustRegion', n)
+        k = state['k']
+        xk = state['x']
+        f = state['f']
+        g = state['g']
+        H = state['H']
+        delta = state['delta']
+        nfev = state['nfev']
+        ngev = state['ngev']
+        typf = state['typf']
+        relgrad = state['relgrad']
+        typx = np.ones(np.asarray(xk).shape)
     else:
-        if initBfgs.shape != (n, n):
-            errorMsg = (
-                f'BFGS must be initialized with a {n}x{n} '
-                f'matrix and not a {initBfgs.shape[0]}'
-                f'x{initBfgs.shape[1]} matrix.'
-            )
-            raise excep.biogemeError(errorMsg)
-        H = initBfgs
-    typx = np.ones(np.asarray(xk).shape)
-    typf = max(np.abs(f), 1.0)
-    relgrad = relativeGradient(xk, f, g, typx, typf)
-    if relgrad <= eps:
-        message = f'Relative gradient = {relgrad:.2g} <= {eps:.2g}'
-        messages = {
-            'Algorithm': 'BFGS with trust region',
-            'Relative gradient': relgrad,
-            'Cause of termination': message,
-            'Number of iterations': 0,
-            'Number of function evaluations': nfev,
-            'Number of gradient evaluations': ngev,
-        }
-        return xk, messages
-    delta = delta0
+        k = 0
+        xk = x0
+        fct.setVariables(xk)
+        f, g = fct.f_g()
+        nfev = 1
+        ngev = 1
+        if initBfgs is None:
+            H = np.identity(n)
+        else:
+            if initBfgs.shape != (n, n):
+                errorMsg = (
+                    f'BFGS must be initialized with a {n}x{n} '
+                    f'matrix and not a {initBfgs.shape[0]}'
+                    f'x{initBfgs.shape[1]} matrix.'
+                )
+                raise excep.biogemeError(errorMsg)
+            H = initBfgs
+        typx = np.ones(np.asarray(xk).shape)
+        typf = max(np.abs(f), 1.0)
+        relgrad = relativeGradient(xk, f, g, typx, typf)
+        if relgrad <= eps:
+            message = f'Relative gradient = {relgrad:.2g} <= {eps:.2g}'
+            messages = {
+                'Algorithm': 'BFGS with trust region',
+                'Relative gradient': relgrad,
+                'Cause of termination': message,
+                'Number of iterations': 0,
+                'Number of function evaluations': nfev,
+                'Number of gradient evaluations': ngev,
+            }
+            return xk, messages
+        delta = delta0
     cont = True
     maxDelta = np.finfo(float).max
     minDelta = np.finfo(float).eps
     rho = 0.0
+    points = None
     while cont:
         k += 1
         if dl:
-            step, _ = dogleg(g, H, delta)
+            if points is None:
+                # The factorization of the hessian is reused as long
+                # as the iterate does not change.
+                points = cauchyNewtonDogleg(g, H)
+            step, _ = dogleg(g, H, delta, points)
         else:
             step, _ = truncatedConjugateGradient(g, H, delta)
         xc = xk + step
@@ -1599,6 +1865,7 @@ def bfgsTrustRegion(
                 f = fc
                 g = gc
                 H = bfgs(H, d, y)
+                points = None
                 if rho >= eta2:
                     # Enlarge the trust region
                     delta = min(2 * delta, maxDelta)
@@ -1612,7 +1879,7 @@ def bfgsTrustRegion(
         if delta <= minDelta:
             message = f'Trust region is too small: {delta}'
             cont = False
-        if k == maxiter:
+        if k >= maxiter:
             message = f'Maximum number of iterations reached: {maxiter}'
             cont = False
         logger.detailed(
@@ -1620,6 +1887,21 @@ def bfgsTrustRegion(
             f' delta={delta:6.2g} '
             f'rho={rho:6.2g} {status}'
         )
+        fct.saveOptimizationState(
+            {
+                'algorithm': 'bfgsTrustRegion',
+                'k': k,
+                'x': xk,
+                'f': f,
+                'g': g,
+                'H': H,
+                'delta': delta,
+                'nfev': nfev,
+                'ngev': ngev,
+                'typf': typf,
+                'relgrad': relgrad,
+            }
+        )
 
     messages = {
         'Algorithm': 'BFGS with trust region',
@@ -1654,7 +1936,9 @@ def truncatedConjugateGradientSubspace(
     :param gk: gradient of the quadratic model.
     :type gk: numpy.array
 
-    :param Hk: hessian of the quadrartic model.
+    :param Hk: hessian of the quadrartic model. It can also be a
+               :class:`hessianVectorOperator`, as only products with
+               vectors are needed.
     :type Hk: numpy.array
 
     :param delta: radius of the trust region.
@@ -1697,7 +1981,8 @@ def truncatedConjugateGradientSubspace(
     if np.isnan(gk).any():
         raise excep.biogemeError(f'Invalid gk: {gk}')
 
-    if np.isnan(Hk).any():
+    hessianFree = isinstance(Hk, hessianVectorOperator)
+    if not hessianFree and np.isnan(Hk).any():
         raise excep.biogemeError(f'Invalid Hk: {Hk}')
 
     # First, we calculate the intersection between the trust region on
@@ -1725,7 +2010,10 @@ def truncatedConjugateGradientSubspace(
 
     # Extract the  bounds for the free variables
     boundsBar = intersection.subspace(freeVariables)
-    Bbar = Hk[freeVariables][:, freeVariables]
+    if hessianFree:
+        Bbar = Hk.subspace(freeVariables)
+    else:
+        Bbar = Hk[freeVariables][:, freeVariables]
     pbar = np.zeros_like(rbar)
     rho1 = 1
     rho2 = np.inner(rbar, rbar)
@@ -1789,6 +2077,8 @@ def simpleBoundsNewtonAlgorithm(
     eta1=0.01,
     eta2=0.9,
     enlargingFactor=10,
+    state=None,
+    hessianFree=False,
 ):
     """Trust region algorithm for problems with simple bounds
 
@@ -1855,6 +2145,19 @@ def simpleBoundsNewtonAlgorithm(
                             by this factor. Default 10.
     :type enlargingFactor: float
 
+    :param state: state saved by a previous run of the algorithm (see
+        :meth:`functionToMinimize.saveOptimizationState`). If not
+        None, the iterations are resumed from this state, and the
+        starting point is ignored. Default: None.
+    :type state: dict(str: object)
+
+    :param hessianFree: if True, the second derivatives matrix is
+        never formed. The conjugate gradient algorithm uses the
+        products of the matrix with vectors, provided by
+        :meth:`functionToMinimize.hessianVectorProduct`, and
+        proportionTrueHessian is ignored. Default: False.
+    :type hessianFree: bool
+
     :return: x, messages
 
         - x is the solution generated by the algorithm,
@@ -1872,7 +2175,7 @@ def simpleBoundsNewtonAlgorithm(
             f'Incompatible size:' f' {len(x0)} and {len(bounds)}'
         )
 
-    if not bounds.feasible(x0):
+    if state is None and not bounds.feasible(x0):
         logger.warning(
             'Initial point not feasible. '
             'It will be projected onto the feasible domain.'
@@ -1881,7 +2184,14 @@ def simpleBoundsNewtonAlgorithm(
     numberOfTrueHessian = 0
     numberOfMatrices = 0
 
-    if proportionTrueHessian == 1.0:
+    numberOfProducts = 0
+
+    if hessianFree:
+        algo = (
+            'Hessian-free Newton with trust region for simple '
+            'bound constraints'
+        )
+    elif proportionTrueHessian == 1.0:
         algo = 'Newton with trust region for simple bound constraints'
     elif proportionTrueHessian == 0.0:
         algo = 'BFGS with trust region for simple bound constraints'
@@ -1891,55 +2201,82 @@ def simpleBoundsNewtonAlgorithm(
             f'region for simple bound constraints'
         )
 
-    k = 0
-    xk = bounds.project(x0)
-    fct.setVariables(xk)
-    nfev = 0
-    ngev = 0
-    nhev = 0
-    if proportionTrueHessian > 0:
-        f, g, H = fct.f_g_h()
-        nfev += 1
-        ngev += 1
-        nhev += 1
-
-        numberOfTrueHessian += 1
-        numberOfMatrices += 1
-        # If there is a numerical problem with the Hessian, we use BFGS instead
-        if np.isnan(H).any() or np.linalg.norm(H) > 1.0e100:
-            logger.warning(
-                f'Numerical problem with the second derivative'
-                f' matrix at the starting point. Norm = '
-                f'{np.linalg.norm(H)}. Replaced by the '
-                f'identity matrix.'
-            )
-            H = np.eye(len(xk))
+    if state is not None:
+        checkOptimizationState(state, 'simpleBoundsNewtonAlgorithm', len(x0))
+        k = state['k']
+        xk = state['x']
+        f = state['f']
+        g = state['g']
+        H = state['H']
+        delta = state['delta']
+        nfev = state['nfev']
+        ngev = state['ngev']
+        nhev = state['nhev']
+        numberOfTrueHessian = state['numberOfTrueHessian']
+        numberOfMatrices = state['numberOfMatrices']
+        numberOfProducts = state.get('numberOfProducts', 0)
+        typf = state['typf']
+        relgrad = state['relgrad']
+        relchange = state['relchange']
+        typx = np.ones(np.asarray(xk).shape)
+        if hessianFree:
+            H = hessianVectorOperator(fct, xk)
     else:
-        f, g = fct.f_g()
-        nfev += 1
-        ngev += 1
-        H = np.eye(len(xk))
-        numberOfMatrices += 1
+        k = 0
+        xk = bounds.project(x0)
+        fct.setVariables(xk)
+        nfev = 0
+        ngev = 0
+        nhev = 0
+        if hessianFree:
+            f, g = fct.f_g()
+            nfev += 1
+            ngev += 1
+            H = hessianVectorOperator(fct, xk)
+        elif proportionTrueHessian > 0:
+            f, g, H = fct.f_g_h()
+            nfev += 1
+            ngev += 1
+            nhev += 1
 
-    projectedGradient = bounds.project(xk - g) - xk
-    typx = np.ones(np.asarray(xk).shape)
-    typf = max(np.abs(f), 1.0)
-    relchange = None
-    relgrad = relativeGradient(xk, f, projectedGradient, typx, typf)
-    if relgrad <= tol:
-        message = f'Relative gradient = {relgrad:.2g} <= {tol:.2g}'
-        messages = {
-            'Algorithm': algo,
-            'Relative projected gradient': relgrad,
-            'Number of iterations': 0,
-            'Number of function evaluations': nfev,
-            'Number of gradient evaluations': ngev,
-            'Number of hessian evaluations': nhev,
-            'Cause of termination': message,
-        }
-        return xk, messages
+            numberOfTrueHessian += 1
+            numberOfMatrices += 1
+            # If there is a numerical problem with the Hessian, we
+            # use BFGS instead
+            if np.isnan(H).any() or np.linalg.norm(H) > 1.0e100:
+                logger.warning(
+                    f'Numerical problem with the second derivative'
+                    f' matrix at the starting point. Norm = '
+                    f'{np.linalg.norm(H)}. Replaced by the '
+                    f'identity matrix.'
+                )
+                H = np.eye(len(xk))
+        else:
+            f, g = fct.f_g()
+            nfev += 1
+            ngev += 1
+            H = np.eye(len(xk))
+            numberOfMatrices += 1
 
-    delta = delta0
+        projectedGradient = bounds.project(xk - g) - xk
+        typx = np.ones(np.asarray(xk).shape)
+        typf = max(np.abs(f), 1.0)
+        relchange = None
+        relgrad = relativeGradient(xk, f, projectedGradient, typx, typf)
+        if relgrad <= tol:
+            message = f'Relative gradient = {relgrad:.2g} <= {tol:.2g}'
+            messages = {
+                'Algorithm': algo,
+                'Relative projected gradient': relgrad,
+                'Number of iterations': 0,
+                'Number of function evaluations': nfev,
+                'Number of gradient evaluations': ngev,
+                'Number of hessian evaluations': nhev,
+                'Cause of termination': message,
+            }
+            return xk, messages
+
+        delta = delta0
     cont = True
     maxDelta = np.finfo(float).max
     minDelta = np.finfo(float).eps
@@ -1972,7 +2309,22 @@ def simpleBoundsNewtonAlgorithm(
                 status = '-'
             else:
                 # Candidate accepted
-                if (
+                if hessianFree:
+                    try:
+                        # The products with H may have modified the
+                        # variables of the function.
+                        fct.setVariables(xc)
+                        fc, gc = fct.f_g()
+                        nfev += 1
+                        ngev += 1
+                        Hc = hessianVectorOperator(fct, xc)
+                        fghCalculated = True
+                    except excep.biogemeError:
+                        # Failure: reduce the trust region
+                        delta = min(delta / 2.0, la.norm(step, np.inf) / 2.0)
+                        status = '-'
+                        fghCalculated = False
+                elif (
                     proportionTrueHessian > 0
                     and float(numberOfTrueHessian) / float(numberOfMatrices)
                     <= proportionTrueHessian
@@ -2022,6 +2374,8 @@ def simpleBoundsNewtonAlgorithm(
                     xk = xc
                     f = fc
                     g = gc
+                    if hessianFree:
+                        numberOfProducts += H.numberOfProducts
                     H = Hc
                     if rho >= eta2:
                         # Enlarge the trust region
@@ -2049,7 +2403,7 @@ def simpleBoundsNewtonAlgorithm(
             if delta <= minDelta:
                 message = f'Trust region is too small: {delta}'
                 cont = False
-            if k == maxiter:
+            if k >= maxiter:
                 message = f'Maximum number of iterations reached: {maxiter}'
                 cont = False
             if relchange is None:
@@ -2065,6 +2419,29 @@ def simpleBoundsNewtonAlgorithm(
                     f'rel. change={relchange:6.2g} '
                     f'delta={delta:6.2g} rho={rho:6.2g} {status}'
                 )
+        fct.saveOptimizationState(
+            {
+                'algorithm': 'simpleBoundsNewtonAlgorithm',
+                'k': k,
+                'x': xk,
+                'f': f,
+                'g': g,
+                'H': None if hessianFree else H,
+                'delta': delta,
+                'nfev': nfev,
+                'ngev': ngev,
+                'nhev': nhev,
+                'numberOfTrueHessian': numberOfTrueHessian,
+                'numberOfMatrices': numberOfMatrices,
+                'numberOfProducts': numberOfProducts
+                + (H.numberOfProducts if hessianFree else 0),
+                'typf': typf,
+                'relgrad': relgrad,
+                'relchange': relchange,
+            }
+        )
+    if hessianFree:
+        numberOfProducts += H.numberOfProducts
     if numberOfMatrices != 0:
         actualProp = 100 * float(numberOfTrueHessian) / float(numberOfMatrices)
     else:
@@ -2083,6 +2460,9 @@ def simpleBoundsNewtonAlgorithm(
         'Number of hessian evaluations': nhev,
         'Cause of termination': message,
     }
+    if hessianFree:
+        del messages['Proportion analytical hessian']
+        messages['Number of hessian-vector products'] = numberOfProducts
 
     return xk, messages
 
@@ -2118,3 +2498,751 @@ def relativeChange(x, xpred, typx):
         return result
 
     return np.finfo(float).max
+
+
+def lbfgsCompactRepresentation(S, Y):
+    """Compact representation of the limited memory BFGS approximation
+    of the second derivatives matrix:
+
+    .. math:: B = \\theta I - W M W^T,
+
+    where :math:`W=[Y \\; \\theta S]` and
+
+    .. math:: M = \\left[\\begin{array}{cc} -D & L^T \\\\ L & \\theta
+              S^TS \\end{array}\\right]^{-1},
+
+    :math:`D` being the diagonal of :math:`S^TY`, and :math:`L` its
+    strictly lower triangular part. See `Byrd et al. (1994)`_.
+
+    .. _`Byrd et al. (1994)`: https://doi.org/10.1007/BF01582063
+
+    :param S: list of the m most recent steps :math:`s_i=x_{i+1}-x_i`.
+    :type S: list(numpy.array)
+
+    :param Y: list of the m most recent gradient differences
+        :math:`y_i=\\nabla f(x_{i+1})-\\nabla f(x_i)`.
+    :type Y: list(numpy.array)
+
+    :return: theta, W, M. W has dimension n x 2m and M is 2m x 2m.
+    :rtype: float, numpy.array, numpy.array
+    """
+    if not S:
+        return 1.0, None, None
+    Smat = np.column_stack(S)
+    Ymat = np.column_stack(Y)
+    theta = np.inner(Y[-1], Y[-1]) / np.inner(S[-1], Y[-1])
+    SY = Smat.T @ Ymat
+    D = np.diag(np.diag(SY))
+    L = np.tril(SY, -1)
+    K = np.block([[-D, L.T], [L, theta * (Smat.T @ Smat)]])
+    W = np.hstack([Ymat, theta * Smat])
+    return theta, W, np.linalg.inv(K)
+
+
+def generalizedCauchyPointLbfgs(x, g, lower, upper, theta, W, M):
+    """Generalized Cauchy point along the projected steepest descent
+    path, for the quadratic model defined by the limited memory BFGS
+    matrix in compact form. The breakpoints are examined in increasing
+    order, and the derivatives of the model along each segment are
+    updated in O(m) operations, as described by `Byrd et al. (1995)`_.
+
+    .. _`Byrd et al. (1995)`: https://doi.org/10.1137/0916069
+
+    :param x: current iterate.
+    :type x: numpy.array
+
+    :param g: gradient at the current iterate.
+    :type g: numpy.array
+
+    :param lower: lower bounds.
+    :type lower: numpy.array
+
+    :param upper: upper bounds.
+    :type upper: numpy.array
+
+    :param theta: scaling factor of the BFGS matrix.
+    :type theta: float
+
+    :param W: matrix W of the compact representation, or None if
+        the matrix is :math:`\\theta I`.
+    :type W: numpy.array
+
+    :param M: matrix M of the compact representation, or None.
+    :type M: numpy.array
+
+    :return: the generalized Cauchy point, and the vector
+        :math:`c=W^T(x_c-x)`, used by the subspace minimization.
+    :rtype: numpy.array, numpy.array
+    """
+    m2 = 0 if W is None else W.shape[1]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t = np.where(
+            g < 0,
+            (x - upper) / g,
+            np.where(g > 0, (x - lower) / g, np.inf),
+        )
+    d = np.where(t > 0, -g, 0.0)
+    xcp = x.copy()
+    c = np.zeros(m2)
+    if m2 > 0:
+        p = W.T @ d
+        Mp = M @ p
+    else:
+        p = np.zeros(0)
+        Mp = p
+    fp = -np.inner(d, d)
+    fpp = -theta * fp - np.inner(p, Mp)
+    if fp >= 0:
+        # The projected gradient is zero.
+        return xcp, c
+    dtMin = -fp / fpp
+    tOld = 0.0
+    free = np.array(
+        [i for i in np.argsort(t, kind='stable') if 0 < t[i] < np.inf],
+        dtype=int,
+    )
+    for b in free:
+        dt = t[b] - tOld
+        if dtMin < dt:
+            break
+        xcp[b] = upper[b] if d[b] > 0 else lower[b]
+        zb = xcp[b] - x[b]
+        c += dt * p
+        gb = g[b]
+        if m2 > 0:
+            wb = W[b]
+            Mwb = M @ wb
+            fp += (
+                dt * fpp
+                + gb * gb
+                + theta * gb * zb
+                - gb * np.inner(wb, M @ c)
+            )
+            fpp -= (
+                theta * gb * gb
+                + 2.0 * gb * np.inner(wb, Mp)
+                + gb * gb * np.inner(wb, Mwb)
+            )
+            p = p + gb * wb
+            Mp = M @ p
+        else:
+            fp += dt * fpp + gb * gb + theta * gb * zb
+            fpp -= theta * gb * gb
+        d[b] = 0.0
+        tOld = t[b]
+        if fpp <= 0 or not np.any(d):
+            # All the variables are at their bounds.
+            dtMin = 0.0
+            break
+        dtMin = -fp / fpp
+    dtMin = max(dtMin, 0.0)
+    tOld += dtMin
+    moving = d != 0
+    xcp[moving] = x[moving] + tOld * d[moving]
+    xcp = np.clip(xcp, lower, upper)
+    c += dtMin * p
+    return xcp, c
+
+
+def subspaceMinimizationLbfgs(x, g, lower, upper, xcp, c, theta, W, M):
+    """Minimizes the quadratic model defined by the limited memory
+    BFGS matrix in the subspace of the variables that are not at their
+    bounds at the generalized Cauchy point, using the direct primal
+    method. The minimizer is projected onto the feasible domain, and
+    truncated if the projection does not generate a descent direction
+    (`Morales and Nocedal, 2011`_).
+
+    .. _`Morales and Nocedal, 2011`: https://doi.org/10.1145/2049662.2049669
+
+    :param x: current iterate.
+    :type x: numpy.array
+
+    :param g: gradient at the current iterate.
+    :type g: numpy.array
+
+    :param lower: lower bounds.
+    :type lower: numpy.array
+
+    :param upper: upper bounds.
+    :type upper: numpy.array
+
+    :param xcp: generalized Cauchy point.
+    :type xcp: numpy.array
+
+    :param c: vector :math:`W^T(x_c-x)`.
+    :type c: numpy.array
+
+    :param theta: scaling factor of the BFGS matrix.
+    :type theta: float
+
+    :param W: matrix W of the compact representation, or None.
+    :type W: numpy.array
+
+    :param M: matrix M of the compact representation, or None.
+    :type M: numpy.array
+
+    :return: point generated by the subspace minimization.
+    :rtype: numpy.array
+    """
+    free = (xcp > lower) & (xcp < upper)
+    if not free.any():
+        return xcp
+    if W is None:
+        r = g[free] + theta * (xcp[free] - x[free])
+        du = -r / theta
+    else:
+        r = g[free] + theta * (xcp[free] - x[free]) - W[free] @ (M @ c)
+        WZ = W[free]
+        v = M @ (WZ.T @ r)
+        N = np.eye(M.shape[0]) - (M @ (WZ.T @ WZ)) / theta
+        try:
+            v = np.linalg.solve(N, v)
+        except np.linalg.LinAlgError:
+            return xcp
+        du = -r / theta - (WZ @ v) / theta ** 2
+    xbar = xcp.copy()
+    xbar[free] = np.clip(xcp[free] + du, lower[free], upper[free])
+    if np.inner(g, xbar - x) < 0:
+        return xbar
+    # The projection does not generate a descent direction. The
+    # step is truncated instead.
+    with np.errstate(divide='ignore', invalid='ignore'):
+        steps = np.where(
+            du > 0,
+            (upper[free] - xcp[free]) / du,
+            np.where(du < 0, (lower[free] - xcp[free]) / du, np.inf),
+        )
+    alpha = min(1.0, steps.min())
+    xbar[free] = xcp[free] + alpha * du
+    return xbar
+
+
+def lbfgsb(
+    fct,
+    bounds,
+    x0,
+    memory=10,
+    tol=np.finfo(np.float64).eps ** 0.3333,
+    steptol=1.0e-5,
+    maxiter=1000,
+    beta1=1.0e-4,
+    maxBacktracking=20,
+    state=None,
+):
+    """Limited memory BFGS algorithm for problems with simple bounds,
+    inspired by L-BFGS-B (`Byrd et al., 1995`_). Only the ``memory``
+    most recent pairs of steps and gradient differences are stored, so
+    that memory and time per iteration are linear in the number of
+    variables. At each iteration, the generalized Cauchy point is
+    calculated, the quadratic model is minimized in the subspace of
+    the free variables, and a backtracking line search is performed
+    between the current iterate and the resulting point.
+
+    .. _`Byrd et al., 1995`: https://doi.org/10.1137/0916069
+
+    :param fct: object to calculate the objective function and its
+        derivatives.
+    :type fct: algorithms.functionToMinimize
+
+    :param bounds: bounds on the variables
+    :type bounds: class bioBounds
+
+    :param x0: starting point
+    :type x0: numpy.array
+
+    :param memory: number of pairs stored in the limited memory
+        matrix. Default: 10.
+    :type memory: int
+
+    :param tol: the algorithm stops when the relative projected
+        gradient is below this threshold. Default:
+        :math:`\\varepsilon^{\\frac{1}{3}}`.
+    :type tol: float
+
+    :param steptol: the algorithm stops when the relative change in x
+        is below this threshold. Default: :math:`10^{-5}`.
+    :type steptol: float
+
+    :param maxiter: maximum number of iterations. Default: 1000.
+    :type maxiter: int
+
+    :param beta1: parameter of the sufficient decrease
+        condition. Default: :math:`10^{-4}`.
+    :type beta1: float
+
+    :param maxBacktracking: maximum number of backtracking steps
+        during the line search. Default: 20.
+    :type maxBacktracking: int
+
+    :param state: state saved by a previous run of the algorithm (see
+        :meth:`functionToMinimize.saveOptimizationState`). If not
+        None, the iterations are resumed from this state, and the
+        starting point is ignored. Default: None.
+    :type state: dict(str: object)
+
+    :return: x, messages
+
+        - x is the solution generated by the algorithm,
+        - messages is a dictionary describing information about the
+          algorithm
+
+    :rtype: numpy.array, dict(str:object)
+
+    :raises biogeme.exceptions.biogemeError: if the dimensions are
+        inconsistent.
+
+    """
+    if bounds.n != len(x0):
+        raise excep.biogemeError(
+            f'Incompatible size: {bounds.n} and {len(x0)}'
+        )
+    if memory < 1:
+        raise excep.biogemeError(f'The memory must be positive: {memory}')
+
+    lower = np.array(bounds.lowerBounds, dtype=float)
+    upper = np.array(bounds.upperBounds, dtype=float)
+    algo = f'L-BFGS-B with memory {memory}'
+
+    if state is not None:
+        checkOptimizationState(state, 'lbfgsb', len(x0))
+        k = state['k']
+        xk = state['x']
+        f = state['f']
+        g = state['g']
+        S = list(state['S'])
+        Y = list(state['Y'])
+        nfev = state['nfev']
+        ngev = state['ngev']
+        typf = state['typf']
+        relgrad = state['relgrad']
+        relchange = state['relchange']
+        typx = np.ones(np.asarray(xk).shape)
+    else:
+        if not bounds.feasible(x0):
+            logger.warning(
+                'Initial point not feasible. '
+                'It will be projected onto the feasible domain.'
+            )
+        k = 0
+        xk = np.clip(np.array(x0, dtype=float), lower, upper)
+        fct.setVariables(xk)
+        f, g = fct.f_g()
+        g = np.asarray(g)
+        nfev = 1
+        ngev = 1
+        S = []
+        Y = []
+        typx = np.ones(np.asarray(xk).shape)
+        typf = max(np.abs(f), 1.0)
+        relchange = None
+        projectedGradient = np.clip(xk - g, lower, upper) - xk
+        relgrad = relativeGradient(xk, f, projectedGradient, typx, typf)
+        if relgrad <= tol:
+            message = f'Relative gradient = {relgrad:.2g} <= {tol:.2g}'
+            messages = {
+                'Algorithm': algo,
+                'Relative projected gradient': relgrad,
+                'Number of iterations': 0,
+                'Number of function evaluations': nfev,
+                'Number of gradient evaluations': ngev,
+                'Cause of termination': message,
+            }
+            return xk, messages
+
+    cont = True
+    while cont:
+        k += 1
+        theta, W, M = lbfgsCompactRepresentation(S, Y)
+        xcp, c = generalizedCauchyPointLbfgs(xk, g, lower, upper, theta, W, M)
+        xbar = subspaceMinimizationLbfgs(
+            xk, g, lower, upper, xcp, c, theta, W, M
+        )
+        d = xbar - xk
+        deriv = np.inner(g, d)
+        if deriv >= 0:
+            # The approximation is not reliable anymore.
+            if S:
+                S = []
+                Y = []
+                status = 'reset'
+                logger.detailed(f'{k} f={f:10.7g} {status}')
+                continue
+            message = 'No descent direction can be generated'
+            break
+
+        # Backtracking line search. As the feasible domain is convex,
+        # all steps between 0 and 1 are feasible.
+        alpha = 1.0
+        if not S:
+            alpha = min(1.0, 1.0 / np.linalg.norm(d))
+        accepted = False
+        for _ in range(maxBacktracking):
+            xc = np.clip(xk + alpha * d, lower, upper)
+            fct.setVariables(xc)
+            try:
+                fc, gc = fct.f_g()
+                nfev += 1
+                ngev += 1
+                if np.isfinite(fc) and fc <= f + beta1 * alpha * deriv:
+                    accepted = True
+                    break
+            except excep.biogemeError:
+                pass
+            alpha /= 2.0
+
+        if not accepted:
+            if S:
+                S = []
+                Y = []
+                status = 'reset'
+                logger.detailed(f'{k} f={f:10.7g} {status}')
+                continue
+            message = 'The line search has failed'
+            break
+
+        gc = np.asarray(gc)
+        s = xc - xk
+        y = gc - g
+        sy = np.inner(s, y)
+        if sy > np.finfo(float).eps * np.inner(y, y):
+            S.append(s)
+            Y.append(y)
+            if len(S) > memory:
+                S.pop(0)
+                Y.pop(0)
+            status = '+'
+        else:
+            status = 'skip'
+        xpred = xk
+        xk = xc
+        f = fc
+        g = gc
+
+        projectedGradient = np.clip(xk - g, lower, upper) - xk
+        relgrad = relativeGradient(xk, f, projectedGradient, typx, typf)
+        relchange = relativeChange(xk, xpred, typx)
+        if relgrad <= tol:
+            message = f'Relative gradient = {relgrad:.2g} <= {tol:.2g}'
+            cont = False
+        elif relchange <= steptol:
+            message = (
+                f'Relative change = {relchange:.3g} <= {steptol:.2g}'
+            )
+            cont = False
+        if k >= maxiter:
+            message = f'Maximum number of iterations reached: {maxiter}'
+            cont = False
+        logger.detailed(
+            f'{k} f={f:10.7g} projected rel. grad.={relgrad:6.2g} '
+            f'rel. change={relchange:6.2g} alpha={alpha:6.2g} {status}'
+        )
+        fct.saveOptimizationState(
+            {
+                'algorithm': 'lbfgsb',
+                'k': k,
+                'x': xk,
+                'f': f,
+                'g': g,
+                'S': list(S),
+                'Y': list(Y),
+                'nfev': nfev,
+                'ngev': ngev,
+                'typf': typf,
+                'relgrad': relgrad,
+                'relchange': relchange,
+            }
+        )
+
+    messages = {
+        'Algorithm': algo,
+        'Relative projected gradient': relgrad,
+        'Relative change': relchange,
+        'Number of iterations': k,
+        'Number of function evaluations': nfev,
+        'Number of gradient evaluations': ngev,
+        'Cause of termination': message,
+    }
+    return xk, messages
+
+
+def stochasticGradient(
+    fct,
+    bounds,
+    x0,
+    method='adam',
+    firstBatch=0.01,
+    batchGrowth=2.0,
+    maximumBatch=0.1,
+    iterationsPerBatch=50,
+    learningRate=0.01,
+    beta1=0.9,
+    beta2=0.999,
+    maxiter=10000,
+    polish=True,
+    tol=np.finfo(np.float64).eps ** 0.3333,
+    polishMaxiter=1000,
+    state=None,
+):
+    """Mini-batch first order algorithms for very large samples, where
+    each iteration uses the gradient on a random batch of the data
+    only. The size of the batch is increased geometrically until it
+    exceeds ``maximumBatch``. At this point, the solution is polished
+    by Newton's algorithm for simple bounds on the full sample. After
+    each step, the iterate is projected onto the feasible domain.
+
+    Two methods are available:
+
+    - ``adam``: Adam (`Kingma and Ba, 2015`_), where the step of each
+      variable is adapted using moving averages of the first and
+      second moments of the stochastic gradient. The number of
+      iterations for each size of the batch is such that each of them
+      processes the same amount of data as ``iterationsPerBatch``
+      iterations with the first batch.
+    - ``svrg``: stochastic variance reduced gradient, where each
+      stochastic gradient is corrected by its value at a snapshot
+      point, and by the gradient at the snapshot calculated on the
+      current, larger, batch (`Lei and Jordan, 2017`_). The snapshot
+      is updated at each increase of the batch, and the step size is
+      adapted using the Barzilai-Borwein rule on the successive
+      snapshots (`Tan et al., 2016`_). The stochastic gradients are
+      calculated on batches of size ``firstBatch``, and
+      ``iterationsPerBatch`` iterations are performed for each
+      snapshot.
+
+    .. _`Kingma and Ba, 2015`: https://arxiv.org/abs/1412.6980
+    .. _`Lei and Jordan, 2017`: https://arxiv.org/abs/1609.03261
+    .. _`Tan et al., 2016`: https://arxiv.org/abs/1605.04131
+
+    :param fct: object to calculate the objective function and its
+        derivatives.
+    :type fct: algorithms.functionToMinimize
+
+    :param bounds: bounds on the variables
+    :type bounds: class bioBounds
+
+    :param x0: starting point
+    :type x0: numpy.array
+
+    :param method: ``'adam'`` or ``'svrg'``. Default: ``'adam'``.
+    :type method: str
+
+    :param firstBatch: share of the data used for the first
+        batch. Default: 0.01.
+    :type firstBatch: float
+
+    :param batchGrowth: factor multiplying the size of the
+        batch. Default: 2.
+    :type batchGrowth: float
+
+    :param maximumBatch: the stochastic iterations stop when the size
+        of the batch exceeds this value, or reaches the full
+        sample. Default: 0.1.
+    :type maximumBatch: float
+
+    :param iterationsPerBatch: number of iterations performed with
+        the first batch. Default: 50.
+    :type iterationsPerBatch: int
+
+    :param learningRate: step size of Adam, and first step size of
+        SVRG. Default: 0.01.
+    :type learningRate: float
+
+    :param beta1: decay rate of the first moment estimates of
+        Adam. Default: 0.9.
+    :type beta1: float
+
+    :param beta2: decay rate of the second moment estimates of
+        Adam. Default: 0.999.
+    :type beta2: float
+
+    :param maxiter: maximum number of stochastic iterations. Default:
+        10000.
+    :type maxiter: int
+
+    :param polish: if True, Newton's algorithm is applied on the full
+        sample after the stochastic iterations. Default: True.
+    :type polish: bool
+
+    :param tol: the Newton polish stops when the relative projected
+        gradient is below this threshold. Default:
+        :math:`\\varepsilon^{\\frac{1}{3}}`.
+    :type tol: float
+
+    :param polishMaxiter: maximum number of iterations of the Newton
+        polish. Default: 1000.
+    :type polishMaxiter: int
+
+    :param state: state saved by a previous run of the algorithm (see
+        :meth:`functionToMinimize.saveOptimizationState`). If not
+        None, the iterations are resumed from this state, and the
+        starting point is ignored. If the state has been saved during
+        the Newton polish, only the polish is resumed. Default: None.
+    :type state: dict(str: object)
+
+    :return: x, messages
+
+        - x is the solution generated by the algorithm,
+        - messages is a dictionary describing information about the
+          algorithm
+
+    :rtype: numpy.array, dict(str:object)
+
+    :raises biogeme.exceptions.biogemeError: if the dimensions are
+        inconsistent, or if a parameter is invalid.
+
+    """
+    if bounds.n != len(x0):
+        raise excep.biogemeError(
+            f'Incompatible size: {bounds.n} and {len(x0)}'
+        )
+    if method not in ('adam', 'svrg'):
+        raise excep.biogemeError(
+            f'Unknown method {method}. Valid methods: adam, svrg'
+        )
+    if firstBatch <= 0.0 or firstBatch > 1.0:
+        raise excep.biogemeError(
+            f'Batch size must be between 0 and 1: {firstBatch}'
+        )
+    if batchGrowth <= 1.0:
+        raise excep.biogemeError(
+            f'The growth of the batch must be greater than 1: {batchGrowth}'
+        )
+
+    lower = np.array(bounds.lowerBounds, dtype=float)
+    upper = np.array(bounds.upperBounds, dtype=float)
+    algo = f'{method.upper()} with increasing batches'
+    eps = np.sqrt(np.finfo(float).eps)
+
+    if state is not None and state.get('algorithm') == (
+        'simpleBoundsNewtonAlgorithm'
+    ):
+        # The stochastic iterations are over.
+        k = None
+        xk = state['x']
+        batch = 1.0
+        message = 'Resumed during the Newton polish'
+    else:
+        if state is not None:
+            checkOptimizationState(state, 'stochasticGradient', len(x0))
+            if state['method'] != method:
+                raise excep.biogemeError(
+                    f'The state has been generated by method '
+                    f'{state["method"]}, and not {method}.'
+                )
+            k = state['k']
+            i = state['i']
+            xk = state['x']
+            batch = state['batch']
+            m = state['m']
+            v = state['v']
+            snapshot = state['snapshot']
+            mu = state['mu']
+            eta = state['eta']
+        else:
+            if not bounds.feasible(x0):
+                logger.warning(
+                    'Initial point not feasible. '
+                    'It will be projected onto the feasible domain.'
+                )
+            k = 0
+            i = 0
+            xk = np.clip(np.array(x0, dtype=float), lower, upper)
+            batch = firstBatch
+            m = np.zeros(len(xk))
+            v = np.zeros(len(xk))
+            snapshot = None
+            mu = None
+            eta = learningRate
+
+        message = f'The batch exceeds {100*maximumBatch}% of the data'
+        while batch <= maximumBatch and batch < 1.0:
+            if k >= maxiter:
+                message = f'Maximum number of iterations reached: {maxiter}'
+                break
+            k += 1
+            if method == 'svrg':
+                if i == 0:
+                    # New snapshot, with the gradient on the current batch
+                    fct.setVariables(xk)
+                    _, newMu = fct.f_g(batch=batch)
+                    newMu = np.asarray(newMu)
+                    if snapshot is not None:
+                        s = xk - snapshot
+                        y = newMu - mu
+                        sy = np.inner(s, y)
+                        if sy > eps * np.inner(s, s):
+                            eta = np.inner(s, s) / (iterationsPerBatch * sy)
+                    snapshot = np.array(xk)
+                    mu = newMu
+                f, g, _, gs = fct.f_g_twoPoints(xk, snapshot, batch=firstBatch)
+                d = np.asarray(g) - np.asarray(gs) + mu
+                step = eta * d
+            else:
+                fct.setVariables(xk)
+                f, g = fct.f_g(batch=batch)
+                g = np.asarray(g)
+                m = beta1 * m + (1.0 - beta1) * g
+                v = beta2 * v + (1.0 - beta2) * g * g
+                mhat = m / (1.0 - beta1 ** k)
+                vhat = v / (1.0 - beta2 ** k)
+                step = learningRate * mhat / (np.sqrt(vhat) + eps)
+            xk = np.clip(xk - step, lower, upper)
+            i += 1
+            logger.detailed(
+                f'{k} f={f:10.7g} batch={100*batch:6.2g}% '
+                f'step={np.linalg.norm(step):6.2g}'
+            )
+            if method == 'svrg':
+                stageLength = iterationsPerBatch
+            else:
+                stageLength = max(
+                    1, int(round(iterationsPerBatch * firstBatch / batch))
+                )
+            if i >= stageLength:
+                i = 0
+                batch = min(batchGrowth * batch, 1.0)
+            fct.saveOptimizationState(
+                {
+                    'algorithm': 'stochasticGradient',
+                    'method': method,
+                    'k': k,
+                    'i': i,
+                    'x': xk,
+                    'batch': batch,
+                    'm': m,
+                    'v': v,
+                    'snapshot': snapshot,
+                    'mu': mu,
+                    'eta': eta,
+                }
+            )
+        logger.detailed(message)
+        state = None
+
+    messages = {
+        'Algorithm': algo,
+        'Number of stochastic iterations': k,
+        'Final batch': f'{100*batch:.1f}%',
+        'Cause of termination': message,
+    }
+    if k is None:
+        del messages['Number of stochastic iterations']
+    if not polish:
+        return xk, messages
+
+    xk, newtonMessages = simpleBoundsNewtonAlgorithm(
+        fct,
+        bounds,
+        xk,
+        tol=tol,
+        maxiter=polishMaxiter,
+        state=state,
+    )
+    messages['Algorithm'] = (
+        f'{algo}, polished by {newtonMessages["Algorithm"]}'
+    )
+    messages['Stochastic iterations'] = messages.pop('Cause of termination')
+    for key, value in newtonMessages.items():
+        if key != 'Algorithm':
+            messages[key] = value
+    return xk, messages
@@ -14,6 +14,8 @@ and the model specification.
 # pylint: disable=too-many-function-args, invalid-unary-operand-type
 
 
+import copy
+import functools
 import multiprocessing as mp
 from datetime import datetime
 import pickle
@@ -21,6 +23,7 @@ import numpy as np
 import pandas as pd
 import tqdm
 
+import biogeme.checkpoint as ckp
 import biogeme.database as db
 import biogeme.cbiogeme as cb
 import biogeme.expressions as eb
@@ -36,6 +39,32 @@ from biogeme.algorithms import functionToMinimize
 # import yep
 
 
+def _closesCheckpoint(method):
+    """Decorator of the entry points of :class:`BIOGEME` that may save
+    the iterations. When the outermost of them returns, the pending
+    iterations are written, and the thread saving them is stopped, so
+    that no file is written after the call.
+
+    :param method: method of :class:`BIOGEME`.
+    :type method: function
+
+    :return: decorated method.
+    :rtype: function
+    """
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        self._checkpointDepth += 1
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            self._checkpointDepth -= 1
+            if self._checkpointDepth == 0 and self.checkpoint is not None:
+                self.checkpoint.close()
+
+    return wrapper
+
+
 class BIOGEME:
     """Main class that combines the database and the model specification.
 
@@ -161,6 +190,28 @@ class BIOGEME:
         the file.
         """
 
+        self.checkpointDelay = 1.0
+        """Minimum number of seconds between two savings of the
+        iterations. The file is written by a background thread, so
+        that the evaluation of the likelihood function is not slowed
+        down. Default: 1.0.
+        """
+
+        self.checkpointMaxUpdates = None
+        """If not None, the iterations are saved as soon as this number of
+        improvements have been obtained since the last saving, even if
+        the delay ``checkpointDelay`` has not expired. Default: None.
+        """
+
+        self.checkpoint = None
+        """Object of type :class:`biogeme.checkpoint.bioCheckpoint` in
+        charge of saving the iterations.
+        """
+
+        self._checkpointDepth = 0
+        """ Number of nested calls to entry points that may save the
+        iterations."""
+
         self.missingData = missingData  #: code for missing data
 
         if not isinstance(formulas, dict):
@@ -212,6 +263,50 @@ class BIOGEME:
         stochastic gradient / hessian
         """
 
+        self.batchSize = None
+        """ number of observations (or individuals for panel data) in
+        the sample of data used to calculate the stochastic gradient /
+        hessian, or None if the full sample is used.
+        """
+
+        self.automaticScaling = False
+        """If True, the optimization algorithm works with the
+        parameters divided by scales, so that the diagonal of the
+        second derivatives matrix of the log likelihood at the
+        starting point is close to one in absolute value. The scales
+        are powers of ten. The results are reported in the original
+        units.
+        """
+
+        self.parameterScales = None
+        """Scales of the parameters used by the last optimization, or
+        None if the parameters have not been scaled.
+        """
+
+        self.initialNumberOfDraws = None
+        """If not None, and if the model involves Monte-Carlo
+        integration, the estimation starts with this number of draws,
+        which is increased by :attr:`drawsGrowthFactor` at each stage
+        of the continuation, until all the draws are used. The draws
+        of each stage are included in the draws of the next one.
+        """
+
+        self.drawsGrowthFactor = 2.0
+        """Factor multiplying the number of draws from one stage of the
+        continuation to the next.
+        """
+
+        self.iterationsPerDrawsStage = 10
+        """Maximum number of iterations of each stage of the
+        continuation, before the number of draws is increased.
+        """
+
+        self.simulationDiagnostic = None
+        """Contribution of the simulation error to the log likelihood at
+        the solution, if it involves Monte-Carlo integration. See
+        :meth:`_calculateSimulationDiagnostic`.
+        """
+
         self.initLogLike = None  #: Init value of the likelihood function
 
         self.nullLogLike = None  #: Log likelihood of the null model
@@ -235,6 +330,10 @@ class BIOGEME:
                     'BIOGEME object.'
                 )
                 self.logger.detailed(error_msg)
+                self.logger.detailed(
+                    'Alternatively, set automaticScaling to True to '
+                    'rescale the parameters during the estimation.'
+                )
 
         if not skipAudit:
             self._audit()
@@ -313,6 +412,30 @@ class BIOGEME:
 
         self.bestIteration = None  #: Store the best iteration found so far.
 
+        self._bootstrapping = False
+        """ True during the bootstrap replications, where the iterations
+        are not saved."""
+
+    def _getCheckpoint(self):
+        """
+        :return: the object in charge of saving the iterations. It is
+            created if needed.
+        :rtype: biogeme.checkpoint.bioCheckpoint
+        """
+        filename = self._saveIterationsFileName()
+        if self.checkpoint is None or self.checkpoint.filename != filename:
+            if self.checkpoint is not None:
+                self.checkpoint.close()
+            self.checkpoint = ckp.bioCheckpoint(
+                filename,
+                stateFilename=self._saveStateFileName(),
+                minimumDelay=self.checkpointDelay,
+                maximumUpdates=self.checkpointMaxUpdates,
+            )
+        self.checkpoint.minimumDelay = self.checkpointDelay
+        self.checkpoint.maximumUpdates = self.checkpointMaxUpdates
+        return self.checkpoint
+
     def _saveIterationsFileName(self):
         """
         :return: The name of the file where the iterations are saved.
@@ -320,6 +443,71 @@ class BIOGEME:
         """
         return f'__{self.modelName}.iter'
 
+    def _saveStateFileName(self):
+        """
+        :return: The name of the file where the state of the
+            optimization algorithm is saved.
+        :rtype: str
+        """
+        return f'__{self.modelName}.state'
+
+    def _saveOptimizationState(self, state):
+        """Records the state of the optimization algorithm, so that
+        the estimation can be resumed. The state is saved together
+        with the current iterate.
+
+        :param state: state of the optimization algorithm.
+        :type state: dict(str: object)
+        """
+        if not self.saveIterations or self._bootstrapping:
+            return
+        # The algorithm may modify the state after the call, while
+        # the checkpoint writes it asynchronously.
+        algorithmState = copy.deepcopy(state)
+        fullState = {
+            'freeBetaNames': list(self.freeBetaNames),
+            'initLogLike': self.initLogLike,
+            'bestIteration': self.bestIteration,
+            'algorithmState': algorithmState,
+            'parameterScales': self.parameterScales,
+        }
+        x = np.asarray(algorithmState['x'])
+        if self.parameterScales is not None:
+            x = x * self.parameterScales
+        self._getCheckpoint().update(
+            dict(zip(self.freeBetaNames, x)),
+            state=fullState,
+        )
+
+    def _loadOptimizationState(self):
+        """Reads the state of the optimization algorithm saved by a
+        previous run.
+
+        :return: the saved state, or None if it is not available.
+        :rtype: dict(str: object)
+
+        :raises biogemeError: if the state has been saved for other
+            parameters.
+        """
+        filename = self._saveStateFileName()
+        try:
+            with open(filename, 'rb') as f:
+                state = pickle.load(f)
+        except IOError:
+            self.logger.warning(
+                f'Cannot read file {filename}. The estimation is not resumed.'
+            )
+            return None
+        if state['freeBetaNames'] != list(self.freeBetaNames):
+            errorMsg = (
+                f'The state saved in file {filename} does not correspond '
+                f'to the parameters of the model: '
+                f'{state["freeBetaNames"]} instead of {self.freeBetaNames}'
+            )
+            raise excep.biogemeError(errorMsg)
+        self.logger.detailed(f'Optimization state restored from {filename}')
+        return state
+
     def _audit(self):
         """Each expression provides an audit function, that verifies its
         validity. Each formula is audited, and the list of errors
@@ -372,44 +560,87 @@ class BIOGEME:
         self.monteCarlo = len(self.allDraws) > 0
         if self.monteCarlo:
             self.database.generateDraws(
-                self.allDraws, self.drawNames, numberOfDraws
+                self.allDraws,
+                self.drawNames,
+                numberOfDraws,
+                numberOfThreads=self.numberOfThreads,
             )
 
-    def _prepareDatabaseForFormula(self, sample=None):
+    def _prepareDatabaseForFormula(self, sample=None, sameBatch=False):
         # Prepare the dataset.
-        if sample is None:
+        if sample is None or sample == 1.0:
             if self.lastSample == 1.0:
                 # We continue to use the full data set. Nothing to be done.
                 return
             self.lastSample = 1.0
             self.database.useFullSample()
-        else:
-            # Check if the sample size is valid
-            if sample <= 0 or sample > 1.0:
-                error_msg = (
-                    f'The value of the parameter sample must be '
-                    f'strictly between 0.0 and 1.0,'
-                    f' and not {sample}'
-                )
-                raise ValueError(error_msg)
-
-            if sample == 1.0:
-                self.database.useFullSample()
-            else:
-                self.logger.detailed(f'Use {100*sample}% of the data.')
-                if self.database.isPanel():
-                    self.database.sampleIndividualMapWithoutReplacement(
-                        sample, self.columnForBatchSamplingWeights
-                    )
-                else:
-                    self.database.sampleWithoutReplacement(
-                        sample, self.columnForBatchSamplingWeights
-                    )
-            self.lastSample = sample
+            # Rebuild the map for panel data
+            if self.database.isPanel():
+                self.database.buildPanelMap()
+            if self.batchSize is not None:
+                self.theC.useFullSample()
+                self.batchSize = None
+            return
+
+        # Check if the sample size is valid
+        if sample <= 0 or sample > 1.0:
+            error_msg = (
+                f'The value of the parameter sample must be '
+                f'strictly between 0.0 and 1.0,'
+                f' and not {sample}'
+            )
+            raise ValueError(error_msg)
 
-        # Rebuild the map for panel data
+        if sameBatch and self.batchSize is not None:
+            if sample != self.lastSample:
+                raise excep.biogemeError(
+                    f'The last batch contains {100*self.lastSample}% of '
+                    f'the data, and not {100*sample}%.'
+                )
+            return
+        self.logger.detailed(f'Use {100*sample}% of the data.')
+        self._drawBatch(sample)
+        self.lastSample = sample
+
+    def _drawBatch(self, sample):
+        """Draws a random sample of the observations (or of the
+        individuals for panel data) without replacement, and instructs
+        the engine to calculate the log likelihood only on them. The
+        data itself is neither copied nor transferred again.
+
+        :param sample: share of the data to be used, strictly between
+            0 and 1.
+        :type sample: float
+        """
         if self.database.isPanel():
-            self.database.buildPanelMap()
+            table = self.database.individualMap
+        else:
+            table = self.database.data
+        n = len(table)
+        self.batchSize = max(1, int(round(sample * n)))
+        p = None
+        if self.columnForBatchSamplingWeights is not None:
+            w = table[self.columnForBatchSamplingWeights].to_numpy(dtype=float)
+            p = w / w.sum()
+        # The generator is seeded from the global state of numpy, so
+        # that the draws can be reproduced using numpy.random.seed. It
+        # selects the sample without permuting the full data set.
+        rng = np.random.default_rng(np.random.randint(2**31))
+        batch = rng.choice(n, size=self.batchSize, replace=False, p=p)
+        # Sorting the indices preserves the locality of the memory
+        # accesses by the engine.
+        self.theC.setSample(np.sort(batch))
+
+    def _sampleSize(self):
+        """Number of observations (or individuals for panel data)
+        involved in the last calculation of the log likelihood.
+
+        :return: size of the sample.
+        :rtype: int
+        """
+        if self.batchSize is not None:
+            return self.batchSize
+        return self.database.getSampleSize()
 
     def getBoundsOnBeta(self, betaName):
         """Returns the bounds on the parameter as defined by the user.
@@ -541,16 +772,17 @@ class BIOGEME:
         f = self.theC.calculateLikelihood(x, self.fixedBetaValues)
 
         self.logger.detailed(
-            f'Log likelihood (N = {self.database.getSampleSize()}): {f:10.7g}'
+            f'Log likelihood (N = {self._sampleSize()}): {f:10.7g}'
         )
 
         if scaled:
-            return f / float(self.database.getSampleSize())
+            return f / float(self._sampleSize())
 
         return f
 
+    @_closesCheckpoint
     def calculateLikelihoodAndDerivatives(
-        self, x, scaled, hessian=False, bhhh=False, batch=None
+        self, x, scaled, hessian=False, bhhh=False, batch=None, sameBatch=False
     ):
         """Calculate the value of the log likelihood function
         and its derivatives.
@@ -575,6 +807,11 @@ class BIOGEME:
                        used. Default: None
         :type batch: float
 
+        :param sameBatch: if True, the random sample used by the
+                       previous calculation is used again, instead of
+                       drawing a new one. Default: False
+        :type sameBatch: bool
+
 
         :return: f, g, h, bh where
 
@@ -597,7 +834,7 @@ class BIOGEME:
                 f'{len(self.betaInitValues)} and not {len(x)}'
             )
             raise ValueError(error_msg)
-        self._prepareDatabaseForFormula(batch)
+        self._prepareDatabaseForFormula(batch, sameBatch)
 
         g = np.empty(n)
         h = np.empty([n, n])
@@ -615,7 +852,7 @@ class BIOGEME:
             bhhhmsg = f'BHHH norm:  {np.linalg.norm(bh):10.1g}'
         gradnorm = np.linalg.norm(g)
         self.logger.general(
-            f'Log likelihood (N = {self.database.getSampleSize()}): {f:10.7g}'
+            f'Log likelihood (N = {self._sampleSize()}): {f:10.7g}'
             f' Gradient norm: {gradnorm:10.1g}'
             f' {hmsg} {bhhhmsg}'
         )
@@ -624,16 +861,15 @@ class BIOGEME:
             error_msg = f'The norm of the gradient is {gradnorm}: g={g}'
             raise excep.biogemeError(error_msg)
 
-        if self.saveIterations:
-            if self.bestIteration is None:
+        # The likelihood calculated on a sample of the data cannot be
+        # compared with the full likelihood.
+        if self.saveIterations and batch is None and not self._bootstrapping:
+            if self.bestIteration is None or f >= self.bestIteration:
                 self.bestIteration = f
-            if f >= self.bestIteration:
-                with open(self._saveIterationsFileName(), 'w') as pf:
-                    for i, v in enumerate(x):
-                        print(f'{self.freeBetaNames[i]} = {v}', file=pf)
+                self._getCheckpoint().update(dict(zip(self.freeBetaNames, x)))
 
         if scaled:
-            N = float(self.database.getSampleSize())
+            N = float(self._sampleSize())
             if N == 0:
                 raise excep.biogemeError(f'Sample size is {N}')
 
@@ -645,29 +881,140 @@ class BIOGEME:
             )
         return f, np.asarray(g), np.asarray(h), np.asarray(bh)
 
-    def likelihoodFiniteDifferenceHessian(self, x):
+    def calculateHessianVectorProduct(self, x, v, scaled):
+        """Calculate the product of the second derivatives matrix of
+        the log likelihood function with a vector. The matrix is not
+        formed. The product is approximated by the engine using
+        central differences of the analytical gradient along v, which
+        costs about two evaluations of the gradient.
+
+        :param x: vector of values for the parameters.
+        :type x: list(float)
+
+        :param v: vector to be multiplied.
+        :type v: list(float)
+
+        :param scaled: if True, the result is divided by the number of
+            observations.
+        :type scaled: bool
+
+        :return: product of the second derivatives matrix with v.
+        :rtype: numpy.array
+
+        :raises ValueError: if the length of the list x or v is incorrect
+        """
+        n = len(x)
+        if n != len(self.betaInitValues) or len(v) != n:
+            error_msg = (
+                f'Input vectors must be of length '
+                f'{len(self.betaInitValues)} and not {len(x)} and {len(v)}'
+            )
+            raise ValueError(error_msg)
+        self._prepareDatabaseForFormula()
+        hv = self.theC.calculateHessianVectorProduct(
+            x, self.fixedBetaValues, self.betaIds, v
+        )
+        if scaled:
+            N = float(self.database.getSampleSize())
+            if N == 0:
+                raise excep.biogemeError(f'Sample size is {N}')
+            return hv / N
+        return hv
+
+    def calculateSeveralLikelihoods(self, points, scaled, gradient=False):
+        """Calculates the value of the log likelihood function, and
+        optionally its gradient, for several values of the parameters.
+
+        All the points are evaluated during the same pass on the
+        data: each observation is loaded once, and used for all the
+        points. It is much faster than calling
+        :meth:`calculateLikelihood` for each point.
+
+        :param points: values of the parameters, one row per point.
+        :type points: numpy.array
+
+        :param scaled: if True, the results are divided by the number
+            of observations.
+        :type scaled: bool
+
+        :param gradient: if True, the gradients are also
+            calculated. Default: False.
+        :type gradient: bool
+
+        :return: vector of values of the log likelihood, one per
+            point. If gradient is True, a tuple is returned, where the
+            second element is the matrix of gradients, one row per
+            point.
+        :rtype: numpy.array or tuple(numpy.array, numpy.array)
+
+        :raises ValueError: if the number of columns is incorrect
+        """
+        points = np.atleast_2d(np.asarray(points, dtype=float))
+        if points.shape[1] != len(self.betaInitValues):
+            error_msg = (
+                f'Input vectors must be of length '
+                f'{len(self.betaInitValues)} and not {points.shape[1]}'
+            )
+            raise ValueError(error_msg)
+        self._prepareDatabaseForFormula()
+        f, g = self.theC.calculateSeveralLikelihoods(
+            points, self.fixedBetaValues, self.betaIds, gradient
+        )
+        best = np.max(f, initial=-np.inf)
+        self.logger.detailed(
+            f'Log likelihood (N = {self._sampleSize()}) '
+            f'at {len(points)} points. Best: {best:10.7g}'
+        )
+        if scaled:
+            N = float(self._sampleSize())
+            if N == 0:
+                raise excep.biogemeError(f'Sample size is {N}')
+            f = f / N
+            g = g / N
+        if gradient:
+            return f, g
+        return f
+
+    def _calculateSeveralGradients(self, points):
+        """Calculates the value and the gradient of the log likelihood
+        function at several points, using one pass on the data.
+
+        :param points: values of the parameters, one row per point.
+        :type points: numpy.array
+
+        :return: vector of values, and matrix of gradients, one row
+            per point.
+        :rtype: numpy.array, numpy.array
+        """
+        return self.calculateSeveralLikelihoods(
+            points, scaled=False, gradient=True
+        )
+
+    def likelihoodFiniteDifferenceHessian(self, x, central=True):
         """Calculate the hessian of the log likelihood function using finite
         differences.
 
         May be useful when the analytical hessian has numerical issues.
+        Finite differences of the analytical gradient are used, and
+        all the gradients are calculated by one call of the engine.
 
         :param x: vector of values for the parameters.
         :type x: list(float)
 
+        :param central: if True, central differences are used,
+            requiring 2K gradients. If False, forward differences are
+            used, requiring K+1 gradients. Default: True.
+        :type central: bool
+
         :return: finite differences approximation of the hessian.
         :rtype: numpy.array
 
         :raises ValueError: if the length of the list x is incorrect
 
         """
-
-        def theFunction(x):
-            f, g, _, _ = self.calculateLikelihoodAndDerivatives(
-                x, scaled=False, hessian=False, bhhh=False
-            )
-            return f, np.asarray(g)
-
-        return tools.findiff_H(theFunction, np.asarray(x))
+        return tools.findiff_H_several(
+            self._calculateSeveralGradients, np.asarray(x), central
+        )
 
     def checkDerivatives(self, verbose=False):
         """Verifies the implementation of the derivatives.
@@ -704,6 +1051,7 @@ class BIOGEME:
             np.asarray(self.betaInitValues),
             self.freeBetaNames,
             verbose,
+            theFunctions=self._calculateSeveralGradients,
         )
 
     def loadSavedIteration(self, filename='__savedIterations.txt'):
@@ -749,14 +1097,27 @@ class BIOGEME:
             replaced by the opposite of this value. Default: 100.
         :type defaultBound: float
         """
-        randomBetas = {
+        self.changeInitValues(self._randomBetaValues(defaultBound))
+
+    def _randomBetaValues(self, defaultBound):
+        """Generates random values of the free parameters, drawn from
+        a uniform distribution on the interval defined by the bounds.
+
+        :param defaultBound: If the upper bound is missing, it is
+            replaced by this value. If the lower bound is missing, it is
+            replaced by the opposite of this value.
+        :type defaultBound: float
+
+        :return: random values of the parameters.
+        :rtype: dict(str: float)
+        """
+        return {
             name: np.random.uniform(
                 low=-defaultBound if beta.lb is None else beta.lb,
                 high=defaultBound if beta.ub is None else beta.ub,
             )
             for name, beta in self.allFreeBetas.items()
         }
-        self.changeInitValues(randomBetas)
 
     def changeInitValues(self, betas):
         """Modifies the initial values of the pameters in all formula
@@ -777,11 +1138,13 @@ class BIOGEME:
             if value is not None:
                 self.betaInitValues[i] = value
 
+    @_closesCheckpoint
     def estimate(
         self,
         bootstrap=0,
         algorithm=opt.simpleBoundsNewtonAlgorithmForBiogeme,
         algoParameters=None,
+        resume=False,
     ):
 
         """Estimate the parameters of the model.
@@ -801,6 +1164,13 @@ class BIOGEME:
             algorithm
         :type algoParameters: dict
 
+        :param resume: if True, and if the iterations are saved, the
+            optimization algorithm continues from the state saved
+            by a previous run, that has been interrupted. The same
+            algorithm must be used. The initial log likelihood is
+            not recalculated. Default: False.
+        :type resume: bool
+
         :return: object containing the estimation results.
         :rtype: biogeme.bioResults
 
@@ -837,8 +1207,24 @@ class BIOGEME:
         self.algorithm = algorithm
         self.algoParameters = algoParameters
 
-        self.calculateInitLikelihood()
-        self.bestIteration = None
+        state = None
+        if resume and self.saveIterations:
+            state = self._loadOptimizationState()
+        if state is None:
+            self.calculateInitLikelihood()
+            self.bestIteration = None
+        else:
+            self.initLogLike = state['initLogLike']
+            self.bestIteration = state['bestIteration']
+            # The state of the algorithm refers to the parameters
+            # scaled as in the interrupted run.
+            self.parameterScales = state.get('parameterScales')
+            x = np.asarray(state['algorithmState']['x'])
+            if self.parameterScales is not None:
+                x = x * self.parameterScales
+            self.betaInitValues = list(x)
+            self.algoParameters = dict(algoParameters or {})
+            self.algoParameters['state'] = state['algorithmState']
 
         start_time = datetime.now()
         #        yep.start('profile.out')
@@ -851,25 +1237,12 @@ class BIOGEME:
         optimizationMessages['Optimization time'] = datetime.now() - start_time
         # Information provided by the optimization algorithm after completion.
         self.optimizationMessages = optimizationMessages
+        # The state must not be used by the bootstrapping.
+        self.algoParameters = algoParameters
 
-        fgHb = self.calculateLikelihoodAndDerivatives(
-            xstar, scaled=False, hessian=True, bhhh=True
-        )
-        if not np.isfinite(fgHb[2]).all():
-            warning_msg = (
-                'Numerical problems in calculating '
-                'the analytical hessian. Finite differences'
-                ' is tried instead.'
-            )
-            self.logger.warning(warning_msg)
-            finDiffHessian = self.likelihoodFiniteDifferenceHessian(xstar)
-            if not np.isfinite(fgHb[2]).all():
-                self.logger.warning(
-                    'Numerical problems with finite '
-                    'difference hessian as well.'
-                )
-            else:
-                fgHb = fgHb[0], fgHb[1], finDiffHessian, fgHb[3]
+        fgHb = self._derivativesAtSolution(xstar)
+        if self.saveIterations:
+            self._getCheckpoint().flush()
 
         # numpy array, of size B x K,
         # where
@@ -886,15 +1259,21 @@ class BIOGEME:
             self.bootstrap_results = np.empty(shape=[bootstrap, len(xstar)])
             hideProgress = self.logger.screenLevel == 0
             self.logger.temporarySilence()
-            for b in tqdm.tqdm(range(bootstrap), disable=hideProgress):
-                if self.database.isPanel():
-                    sample = self.database.sampleIndividualMapWithReplacement()
-                    self.theC.setDataMap(sample)
-                else:
-                    sample = self.database.sampleWithReplacement()
-                    self.theC.setData(sample)
-                x_br, _ = self.optimize(xstar)
-                self.bootstrap_results[b] = x_br
+            self._bootstrapping = True
+            try:
+                for b in tqdm.tqdm(range(bootstrap), disable=hideProgress):
+                    if self.database.isPanel():
+                        sample = (
+                            self.database.sampleIndividualMapWithReplacement()
+                        )
+                        self.theC.setDataMap(sample)
+                    else:
+                        sample = self.database.sampleWithReplacement()
+                        self.theC.setData(sample)
+                    x_br, _ = self.optimize(xstar)
+                    self.bootstrap_results[b] = x_br
+            finally:
+                self._bootstrapping = False
 
             # Time needed to generate the bootstrap results
             self.bootstrap_time = datetime.now() - start_time
@@ -909,18 +1288,126 @@ class BIOGEME:
             r.writePickle()
         return r
 
-    def quickEstimate(
+    def _derivativesAtSolution(self, xstar):
+        """Calculates the log likelihood and its derivatives at the
+        solution, in order to report the statistics. If the
+        analytical hessian cannot be calculated, finite differences
+        are tried instead.
+
+        :param xstar: solution of the optimization algorithm.
+        :type xstar: numpy.array
+
+        :return: f, g, h, bh. See
+            :meth:`calculateLikelihoodAndDerivatives`
+        :rtype: tuple  float, numpy.array, numpy.array, numpy.array
+        """
+        fgHb = self.calculateLikelihoodAndDerivatives(
+            xstar, scaled=False, hessian=True, bhhh=True
+        )
+        if not np.isfinite(fgHb[2]).all():
+            warning_msg = (
+                'Numerical problems in calculating '
+                'the analytical hessian. Finite differences'
+                ' is tried instead.'
+            )
+            self.logger.warning(warning_msg)
+            finDiffHessian = self.likelihoodFiniteDifferenceHessian(xstar)
+            if not np.isfinite(fgHb[2]).all():
+                self.logger.warning(
+                    'Numerical problems with finite '
+                    'difference hessian as well.'
+                )
+            else:
+                fgHb = fgHb[0], fgHb[1], finDiffHessian, fgHb[3]
+        self.simulationDiagnostic = self._calculateSimulationDiagnostic(xstar)
+        return fgHb
+
+    def _calculateSimulationDiagnostic(self, x):
+        """Calculates the contribution of the simulation error to the
+        log likelihood, when it is the logarithm of a Monte-Carlo
+        integral. For each observation (or individual for panel data)
+        :math:`n`, the simulated value :math:`\\hat{P}_n` has variance
+        :math:`\\sigma^2_n`, estimated from the draws. The variance of
+        the simulated log likelihood is approximated by :math:`\\sum_n
+        \\sigma^2_n / \\hat{P}_n^2`, and its bias by :math:`-\\sum_n
+        \\sigma^2_n / (2 \\hat{P}_n^2)`.
+
+        :param x: values of the parameters.
+        :type x: numpy.array
+
+        :return: dict with the standard error and the bias of the
+            simulated log likelihood, and the average number of draws
+            per observation, or None if the log likelihood does not
+            have the required structure.
+        :rtype: dict(str: float)
+        """
+        if not self.monteCarlo:
+            return None
+        if not isinstance(self.loglike, eb.log) or not isinstance(
+            self.loglike.child, eb.MonteCarlo
+        ):
+            return None
+        integral = self.loglike.child
+        signatures = [integral.getSignature(output) for output in range(3)]
+        if self.weight is not None:
+            signatures.append(self.weight.getSignature())
+        result = self.theC.simulateSeveralFormulas(
+            signatures,
+            list(x),
+            self.fixedBetaValues,
+            self.database.data,
+            self.numberOfThreads,
+        )
+        if self.database.isPanel():
+            result = result[:, : len(self.database.individualMap)]
+        values, variances, draws = result[:3]
+        weights = result[3] if self.weight is not None else 1.0
+        relativeVariances = variances / values ** 2
+        return {
+            'standardError': np.sqrt(
+                np.sum(weights ** 2 * relativeVariances)
+            ),
+            'bias': -0.5 * np.sum(weights * relativeVariances),
+            'averageNumberOfDraws': np.mean(draws),
+        }
+
+    @_closesCheckpoint
+    def estimateMultiStart(
         self,
+        numberOfStarts=10,
         algorithm=opt.simpleBoundsNewtonAlgorithmForBiogeme,
         algoParameters=None,
+        defaultBound=100.0,
+        pruningIterations=5,
+        survivalRate=0.5,
+        tolerance=1.0e-4,
     ):
-
-        """| Estimate the parameters of the model. Same as estimate, where any
-             extra calculation is skipped (init loglikelihood,
-             t-statistics, etc.)
+        """Estimate the parameters of the model from several starting
+        points, in order to explore several local optima of the log
+        likelihood function.
+
+        The first starting point is given by the initial values of
+        the parameters. The others are randomly generated, as in
+        :meth:`setRandomInitValues`. All the starts share the data
+        and the C++ engine, which distributes each evaluation of the
+        log likelihood over ``numberOfThreads`` threads.
+
+        The starts are run in two stages. First, each start is run
+        for ``pruningIterations`` iterations. The starts that have
+        not converged are then ranked by log likelihood, and only the
+        best of them are continued until convergence. The algorithm
+        is resumed from its saved state (see :meth:`estimate`) if it
+        supports it, and restarted from the last iterate otherwise.
+
+        Solutions whose parameters differ, relative to their
+        magnitude, by at most ``tolerance`` are considered to be the
+        same local optimum.
+
+        :param numberOfStarts: number of starting points. Default: 10.
+        :type numberOfStarts: int
 
         :param algorithm: optimization algorithm to use for the
-               maximum likelihood estimation.Default: Biogeme's
+               maximum likelihood estimation. Default: Biogeme's
                Newton's algorithm with simple bounds.
         :type algorithm: function
 
@@ -928,63 +1415,580 @@ class BIOGEME:
             algorithm
         :type algoParameters: dict
 
-        :return: object containing the estimation results.
-        :rtype: biogeme.results.bioResults
+        :param defaultBound: If the upper bound of a parameter is
+            missing, it is replaced by this value to generate the
+            random starting points. If the lower bound is missing, it
+            is replaced by the opposite of this value. Default: 100.
+        :type defaultBound: float
+
+        :param pruningIterations: number of iterations performed from
+            each starting point before pruning. If 0, no start is
+            pruned. Default: 5.
+        :type pruningIterations: int
+
+        :param survivalRate: share of the starts that have not
+            converged after ``pruningIterations`` iterations, that are
+            continued. The others are abandoned. Default: 0.5.
+        :type survivalRate: float
+
+        :param tolerance: two solutions are considered identical if
+            the relative difference between each of their parameters
+            is at most this value. Default: 1.0e-4.
+        :type tolerance: float
+
+        :return: tuple containing the results of the best solution,
+            and the results of all the distinct solutions, sorted by
+            decreasing value of the log likelihood. The diagnostics
+            of the algorithm include the number of starts that have
+            reached each solution.
+        :rtype: biogeme.results.bioResults,
+            list(biogeme.results.bioResults)
 
         Example::
 
             # Create an instance of biogeme
             biogeme  = bio.BIOGEME(database, logprob)
 
-            # Gives a name to the model
-            biogeme.modelName = 'mymodel'
-
-            # Estimate the parameters
-            results = biogeme.quickEstimate()
+            # Estimate the parameters from 20 starting points
+            best, ranking = biogeme.estimateMultiStart(numberOfStarts=20)
 
         :raises biogemeError: if no expression has been provided for the
             likelihood
 
+        :raises biogemeError: if the number of starts is not positive, or
+            the survival rate is not in ]0, 1].
         """
-
         if self.loglike is None:
             raise excep.biogemeError(
-                'No log likelihood function has been specificed'
+                'No log likelihood function has been specified'
             )
         if len(self.freeBetaNames) == 0:
             raise excep.biogemeError(
                 f'There is no parameter to estimate'
                 f' in the formula: {self.loglike}.'
             )
+        if numberOfStarts < 1:
+            raise excep.biogemeError(
+                f'The number of starts must be positive: {numberOfStarts}'
+            )
+        if survivalRate <= 0 or survivalRate > 1:
+            raise excep.biogemeError(
+                f'The survival rate must be in ]0, 1]: {survivalRate}'
+            )
 
+        if self.saveIterations:
+            self.logger.general(
+                f'*** Initial values of the parameters are '
+                f'obtained from the file {self._saveIterationsFileName()}'
+            )
+            self._loadSavedIteration()
         self.algorithm = algorithm
         self.algoParameters = algoParameters
+        self.calculateInitLikelihood()
+        self.bestIteration = None
 
-        start_time = datetime.now()
-        #        yep.start('profile.out')
-
-        #        yep.stop()
+        starts = [list(self.betaInitValues)]
+        for _ in range(numberOfStarts - 1):
+            randomBetas = self._randomBetaValues(defaultBound)
+            starts.append([randomBetas[name] for name in self.freeBetaNames])
+        runs = [
+            {'x': x, 'state': None, 'messages': None, 'time': None}
+            for x in starts
+        ]
 
-        output = self.optimize(self.betaInitValues)
-        xstar, optimizationMessages = output
-        # Running time of the optimization algorithm
-        optimizationMessages['Optimization time'] = datetime.now() - start_time
-        # Information provided by the optimization algorithm after completion.
-        self.optimizationMessages = optimizationMessages
+        hideProgress = self.logger.screenLevel == 0
+        self.logger.temporarySilence()
+        try:
+            numberOfPruned = 0
+            if pruningIterations > 0 and numberOfStarts > 1:
+                for run in tqdm.tqdm(runs, disable=hideProgress):
+                    self._runStart(run, maxiter=pruningIterations)
+                self._evaluateRuns(runs)
+                # A start that has stopped before the maximum number of
+                # iterations does not need to be continued.
+                unfinished = sorted(
+                    (
+                        run
+                        for run in runs
+                        if run['messages'].get('Number of iterations', 0)
+                        >= pruningIterations
+                    ),
+                    key=lambda run: run['f'],
+                    reverse=True,
+                )
+                survivors = int(np.ceil(survivalRate * len(unfinished)))
+                for run in unfinished[survivors:]:
+                    run['pruned'] = True
+                    numberOfPruned += 1
+                toBeContinued = unfinished[:survivors]
+            else:
+                toBeContinued = runs
+            for run in tqdm.tqdm(toBeContinued, disable=hideProgress):
+                self._runStart(run)
+            self._evaluateRuns(toBeContinued)
+        finally:
+            self.logger.resume()
 
-        f = self.calculateLikelihood(xstar, scaled=False)
+        if self.saveIterations:
+            self._getCheckpoint().flush()
+
+        # Identify the distinct solutions.
+        optima = []
+        completed = [run for run in runs if not run.get('pruned', False)]
+        for run in sorted(completed, key=lambda run: run['f'], reverse=True):
+            for optimum in optima:
+                xopt = optimum['x']
+                distance = np.abs(run['x'] - xopt) / np.maximum(
+                    np.abs(xopt), 1.0
+                )
+                if distance.max() <= tolerance:
+                    optimum['count'] += 1
+                    break
+            else:
+                optima.append(dict(run, count=1))
 
-        fgHb = f, None, None, None
-        rawResults = res.rawResults(
-            self, xstar, fgHb, bootstrap=self.bootstrap_results
+        self.logger.general(
+            f'Multi-start estimation: {numberOfStarts} starts, '
+            f'{numberOfPruned} pruned after {pruningIterations} '
+            f'iterations, {len(optima)} distinct solutions.'
         )
-        r = res.bioResults(rawResults)
-        return r
 
-    def validate(self, estimationResults, validationData):
-        """Perform out-of-sample validation.
+        ranking = []
+        for optimum in optima:
+            self.optimizationMessages = dict(optimum['messages'])
+            self.optimizationMessages['Optimization time'] = optimum['time']
+            self.optimizationMessages['Number of starts'] = numberOfStarts
+            self.optimizationMessages[
+                'Number of starts reaching this solution'
+            ] = optimum['count']
+            fgHb = self._derivativesAtSolution(optimum['x'])
+            rawResults = res.rawResults(self, optimum['x'], fgHb)
+            ranking.append(res.bioResults(rawResults))
+
+        best = ranking[0]
+        self.optimizationMessages = best.data.optimizationMessages
+        if self.generateHtml:
+            best.writeHtml()
+        if self.generatePickle:
+            best.writePickle()
+        return best, ranking
 
-        The function performs the following tasks:
+    def _runStart(self, run, maxiter=None):
+        """Runs the optimization algorithm from one of the starting
+        points of the multi-start estimation. If the algorithm has
+        already been run from this point, it is resumed.
+
+        :param run: description of the start. The entries 'x',
+            'state', 'messages' and 'time' are updated.
+        :type run: dict(str: object)
+
+        :param maxiter: if not None, maximum number of iterations.
+        :type maxiter: int
+        """
+
+        def saveState(state):
+            run['state'] = state
+
+        parameters = dict(self.algoParameters or {})
+        if maxiter is not None:
+            parameters['maxiter'] = maxiter
+        if run['state'] is not None:
+            parameters['state'] = run['state']
+
+        theFunction = negLikelihood(
+            like=self.calculateLikelihood,
+            like_deriv=self.calculateLikelihoodAndDerivatives,
+            scaled=True,
+            saveState=saveState,
+            like_hv=self.calculateHessianVectorProduct,
+        )
+        start_time = datetime.now()
+        xstar, messages = self.algorithm(
+            theFunction, run['x'], self.bounds, parameters
+        )
+        elapsed = datetime.now() - start_time
+        run['time'] = elapsed if run['time'] is None else run['time'] + elapsed
+        run['x'] = np.asarray(xstar)
+        run['messages'] = messages
+
+    def _evaluateRuns(self, runs):
+        """Calculates the log likelihood at the last iterate of
+        several starts of the multi-start estimation, in one pass on
+        the data.
+
+        :param runs: description of the starts. The entry 'f' is
+            updated.
+        :type runs: list(dict(str: object))
+        """
+        if not runs:
+            return
+        values = self.calculateSeveralLikelihoods(
+            [run['x'] for run in runs], scaled=False
+        )
+        for run, f in zip(runs, values):
+            run['f'] = f
+
+    @_closesCheckpoint
+    def estimateEM(
+        self,
+        bootstrap=0,
+        algorithm=opt.simpleBoundsNewtonAlgorithmForBiogeme,
+        algoParameters=None,
+        maxEmIterations=100,
+        emTolerance=1.0e-4,
+        resume=False,
+    ):
+        """Estimate the parameters of a latent class model, using the
+        EM (Expectation-Maximization) algorithm, followed by the
+        optimization algorithm.
+
+        The log likelihood must be the logarithm of an expression
+        generated by :func:`biogeme.models.latentClass`, possibly
+        integrated with MonteCarlo. Each iteration of the EM algorithm
+
+            - calculates, for each individual, the posterior
+              probability to belong to each class (E-step),
+            - maximizes the sum over the classes of the logarithm of
+              the class membership probability and of the class
+              likelihood, weighted by the posterior probabilities
+              (M-step). It does not involve the logarithm of the
+              mixture, and its second derivatives matrix is block
+              diagonal if the classes do not share parameters. It is
+              solved approximately, with a few iterations of Newton's
+              algorithm.
+
+        When the improvement of the log likelihood falls below the
+        tolerance, the EM algorithm is stopped, and the optimization
+        algorithm is applied to the full log likelihood, in order to
+        converge quickly and to obtain accurate second derivatives.
+
+        :param bootstrap: number of bootstrap resampling used to
+               calculate the variance-covariance matrix using
+               bootstrapping. The bootstrap replications do not
+               involve the EM algorithm. Default: 0.
+        :type bootstrap: int
+
+        :param algorithm: optimization algorithm used after the EM
+            algorithm. Default: Biogeme's Newton's algorithm with
+            simple bounds.
+        :type algorithm: function
+
+        :param algoParameters: parameters to transfer to the optimization
+            algorithm
+        :type algoParameters: dict
+
+        :param maxEmIterations: maximum number of iterations of the EM
+            algorithm. Default: 100.
+        :type maxEmIterations: int
+
+        :param emTolerance: the EM algorithm is stopped when the
+            increase of the log likelihood between two iterations is
+            below this value, relatively to the log likelihood.
+            Default: 1.0e-4.
+        :type emTolerance: float
+
+        :param resume: if True, the estimation is resumed as in
+            :meth:`estimate`. The EM algorithm is skipped if the
+            optimization algorithm has been interrupted.
+            Default: False.
+        :type resume: bool
+
+        :return: object containing the estimation results.
+        :rtype: biogeme.bioResults
+
+        Example::
+
+            prob = [PanelLikelihoodTrajectory(models.logit(V[i], av, CHOICE))
+                    for i in range(2)]
+            logprob = log(MonteCarlo(
+                models.latentClass([PROB_class0, 1 - PROB_class0], prob)))
+            biogeme  = bio.BIOGEME(database, logprob)
+            results = biogeme.estimateEM()
+
+        :raises biogemeError: if the log likelihood does not have the
+            structure of a latent class model.
+        """
+        probabilities, likelihoods = self._latentClassStructure()
+
+        def emAlgorithm(fct, initBetas, bounds, parameters=None):
+            emMessages = {}
+            if not self._bootstrapping and (
+                parameters is None or 'state' not in parameters
+            ):
+                initBetas, emMessages = self._expectationMaximization(
+                    probabilities,
+                    likelihoods,
+                    initBetas,
+                    maxEmIterations,
+                    emTolerance,
+                )
+            x, messages = algorithm(fct, initBetas, bounds, parameters)
+            return x, {**emMessages, **messages}
+
+        return self.estimate(
+            bootstrap=bootstrap,
+            algorithm=emAlgorithm,
+            algoParameters=algoParameters,
+            resume=resume,
+        )
+
+    def _latentClassStructure(self):
+        """Identifies the latent class structure of the log likelihood.
+
+        :return: copies of the class membership probabilities, and of
+            the class likelihoods. If the mixture is integrated with
+            MonteCarlo, so are the class likelihoods.
+        :rtype: list(biogeme.expressions.Expression),
+            list(biogeme.expressions.Expression)
+
+        :raises biogemeError: if the log likelihood is not the
+            logarithm of an expression generated by
+            :func:`biogeme.models.latentClass`, possibly integrated
+            with MonteCarlo.
+
+        :raises biogemeError: if the class membership probabilities
+            involve draws, or if a weight is defined.
+        """
+        errorMsg = (
+            'The EM algorithm requires the log likelihood to be the '
+            'logarithm of an expression generated by '
+            'biogeme.models.latentClass, possibly integrated with '
+            f'MonteCarlo: {self.loglike}'
+        )
+        if not isinstance(self.loglike, eb.log):
+            raise excep.biogemeError(errorMsg)
+        # The expressions are copied, so that using them in other
+        # expressions does not modify the model.
+        mixture = copy.deepcopy(self.loglike).child
+        monteCarlo = isinstance(mixture, eb.MonteCarlo)
+        if monteCarlo:
+            mixture = mixture.child
+        probabilities = getattr(mixture, 'latentClassProbabilities', None)
+        likelihoods = getattr(mixture, 'latentClassLikelihoods', None)
+        if probabilities is None or likelihoods is None:
+            raise excep.biogemeError(errorMsg)
+        for p in probabilities:
+            if isinstance(p, eb.Expression) and p.requiresDraws():
+                raise excep.biogemeError(
+                    f'The class membership probabilities must not '
+                    f'involve draws: {p}'
+                )
+        if self.weight is not None:
+            raise excep.biogemeError(
+                'The EM algorithm is not available with weights.'
+            )
+        if monteCarlo:
+            # As the probabilities do not involve draws, the integral
+            # of the mixture is the mixture of the integrals.
+            likelihoods = [eb.MonteCarlo(ell) for ell in likelihoods]
+        return probabilities, likelihoods
+
+    def _expectationMaximization(
+        self, probabilities, likelihoods, x0, maxiter, tolerance
+    ):
+        """EM algorithm for latent class models.
+
+        The posterior probabilities of the classes are calculated by
+        a simulation engine, and stored as columns of a copy of the
+        data of the engine in charge of the M-step, where they weight
+        the logarithm of each class contribution. Both engines use the
+        same draws as the estimation, and neither the database nor the
+        expressions of the model are modified.
+
+        :param probabilities: class membership probabilities.
+        :type probabilities: list(biogeme.expressions.Expression)
+
+        :param likelihoods: class likelihoods.
+        :type likelihoods: list(biogeme.expressions.Expression)
+
+        :param x0: starting point, in the order of ``self.freeBetaNames``.
+        :type x0: list(float)
+
+        :param maxiter: maximum number of iterations.
+        :type maxiter: int
+
+        :param tolerance: the algorithm stops when the relative
+            increase of the log likelihood is below this value.
+        :type tolerance: float
+
+        :return: x, messages
+
+           - x is the solution generated by the algorithm,
+           - messages is a dictionary describing the iterations.
+
+        :rtype: numpy.array, dict(str:object)
+
+        :raises biogemeError: if the class probabilities and
+            likelihoods involve other parameters than the model.
+        """
+        start_time = datetime.now()
+        weightNames = [f'__emWeight_{c}' for c in range(len(likelihoods))]
+        mstepFormula = eb.bioMultSum(
+            [
+                eb.Variable(name) * eb.log(p * ell)
+                for name, p, ell in zip(
+                    weightNames, probabilities, likelihoods
+                )
+            ]
+        )
+        estepFormulas = {
+            f'class{c}': p * ell
+            for c, (p, ell) in enumerate(zip(probabilities, likelihoods))
+        }
+        # The posterior probabilities are stored in the private copy
+        # of the data of the M-step engine.
+        mstep = _auxiliaryBIOGEME(
+            self, mstepFormula, columns={name: 1.0 for name in weightNames}
+        )
+        estep = _auxiliaryBIOGEME(self, estepFormulas)
+        if set(mstep.freeBetaNames) != set(self.freeBetaNames):
+            raise excep.biogemeError(
+                f'The latent class model involves the parameters '
+                f'{mstep.freeBetaNames} instead of {self.freeBetaNames}'
+            )
+        mstep.saveIterations = False
+        # The M-step does not need to be solved exactly.
+        mstep.algorithm = opt.simpleBoundsNewtonAlgorithmForBiogeme
+        mstep.algoParameters = {'maxiter': 3}
+        simulator = estep.prepareSimulation()
+
+        columns = [
+            list(mstep.database.data.columns).index(name)
+            for name in weightNames
+        ]
+        if self.database.isPanel():
+            individualMap = self.database.individualMap.to_numpy()
+            rowsPerIndividual = individualMap[:, 1] - individualMap[:, 0]
+            rowsPerIndividual += 1
+        mstepIndex = [self.freeBetaNames.index(n) for n in mstep.freeBetaNames]
+
+        x = np.array(x0, dtype=float)
+        logLike = None
+        cause = f'Maximum number of iterations reached: {maxiter}'
+        k = 0
+        while k < maxiter:
+            # E-step
+            simulator.setBetas(dict(zip(self.freeBetaNames, x)))
+            contributions = simulator.simulate().to_numpy()
+            if self.database.isPanel():
+                contributions = contributions[: len(rowsPerIndividual)]
+            mixture = contributions.sum(axis=1)
+            previousLogLike = logLike
+            logLike = np.log(mixture).sum()
+            self.logger.detailed(
+                f'EM iteration {k}: log likelihood = {logLike:10.7g}'
+            )
+            if previousLogLike is not None and (
+                logLike - previousLogLike <= tolerance * abs(logLike)
+            ):
+                cause = (
+                    f'Relative improvement = '
+                    f'{(logLike - previousLogLike) / abs(logLike):.2g}'
+                    f' <= {tolerance:.2g}'
+                )
+                break
+            posterior = contributions / mixture[:, np.newaxis]
+            # M-step
+            for c, column in enumerate(columns):
+                weights = posterior[:, c]
+                if self.database.isPanel():
+                    weights = np.repeat(weights, rowsPerIndividual)
+                mstep.theC.setDataColumn(column, weights)
+            self.logger.temporarySilence()
+            try:
+                xm, _ = mstep.optimize(x[mstepIndex])
+            finally:
+                self.logger.resume()
+            x[mstepIndex] = xm
+            k += 1
+
+        messages = {
+            'Number of EM iterations': k,
+            'EM log likelihood': logLike,
+            'EM cause of termination': cause,
+            'EM time': datetime.now() - start_time,
+        }
+        return x, messages
+
+    @_closesCheckpoint
+    def quickEstimate(
+        self,
+        algorithm=opt.simpleBoundsNewtonAlgorithmForBiogeme,
+        algoParameters=None,
+    ):
+
+        """| Estimate the parameters of the model. Same as estimate, where any
+             extra calculation is skipped (init loglikelihood,
+             t-statistics, etc.)
+
+        :param algorithm: optimization algorithm to use for the
+               maximum likelihood estimation.Default: Biogeme's
+               Newton's algorithm with simple bounds.
+        :type algorithm: function
+
+        :param algoParameters: parameters to transfer to the optimization
+            algorithm
+        :type algoParameters: dict
+
+        :return: object containing the estimation results.
+        :rtype: biogeme.results.bioResults
+
+        Example::
+
+            # Create an instance of biogeme
+            biogeme  = bio.BIOGEME(database, logprob)
+
+            # Gives a name to the model
+            biogeme.modelName = 'mymodel'
+
+            # Estimate the parameters
+            results = biogeme.quickEstimate()
+
+        :raises biogemeError: if no expression has been provided for the
+            likelihood
+
+        """
+
+        if self.loglike is None:
+            raise excep.biogemeError(
+                'No log likelihood function has been specificed'
+            )
+        if len(self.freeBetaNames) == 0:
+            raise excep.biogemeError(
+                f'There is no parameter to estimate'
+                f' in the formula: {self.loglike}.'
+            )
+
+        self.algorithm = algorithm
+        self.algoParameters = algoParameters
+
+        start_time = datetime.now()
+        #        yep.start('profile.out')
+
+        #        yep.stop()
+
+        output = self.optimize(self.betaInitValues)
+        xstar, optimizationMessages = output
+        # Running time of the optimization algorithm
+        optimizationMessages['Optimization time'] = datetime.now() - start_time
+        # Information provided by the optimization algorithm after completion.
+        self.optimizationMessages = optimizationMessages
+
+        f = self.calculateLikelihood(xstar, scaled=False)
+        if self.saveIterations and self.checkpoint is not None:
+            self.checkpoint.flush()
+
+        fgHb = f, None, None, None
+        rawResults = res.rawResults(
+            self, xstar, fgHb, bootstrap=self.bootstrap_results
+        )
+        r = res.bioResults(rawResults)
+        return r
+
+    def validate(self, estimationResults, validationData):
+        """Perform out-of-sample validation.
+
+        The function performs the following tasks:
 
           - each slice defines a validation set (the slice itself)
             and an estimation set (the rest of the data),
@@ -1038,6 +2042,7 @@ class BIOGEME:
 
         return allSimulationResults
 
+    @_closesCheckpoint
     def optimize(self, startingValues=None):
         """Calls the optimization algorithm. The function self.algorithm
         is called.
@@ -1056,13 +2061,6 @@ class BIOGEME:
 
         :raises biogemeError: an error is raised if no algorithm is specified.
         """
-
-        theFunction = negLikelihood(
-            like=self.calculateLikelihood,
-            like_deriv=self.calculateLikelihoodAndDerivatives,
-            scaled=True,
-        )
-
         if startingValues is None:
             startingValues = self.betaInitValues
 
@@ -1073,11 +2071,159 @@ class BIOGEME:
             )
             raise excep.biogemeError(err)
 
-        results = self.algorithm(
-            theFunction, startingValues, self.bounds, self.algoParameters
+        resumed = (self.algoParameters or {}).get('state') is not None
+        if resumed or (self._bootstrapping and self.automaticScaling):
+            # The scales of the previous optimization are used.
+            pass
+        elif self.automaticScaling:
+            self.parameterScales = self._calculateParameterScales(
+                startingValues
+            )
+        else:
+            self.parameterScales = None
+
+        theFunction = negLikelihood(
+            like=self.calculateLikelihood,
+            like_deriv=self.calculateLikelihoodAndDerivatives,
+            scaled=True,
+            saveState=self._saveOptimizationState,
+            like_hv=self.calculateHessianVectorProduct,
+            parameterScales=self.parameterScales,
+        )
+
+        x0 = startingValues
+        bounds = self.bounds
+        s = self.parameterScales
+        if s is not None:
+            x0 = np.asarray(startingValues, dtype=float) / s
+            bounds = [
+                (
+                    None if lb is None else lb / si,
+                    None if ub is None else ub / si,
+                )
+                for (lb, ub), si in zip(self.bounds, s)
+            ]
+
+        continuationMessages = {}
+        if not resumed and not self._bootstrapping:
+            x0, continuationMessages = self._drawContinuation(
+                theFunction, x0, bounds
+            )
+        x, messages = self.algorithm(
+            theFunction, x0, bounds, self.algoParameters
         )
+        messages.update(continuationMessages)
+        if s is None:
+            return x, messages
+        return np.asarray(x) * s, messages
+
+    def _drawContinuation(self, theFunction, x0, bounds):
+        """If requested by :attr:`initialNumberOfDraws`, the
+        optimization algorithm is first applied with fewer draws for
+        the Monte-Carlo integration. The draws used at each stage are
+        the first draws of the ones generated for the estimation, so
+        that the draws of a stage are included in the draws of the
+        next one. The number of draws is multiplied by
+        :attr:`drawsGrowthFactor` from one stage to the next, when the
+        algorithm has converged or after
+        :attr:`iterationsPerDrawsStage` iterations. All the draws are
+        restored at the end, for the last stage, which is not
+        performed by this function.
+
+        :param theFunction: function to minimize.
+        :type theFunction: negLikelihood
+
+        :param x0: starting point.
+        :type x0: numpy.array
+
+        :param bounds: bounds on the variables.
+        :type bounds: list(tuple)
+
+        :return: starting point for the last stage, and messages
+            describing the stages.
+        :rtype: numpy.array, dict(str:object)
+        """
+        if not self.monteCarlo or self.initialNumberOfDraws is None:
+            return x0, {}
+        draws = self.database.theDraws
+        numberOfDraws = draws.shape[1]
+        r = max(1, int(self.initialNumberOfDraws))
+        if r >= numberOfDraws:
+            return x0, {}
+        if self.drawsGrowthFactor <= 1:
+            raise excep.biogemeError(
+                f'The growth factor of the number of draws must be '
+                f'larger than one: {self.drawsGrowthFactor}'
+            )
+        parameters = dict(self.algoParameters or {})
+        parameters['maxiter'] = self.iterationsPerDrawsStage
+        saveState = theFunction.saveState
+        # The states of the intermediate stages cannot be used to
+        # resume the estimation, which involves all the draws.
+        theFunction.saveState = None
+        x = x0
+        iterations = 0
+        stages = 0
+        try:
+            while r < numberOfDraws:
+                self.theC.setDraws(draws[:, :r, :])
+                # The log likelihood depends on the number of draws.
+                self.bestIteration = None
+                x, messages = self.algorithm(
+                    theFunction, x, bounds, parameters
+                )
+                stages += 1
+                iterations += messages.get('Number of iterations', 0)
+                self.logger.general(
+                    f'Draws continuation: {r} draws, '
+                    f'{messages.get("Number of iterations", 0)} iterations'
+                )
+                r = int(np.ceil(self.drawsGrowthFactor * r))
+        finally:
+            self.theC.setDraws(draws)
+            self.bestIteration = None
+            theFunction.saveState = saveState
+        messages = {
+            'Number of draws stages': stages,
+            'Iterations with fewer draws': iterations,
+        }
+        return x, messages
+
+    def _calculateParameterScales(self, x):
+        """Calculates the scales of the parameters, so that the
+        diagonal entries of the second derivatives matrix of the log
+        likelihood, with respect to the scaled parameters, are close
+        to one in absolute value. If a diagonal entry of the second
+        derivatives matrix is zero or not finite, the corresponding
+        entry of the BHHH matrix is used instead. If both are
+        unusable, the scale is one. Each scale is rounded to a power
+        of ten, as the scales suggested for the variables by
+        :meth:`biogeme.database.Database.suggestScaling`.
+
+        :param x: values of the parameters where the second
+            derivatives are calculated.
+        :type x: list(float)
 
-        return results
+        :return: scales of the parameters. The scaled parameters are
+            the parameters divided by these scales.
+        :rtype: numpy.array
+        """
+        _, _, h, bh = self.calculateLikelihoodAndDerivatives(
+            x, scaled=True, hessian=True, bhhh=True
+        )
+        curvature = np.abs(np.diag(h))
+        unusable = ~np.isfinite(curvature) | (curvature == 0)
+        curvature[unusable] = np.abs(np.diag(bh))[unusable]
+        scales = np.ones(len(curvature))
+        valid = np.isfinite(curvature) & (curvature > 0)
+        scales[valid] = 10.0 ** np.round(-0.5 * np.log10(curvature[valid]))
+        for name, scale in zip(self.freeBetaNames, scales):
+            if scale != 1.0:
+                self.logger.general(
+                    f'Parameter {name} is divided by {scale:g} '
+                    f'during the optimization'
+                )
+        return scales
 
     def simulate(self, theBetaValues=None):
         """Applies the formulas to each row of the database.
@@ -1104,30 +2250,214 @@ class BIOGEME:
 
         """
 
-        if theBetaValues is None:
-            betaValues = self.betaInitValues
+        betaValues = self._betaValuesForSimulation(theBetaValues)
+        formulas_signature = self._prepareFormulasForSimulation()
+
+        output = pd.DataFrame(index=self.database.data.index)
+        result = self.theC.simulateSeveralFormulas(
+            formulas_signature,
+            betaValues,
+            self.fixedBetaValues,
+            self.database.data,
+            self.numberOfThreads,
+        )
+        for key, r in zip(self.formulas.keys(), result):
+            output[key] = r
+        return output
+
+    def prepareSimulation(self, theBetaValues=None):
+        """Prepares the formulas for repeated simulation. The formulas
+        are audited and parsed once, and the data is transferred once
+        to the simulation engine. The returned object can then be used
+        to simulate many scenarios, where only the values of the
+        parameters and/or some columns of the data are modified.
+
+        :param theBetaValues: values of the parameters to be used in
+                the calculations. If None, the default values are
+                used. Default: None.
+        :type theBetaValues: dict(str, float)
+
+        :return: object that performs the simulation.
+        :rtype: :class:`biogeme.biogeme.bioSimulator`
+
+        Example::
+
+              simulator = biogeme.prepareSimulation(betaValues)
+              for scale in [0.9, 1.0, 1.1]:
+                  simulator.setColumn('TRAIN_COST',
+                                      scale * database.data['TRAIN_COST'])
+                  simulatedValues = simulator.simulate()
+
+        :raises biogemeError: if the formulas are invalid.
+        """
+        return bioSimulator(self, theBetaValues)
+
+    def simulatePosterior(
+        self, coefficients, theBetaValues=None, quantiles=None
+    ):
+        """Summarizes the distribution of random coefficients
+        conditional on the choices of each individual, for a mixture
+        model estimated by Monte-Carlo integration. The likelihood of
+        the choices conditional on the draws is calculated only once
+        per draw, and weights the values of all the coefficients, so
+        that the conditional means, variances and quantiles are
+        obtained in one pass over the draws, instead of simulating the
+        numerator and the denominator of each ratio as separate
+        formulas.
+
+        :param coefficients: random coefficients, involving the draws
+            of the model. The keys are the names of the coefficients.
+        :type coefficients: dict(str, biogeme.expressions.Expression)
+
+        :param theBetaValues: values of the parameters to be used in
+                the calculations. If None, the default values are
+                used. Default: None.
+        :type theBetaValues: dict(str, float)
+
+        :param quantiles: probabilities, between 0 and 1, of the
+            conditional quantiles to be calculated. Default: None.
+        :type quantiles: list(float)
+
+        :return: array with one row for each individual (each
+            observation if the data is not panel), and one column for
+            each coefficient, in the order of the dict. The third
+            dimension contains the conditional mean, the conditional
+            variance, and the conditional quantiles. If the choices of
+            an individual have zero likelihood for all draws, the
+            values are NaN.
+        :rtype: numpy.array
+
+        Example::
+
+              post = biogeme.simulatePosterior(
+                  {'B_TIME': B_TIME_RND}, betaValues, quantiles=[0.5]
+              )
+              conditionalMeans = post[:, 0, 0]
+
+        :raises biogemeError: if the log likelihood is not the log of
+            a Monte-Carlo integration, or if the coefficients are
+            invalid.
+        """
+        likelihood = self._conditionalLikelihood()
+        quantiles = [] if quantiles is None else list(quantiles)
+        for p in quantiles:
+            if p < 0 or p > 1:
+                raise excep.biogemeError(
+                    f'Quantile {p} is not between 0 and 1'
+                )
+        if not coefficients:
+            raise excep.biogemeError('No coefficient has been provided')
+        for name, c in coefficients.items():
+            if not isinstance(c, eb.Expression):
+                raise excep.biogemeError(
+                    f'Expression for "{name}" is not of type '
+                    f'biogeme.expressions.Expression. '
+                    f'It is of type {type(c)}'
+                )
+            if c.embedExpression(eb.monteCarloExpressions) or (
+                c.countPanelTrajectoryExpressions() > 0
+            ):
+                raise excep.biogemeError(
+                    f'Coefficient {name} must not involve the integration, '
+                    f'nor the panel trajectory: {c}'
+                )
+
+        betaValues = self._betaValuesForSimulation(theBetaValues)
+        formulas = {'likelihood': likelihood}
+        for k, c in enumerate(coefficients.values()):
+            formulas[f'coefficient{k}'] = c
+        posterior = _auxiliaryBIOGEME(self, formulas)
+        theC = posterior.theC
+        theC.prepareSimulation(
+            [f.getSignature() for f in posterior.formulas.values()],
+            self.numberOfThreads,
+        )
+        theC.setSimulationBetas(
+            [
+                betaValues[self.freeBetaNames.index(n)]
+                for n in posterior.freeBetaNames
+            ],
+            posterior.fixedBetaValues,
+        )
+        if self.database.isPanel():
+            n = len(self.database.individualMap)
         else:
-            if not isinstance(theBetaValues, dict):
-                err = (
-                    'Deprecated. A dictionary must be provided. '
-                    'It can be obtained from results.getBetaValues()'
+            n = len(self.database.data)
+        return theC.simulatePosterior(quantiles, n, len(coefficients))
+
+    def _conditionalLikelihood(self):
+        """Likelihood of the choices of each individual conditional on
+        the draws, that is the integrand of the Monte-Carlo
+        integration of the log likelihood.
+
+        :return: conditional likelihood.
+        :rtype: biogeme.expressions.Expression
+
+        :raises biogemeError: if the log likelihood is not the log of
+            a Monte-Carlo integration.
+        """
+        # The expression is copied, so that using it in another
+        # expression does not modify the model.
+        loglike = copy.deepcopy(self.loglike)
+        if isinstance(loglike, eb.LogMonteCarloPanelTrajectory):
+            return eb.PanelLikelihoodTrajectory(loglike.probability)
+        if isinstance(loglike, eb.log) and isinstance(
+            loglike.child, eb.MonteCarlo
+        ):
+            return loglike.child.child
+        raise excep.biogemeError(
+            f'The posterior distribution requires a log likelihood of the '
+            f'form log(MonteCarlo(...)) or '
+            f'LogMonteCarloPanelTrajectory(...), and not {loglike}'
+        )
+
+    def _betaValuesForSimulation(self, theBetaValues):
+        """Builds the list of values of the free parameters to be used
+        for simulation.
+
+        :param theBetaValues: values of the parameters to be used in
+                the calculations. If None, the default values are
+                used.
+        :type theBetaValues: dict(str, float)
+
+        :return: values of the free parameters, in the order of
+            ``self.freeBetaNames``.
+        :rtype: list(float)
+
+        :raises biogemeError: if the values are not provided as a dict.
+        """
+        if theBetaValues is None:
+            return list(self.betaInitValues)
+
+        if not isinstance(theBetaValues, dict):
+            err = (
+                'Deprecated. A dictionary must be provided. '
+                'It can be obtained from results.getBetaValues()'
+            )
+            raise excep.biogemeError(err)
+        for x in theBetaValues.keys():
+            if x not in self.freeBetaNames:
+                self.logger.warning(f'Parameter {x} not present in the model')
+        betaValues = list()
+        for i, x in enumerate(self.freeBetaNames):
+            if x in theBetaValues:
+                betaValues.append(theBetaValues[x])
+            else:
+                self.logger.warning(
+                    f'Simulation: initial value of {x} not provided.'
                 )
-                raise excep.biogemeError(err)
-            for x in theBetaValues.keys():
-                if x not in self.freeBetaNames:
-                    self.logger.warning(
-                        f'Parameter {x} not present in the model'
-                    )
-            betaValues = list()
-            for i, x in enumerate(self.freeBetaNames):
-                if x in theBetaValues:
-                    betaValues.append(theBetaValues[x])
-                else:
-                    self.logger.warning(
-                        f'Simulation: initial value of {x} not provided.'
-                    )
-                    betaValues.append(self.betaInitValues[i])
+                betaValues.append(self.betaInitValues[i])
+        return betaValues
+
+    def _prepareFormulasForSimulation(self):
+        """Checks and audits the formulas before simulation, and
+        transfers the panel structure to the C++ engine, if relevant.
 
+        :return: signatures of the formulas.
+        :rtype: list(list(bytes))
+
+        :raises biogemeError: if a formula is invalid.
+        """
         if self.database.isPanel():
             for f in self.formulas.values():
                 count = f.countPanelTrajectoryExpressions()
@@ -1139,7 +2469,6 @@ class BIOGEME:
                     )
                     raise excep.biogemeError(theError)
 
-        output = pd.DataFrame(index=self.database.data.index)
         formulas_signature = [v.getSignature() for v in self.formulas.values()]
 
         if self.database.isPanel():
@@ -1156,17 +2485,7 @@ class BIOGEME:
             if listOfErrors:
                 self.logger.warning('\n'.join(listOfErrors))
                 raise excep.biogemeError('\n'.join(listOfErrors))
-
-        result = self.theC.simulateSeveralFormulas(
-            formulas_signature,
-            betaValues,
-            self.fixedBetaValues,
-            self.database.data,
-            self.numberOfThreads,
-        )
-        for key, r in zip(self.formulas.keys(), result):
-            output[key] = r
-        return output
+        return formulas_signature
 
     def oldsimulate(self, theBetaValues=None):
         """Applies the formulas to each row of the database. This is the old
@@ -1308,6 +2627,457 @@ class BIOGEME:
         return r
 
 
+class _auxiliaryBIOGEME(BIOGEME):
+    """Engine calculating auxiliary formulas of a model, such as the
+    steps of the EM algorithm, with the data and the draws of the
+    model. It works on copies of the formulas and of the database, so
+    that neither the expressions nor the database of the model are
+    modified, and it does not generate draws.
+    """
+
+    def __init__(self, model, formulas, columns=None):
+        """Constructor
+
+        :param model: model providing the data, the draws and the
+            options.
+        :type model: :class:`biogeme.biogeme.BIOGEME`
+
+        :param formulas: expression or dictionary of expressions, as
+            for :class:`biogeme.biogeme.BIOGEME`. They are copied.
+        :type formulas: :class:`biogeme.expressions.Expression`, or
+                        dict(:class:`biogeme.expressions.Expression`)
+
+        :param columns: columns added to the copy of the data, with
+            their value. Default: None.
+        :type columns: dict(str, float)
+
+        :raises biogemeError: if the formulas involve parameters or
+            draws that are not in the model.
+        """
+        self._model = model
+        database = copy.copy(model.database)
+        data = model.database.data
+        if columns:
+            data = data.assign(**columns)
+        database.data = data
+        database.fullData = data
+        super().__init__(
+            database,
+            copy.deepcopy(formulas),
+            numberOfThreads=model.numberOfThreads,
+            numberOfDraws=model.numberOfDraws,
+            skipAudit=True,
+            suggestScales=False,
+            missingData=model.missingData,
+        )
+
+    def _generateDraws(self, numberOfDraws):
+        """The draws of the model are used instead of generating new
+        ones.
+
+        :param numberOfDraws: number of draws, ignored.
+        :type numberOfDraws: int
+
+        :raises biogemeError: if the formulas involve parameters or
+            draws that are not in the model.
+        """
+        model = self._model
+        unknown = set(self.freeBetaNames) - set(model.freeBetaNames)
+        unknown |= set(self.drawNames) - set(model.drawNames)
+        if unknown:
+            raise excep.biogemeError(
+                f'The formulas involve parameters or draws that are not '
+                f'in the model: {sorted(unknown)}'
+            )
+        self.numberOfDraws = model.numberOfDraws
+        self.monteCarlo = len(self.allDraws) > 0
+        if self.monteCarlo:
+            index = [model.drawNames.index(n) for n in self.drawNames]
+            self.database.theDraws = model.database.theDraws[:, :, index]
+
+
+class bioSimulator:
+    """Simulation engine prepared once, and used for many
+    scenarios. The formulas are parsed, and the data is stored in the
+    C++ engine only once. Between two simulations, the values of the
+    parameters and the columns of the data can be modified in
+    place. The database of the BIOGEME object is not modified.
+    """
+
+    def __init__(self, biogemeObject, theBetaValues=None):
+        """Constructor
+
+        :param biogemeObject: object containing the formulas and the
+            data.
+        :type biogemeObject: :class:`biogeme.biogeme.BIOGEME`
+
+        :param theBetaValues: values of the parameters to be used in
+                the calculations. If None, the default values are
+                used. Default: None.
+        :type theBetaValues: dict(str, float)
+
+        :raises biogemeError: if the formulas are invalid.
+        """
+        self.biogeme = biogemeObject  #: BIOGEME object
+        self.formulaNames = list(biogemeObject.formulas.keys())
+        """ Names of the simulated formulas."""
+
+        self.index = biogemeObject.database.data.index
+        """ Index of the rows of the database."""
+
+        self.columns = list(biogemeObject.database.data.columns)
+        """ Names of the columns of the database."""
+
+        self.data = biogemeObject.database.data
+        """ Data frame with the original values of the data."""
+
+        self.updatedColumns = dict()
+        """ Values of the columns that have been modified by
+        :meth:`setColumn`."""
+
+        self.firstRows = None
+        """ For panel data, index of the first row of each individual."""
+        if biogemeObject.database.isPanel():
+            self.firstRows = biogemeObject.database.individualMap[
+                0
+            ].to_numpy()
+
+        self.betaValues = biogemeObject._betaValuesForSimulation(
+            theBetaValues
+        )
+        """ Current values of the free parameters."""
+
+        self.fixedBetaValues = list(biogemeObject.fixedBetaValues)
+        """ Current values of the fixed parameters."""
+
+        formulas_signature = biogemeObject._prepareFormulasForSimulation()
+
+        # The simulator has its own C++ object, so that updating the
+        # data does not interfere with the estimation.
+        self.theC = cb.pyBiogeme(len(biogemeObject.freeBetaNames))
+        database = biogemeObject.database
+        if database.isPanel():
+            self.theC.setPanel(True)
+            self.theC.setDataMap(database.individualMap)
+        self.theC.setData(database.data)
+        self.theC.setMissingData(biogemeObject.missingData)
+        if biogemeObject.monteCarlo:
+            self.theC.setDraws(database.theDraws)
+        self.theC.prepareSimulation(
+            formulas_signature, biogemeObject.numberOfThreads
+        )
+        self.theC.setSimulationBetas(self.betaValues, self.fixedBetaValues)
+
+    def setBetas(self, theBetaValues):
+        """Modifies the values of some parameters. The parameters that
+        are not mentioned keep their current value.
+
+        :param theBetaValues: new values of the parameters.
+        :type theBetaValues: dict(str, float)
+
+        :raises biogemeError: if a parameter is unknown.
+        """
+        freeNames = self.biogeme.freeBetaNames
+        fixedNames = self.biogeme.fixedBetaNames
+        for name, value in theBetaValues.items():
+            if name in freeNames:
+                self.betaValues[freeNames.index(name)] = float(value)
+            elif name in fixedNames:
+                self.fixedBetaValues[fixedNames.index(name)] = float(value)
+            else:
+                raise excep.biogemeError(
+                    f'Parameter {name} not present in the model'
+                )
+        self.theC.setSimulationBetas(self.betaValues, self.fixedBetaValues)
+
+    def setColumn(self, name, values):
+        """Overwrites the values of one column of the data stored in
+        the simulation engine.
+
+        :param name: name of the column.
+        :type name: str
+
+        :param values: new values, one for each row of the database.
+        :type values: numpy.array or pandas.Series
+
+        :raises biogemeError: if the column is unknown, or if the
+            number of values is incorrect.
+        """
+        if name not in self.columns:
+            raise excep.biogemeError(f'Unknown column {name}')
+        values = np.asarray(values, dtype=float)
+        if values.shape != (len(self.index),):
+            raise excep.biogemeError(
+                f'{len(self.index)} values are expected for column {name}, '
+                f'and not {values.shape}'
+            )
+        self.theC.setDataColumn(self.columns.index(name), values)
+        self.updatedColumns[name] = values
+
+    def simulate(self):
+        """Applies the formulas to each row of the data, using the
+        current values of the parameters and of the data.
+
+        :return: a pandas data frame with the simulated value. Each
+              row corresponds to a row in the database, and each
+              column to a formula.
+
+        :rtype: Pandas data frame
+        """
+        result = self.theC.simulatePrepared(
+            len(self.formulaNames), len(self.index)
+        )
+        output = pd.DataFrame(index=self.index)
+        for key, r in zip(self.formulaNames, result):
+            output[key] = r
+        return output
+
+    def simulateJacobian(self, columns):
+        """Calculates the values of the formulas and their derivatives
+        with respect to several columns of the data. The derivatives
+        are obtained by the same recursive evaluation as the values,
+        so that each observation is evaluated only once, irrespectively
+        of the number of columns.
+
+        :param columns: names of the columns.
+        :type columns: list(str)
+
+        :return: a pandas data frame with the simulated values (see
+            :meth:`simulate`), and a numpy array of dimension
+            (number of rows) x (number of formulas) x (number of columns)
+            with the derivatives.
+        :rtype: tuple(pandas.DataFrame, numpy.array)
+
+        :raises biogemeError: if a column is unknown.
+        """
+        literalIds = []
+        for c in columns:
+            if c not in self.columns:
+                raise excep.biogemeError(f'Unknown column {c}')
+            literalIds.append(self.biogeme.elementaryExpressionIndex[c])
+        values, jacobian = self.theC.simulateJacobian(
+            literalIds, len(self.formulaNames), len(self.index)
+        )
+        output = pd.DataFrame(index=self.index)
+        for key, r in zip(self.formulaNames, values):
+            output[key] = r
+        return output, np.moveaxis(jacobian, -1, 0)
+
+    def elasticities(self, formulas, columns, weight=None):
+        """Calculates the point elasticities of several formulas (typically,
+        choice probabilities) with respect to several columns of the
+        data, in one pass. Direct and cross elasticities are obtained
+        together: the elasticity of formula i with respect to column k
+        is direct if column k is an attribute of the alternative
+        associated with formula i, and cross otherwise.
+
+        The aggregate elasticities are the weighted averages of the
+        disaggregate elasticities, where the weight of each
+        observation is its weight multiplied by the value of the
+        formula:
+
+        .. math:: E^{P_i}_{x_k} = \\frac{\\sum_n w_n P_{in} E^{P_{in}}_{x_{nk}}}
+                  {\\sum_n w_n P_{in}}.
+
+        :param formulas: names of the formulas.
+        :type formulas: list(str)
+
+        :param columns: names of the columns.
+        :type columns: list(str)
+
+        :param weight: name of the formula providing the weight of each
+            observation. If None, all weights are 1. Default: None.
+        :type weight: str
+
+        :return: a pandas data frame with the disaggregate
+            elasticities, where each column is labeled by a tuple
+            (formula, column), and a pandas data frame with the
+            aggregate elasticities, where each row corresponds to a
+            formula, and each column to a column of the data.
+        :rtype: tuple(pandas.DataFrame, pandas.DataFrame)
+
+        :raises biogemeError: if a formula is unknown, or if the data
+            is organized as panel.
+        """
+        if self.firstRows is not None:
+            raise excep.biogemeError(
+                'Point elasticities are defined for each observation, '
+                'and cannot be calculated for panel data.'
+            )
+        for f in list(formulas) + ([] if weight is None else [weight]):
+            if f not in self.formulaNames:
+                raise excep.biogemeError(f'Unknown formula {f}')
+        values, jacobian = self.simulateJacobian(columns)
+        indices = [self.formulaNames.index(f) for f in formulas]
+        x = np.column_stack(
+            [
+                self.updatedColumns[c]
+                if c in self.updatedColumns
+                else self.data[c].to_numpy(dtype=float)
+                for c in columns
+            ]
+        )
+        prob = values[formulas].to_numpy()
+        # Dimensions: rows x formulas x columns. As the elasticity is
+        # dP/dx x / P, the product P * elasticity is dP/dx x.
+        probTimesElasticity = jacobian[:, indices, :] * x[:, np.newaxis, :]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            disaggregate = probTimesElasticity / prob[:, :, np.newaxis]
+        w = (
+            np.ones(len(self.index))
+            if weight is None
+            else values[weight].to_numpy()
+        )
+        aggregate = (
+            np.einsum('n,nik->ik', w, probTimesElasticity)
+            / (w @ prob)[:, np.newaxis]
+        )
+        point = pd.DataFrame(
+            disaggregate.reshape(len(self.index), -1),
+            index=self.index,
+            columns=pd.MultiIndex.from_product([formulas, columns]),
+        )
+        agg = pd.DataFrame(aggregate, index=formulas, columns=columns)
+        return point, agg
+
+    def simulateAggregates(self, sums, ratios=None, groupBy=None):
+        """Calculates aggregate indicators, such as market shares or
+        revenues. The per-observation values are never returned:
+        they are reduced by each thread of the C++ engine, and only
+        the aggregates are transferred.
+
+        :param sums: dictionary defining weighted sums. The key is the
+            name of the indicator, and the value is a list of names of
+            formulas. For each observation, the product of these
+            formulas is calculated, and summed over the
+            observations. A single name can also be provided.
+        :type sums: dict(str: list(str))
+
+        :param ratios: dictionary defining ratios of sums. The key is
+            the name of the indicator, and the value a tuple
+            (numerator, denominator) with the names of two sums.
+        :type ratios: dict(str: tuple(str, str))
+
+        :param groupBy: name of a column of the database. If not None,
+            the aggregates are calculated for each of its values. For
+            panel data, the value of the first observation of each
+            individual is used.
+        :type groupBy: str
+
+        :return: a pandas data frame where each column corresponds to
+            an indicator, and each row to a group. If groupBy is None,
+            the only row is labeled 'Total'.
+        :rtype: pandas.DataFrame
+
+        Example::
+
+              shares = simulator.simulateAggregates(
+                  sums={'car': ['weight', 'Prob. car'],
+                        'total': 'weight'},
+                  ratios={'Market share car': ('car', 'total')},
+                  groupBy='Gender')
+
+        :raises biogemeError: if a formula, a sum or a column is unknown.
+        """
+        if not sums:
+            raise excep.biogemeError('At least one sum must be defined.')
+        terms = []
+        for name, formulas in sums.items():
+            if isinstance(formulas, str):
+                formulas = [formulas]
+            indices = []
+            for f in formulas:
+                if f not in self.formulaNames:
+                    raise excep.biogemeError(
+                        f'Unknown formula {f} in the definition of {name}'
+                    )
+                indices.append(self.formulaNames.index(f))
+            terms.append(indices)
+
+        if groupBy is None:
+            labels = ['Total']
+            groups = None
+        else:
+            if groupBy not in self.columns:
+                raise excep.biogemeError(f'Unknown column {groupBy}')
+            values = self.updatedColumns.get(groupBy)
+            if values is None:
+                values = self.data[groupBy].to_numpy()
+            if self.firstRows is not None:
+                values = values[self.firstRows]
+            labels, groups = np.unique(values, return_inverse=True)
+            groups = groups.tolist()
+
+        result = self.theC.simulateAggregates(terms, groups, len(labels))
+        output = pd.DataFrame(result, index=labels, columns=list(sums.keys()))
+        if ratios is not None:
+            for name, (numerator, denominator) in ratios.items():
+                for theSum in [numerator, denominator]:
+                    if theSum not in sums:
+                        raise excep.biogemeError(
+                            f'Unknown sum {theSum} in the definition '
+                            f'of {name}'
+                        )
+                output[name] = output[numerator] / output[denominator]
+        if groupBy is not None:
+            output.index.name = groupBy
+        return output
+
+    def aggregateConfidenceIntervals(
+        self, betaValues, sums, ratios=None, groupBy=None, intervalSize=0.9
+    ):
+        """Calculate confidence intervals on aggregate indicators.
+
+        :param betaValues: array of parameters values to be used in
+               the calculations. Typically, it is a sample drawn from
+               a distribution.
+        :type betaValues: list(dict(str: float))
+
+        :param sums: definition of the weighted sums. See
+            :meth:`simulateAggregates`.
+        :type sums: dict(str: list(str))
+
+        :param ratios: definition of the ratios. See
+            :meth:`simulateAggregates`.
+        :type ratios: dict(str: tuple(str, str))
+
+        :param groupBy: name of the column defining the groups. See
+            :meth:`simulateAggregates`.
+        :type groupBy: str
+
+        :param intervalSize: size of the reported confidence interval,
+                    in percentage. If it is denoted by s, the interval
+                    is calculated for the quantiles (1-s)/2 and
+                    (1+s)/2. The default (0.9) corresponds to
+                    quantiles for the confidence interval [0.05, 0.95].
+        :type intervalSize: float
+
+        :return: two pandas data frames 'left' and 'right' with the
+            same dimensions as the output of :meth:`simulateAggregates`.
+        :rtype: tuple of two Pandas dataframes.
+        """
+        currentBetas = list(self.betaValues)
+        currentFixedBetas = list(self.fixedBetaValues)
+        listOfResults = []
+        try:
+            for b in betaValues:
+                self.setBetas(b)
+                listOfResults.append(
+                    self.simulateAggregates(sums, ratios, groupBy)
+                )
+        finally:
+            self.betaValues = currentBetas
+            self.fixedBetaValues = currentFixedBetas
+            self.theC.setSimulationBetas(
+                self.betaValues, self.fixedBetaValues
+            )
+        allResults = pd.concat(listOfResults)
+        r = (1.0 - intervalSize) / 2.0
+        left = allResults.groupby(level=0).quantile(r)
+        right = allResults.groupby(level=0).quantile(1.0 - r)
+        return left, right
+
+
 class negLikelihood(functionToMinimize):
     """Provides the value of the function to be minimized, as well as its
     derivatives. To be used by the opimization package.
@@ -1316,7 +3086,15 @@ class negLikelihood(functionToMinimize):
 
     # pylint: disable=too-many-instance-attributes
 
-    def __init__(self, like, like_deriv, scaled):
+    def __init__(
+        self,
+        like,
+        like_deriv,
+        scaled,
+        saveState=None,
+        like_hv=None,
+        parameterScales=None,
+    ):
         """Constructor"""
         self.recalculate = True
         """True if the log likelihood must be recalculated
@@ -1350,6 +3128,66 @@ class negLikelihood(functionToMinimize):
         with different sample sizes are comparable.
         """
 
+        self.saveState = saveState
+        """function called with the state of the optimization
+        algorithm at each iteration, or None.
+        """
+
+        self.like_hv = like_hv
+        """function calculating the product of the second derivatives
+        matrix of the log likelihood with a vector, or None.
+        """
+
+        self.parameterScales = (
+            None
+            if parameterScales is None
+            else np.asarray(parameterScales, dtype=float)
+        )
+        """If not None, the variables of the function are the
+        parameters divided by these scales, and the derivatives are
+        transformed accordingly.
+        """
+
+    def _parameters(self, x):
+        """
+        :return: the values of the parameters corresponding to the
+            variables x.
+        :rtype: numpy.array
+        """
+        if self.parameterScales is None:
+            return x
+        return np.asarray(x) * self.parameterScales
+
+    def _derivatives(self, g, h=None):
+        """Transforms the derivatives with respect to the parameters
+        into derivatives with respect to the variables.
+
+        :return: gradient, and second derivatives matrix if h is not
+            None.
+        :rtype: numpy.array, numpy.array
+        """
+        if self.parameterScales is None:
+            return g, h
+        s = self.parameterScales
+        g = np.asarray(g) * s
+        if h is not None:
+            h = np.asarray(h) * np.outer(s, s)
+        return g, h
+
+    def saveOptimizationState(self, state):
+        if self.saveState is not None:
+            self.saveState(state)
+
+    def hessianVectorProduct(self, x, v):
+        if self.like_hv is None:
+            return super().hessianVectorProduct(x, v)
+        if self.parameterScales is None:
+            return -self.like_hv(x, v, self.scaled)
+        s = self.parameterScales
+        return -s * self.like_hv(
+            self._parameters(x), s * np.asarray(v), self.scaled
+        )
+
     def setVariables(self, x):
         self.recalculate = True
         self.x = x
@@ -1370,7 +3208,9 @@ class negLikelihood(functionToMinimize):
             self.recalculate = True
 
         if self.recalculate:
-            self.fv = self.like(self.x, self.scaled, self.batch)
+            self.fv = self.like(
+                self._parameters(self.x), self.scaled, self.batch
+            )
             self.gv = None
             self.hv = None
             self.bhhhv = None
@@ -1390,13 +3230,39 @@ class negLikelihood(functionToMinimize):
 
         if self.recalculate:
             self.fv, self.gv, *_ = self.like_deriv(
-                self.x, self.scaled, hessian=False, bhhh=False, batch=batch
+                self._parameters(self.x),
+                self.scaled,
+                hessian=False,
+                bhhh=False,
+                batch=batch,
             )
+            self.gv, _ = self._derivatives(self.gv)
             self.hv = None
             self.bhhhv = None
 
         return -self.fv, -self.gv
 
+    def f_g_twoPoints(self, x, y, batch=None):
+        self.setVariables(y)
+        fx, gx, *_ = self.like_deriv(
+            self._parameters(x),
+            self.scaled,
+            hessian=False,
+            bhhh=False,
+            batch=batch,
+        )
+        fy, gy, *_ = self.like_deriv(
+            self._parameters(y),
+            self.scaled,
+            hessian=False,
+            bhhh=False,
+            batch=batch,
+            sameBatch=True,
+        )
+        gx, _ = self._derivatives(gx)
+        gy, _ = self._derivatives(gy)
+        return -fx, -gx, -fy, -gy
+
     def f_g_h(self, batch=None):
         logger = msg.bioMessage()
         if self.x is None:
@@ -1411,8 +3277,13 @@ class negLikelihood(functionToMinimize):
 
         if self.recalculate:
             self.fv, self.gv, self.hv, _ = self.like_deriv(
-                self.x, self.scaled, hessian=True, bhhh=False, batch=batch
+                self._parameters(self.x),
+                self.scaled,
+                hessian=True,
+                bhhh=False,
+                batch=batch,
             )
+            self.gv, self.hv = self._derivatives(self.gv, self.hv)
             self.bhhhv = None
 
         return -self.fv, -self.gv, -self.hv
@@ -1430,8 +3301,13 @@ class negLikelihood(functionToMinimize):
 
         if self.recalculate:
             self.fv, self.gv, _, self.bhhhv = self.like_deriv(
-                self.x, self.scaled, hessian=False, bhhh=True, batch=batch
+                self._parameters(self.x),
+                self.scaled,
+                hessian=False,
+                bhhh=True,
+                batch=batch,
             )
+            self.gv, self.bhhhv = self._derivatives(self.gv, self.bhhhv)
             self.hv = None
 
         return (-self.fv, -self.gv, -self.bhhhv)
@@ -0,0 +1,247 @@
+"""Saves the iterations of the estimation algorithm in a checkpoint
+file, without slowing down the evaluation of the likelihood function.
+
+The file is written by a background thread, at most once every
+``minimumDelay`` seconds, unless ``maximumUpdates`` improvements have
+been recorded since the last writing. Each file is first written
+under a unique temporary name, and then atomically renamed, so that
+several estimations running concurrently in the same directory never
+read or produce a partially written file.
+
+:author: Michel Bierlaire
+:date: Mon Oct 19 09:12:37 2026
+
+"""
+
+# Too constraining
+# pylint: disable=invalid-name, too-many-instance-attributes
+
+import os
+import pickle
+import tempfile
+import threading
+import time
+import biogeme.messaging as msg
+
+logger = msg.bioMessage()
+
+
+def atomicWrite(filename, content, binary=False):
+    """Writes a file in such a way that any reader sees either the
+    previous version of the file, or the new one, but never a
+    partially written file.
+
+    :param filename: name of the file.
+    :type filename: str
+
+    :param content: content of the file.
+    :type content: str or bytes
+
+    :param binary: if True, the content is written in binary mode.
+    :type binary: bool
+    """
+    directory = os.path.dirname(os.path.abspath(filename))
+    basename = os.path.basename(filename)
+    fd, tmpName = tempfile.mkstemp(
+        dir=directory, prefix=f'.{basename}.', suffix='.tmp'
+    )
+    try:
+        with os.fdopen(fd, 'wb' if binary else 'w') as f:
+            f.write(content)
+        os.replace(tmpName, filename)
+    except BaseException:
+        if os.path.exists(tmpName):
+            os.remove(tmpName)
+        raise
+
+
+class bioCheckpoint:
+    """Throttled and asynchronous saving of the iterations."""
+
+    def __init__(
+        self,
+        filename,
+        stateFilename=None,
+        minimumDelay=1.0,
+        maximumUpdates=None,
+        asynchronous=True,
+    ):
+        """Constructor
+
+        :param filename: name of the file where the values of the
+            parameters are saved. Each line has the form ``name = value``.
+        :type filename: str
+
+        :param stateFilename: name of the file where the state of the
+            optimization algorithm is pickled, if provided. If None,
+            the state is not saved. Default: None.
+        :type stateFilename: str
+
+        :param minimumDelay: minimum number of seconds between two
+            writings of the file. Default: 1.0.
+        :type minimumDelay: float
+
+        :param maximumUpdates: if not None, the file is written as soon
+            as this number of updates have been recorded since the
+            last writing, even if the delay has not expired. Default:
+            None.
+        :type maximumUpdates: int
+
+        :param asynchronous: if True, the file is written by a
+            background thread. Default: True.
+        :type asynchronous: bool
+        """
+        self.filename = filename  #: name of the file for the parameters
+        self.stateFilename = stateFilename  #: name of the file for the state
+        self.minimumDelay = minimumDelay  #: minimum delay between writings
+        self.maximumUpdates = maximumUpdates  #: maximum pending updates
+        self.asynchronous = asynchronous  #: True if a thread writes the files
+
+        self.pending = None
+        """ Most recent data that has not been written yet."""
+
+        self.numberOfPendingUpdates = 0
+        """ Number of updates since the last writing."""
+
+        self.numberOfWritings = 0  #: Number of times the files were written
+
+        self.lastWriting = None  #: Time of the last writing
+
+        self._condition = threading.Condition()
+        self._writing = False
+        self._thread = None
+
+    def update(self, betas, state=None):
+        """Records new values to be saved. The file is written only if
+        the delay since the last writing has expired, or if the
+        maximum number of updates has been reached. Otherwise, the
+        values are kept until the next writing.
+
+        :param betas: values of the parameters.
+        :type betas: dict(str: float)
+
+        :param state: state of the optimization algorithm. It must be
+            possible to pickle it. If None, the state of a previous
+            update that has not been written yet, if any, is
+            kept. Default: None.
+        :type state: object
+        """
+        with self._condition:
+            if state is None and self.pending is not None:
+                state = self.pending[1]
+            self.pending = (dict(betas), state)
+            self.numberOfPendingUpdates += 1
+            if self.asynchronous:
+                # The thread decides when the file is written.
+                self._startThread()
+                self._condition.notify_all()
+                return
+            if not self._isDue():
+                return
+            data = self._takePending()
+        self._write(data)
+
+    def flush(self):
+        """Writes the pending values, if any, and waits until all
+        writings are completed.
+        """
+        with self._condition:
+            while self._writing:
+                self._condition.wait()
+            data = self._takePending()
+            if data is None:
+                return
+            self._writing = True
+        try:
+            self._write(data)
+        finally:
+            with self._condition:
+                self._writing = False
+                self._condition.notify_all()
+
+    def close(self):
+        """Writes the pending values, if any, and stops the background
+        thread. The checkpoint can still be updated afterwards, in
+        which case a new thread is started.
+        """
+        self.flush()
+        with self._condition:
+            thread = self._thread
+            # Wakes up the thread if it is waiting for the delay.
+            self._condition.notify_all()
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+
+    def reset(self):
+        """Forgets the pending values, and the time of the last
+        writing. It waits until the writing in progress, if any, is
+        completed, so that the files can safely be removed afterwards.
+        """
+        with self._condition:
+            while self._writing:
+                self._condition.wait()
+            self.pending = None
+            self.numberOfPendingUpdates = 0
+            self.lastWriting = None
+
+    def _isDue(self):
+        if self.lastWriting is None:
+            return True
+        if (
+            self.maximumUpdates is not None
+            and self.numberOfPendingUpdates >= self.maximumUpdates
+        ):
+            return True
+        return time.monotonic() - self.lastWriting >= self.minimumDelay
+
+    def _takePending(self):
+        data = self.pending
+        self.pending = None
+        self.numberOfPendingUpdates = 0
+        if data is not None:
+            self.lastWriting = time.monotonic()
+        return data
+
+    def _startThread(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while self._writing:
+                    self._condition.wait()
+                if self.pending is None:
+                    # Nothing left to write. The next update starts a
+                    # new thread.
+                    self._thread = None
+                    return
+                if not self._isDue():
+                    # Wait until the delay expires, or a flush occurs.
+                    delay = self.minimumDelay - (
+                        time.monotonic() - self.lastWriting
+                    )
+                    self._condition.wait(timeout=max(delay, 0.0))
+                    continue
+                data = self._takePending()
+                self._writing = True
+            try:
+                self._write(data)
+            except Exception as e:  # pylint: disable=broad-except
+                logger.warning(f'Unable to save the iteration: {e}')
+            finally:
+                with self._condition:
+                    self._writing = False
+                    self._condition.notify_all()
+
+    def _write(self, data):
+        betas, state = data
+        content = ''.join(f'{k} = {v}\n' for k, v in betas.items())
+        atomicWrite(self.filename, content)
+        if self.stateFilename is not None and state is not None:
+            atomicWrite(
+                self.stateFilename, pickle.dumps(state), binary=True
+            )
+        self.numberOfWritings += 1
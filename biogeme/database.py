@@ -17,6 +17,8 @@ for specific services to Biogeme
 # pylint: disable=too-many-instance-attributes, too-many-lines,
 # pylint: disable=too-many-public-methods
 
+import zlib
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
 import pandas as pd
 
@@ -111,6 +113,29 @@ class Database:
 
         self.typesOfDraws = {}  #: Types of draws for Monte Carlo integration
 
+        self.drawsSeed = None
+        """Seed of the native draws. If not None, or if a cache is
+        used, each random variable has its own stream of
+        pseudo-random numbers, derived from this seed and its name,
+        and the streams are generated in parallel. If None, the
+        native draws are generated sequentially from the global
+        state of numpy, unless a cache is used, in which case the
+        seed is drawn from the global state of numpy the first time
+        that draws are generated, and reused afterwards, so that the
+        cached draws can be found again.
+        """
+
+        self._defaultDrawsSeed = None
+        """Seed drawn from the global state of numpy, used when a cache
+        is used and no seed is provided."""
+
+        self.drawsCache = None
+        """Object of type drawscache.bioDrawsCache, where the tables
+        of native draws are stored in order to be reused. The same
+        cache can be shared by several databases. If None, the draws
+        are not cached.
+        """
+
         self._auditDone = False
 
         self.theDraws = None  #: Draws for Monte-Carlo integration
@@ -244,6 +269,69 @@ class Database:
                 sampleSize, numberOfDraws, uniformNumbers=unif, antithetic=True
             )
 
+        def halton(sampleSize, numberOfDraws, symmetric=False, dimension=0):
+            base = tools.getPrimeNumbers(dimension + 1)[dimension]
+            return draws.getScrambledHaltonDraws(
+                sampleSize, numberOfDraws, symmetric=symmetric, base=base
+            )
+
+        def symm_halton(sampleSize, numberOfDraws, dimension=0):
+            return halton(
+                sampleSize, numberOfDraws, symmetric=True, dimension=dimension
+            )
+
+        def normal_halton(sampleSize, numberOfDraws, dimension=0):
+            unif = halton(sampleSize, numberOfDraws, dimension=dimension)
+            return draws.getNormalWichuraDraws(
+                sampleSize,
+                numberOfDraws,
+                uniformNumbers=unif,
+                antithetic=False,
+            )
+
+        def symm_sobol(sampleSize, numberOfDraws, dimension=0):
+            return draws.getSobolDraws(
+                sampleSize, numberOfDraws, symmetric=True, dimension=dimension
+            )
+
+        def normal_sobol(sampleSize, numberOfDraws, dimension=0):
+            unif = draws.getSobolDraws(
+                sampleSize, numberOfDraws, dimension=dimension
+            )
+            return draws.getNormalWichuraDraws(
+                sampleSize,
+                numberOfDraws,
+                uniformNumbers=unif,
+                antithetic=False,
+            )
+
+        # Native draws based on a multidimensional sequence. Each
+        # random variable using the same sequence is associated with
+        # a different dimension of that sequence.
+        self._drawsSequences = {
+            'UNIFORM_SHALTON': 'HALTON',
+            'UNIFORMSYM_SHALTON': 'HALTON',
+            'NORMAL_SHALTON': 'HALTON',
+            'UNIFORM_SOBOL': 'SOBOL',
+            'UNIFORMSYM_SOBOL': 'SOBOL',
+            'NORMAL_SOBOL': 'SOBOL',
+        }
+
+        # Number of draws generated in each chunk, for the draws
+        # that are independent across individuals.
+        self._drawsChunkSize = 2**18
+
+        # Native draws that are independent across individuals, and
+        # can therefore be generated by chunks of individuals.
+        self._independentDraws = {
+            'UNIFORM',
+            'UNIFORM_ANTI',
+            'UNIFORMSYM',
+            'UNIFORMSYM_ANTI',
+            'NORMAL',
+            'NORMAL_ANTI',
+        }
+
         # Dictionary containing native random number generators.
         self.nativeRandomNumberGenerators = {
             'UNIFORM': (draws.getUniform, 'Uniform U[0, 1]'),
@@ -260,6 +348,20 @@ class Database:
                 halton5,
                 'Halton draws with base 5, skipping the first 10',
             ),
+            'UNIFORM_SHALTON': (
+                halton,
+                (
+                    'Scrambled Halton draws, with a different prime '
+                    'base for each random variable'
+                ),
+            ),
+            'UNIFORM_SOBOL': (
+                draws.getSobolDraws,
+                (
+                    'Scrambled Sobol draws, with a different dimension '
+                    'for each random variable'
+                ),
+            ),
             'UNIFORM_MLHS': (
                 draws.getLatinHypercubeDraws,
                 'Modified Latin Hypercube Sampling on [0, 1]',
@@ -285,6 +387,14 @@ class Database:
                 symm_halton5,
                 'Halton draws on [-1, 1] with base 5, skipping the first 10',
             ),
+            'UNIFORMSYM_SHALTON': (
+                symm_halton,
+                'Scrambled Halton draws on [-1, 1]',
+            ),
+            'UNIFORMSYM_SOBOL': (
+                symm_sobol,
+                'Scrambled Sobol draws on [-1, 1]',
+            ),
             'UNIFORMSYM_MLHS': (
                 symm_MLHS,
                 'Modified Latin Hypercube Sampling on [-1, 1]',
@@ -307,6 +417,14 @@ class Database:
                 normal_halton5,
                 'Normal draws from Halton base 5 sequence',
             ),
+            'NORMAL_SHALTON': (
+                normal_halton,
+                'Normal draws from scrambled Halton sequences',
+            ),
+            'NORMAL_SOBOL': (
+                normal_sobol,
+                'Normal draws from scrambled Sobol sequences',
+            ),
             'NORMAL_MLHS': (
                 normal_MLHS,
                 'Normal draws from Modified Latin Hypercube Sampling',
@@ -786,7 +904,7 @@ class Database:
 
         self.userRandomNumberGenerators = rng
 
-    def generateDraws(self, types, names, numberOfDraws):
+    def generateDraws(self, types, names, numberOfDraws, numberOfThreads=1):
         """Generate draws for each variable.
 
 
@@ -803,6 +921,12 @@ class Database:
         :param numberOfDraws: number of draws to generate.
         :type numberOfDraws: int
 
+        :param numberOfThreads: number of threads used to generate the
+            native draws, when each variable has its own stream (see
+            Database.drawsSeed). The draws do not depend on the number
+            of threads. Default: 1.
+        :type numberOfThreads: int
+
         :return: a 3-dimensional table with draws. The 3 dimensions are
 
               1. number of individuals
@@ -827,11 +951,23 @@ class Database:
         """
 
         self.numberOfDraws = numberOfDraws
+        sampleSize = self.getSampleSize()
+        streams = self.drawsSeed is not None or self.drawsCache is not None
+        if streams:
+            seed = self.drawsSeed
+            if seed is None:
+                if self._defaultDrawsSeed is None:
+                    self._defaultDrawsSeed = np.random.randint(2**31)
+                seed = self._defaultDrawsSeed
         # Dimensions of the draw table:
         # 1. number of variables
         # 2. number of individuals
         # 3. number of draws
         listOfDraws = [None] * len(names)
+        # Next available dimension for each multidimensional sequence
+        dimensions = {}
+        # Native draws generated in parallel, each with its own stream
+        streamsToGenerate = {}
         for i, v in enumerate(names):
             name = v
             drawType = types[name]
@@ -849,14 +985,57 @@ class Database:
                         f'User defined: {user}'
                     )
                     raise excep.biogemeError(errorMsg)
+            sequence = self._drawsSequences.get(drawType)
+            options = {}
+            if sequence is not None:
+                dimension = dimensions.get(sequence, 0)
+                dimensions[sequence] = dimension + 1
+                options['dimension'] = dimension
+            if streams and drawType in self.nativeRandomNumberGenerators:
+                streamSeed = int(
+                    np.random.SeedSequence(
+                        [seed, zlib.crc32(name.encode())]
+                    ).generate_state(1)[0]
+                )
+                key = (
+                    drawType,
+                    sampleSize,
+                    numberOfDraws,
+                    streamSeed,
+                    options.get('dimension'),
+                )
+                if self.drawsCache is not None:
+                    listOfDraws[i] = self.drawsCache.get(key)
+                if listOfDraws[i] is None:
+                    streamsToGenerate[i] = (
+                        key,
+                        theGenerator[0],
+                        options,
+                        drawType in self._independentDraws,
+                    )
+                continue
+            # User defined draws are generated sequentially from the
+            # global state of numpy, and never cached, as the function
+            # generating them may change.
             listOfDraws[i] = theGenerator[0](
-                self.getSampleSize(), numberOfDraws
+                sampleSize, numberOfDraws, **options
+            )
+
+        if streamsToGenerate:
+            generated = self._generateStreams(
+                streamsToGenerate, numberOfDraws, numberOfThreads
             )
-            if listOfDraws[i].shape != (self.getSampleSize(), numberOfDraws):
+            for i, table in generated.items():
+                listOfDraws[i] = table
+                if self.drawsCache is not None:
+                    self.drawsCache.put(streamsToGenerate[i][0], table)
+
+        for i, name in enumerate(names):
+            if listOfDraws[i].shape != (sampleSize, numberOfDraws):
                 errorMsg = (
                     f'The draw generator for {name} must'
                     f' generate a numpy array of dimensions'
-                    f' ({self.getSampleSize()}, {numberOfDraws})'
+                    f' ({sampleSize}, {numberOfDraws})'
                     f' instead of {listOfDraws[i].shape}'
                 )
                 raise excep.biogemeError(errorMsg)
@@ -870,6 +1049,65 @@ class Database:
         self.theDraws = np.moveaxis(self.theDraws, 0, -1)
         return self.theDraws
 
+    def _generateStreams(self, streams, numberOfDraws, numberOfThreads):
+        """Generate native draws, each variable with its own stream of
+        pseudo-random numbers. Draws that are independent across
+        individuals are generated by chunks of individuals, each with
+        its own stream as well, so that the chunks are generated in
+        parallel. As the chunks do not depend on the number of
+        threads, neither do the draws.
+
+        :param streams: for each index of variable, the key of the
+            stream, the function generating the draws, its optional
+            arguments, and True if the draws are independent across
+            individuals.
+        :type streams: dict(int: tuple(tuple, fct, dict, bool))
+
+        :param numberOfDraws: number of draws to generate.
+        :type numberOfDraws: int
+
+        :param numberOfThreads: number of threads.
+        :type numberOfThreads: int
+
+        :return: table of draws for each index of variable.
+        :rtype: dict(int: numpy.array)
+        """
+        sampleSize = self.getSampleSize()
+        chunkSize = max(1, self._drawsChunkSize // numberOfDraws)
+        jobs = []
+        for i, (key, generator, options, independent) in streams.items():
+            streamSeed = key[3]
+            size = chunkSize if independent else sampleSize
+            for chunk, first in enumerate(range(0, sampleSize, size)):
+                jobs.append(
+                    (
+                        i,
+                        generator,
+                        options,
+                        min(size, sampleSize - first),
+                        [streamSeed, chunk],
+                    )
+                )
+
+        def generate(job):
+            _, generator, options, individuals, entropy = job
+            with draws.randomStream(entropy):
+                return generator(individuals, numberOfDraws, **options)
+
+        if numberOfThreads > 1 and len(jobs) > 1:
+            with ThreadPoolExecutor(max_workers=numberOfThreads) as pool:
+                tables = list(pool.map(generate, jobs))
+        else:
+            tables = [generate(job) for job in jobs]
+
+        chunks = {i: [] for i in streams}
+        for job, table in zip(jobs, tables):
+            chunks[job[0]].append(table)
+        return {
+            i: np.concatenate(parts) if len(parts) > 1 else parts[0]
+            for i, parts in chunks.items()
+        }
+
     def getNumberOfObservations(self):
         """
         Reports the number of observations in the database.
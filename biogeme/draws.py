@@ -8,9 +8,53 @@
 # Too constraining
 # pylint: disable=invalid-name, too-many-arguments, too-many-locals, too-many-statements
 
+import contextlib
+import threading
+import warnings
 import numpy as np
+from scipy.stats import qmc
 import biogeme.exceptions as excep
 
+_streams = threading.local()
+
+
+def _random():
+    """Source of pseudo-random numbers for the current thread.
+
+    :return: the stream of the thread, if one has been defined by
+        randomStream, or the global state of numpy otherwise.
+    :rtype: numpy.random.RandomState or module numpy.random
+    """
+    state = getattr(_streams, 'state', None)
+    return np.random if state is None else state
+
+
+@contextlib.contextmanager
+def randomStream(seed):
+    """Context where the draws generated by the current thread use
+    their own stream of pseudo-random numbers, instead of the global
+    state of numpy. Streams initialized with different seeds are
+    independent, so that draws can be generated in parallel, and
+    reproduced irrespectively of the number of threads.
+
+    :param seed: seed of the stream. Any entropy accepted by
+        numpy.random.SeedSequence can be used.
+    :type seed: int or list(int)
+
+    Example::
+
+        with dr.randomStream([123, 0]):
+            draws = dr.getNormalWichuraDraws(sampleSize=3, numberOfDraws=10)
+    """
+    previous = getattr(_streams, 'state', None)
+    _streams.state = np.random.RandomState(
+        np.random.MT19937(np.random.SeedSequence(seed))
+    )
+    try:
+        yield
+    finally:
+        _streams.state = previous
+
 
 def getUniform(sampleSize, numberOfDraws, symmetric=False):
     """Uniform [0, 1] or [-1, 1] numbers
@@ -63,7 +107,7 @@ def getUniform(sampleSize, numberOfDraws, symmetric=False):
         )
     totalSize = numberOfDraws * sampleSize
 
-    uniformNumbers = np.random.uniform(size=totalSize)
+    uniformNumbers = _random().uniform(size=totalSize)
     if symmetric:
         uniformNumbers = 2.0 * uniformNumbers - 1.0
 
@@ -124,7 +168,7 @@ def getLatinHypercubeDraws(
     totalSize = numberOfDraws * sampleSize
 
     if uniformNumbers is None:
-        uniformNumbers = np.random.uniform(size=totalSize)
+        uniformNumbers = _random().uniform(size=totalSize)
     else:
         if uniformNumbers.size != totalSize:
             errorMsg = (
@@ -134,16 +178,11 @@ def getLatinHypercubeDraws(
             raise excep.biogemeError(errorMsg)
 
     uniformNumbers.shape = (totalSize,)
-    numbers = np.array(
-        [
-            (float(i) + uniformNumbers[i]) / float(totalSize)
-            for i in range(totalSize)
-        ]
-    )
+    numbers = (np.arange(totalSize) + uniformNumbers) / float(totalSize)
     if symmetric:
         numbers = 2.0 * numbers - 1.0
 
-    np.random.shuffle(numbers)
+    _random().shuffle(numbers)
     numbers.shape = (sampleSize, numberOfDraws)
     return numbers
 
@@ -218,7 +257,154 @@ def getHaltonDraws(
     numbers = numbers[skip + 1:length + skip + 1]
 
     if shuffled:
-        np.random.shuffle(numbers)
+        _random().shuffle(numbers)
+
+    if symmetric:
+        numbers = 2.0 * numbers - 1.0
+
+    numbers.shape = (sampleSize, numberOfDraws)
+    return numbers
+
+
+def getScrambledHaltonDraws(
+    sampleSize, numberOfDraws, symmetric=False, base=2, skip=0
+):
+    """Generate randomized Halton draws, where the digits of the
+    sequence are scrambled with a random permutation for each digit
+    position. Contrarily to plain Halton draws, the correlation
+    between sequences with large prime bases disappears, so that
+    many dimensions can be used.
+
+    :param sampleSize: number of observations for which draws must be
+                       generated.
+    :type sampleSize: int
+
+    :param numberOfDraws: number of draws to generate.
+    :type numberOfDraws: int
+
+    :param symmetric: if True, draws from [-1: 1] are generated.
+           If False, draws from [0: 1] are generated.  Default: False
+    :type symmetric: bool
+
+    :param base: base of the sequence. It must be a prime
+            number. Default: 2.
+    :type base: int
+
+    :param skip: the number of  elements of the sequence to be discarded.
+    :type skip: int
+
+    :return: numpy array with the draws
+    :rtype: numpy.array
+
+    Example::
+
+        halton = dr.getScrambledHaltonDraws(
+            sampleSize=2, numberOfDraws=10, base=7
+        )
+
+    :raise biogemeError: if the number of draws is not positive.
+
+    :raise biogemeError: if the sample size is not positive.
+
+    :raise biogemeError: if the base is less than 2.
+    """
+    if numberOfDraws <= 0:
+        raise excep.biogemeError(f'Invalid number of draws: {numberOfDraws}.')
+
+    if sampleSize <= 0:
+        raise excep.biogemeError(
+            f'Invalid sample size: {sampleSize} when generating draws.'
+        )
+    if base < 2:
+        raise excep.biogemeError(f'Invalid base for Halton draws: {base}.')
+
+    length = numberOfDraws * sampleSize
+    indices = np.arange(skip + 1, length + skip + 1, dtype=np.int64)
+    # Number of digits needed to reach the machine precision.
+    totalDigits = int(np.ceil(53 * np.log(2) / np.log(base)))
+    # Random permutation of the digits for each position.
+    permutations = np.argsort(
+        _random().uniform(size=(totalDigits, base)), axis=1
+    )
+    numbers = np.zeros(length)
+    remaining = indices.copy()
+    factor = 1.0 / base
+    for position in range(totalDigits):
+        if remaining[-1] == 0:
+            # The remaining digits are all zeros, and are permuted in
+            # the same way for all elements.
+            numbers += permutations[position, 0] * factor
+        else:
+            numbers += permutations[position, remaining % base] * factor
+            remaining //= base
+        factor /= base
+
+    if symmetric:
+        numbers = 2.0 * numbers - 1.0
+
+    numbers.shape = (sampleSize, numberOfDraws)
+    return numbers
+
+
+def getSobolDraws(
+    sampleSize, numberOfDraws, symmetric=False, dimension=0, scrambled=True
+):
+    """Generate Sobol draws. The sequence is generated by the
+    Sobol engine of scipy, and scrambled using a linear matrix
+    scrambling and a digital random shift, unless requested otherwise.
+
+    :param sampleSize: number of observations for which draws must be
+                       generated.
+    :type sampleSize: int
+
+    :param numberOfDraws: number of draws to generate.
+    :type numberOfDraws: int
+
+    :param symmetric: if True, draws from [-1: 1] are generated.
+           If False, draws from [0: 1] are generated.  Default: False
+    :type symmetric: bool
+
+    :param dimension: dimension of the Sobol sequence to use, starting
+        from 0. Draws for different random variables should use
+        different dimensions. Default: 0.
+    :type dimension: int
+
+    :param scrambled: if True, the sequence is scrambled. Default: True.
+    :type scrambled: bool
+
+    :return: numpy array with the draws
+    :rtype: numpy.array
+
+    :raise biogemeError: if the number of draws is not positive.
+
+    :raise biogemeError: if the sample size is not positive.
+
+    :raise biogemeError: if the dimension is negative.
+    """
+    if numberOfDraws <= 0:
+        raise excep.biogemeError(f'Invalid number of draws: {numberOfDraws}.')
+
+    if sampleSize <= 0:
+        raise excep.biogemeError(
+            f'Invalid sample size: {sampleSize} when generating draws.'
+        )
+    if dimension < 0:
+        raise excep.biogemeError(
+            f'Invalid dimension for Sobol draws: {dimension}.'
+        )
+
+    length = numberOfDraws * sampleSize
+    seed = _random().randint(2**31 - 1) if scrambled else None
+    engine = qmc.Sobol(dimension + 1, scramble=scrambled, seed=seed)
+    if not scrambled:
+        # The first element of the unscrambled sequence is 0.
+        engine.fast_forward(1)
+    with warnings.catch_warnings():
+        # The balance properties of the sequence are lost if the
+        # number of draws is not a power of two. It does not matter
+        # here, as the sequence is split across individuals.
+        warnings.simplefilter('ignore', UserWarning)
+        numbers = engine.random(length)[:, dimension]
 
     if symmetric:
         numbers = 2.0 * numbers - 1.0
@@ -383,7 +569,7 @@ def getNormalWichuraDraws(
     f7 = 2.04426310338993978564e-15
 
     if uniformNumbers is None:
-        uniformNumbers = np.random.uniform(size=totalSize)
+        uniformNumbers = _random().uniform(size=totalSize)
     elif uniformNumbers.size != totalSize:
         errorMsg = (
             f'A total of {totalSize} uniform draws must be '
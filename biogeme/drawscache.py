@@ -0,0 +1,172 @@
+"""Cache of the tables of draws, so that draws that have already been
+generated are reused by other estimations, such as bootstrapping,
+the candidates of an assisted specification, or repeated runs of the
+same script.
+
+The tables are kept either in memory, or on disk as numpy files that
+are memory-mapped when they are reused. In both cases, the total size
+of the cache is bounded, and the tables that have not been used for
+the longest time are evicted first.
+
+:author: Michel Bierlaire
+:date: Mon Oct 19 15:41:08 2026
+
+"""
+
+# Too constraining
+# pylint: disable=invalid-name
+
+import os
+import hashlib
+import collections
+import tempfile
+import numpy as np
+import biogeme.exceptions as excep
+import biogeme.messaging as msg
+
+logger = msg.bioMessage()
+
+
+class bioDrawsCache:
+    """Size-bounded cache of the tables of draws."""
+
+    def __init__(self, maximumSize=2**30, directory=None):
+        """Constructor
+
+        :param maximumSize: maximum total size of the cached tables, in
+            bytes. Default: 1 GB.
+        :type maximumSize: int
+
+        :param directory: if not None, the tables are stored in this
+            directory, and memory-mapped when they are reused. The
+            tables already in the directory are reused. If None, the
+            tables are kept in memory. Default: None.
+        :type directory: str
+
+        :raise biogemeError: if the maximum size is not positive.
+        """
+        if maximumSize <= 0:
+            raise excep.biogemeError(
+                f'Invalid maximum size of the cache: {maximumSize}'
+            )
+        self.maximumSize = maximumSize  #: maximum size in bytes
+        self.directory = directory  #: directory for the tables, if any
+        self.hits = 0  #: number of tables found in the cache
+        self.misses = 0  #: number of tables not found in the cache
+
+        self._tables = collections.OrderedDict()
+        """ Tables, or names of the files, ordered from the least
+        recently used to the most recently used."""
+
+        self._sizes = {}  #: size of each table, in bytes
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+            self._scanDirectory()
+
+    def size(self):
+        """Total size of the cached tables.
+
+        :return: size in bytes.
+        :rtype: int
+        """
+        return sum(self._sizes.values())
+
+    def get(self, key):
+        """Retrieves a table from the cache.
+
+        :param key: identification of the table, typically the type of
+            draws, the sample size, the number of draws and the seed.
+        :type key: tuple
+
+        :return: the table, or None if it is not in the cache. When
+            the cache is on disk, the table is memory-mapped in read
+            only mode.
+        :rtype: numpy.array
+        """
+        entry = self._entry(key)
+        table = self._tables.get(entry)
+        if table is not None and self.directory is not None:
+            # The file may have been evicted by another cache sharing
+            # the same directory.
+            try:
+                os.utime(table)
+                table = np.load(table, mmap_mode='r')
+            except OSError:
+                self._tables.pop(entry)
+                self._sizes.pop(entry)
+                table = None
+        if table is None:
+            self.misses += 1
+            return None
+        self._tables.move_to_end(entry)
+        self.hits += 1
+        return table
+
+    def put(self, key, table):
+        """Stores a table in the cache, and evicts the least recently
+        used tables if the cache is full. A table larger than the
+        cache is not stored.
+
+        :param key: identification of the table.
+        :type key: tuple
+
+        :param table: table of draws.
+        :type table: numpy.array
+        """
+        if table.nbytes > self.maximumSize:
+            logger.detailed(
+                f'Draws table of {table.nbytes} bytes is too large '
+                f'for the cache.'
+            )
+            return
+        entry = self._entry(key)
+        self._remove(entry)
+        while self._tables and self.size() + table.nbytes > self.maximumSize:
+            self._remove(next(iter(self._tables)))
+        if self.directory is None:
+            self._tables[entry] = table
+        else:
+            filename = os.path.join(self.directory, f'{entry}.npy')
+            # Scripts running concurrently never see a partial file.
+            fd, tmpName = tempfile.mkstemp(
+                dir=self.directory, prefix=f'.{entry}.', suffix='.tmp'
+            )
+            with os.fdopen(fd, 'wb') as f:
+                np.save(f, table)
+            os.replace(tmpName, filename)
+            self._tables[entry] = filename
+        self._sizes[entry] = table.nbytes
+
+    def clear(self):
+        """Removes all the tables from the cache."""
+        while self._tables:
+            self._remove(next(iter(self._tables)))
+
+    def _entry(self, key):
+        if self.directory is None:
+            return key
+        # The name of the file must be valid whatever the key, and
+        # identical across runs.
+        return hashlib.sha1(repr(key).encode()).hexdigest()
+
+    def _remove(self, entry):
+        table = self._tables.pop(entry, None)
+        self._sizes.pop(entry, None)
+        if self.directory is not None and table is not None:
+            try:
+                os.remove(table)
+            except OSError as e:
+                logger.warning(f'Unable to remove {table}: {e}')
+
+    def _scanDirectory(self):
+        files = []
+        for name in os.listdir(self.directory):
+            if not name.endswith('.npy'):
+                continue
+            filename = os.path.join(self.directory, name)
+            files.append((os.path.getmtime(filename), name[:-4], filename))
+        for _, entry, filename in sorted(files):
+            self._tables[entry] = filename
+            self._sizes[entry] = os.path.getsize(filename)
+        while self.size() > self.maximumSize:
+            self._remove(next(iter(self._tables)))
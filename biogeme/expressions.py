@@ -13,11 +13,27 @@
 # pylint: disable=invalid-name, too-many-locals, too-many-arguments
 # pylint: disable=too-many-instance-attributes, too-many-lines
 
+import copy
 import numpy as np
 import biogeme.exceptions as excep
 import biogeme.messaging as msg
 import biogeme.cexpressions as ee
 
+monteCarloExpressions = (
+    'MonteCarlo',
+    'MonteCarloControlVariate',
+    'MonteCarloImportance',
+    'LogMonteCarloPanelTrajectory',
+)
+"""Names of the expressions performing a Monte-Carlo integration."""
+
+panelTrajectoryExpressions = (
+    'PanelLikelihoodTrajectory',
+    'LogMonteCarloPanelTrajectory',
+)
+"""Names of the expressions calculating the likelihood of the sequence
+of observations of an individual."""
+
 
 def isNumeric(obj):
     """Identifies if an object is numeric, that is int, float or bool.
@@ -102,6 +118,27 @@ class Expression:
         """ Value interpreted as missing data
         """
 
+    def __deepcopy__(self, memo):
+        """Copies the expression and its sub-expressions. The copy has
+        its own interface to the C++ implementation, and shares the
+        logger.
+
+        :param memo: objects already copied, indexed by their id.
+        :type memo: dict
+
+        :return: copy of the expression.
+        :rtype: biogeme.expressions.Expression
+        """
+        theCopy = self.__class__.__new__(self.__class__)
+        memo[id(self)] = theCopy
+        for name, value in self.__dict__.items():
+            if name == 'cpp':
+                value = ee.pyEvaluateOneExpression()
+            elif name != 'logger':
+                value = copy.deepcopy(value, memo)
+            setattr(theCopy, name, value)
+        return theCopy
+
     def __repr__(self):
         """built-in function used to compute the 'official' string reputation
         of an object
@@ -879,7 +916,7 @@ class Expression:
             self._prepareFormulaForEvaluation(database)
         if database is not None:
             self.cpp.setData(database.data)
-            if self.embedExpression('PanelLikelihoodTrajectory'):
+            if self.embedExpression(panelTrajectoryExpressions):
                 if database.isPanel():
                     database.buildPanelMap()
                     self.cpp.setDataMap(database.individualMap)
@@ -945,7 +982,7 @@ class Expression:
         :return: True if it requires draws.
         :rtype: bool
         """
-        return self.embedExpression('MonteCarlo')
+        return self.embedExpression(monteCarloExpressions)
 
     def setOfBetas(self, free=True, fixed=False):
         """
@@ -1202,6 +1239,9 @@ class Expression:
         expression is contained in a MonteCarlo expression. If not, it
         cannot be evaluated.
 
+        :param t: name of the type of expression, or tuple of names.
+        :type t: str or tuple(str)
+
         :return: True if the expression is contained in an expression
             of type t.
         :rtype: bool.
@@ -1210,7 +1250,8 @@ class Expression:
         """
         if self.parent is None:
             return False
-        if self.parent.getClassName() == t:
+        types = (t,) if isinstance(t, str) else t
+        if self.parent.getClassName() in types:
             return True
         return self.parent.isContainedIn(t)
 
@@ -1220,12 +1261,16 @@ class Expression:
         Typically, this would be used to check that a MonteCarlo
         expression contains a bioDraws expression.
 
+        :param t: name of the type of expression, or tuple of names.
+        :type t: str or tuple(str)
+
         :return: True if the expression contains an expression of type t.
         :rtype: bool
 
         See: :func:`biogeme.expressions.Expression.isContainedIn`
         """
-        if self.getClassName() == t:
+        types = (t,) if isinstance(t, str) else t
+        if self.getClassName() in types:
             return True
         for e in self.children:
             if e.embedExpression(t):
@@ -1828,16 +1873,70 @@ class MonteCarlo(UnaryOperator):
     Monte Carlo integration
     """
 
-    def __init__(self, child):
+    def __init__(self, child, tolerance=None, minimumDraws=100):
         """Constructor
 
         :param child: arithmetic expression
         :type child: biogeme.expressions.Expression
+
+        :param tolerance: if not None, the integration is adaptive.
+            The number of draws is doubled, starting from
+            ``minimumDraws``, until the relative standard error of the
+            simulated value for the observation is below this
+            tolerance, or until all the draws have been used. If None,
+            all the draws are used. Default: None.
+        :type tolerance: float
+
+        :param minimumDraws: number of draws used before the first
+            check of the adaptive integration. Default: 100.
+        :type minimumDraws: int
+
+        :raise biogemeError: if the tolerance is not positive.
         """
         UnaryOperator.__init__(self, child)
+        if tolerance is not None and tolerance <= 0:
+            raise excep.biogemeError(
+                f'The tolerance must be positive: {tolerance}'
+            )
+        self.tolerance = tolerance  #: tolerance of the adaptive integration
+        self.minimumDraws = minimumDraws  #: draws before the first check
 
     def __str__(self):
-        return f'MonteCarlo({self.child})'
+        if self.tolerance is None:
+            return f'MonteCarlo({self.child})'
+        return (
+            f'MonteCarlo({self.child}, tolerance={self.tolerance}, '
+            f'minimumDraws={self.minimumDraws})'
+        )
+
+    def getSignature(self, output=0):
+        """The signature of a string characterizing an expression.
+
+        If the integration is adaptive, or if the output is not the
+        simulated value, the tolerance, the minimum number of draws
+        and the output are appended to the signature.
+
+        :param output: 0 for the simulated value, 1 for the variance
+            of the simulated value, and 2 for the number of draws used
+            for each observation. Default: 0.
+        :type output: int
+
+        :return: list of the signatures of an expression and its children.
+        :rtype: list(string)
+        """
+        if self.tolerance is None and output == 0:
+            return super().getSignature()
+        listOfSignatures = self.child.getSignature()
+        # Each diagnostic output is a distinct expression for the C++
+        # code.
+        theId = id(self) if output == 0 else f'{id(self)}_{output}'
+        mysignature = f'<{self.getClassName()}>'
+        mysignature += f'{{{theId}}}'
+        mysignature += f'(1),{id(self.child)}'
+        tolerance = 0.0 if self.tolerance is None else self.tolerance
+        mysignature += f',{tolerance},{self.minimumDraws},{output}'
+        listOfSignatures += [mysignature.encode()]
+        return listOfSignatures
 
     def audit(self, database=None):
         """Performs various checks on the expressions.
@@ -1849,32 +1948,227 @@ class MonteCarlo(UnaryOperator):
         :rtype: list(string), list(string)
 
         """
-        listOfErrors, listOfWarnings = self.child.audit(database)
-        if database is None:
-            if self.child.embedExpression('PanelLikelihoodTrajectory'):
-                theWarning = (
-                    'The formula contains a PanelLikelihoodTrajectory '
-                    'expression, and no database is given'
-                )
-                listOfWarnings.append(theWarning)
-        else:
-            if database.isPanel() and not self.child.embedExpression(
-                'PanelLikelihoodTrajectory'
-            ):
-                theError = (
-                    f'As the database is panel, the argument '
-                    f'of MonteCarlo must contain a'
-                    f' PanelLikelihoodTrajectory: {self}'
-                )
-                listOfErrors.append(theError)
+        return _auditIntegrand(self, self.child, database)
 
-        if not self.child.embedExpression('bioDraws'):
+
+def _auditIntegrand(expression, integrand, database):
+    """Performs the checks on the integrand of a Monte-Carlo
+    integration.
+
+    :param expression: expression performing the integration.
+    :type expression: biogeme.expressions.Expression
+
+    :param integrand: integrand.
+    :type integrand: biogeme.expressions.Expression
+
+    :param database: database object
+    :type database: biogeme.database.Database
+
+    :return: tuple listOfErrors, listOfWarnings
+    :rtype: list(string), list(string)
+    """
+    listOfErrors, listOfWarnings = integrand.audit(database)
+    if database is None:
+        if integrand.embedExpression('PanelLikelihoodTrajectory'):
+            theWarning = (
+                'The formula contains a PanelLikelihoodTrajectory '
+                'expression, and no database is given'
+            )
+            listOfWarnings.append(theWarning)
+    else:
+        if database.isPanel() and not integrand.embedExpression(
+            'PanelLikelihoodTrajectory'
+        ):
             theError = (
-                f'The argument of MonteCarlo must contain a'
-                f' bioDraws: {self}'
+                f'As the database is panel, the argument '
+                f'of MonteCarlo must contain a'
+                f' PanelLikelihoodTrajectory: {expression}'
             )
             listOfErrors.append(theError)
-        if self.child.embedExpression('MonteCarlo'):
+
+    if not integrand.embedExpression('bioDraws'):
+        theError = (
+            f'The argument of MonteCarlo must contain a'
+            f' bioDraws: {expression}'
+        )
+        listOfErrors.append(theError)
+    if integrand.embedExpression(monteCarloExpressions):
+        theError = (
+            f'It is not possible to include a MonteCarlo '
+            f'statement in another one: {expression}'
+        )
+        listOfErrors.append(theError)
+    return listOfErrors, listOfWarnings
+
+
+def _expression(e):
+    """Transforms a numeric value into an expression.
+
+    :param e: numeric value or expression.
+    :type e: int, float, bool or biogeme.expressions.Expression
+
+    :return: the expression.
+    :rtype: biogeme.expressions.Expression
+
+    :raise biogemeError: if the argument is neither a numeric value
+        nor an expression.
+    """
+    if isNumeric(e):
+        return Numeric(e)
+    if not isinstance(e, Expression):
+        raise excep.biogemeError(f'This is not a valid expression: {e}')
+    return e
+
+
+class MonteCarloControlVariate(Expression):
+    """
+    Monte Carlo integration with a control variate. The integral of
+    the child is approximated by
+
+    .. math:: \\bar{f} - \\hat{c} (\\bar{h} - I_h)
+
+    where :math:`\\bar{f}` and :math:`\\bar{h}` are the averages over
+    the draws of the child and of the control, :math:`I_h` is the known
+    integral of the control, and :math:`\\hat{c}` is the estimated
+    covariance between the child and the control, divided by the
+    estimated variance of the control. The variance is reduced as
+    much as the correlation between the child and the control is
+    high. The derivatives account for the dependence of
+    :math:`\\hat{c}` on the parameters.
+
+    As the approximation is not guaranteed to be positive, it should
+    be used for integrals that are far from zero, such as choice
+    probabilities that are not too small.
+    """
+
+    def __init__(self, child, control, integral):
+        """Constructor
+
+        :param child: arithmetic expression to integrate.
+        :type child: biogeme.expressions.Expression
+
+        :param control: arithmetic expression involving the same draws,
+            and highly correlated with the child.
+        :type control: biogeme.expressions.Expression
+
+        :param integral: integral of the control. It may involve
+            parameters and variables, but no draws.
+        :type integral: biogeme.expressions.Expression
+        """
+        Expression.__init__(self)
+        self.child = _expression(child)  #: integrand
+        self.control = _expression(control)  #: control variate
+        self.integral = _expression(integral)  #: integral of the control
+        for e in [self.child, self.control, self.integral]:
+            e.parent = self
+            self.children.append(e)
+
+    def __str__(self):
+        return (
+            f'MonteCarloControlVariate({self.child}, {self.control}, '
+            f'{self.integral})'
+        )
+
+    def audit(self, database=None):
+        """Performs various checks on the expressions.
+
+        :param database: database object
+        :type database: biogeme.database.Database
+
+        :return: tuple listOfErrors, listOfWarnings
+        :rtype: list(string), list(string)
+
+        """
+        listOfErrors, listOfWarnings = _auditIntegrand(
+            self, self.child, database
+        )
+        e, w = _auditIntegrand(self, self.control, database)
+        listOfErrors += e
+        listOfWarnings += w
+        e, w = self.integral.audit(database)
+        listOfErrors += e
+        listOfWarnings += w
+        if self.integral.embedExpression('bioDraws'):
+            theError = (
+                f'The integral of the control variate must not '
+                f'involve draws: {self}'
+            )
+            listOfErrors.append(theError)
+        return listOfErrors, listOfWarnings
+
+
+class MonteCarloImportance(Expression):
+    """
+    Monte Carlo integration with importance sampling. The draws are
+    generated from a proposal density, typically centered on the
+    region where the integrand is large, and the value of the child
+    for each draw is multiplied by the ratio between the density of
+    the random variables and the proposal density. If the weights
+    are normalized, the sum of the weighted values is divided by the
+    sum of the weights instead of the number of draws, so that the
+    densities need to be known only up to a constant.
+    """
+
+    def __init__(self, child, weight, normalized=False):
+        """Constructor
+
+        :param child: arithmetic expression to integrate, evaluated at
+            the draws from the proposal density.
+        :type child: biogeme.expressions.Expression
+
+        :param weight: ratio between the density of the random
+            variables and the proposal density, evaluated at the same
+            draws. It may involve parameters.
+        :type weight: biogeme.expressions.Expression
+
+        :param normalized: if True, the weights are normalized to sum
+            up to one. Default: False.
+        :type normalized: bool
+        """
+        Expression.__init__(self)
+        self.child = _expression(child)  #: integrand
+        self.weight = _expression(weight)  #: importance weight
+        self.normalized = normalized  #: True if the weights are normalized
+        for e in [self.child, self.weight]:
+            e.parent = self
+            self.children.append(e)
+
+    def __str__(self):
+        return (
+            f'MonteCarloImportance({self.child}, {self.weight}, '
+            f'normalized={self.normalized})'
+        )
+
+    def getSignature(self):
+        """The signature of a string characterizing an expression.
+
+        The signature of the children is followed by 1 if the weights
+        are normalized, and 0 otherwise.
+
+        :return: list of the signatures of an expression and its children.
+        :rtype: list(string)
+        """
+        listOfSignatures = super().getSignature()
+        listOfSignatures[-1] += f',{int(self.normalized)}'.encode()
+        return listOfSignatures
+
+    def audit(self, database=None):
+        """Performs various checks on the expressions.
+
+        :param database: database object
+        :type database: biogeme.database.Database
+
+        :return: tuple listOfErrors, listOfWarnings
+        :rtype: list(string), list(string)
+
+        """
+        listOfErrors, listOfWarnings = _auditIntegrand(
+            self, self.child, database
+        )
+        e, w = self.weight.audit(database)
+        listOfErrors += e
+        listOfWarnings += w
+        if self.weight.embedExpression(monteCarloExpressions):
             theError = (
                 f'It is not possible to include a MonteCarlo '
                 f'statement in another one: {self}'
@@ -1944,6 +2238,85 @@ class PanelLikelihoodTrajectory(UnaryOperator):
         return listOfErrors, listOfWarnings
 
 
+class LogMonteCarloPanelTrajectory(UnaryOperator):
+    """
+    Log of the Monte-Carlo integration of the likelihood of the
+    sequence of observations of an individual. It is equivalent to
+
+    .. math:: \\log \\left(\\frac{1}{R} \\sum_{r=1}^R \\prod_{t=1}^T
+              P_{tr}\\right),
+
+    that is ``log(MonteCarlo(PanelLikelihoodTrajectory(child)))``, but
+    the product over the observations and the average over the draws
+    are calculated in log space. Therefore, the log likelihood of long
+    sequences of observations does not underflow, and fewer
+    exponentials and logarithms are calculated.
+    """
+
+    def __init__(self, child):
+        """Constructor
+
+        :param child: probability of an observation. If it is an
+            exponential, such as for the logit model, its argument is
+            used directly as the log of the probability.
+        :type child: biogeme.expressions.Expression
+        """
+        self.probability = child  #: probability of an observation
+        if isinstance(child, exp):
+            UnaryOperator.__init__(self, child.child)
+        else:
+            UnaryOperator.__init__(self, log(child))
+
+    def __str__(self):
+        return f'LogMonteCarloPanelTrajectory({self.probability})'
+
+    def countPanelTrajectoryExpressions(self):
+        """Count the number of times the PanelLikelihoodTrajectory
+        is used in the formula.
+        """
+        return 1 + self.child.countPanelTrajectoryExpressions()
+
+    def audit(self, database=None):
+        """Performs various checks on the expressions.
+
+        :param database: database object
+        :type database: biogeme.database.Database
+
+        :return: tuple listOfErrors, listOfWarnings
+        :rtype: list(string), list(string)
+
+        """
+        listOfErrors, listOfWarnings = self.child.audit(database)
+        if database is not None and not database.isPanel():
+            theError = (
+                f'Expression LogMonteCarloPanelTrajectory can '
+                f'only be used with panel data. Use the statement '
+                f'database.panel("IndividualId") to declare the '
+                f'panel structure of the data: {self}'
+            )
+            listOfErrors.append(theError)
+        if not self.child.embedExpression('bioDraws'):
+            theError = (
+                f'The argument of LogMonteCarloPanelTrajectory must '
+                f'contain a bioDraws: {self}'
+            )
+            listOfErrors.append(theError)
+        if self.child.embedExpression(monteCarloExpressions):
+            theError = (
+                f'It is not possible to include a MonteCarlo '
+                f'statement in another one: {self}'
+            )
+            listOfErrors.append(theError)
+        if self.child.embedExpression(panelTrajectoryExpressions):
+            theError = (
+                f'It is not possible to include a '
+                f'PanelLikelihoodTrajectory statement in '
+                f'LogMonteCarloPanelTrajectory: {self}'
+            )
+            listOfErrors.append(theError)
+        return listOfErrors, listOfWarnings
+
+
 class exp(UnaryOperator):
     """
     exponential expression
@@ -2094,20 +2467,34 @@ class Derive(UnaryOperator):
 
 class Integrate(UnaryOperator):
     """
-    Numerical integration
+    Numerical integration from minus infinity to plus infinity, using
+    a Gauss-Hermite quadrature. The nodes and weights are calculated
+    once for each number of nodes, and shared by all the expressions.
     """
 
-    def __init__(self, child, name):
+    def __init__(self, child, name, numberOfNodes=100):
         """Constructor
 
         :param child: first arithmetic expression
         :type child: biogeme.expressions.Expression
         :param name: name of the random variable for the integration.
         :type name: string
+        :param numberOfNodes: number of nodes of the quadrature. Fewer
+            nodes are faster, but less accurate. Default: 100.
+        :type numberOfNodes: int
+
+        :raise biogemeError: if the number of nodes is not a positive
+            integer.
         """
         UnaryOperator.__init__(self, child)
+        if not isinstance(numberOfNodes, int) or numberOfNodes < 1:
+            raise excep.biogemeError(
+                f'The number of nodes must be a positive integer, '
+                f'and not {numberOfNodes}'
+            )
         self.randomVariableName = name
         self.randomVariableIndex = None
+        self.numberOfNodes = numberOfNodes  #: nodes of the quadrature
 
     def audit(self, database=None):
         """Performs various checks on the expressions.
@@ -2210,6 +2597,7 @@ class Integrate(UnaryOperator):
             3. the id of the expression between { }, preceeded by a comma
             4. the id of the children, preceeded by a comma
             5. the index of the randon variable, preceeded by a comma
+            6. the number of nodes of the quadrature, preceeded by a comma
 
         Consider the following expression:
 
@@ -2251,6 +2639,7 @@ class Integrate(UnaryOperator):
         mysignature += f'{{{id(self)}}}'
         mysignature += f',{id(self.child)}'
         mysignature += f',{self.randomVariableIndex}'
+        mysignature += f',{self.numberOfNodes}'
         listOfSignatures += [mysignature.encode()]
         return listOfSignatures
 
@@ -2258,6 +2647,177 @@ class Integrate(UnaryOperator):
         return f'Integrate({self.child}, "{self.randomVariableName}")'
 
 
+class SparseGridIntegrate(UnaryOperator):
+    """
+    Expectation with respect to several independent standard normal
+    random variables, approximated with a Smolyak sparse grid of
+    Gauss-Hermite nodes. Contrarily to
+    :class:`biogeme.expressions.Integrate`, the density of the random
+    variables is accounted for by the quadrature, and must not be
+    included in the child expression.
+
+    The grid of level k is exact for polynomials of total degree up to
+    2k-1. Its number of nodes grows polynomially with the number of
+    random variables, instead of exponentially for nested
+    Integrate expressions. It is designed for mixtures with a small
+    number of normally distributed coefficients, typically 2 to 4.
+    """
+
+    def __init__(self, child, names, level=4):
+        """Constructor
+
+        :param child: arithmetic expression to integrate.
+        :type child: biogeme.expressions.Expression
+
+        :param names: names of the random variables for the
+            integration.
+        :type names: list(string)
+
+        :param level: level of the sparse grid. Default: 4.
+        :type level: int
+
+        :raise biogemeError: if no random variable is given, if a
+            random variable is given more than once, or if the level
+            is not a positive integer.
+        """
+        UnaryOperator.__init__(self, child)
+        if isinstance(names, str):
+            names = [names]
+        if not names:
+            raise excep.biogemeError(
+                'At least one random variable must be integrated.'
+            )
+        if len(set(names)) != len(names):
+            raise excep.biogemeError(
+                f'Random variables integrated more than once: {names}'
+            )
+        if not isinstance(level, int) or level < 1:
+            raise excep.biogemeError(
+                f'The level of the sparse grid must be a positive '
+                f'integer, and not {level}'
+            )
+        self.randomVariableNames = list(names)  #: random variables
+        self.level = level  #: level of the sparse grid
+        self.randomVariableIndices = None  #: indices of random variables
+
+    def audit(self, database=None):
+        """Performs various checks on the expressions.
+
+        :param database: database object
+        :type database: biogeme.database.Database
+
+        :return: tuple listOfErrors, listOfWarnings
+        :rtype: list(string), list(string)
+
+        """
+        listOfErrors, listOfWarnings = self.child.audit(database)
+        randomVariables = self.child.dictOfRandomVariables()
+        for name in self.randomVariableNames:
+            if name not in randomVariables:
+                theError = (
+                    f'The argument of SparseGridIntegrate must contain '
+                    f'the RandomVariable {name}: {self}'
+                )
+                listOfErrors.append(theError)
+        return listOfErrors, listOfWarnings
+
+    def _indices(self, indices):
+        missing = [n for n in self.randomVariableNames if n not in indices]
+        if missing:
+            error_msg = (
+                f'No index is available for random variables {missing}.'
+            )
+            raise excep.biogemeError(error_msg)
+        return [indices[n] for n in self.randomVariableNames]
+
+    def setUniqueId(self, idsOfElementaryExpressions):
+        """Provides a unique id to the elementary expressions. Overloads the
+        generic function
+
+        :param idsOfElementaryExpressions: dictionary mapping the name of
+                the elementary expression with their id.
+        :type idsOfElementaryExpressions: dict(string:int)
+
+        :raise biogemeError: if no index is available for a random variable.
+        """
+        self.randomVariableIndices = self._indices(
+            idsOfElementaryExpressions
+        )
+        self.child.setUniqueId(idsOfElementaryExpressions)
+
+    def setSpecificIndices(
+        self,
+        indicesOfFreeBetas,
+        indicesOfFixedBetas,
+        indicesOfRandomVariables,
+        indicesOfDraws,
+    ):
+        """
+        Provide an index to all elementary expressions, specific to their type
+        Overloads the generic function.
+
+        :param indicesOfFreeBetas: dictionary mapping the name of the
+                               free betas with their index
+        :type indicesOfFreeBetas: dict(string:int)
+
+        :param indicesOfFixedBetas: dictionary mapping the name of the
+                                fixed betas with their index
+        :type indicesOfFixedBetas: dict(string:int)
+
+        :param indicesOfRandomVariables: dictionary mapping the name of the
+                                random variables with their index
+        :type indicesOfRandomVariables: dict(string:int)
+        :param indicesOfDraws: dictionary mapping the name of the draws with
+                            their index
+        :type indicesOfDraws: dict(string:int)
+
+        :raise biogemeError: if no index is available for a random variable.
+
+        """
+        self.randomVariableIndices = self._indices(indicesOfRandomVariables)
+        self.child.setSpecificIndices(
+            indicesOfFreeBetas,
+            indicesOfFixedBetas,
+            indicesOfRandomVariables,
+            indicesOfDraws,
+        )
+
+    def getSignature(self):
+        """The signature of a string characterizing an expression.
+
+        This is designed to be communicated to C++, so that the
+        expression can be reconstructed in this environment.
+
+        The list contains the following elements:
+
+            1. the signatures of the child expression,
+            2. the name of the expression between < >
+            3. the id of the expression between { }, preceeded by a comma
+            4. the id of the child, preceeded by a comma
+            5. the level of the sparse grid, preceeded by a comma
+            6. the index of each random variable, preceeded by a comma
+
+        :return: list of the signatures of an expression and its children.
+        :rtype: list(string)
+        """
+        listOfSignatures = []
+        listOfSignatures += self.child.getSignature()
+        mysignature = f'<{self.getClassName()}>'
+        mysignature += f'{{{id(self)}}}'
+        mysignature += f',{id(self.child)}'
+        mysignature += f',{self.level}'
+        for index in self.randomVariableIndices:
+            mysignature += f',{index}'
+        listOfSignatures += [mysignature.encode()]
+        return listOfSignatures
+
+    def __str__(self):
+        return (
+            f'SparseGridIntegrate({self.child}, '
+            f'{self.randomVariableNames}, level={self.level})'
+        )
+
+
 class Elementary(Expression):
     """Elementary expression.
 
@@ -2507,7 +3067,7 @@ class bioDraws(Elementary):
         """
         listOfErrors = []
         listOfWarnings = []
-        if not self.isContainedIn('MonteCarlo'):
+        if not self.isContainedIn(monteCarloExpressions):
             theError = (
                 f'bioDraws expression must be embedded into a '
                 f'MonteCarlo: {self}'
@@ -2804,7 +3364,7 @@ class RandomVariable(Elementary):
         """
         listOfErrors = []
         listOfWarnings = []
-        if not self.isContainedIn('Integrate'):
+        if not self.isContainedIn(('Integrate', 'SparseGridIntegrate')):
             theError = (
                 f'RandomVariable expression must be embedded into '
                 f'a integrate: {self}'
@@ -10,7 +10,7 @@ Experimental algorithm by Gael Lederrey. Not yet documented.
 # pylint: disable=too-many-arguments, too-many-locals
 
 import numpy as np
-import biogeme.optimization as opt
+import biogeme.algorithms as alg
 import biogeme.messaging as msg
 import biogeme.exceptions as excep
 
@@ -103,11 +103,13 @@ class smoothing:
 def generateCandidateFirstOrder(
     fct, x, f, g, h, batch, delta, dogleg, maxiter, maxDelta, eta1, eta2
 ):
+    # The points of the dogleg method do not depend on the radius.
+    points = alg.cauchyNewtonDogleg(g, h) if dogleg else None
     for k in range(maxiter):
         if dogleg:
-            step, _ = opt.dogleg(g, h, delta)
+            step, _ = alg.dogleg(g, h, delta, points)
         else:
-            step, _ = opt.truncatedConjugateGradient(g, h, delta)
+            step, _ = alg.truncatedConjugateGradient(g, h, delta)
         xc = x + step
         fct.setVariables(xc)
         fc, gc = fct.f_g(batch=batch)
@@ -121,7 +123,7 @@ def generateCandidateFirstOrder(
         else:
             success = True
             y = gc - g
-            hc = opt.bfgs(h, step, y)
+            hc = alg.bfgs(h, step, y)
             if rho >= eta2:
                 # Enlarge the trust region
                 delta = min(2 * delta, maxDelta)
@@ -133,11 +135,13 @@ def generateCandidateSecondOrder(
     fct, x, f, g, h, batch, delta, dogleg, maxiter, maxDelta, eta1, eta2
 ):
     """To be documented..."""
+    # The points of the dogleg method do not depend on the radius.
+    points = alg.cauchyNewtonDogleg(g, h) if dogleg else None
     for k in range(maxiter):
         if dogleg:
-            step, _ = opt.dogleg(g, h, delta)
+            step, _ = alg.dogleg(g, h, delta, points)
         else:
-            step, _ = opt.truncatedConjugateGradient(g, h, delta)
+            step, _ = alg.truncatedConjugateGradient(g, h, delta)
         xc = x + step
         fct.setVariables(xc)
         fc, gc, hc = fct.f_g_h(batch=batch)
@@ -187,6 +191,9 @@ def hamabs(fct, initBetas, fixedBetas, betaIds, bounds, parameters=None):
            algorithm has reached convergence
            (default: :math:`\\varepsilon^{\\frac{1}{3}}`);
          - maxiter: the maximum number of iterations (default: 100).
+         - state: state of the algorithm saved by a previous run, to
+           resume the iterations, including the current batch size
+           (default: None).
 
     :type parameters: dict(string:float or int)
 
@@ -222,6 +229,7 @@ def hamabs(fct, initBetas, fixedBetas, betaIds, bounds, parameters=None):
     dogleg = False
     eta1 = 0.01
     eta2 = 0.9
+    state = None
 
     if parameters is not None:
         if 'tolerance' in parameters:
@@ -244,29 +252,50 @@ def hamabs(fct, initBetas, fixedBetas, betaIds, bounds, parameters=None):
             eta1 = parameters['eta1']
         if 'eta2' in parameters:
             eta2 = parameters['eta2']
+        if 'state' in parameters:
+            state = parameters['state']
 
     logger.detailed("** Optimization: HAMABS")
 
-    avging = smoothing()
-
-    k = 0
-    xk = initBetas
-    batch = firstBatch
-
-    fct.setVariables(xk)
-    f, g, h = fct.f_g_h(batch=batch)
-    avgf, avgg, avgh = avging.add(f, g, h, batch)
-
-    typx = np.ones(np.asarray(xk).shape)
-    typf = max(np.abs(f), 1.0)
-
-    if batch == 1.0:
-        relgrad = opt.relativeGradient(xk, f, g, typx, typf)
-        if relgrad <= tol:
-            message = f"Relative gradient = {relgrad} <= {tol}"
-            return xk, 0, 1, message
-
-    delta = firstRadius
+    relgrad = None
+    if state is not None:
+        alg.checkOptimizationState(state, 'hamabs', len(initBetas))
+        k = state['k']
+        xk = state['x']
+        batch = state['batch']
+        delta = state['delta']
+        avging = state['smoothing']
+        avgf, avgg, avgh = state['f'], state['g'], state['H']
+        typf = state['typf']
+        relgrad = state['relgrad']
+        typx = np.ones(np.asarray(xk).shape)
+    else:
+        avging = smoothing()
+
+        k = 0
+        xk = initBetas
+        batch = firstBatch
+
+        fct.setVariables(xk)
+        f, g, h = fct.f_g_h(batch=batch)
+        avgf, avgg, avgh = avging.add(f, g, h, batch)
+
+        typx = np.ones(np.asarray(xk).shape)
+        typf = max(np.abs(f), 1.0)
+
+        if batch == 1.0:
+            relgrad = alg.relativeGradient(xk, f, g, typx, typf)
+            if relgrad <= tol:
+                message = f"Relative gradient = {relgrad} <= {tol}"
+                messages = {
+                    'Algorithm': 'HAMABS prototype',
+                    'Relative gradient': relgrad,
+                    'Cause of termination': message,
+                    'Number of iterations': 0,
+                }
+                return xk, messages
+
+        delta = firstRadius
     cont = True
 
     maxDelta = np.finfo(float).max
@@ -318,7 +347,7 @@ def hamabs(fct, initBetas, fixedBetas, betaIds, bounds, parameters=None):
             xk = xc
             avgf, avgg, avgh = avging.add(fc, gc, hc, batch)
             if batch == 1.0:
-                relgrad = opt.relativeGradient(xk, avgf, avgg, typx, typf)
+                relgrad = alg.relativeGradient(xk, avgf, avgg, typx, typf)
                 if relgrad <= tol:
                     message = f"Relative gradient = {relgrad} <= {tol}"
                     cont = False
@@ -340,12 +369,27 @@ def hamabs(fct, initBetas, fixedBetas, betaIds, bounds, parameters=None):
                 message = f"Trust region is too small: {delta}"
                 cont = False
 
-        if k == maxiter:
+        if k >= maxiter:
             message = f"Maximum number of iterations reached: {maxiter}"
             cont = False
         logger.detailed(
             f"{k} f={avgf:10.7g} delta={delta:6.2g} batch={100*batch:6.2g}%"
         )
+        fct.saveOptimizationState(
+            {
+                'algorithm': 'hamabs',
+                'k': k,
+                'x': xk,
+                'f': avgf,
+                'g': avgg,
+                'H': avgh,
+                'batch': batch,
+                'delta': delta,
+                'smoothing': avging,
+                'typf': typf,
+                'relgrad': relgrad,
+            }
+        )
 
     logger.detailed(message)
     messages = {
@@ -356,3 +400,31 @@ def hamabs(fct, initBetas, fixedBetas, betaIds, bounds, parameters=None):
     }
 
     return xk, messages
+
+
+def hamabsForBiogeme(fct, initBetas, bounds, parameters=None):
+    """Optimization interface for Biogeme, based on the HAMABS algorithm.
+
+    :param fct: object to calculate the objective function and its derivatives.
+    :type fct: algorithms.functionToMinimize
+
+    :param initBetas: initial value of the parameters.
+    :type initBetas: numpy.array
+
+    :param bounds: list of tuples (ell,u) containing the lower and upper
+        bounds for each free parameter. Note that this algorithm does not
+        support bound constraints. Therefore, all the bounds must be None.
+    :type bounds: list(tuples)
+
+    :param parameters: dict of parameters to be transmitted to the
+        optimization routine. See :func:`hamabs`.
+    :type parameters: dict(string:float or int)
+
+    :return: tuple x, messages, where
+
+            - x is the solution found,
+            - messages is a dictionary reporting various aspects related to
+              the run of the algorithm.
+    :rtype: numpy.array, dict(str:object)
+    """
+    return hamabs(fct, initBetas, None, None, bounds, parameters)
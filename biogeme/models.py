@@ -1689,3 +1689,59 @@ def checkValidityCNL(V, nests):
         )
 
     return ok, message
+
+
+def latentClass(probabilities, likelihoods):
+    """Likelihood of a latent class model, also called discrete
+    mixture.
+
+    The model is defined as
+
+    .. math:: \\sum_{c=1}^C \\pi_c L_c
+
+    where :math:`\\pi_c` is the probability that the individual
+    belongs to class :math:`c`, and :math:`L_c` is the likelihood of
+    the observations of the individual, conditional on belonging to
+    class :math:`c`.
+
+    The latent class structure is recorded in the expression, so that
+    the model can be estimated by the EM algorithm (see
+    :meth:`biogeme.biogeme.BIOGEME.estimateEM`). For this, the log
+    likelihood must be the logarithm of the returned expression,
+    possibly integrated with MonteCarlo.
+
+    :param probabilities: class membership probabilities
+        :math:`\\pi_c`. They must not involve draws.
+    :type probabilities: list(biogeme.expressions.Expression)
+
+    :param likelihoods: likelihood :math:`L_c` of each class.
+    :type likelihoods: list(biogeme.expressions.Expression)
+
+    :return: likelihood of the latent class model.
+    :rtype: biogeme.expressions.Expression
+
+    :raise biogemeError: if the lists do not have the same length, or
+        involve less than two classes.
+
+    Example::
+
+        prob = [PanelLikelihoodTrajectory(models.logit(V[i], av, CHOICE))
+                for i in range(2)]
+        logprob = log(MonteCarlo(
+            models.latentClass([PROB_class0, 1 - PROB_class0], prob)))
+    """
+    if len(probabilities) != len(likelihoods):
+        raise excep.biogemeError(
+            f'Inconsistent number of classes: {len(probabilities)} '
+            f'probabilities and {len(likelihoods)} likelihoods.'
+        )
+    if len(probabilities) < 2:
+        raise excep.biogemeError(
+            'A latent class model must involve at least two classes.'
+        )
+    mixture = expr.bioMultSum(
+        [p * ell for p, ell in zip(probabilities, likelihoods)]
+    )
+    mixture.latentClassProbabilities = list(probabilities)
+    mixture.latentClassLikelihoods = list(likelihoods)
+    return mixture
@@ -169,6 +169,8 @@ def newtonTrustRegionForBiogeme(fct, initBetas, bounds, parameters=None):
           the Dogleg method. If False, it is solved using the
           truncated conjugate gradient method (default: False).
         - radius: the initial radius of the truat region (default: 1.0).
+        - state: state of the algorithm saved by a previous run, to
+          resume the iterations (default: None).
 
     :type parameters: dict(string:float or int)
 
@@ -196,6 +198,7 @@ def newtonTrustRegionForBiogeme(fct, initBetas, bounds, parameters=None):
     maxiter = 100
     applyDogleg = False
     radius = 1.0
+    state = None
     if parameters is not None:
         if 'tolerance' in parameters:
             tol = parameters['tolerance']
@@ -205,6 +208,8 @@ def newtonTrustRegionForBiogeme(fct, initBetas, bounds, parameters=None):
             applyDogleg = parameters['dogleg']
         if 'radius' in parameters:
             radius = parameters['radius']
+        if 'state' in parameters:
+            state = parameters['state']
 
     logger.detailed('** Optimization: Newton with trust region')
     return alg.newtonTrustRegion(
@@ -214,6 +219,7 @@ def newtonTrustRegionForBiogeme(fct, initBetas, bounds, parameters=None):
         eps=tol,
         dl=applyDogleg,
         maxiter=maxiter,
+        state=state,
     )
 
 
@@ -324,6 +330,8 @@ def bfgsTrustRegionForBiogeme(fct, initBetas, bounds, parameters=None):
            BFGS updates. If None, the identity matrix is
            used. Default: None.
 
+         - state: state of the algorithm saved by a previous run, to
+           resume the iterations (default: None).
 
     :type parameters: dict(string:float or int)
 
@@ -351,6 +359,7 @@ def bfgsTrustRegionForBiogeme(fct, initBetas, bounds, parameters=None):
     applyDogleg = False
     radius = 1.0
     initBfgs = None
+    state = None
     if parameters is not None:
         if 'tolerance' in parameters:
             tol = parameters['tolerance']
@@ -362,6 +371,8 @@ def bfgsTrustRegionForBiogeme(fct, initBetas, bounds, parameters=None):
             radius = parameters['radius']
         if 'initBfgs' in parameters:
             initBfgs = parameters['initBfgs']
+        if 'state' in parameters:
+            state = parameters['state']
 
     logger.detailed('** Optimization: BFGS with trust region')
     return alg.bfgsTrustRegion(
@@ -372,6 +383,7 @@ def bfgsTrustRegionForBiogeme(fct, initBetas, bounds, parameters=None):
         eps=tol,
         dl=applyDogleg,
         maxiter=maxiter,
+        state=state,
     )
 
 
@@ -420,6 +432,11 @@ def simpleBoundsNewtonAlgorithmForBiogeme(
         - eta2: threshold for very successful iteration (default 0.9).
         - enlargingFactor: factor used to enlarge the trust region
           during very successful iterations (default 10).
+        - state: state of the algorithm saved by a previous run, to
+          resume the iterations (default: None).
+        - hessianFree: if True, the second derivatives matrix is never
+          formed, and only its products with vectors are calculated
+          (default: False).
 
     :type parameters: dict(string:float or int)
 
@@ -441,6 +458,8 @@ def simpleBoundsNewtonAlgorithmForBiogeme(
     proportionTrueHessian = 1.0
     enlargingFactor = 2
     infeasibleConjugateGradient = False
+    state = None
+    hessianFree = False
 
     # We replace the default value by user defined value, if any.
     if parameters is not None:
@@ -466,8 +485,17 @@ def simpleBoundsNewtonAlgorithmForBiogeme(
             infeasibleConjugateGradient = parameters[
                 'infeasibleConjugateGradient'
             ]
+        if 'state' in parameters:
+            state = parameters['state']
+        if 'hessianFree' in parameters:
+            hessianFree = parameters['hessianFree']
 
-    if proportionTrueHessian == 1.0:
+    if hessianFree:
+        logger.detailed(
+            '** Optimization: Hessian-free Newton with trust region for '
+            'simple bounds'
+        )
+    elif proportionTrueHessian == 1.0:
         logger.detailed(
             '** Optimization: Newton with trust region for simple ' 'bounds'
         )
@@ -495,6 +523,8 @@ def simpleBoundsNewtonAlgorithmForBiogeme(
         eta1=eta1,
         eta2=eta2,
         enlargingFactor=enlargingFactor,
+        state=state,
+        hessianFree=hessianFree,
     )
 
 
@@ -539,6 +569,8 @@ def bioNewton(fct, initBetas, bounds, parameters=None):
         - eta2: threshold for very successful iteration (default 0.9).
         - enlargingFactor: factor used to enlarge the trust region
           during very successful iterations (default 10).
+        - state: state of the algorithm saved by a previous run, to
+          resume the iterations (default: None).
 
     :type parameters: dict(string:float or int)
 
@@ -600,6 +632,8 @@ def bioBfgs(fct, initBetas, bounds, parameters=None):
         - eta2: threshold for very successful iteration (default 0.9).
         - enlargingFactor: factor used to enlarge the trust region
           during very successful iterations (default 10).
+        - state: state of the algorithm saved by a previous run, to
+          resume the iterations (default: None).
 
     :type parameters: dict(string:float or int)
 
@@ -618,3 +652,272 @@ def bioBfgs(fct, initBetas, bounds, parameters=None):
     return simpleBoundsNewtonAlgorithmForBiogeme(
         fct, initBetas, bounds, parameters
     )
+
+
+def bioNewtonHessianFree(fct, initBetas, bounds, parameters=None):
+    """Optimization interface for Biogeme, based on Newton's method
+    with simple bounds, where the second derivatives matrix is never
+    formed. The conjugate gradient algorithm solving the trust region
+    subproblem uses only products of the matrix with vectors, each
+    costing about two evaluations of the gradient.
+
+    :param fct: object to calculate the objective function and its derivatives.
+    :type fct: algorithms.functionToMinimize
+
+    :param initBetas: initial value of the parameters.
+    :type initBetas: numpy.array
+
+    :param bounds: list of tuples (ell,u) containing the lower and upper
+                   bounds for each free parameter.
+    :type bounds: list(tuples)
+
+    :param parameters: dict of parameters to be transmitted to the
+        optimization routine. See
+        :func:`simpleBoundsNewtonAlgorithmForBiogeme`.
+    :type parameters: dict(string:float or int)
+
+    :return: x, messages
+
+        - x is the solution generated by the algorithm,
+        - messages is a dictionary describing information about the lagorithm
+
+    :rtype: numpay.array, dict(str:object)
+
+    """
+    if parameters is None:
+        parameters = {'hessianFree': True}
+    else:
+        parameters['hessianFree'] = True
+    return simpleBoundsNewtonAlgorithmForBiogeme(
+        fct, initBetas, bounds, parameters
+    )
+
+
+def lbfgsbForBiogeme(fct, initBetas, bounds, parameters=None):
+    """Optimization interface for Biogeme, based on the limited
+    memory BFGS algorithm with simple bounds. It is designed for
+    models with many parameters, as the memory and the time per
+    iteration are linear in the number of parameters.
+
+    :param fct: object to calculate the objective function and its derivatives.
+    :type fct: algorithms.functionToMinimize
+
+    :param initBetas: initial value of the parameters.
+    :type initBetas: numpy.array
+
+    :param bounds: list of tuples (ell,u) containing the lower and upper
+                   bounds for each free parameter.
+    :type bounds: list(tuples)
+
+    :param parameters: dict of parameters to be transmitted to the
+        optimization routine:
+
+        - tolerance: when the relative projected gradient is below
+          that threshold, the algorithm has reached convergence
+          (default:  :math:`\\varepsilon^{\\frac{1}{3}}`);
+        - steptol: the algorithm stops when the relative change in x
+          is below this threshold. Default: :math:`10^{-5}`
+        - maxiter: the maximum number of iterations (default: 1000).
+        - memory: number of pairs of vectors used to approximate the
+          second derivatives matrix (default: 10).
+        - state: state of the algorithm saved by a previous run, to
+          resume the iterations (default: None).
+
+    :type parameters: dict(string:float or int)
+
+    :return: x, messages
+
+        - x is the solution generated by the algorithm,
+        - messages is a dictionary describing information about the
+          algorithm
+
+    :rtype: numpy.array, dict(str:object)
+
+    """
+    tol = np.finfo(np.float64).eps ** 0.3333
+    steptol = 1.0e-5
+    maxiter = 1000
+    memory = 10
+    state = None
+    if parameters is not None:
+        if 'tolerance' in parameters:
+            tol = parameters['tolerance']
+        if 'steptol' in parameters:
+            steptol = parameters['steptol']
+        if 'maxiter' in parameters:
+            maxiter = parameters['maxiter']
+        if 'memory' in parameters:
+            memory = parameters['memory']
+        if 'state' in parameters:
+            state = parameters['state']
+
+    logger.detailed(
+        f'** Optimization: limited memory BFGS ({memory}) for simple bounds'
+    )
+    return alg.lbfgsb(
+        fct,
+        bounds=alg.bioBounds(bounds),
+        x0=initBetas,
+        memory=memory,
+        tol=tol,
+        steptol=steptol,
+        maxiter=maxiter,
+        state=state,
+    )
+
+
+def _stochasticGradientForBiogeme(method, fct, initBetas, bounds, parameters):
+    firstBatch = 0.01
+    batchGrowth = 2.0
+    maximumBatch = 0.1
+    iterationsPerBatch = 50
+    learningRate = 0.01
+    maxiter = 10000
+    polish = True
+    tol = np.finfo(np.float64).eps ** 0.3333
+    polishMaxiter = 1000
+    state = None
+    if parameters is not None:
+        if 'firstBatch' in parameters:
+            firstBatch = parameters['firstBatch']
+        if 'batchGrowth' in parameters:
+            batchGrowth = parameters['batchGrowth']
+        if 'maximumBatch' in parameters:
+            maximumBatch = parameters['maximumBatch']
+        if 'iterationsPerBatch' in parameters:
+            iterationsPerBatch = parameters['iterationsPerBatch']
+        if 'learningRate' in parameters:
+            learningRate = parameters['learningRate']
+        if 'maxiter' in parameters:
+            maxiter = parameters['maxiter']
+        if 'polish' in parameters:
+            polish = parameters['polish']
+        if 'tolerance' in parameters:
+            tol = parameters['tolerance']
+        if 'polishMaxiter' in parameters:
+            polishMaxiter = parameters['polishMaxiter']
+        if 'state' in parameters:
+            state = parameters['state']
+
+    logger.detailed(
+        f'** Optimization: {method.upper()} with increasing batches '
+        f'starting at {100*firstBatch}% of the data'
+    )
+    return alg.stochasticGradient(
+        fct,
+        bounds=alg.bioBounds(bounds),
+        x0=initBetas,
+        method=method,
+        firstBatch=firstBatch,
+        batchGrowth=batchGrowth,
+        maximumBatch=maximumBatch,
+        iterationsPerBatch=iterationsPerBatch,
+        learningRate=learningRate,
+        maxiter=maxiter,
+        polish=polish,
+        tol=tol,
+        polishMaxiter=polishMaxiter,
+        state=state,
+    )
+
+
+def adamForBiogeme(fct, initBetas, bounds, parameters=None):
+    """Optimization interface for Biogeme, based on the mini-batch
+    Adam algorithm with projection onto the bounds. The size of the
+    batches increases until the full sample is reached, and the
+    solution is then polished by Newton's method with simple
+    bounds. It is designed for very large samples, where each
+    evaluation of the derivatives on the full sample is expensive.
+
+    :param fct: object to calculate the objective function and its derivatives.
+    :type fct: algorithms.functionToMinimize
+
+    :param initBetas: initial value of the parameters.
+    :type initBetas: numpy.array
+
+    :param bounds: list of tuples (ell,u) containing the lower and upper
+                   bounds for each free parameter.
+    :type bounds: list(tuples)
+
+    :param parameters: dict of parameters to be transmitted to the
+        optimization routine:
+
+        - firstBatch: share of the data used for the first batch
+          (default: 0.01).
+        - batchGrowth: factor multiplying the size of the batch
+          (default: 2).
+        - maximumBatch: the stochastic iterations stop when the size
+          of the batch exceeds this share of the data (default: 0.1).
+        - iterationsPerBatch: number of iterations with the first
+          batch. The number of iterations with larger batches is
+          such that each size processes the same amount of data
+          (default: 50).
+        - learningRate: step size (default: 0.01).
+        - maxiter: the maximum number of stochastic iterations
+          (default: 10000).
+        - polish: if True, the solution is polished by Newton's
+          method on the full sample (default: True).
+        - tolerance: when the relative projected gradient is below
+          that threshold, the polish has reached convergence
+          (default:  :math:`\\varepsilon^{\\frac{1}{3}}`);
+        - polishMaxiter: the maximum number of iterations of the
+          polish (default: 1000).
+        - state: state of the algorithm saved by a previous run, to
+          resume the iterations (default: None).
+
+    :type parameters: dict(string:float or int)
+
+    :return: x, messages
+
+        - x is the solution generated by the algorithm,
+        - messages is a dictionary describing information about the
+          algorithm
+
+    :rtype: numpy.array, dict(str:object)
+
+    """
+    return _stochasticGradientForBiogeme(
+        'adam', fct, initBetas, bounds, parameters
+    )
+
+
+def svrgForBiogeme(fct, initBetas, bounds, parameters=None):
+    """Optimization interface for Biogeme, based on the stochastic
+    variance reduced gradient algorithm with projection onto the
+    bounds. The gradient at a snapshot is calculated on batches of
+    increasing size, and corrects the gradients calculated on small
+    batches of fixed size. When the batch is large enough, the
+    solution is polished by Newton's method with simple bounds on the
+    full sample.
+
+    :param fct: object to calculate the objective function and its derivatives.
+    :type fct: algorithms.functionToMinimize
+
+    :param initBetas: initial value of the parameters.
+    :type initBetas: numpy.array
+
+    :param bounds: list of tuples (ell,u) containing the lower and upper
+                   bounds for each free parameter.
+    :type bounds: list(tuples)
+
+    :param parameters: dict of parameters to be transmitted to the
+        optimization routine. See :func:`adamForBiogeme`. The
+        learningRate is the step size used until the second
+        snapshot. Afterwards, it is adapted by the Barzilai-Borwein
+        rule. The stochastic gradients are calculated on batches of
+        size firstBatch, and iterationsPerBatch iterations are
+        performed for each snapshot.
+    :type parameters: dict(string:float or int)
+
+    :return: x, messages
+
+        - x is the solution generated by the algorithm,
+        - messages is a dictionary describing information about the
+          algorithm
+
+    :rtype: numpy.array, dict(str:object)
+
+    """
+    return _stochasticGradientForBiogeme(
+        'svrg', fct, initBetas, bounds, parameters
+    )
@@ -265,6 +265,11 @@ class rawResults:
         self.drawsProcessingTime = theModel.drawsProcessingTime
         """Time needed to process the draws"""
 
+        self.simulationDiagnostic = theModel.simulationDiagnostic
+        """Contribution of the simulation error to the log likelihood,
+        or None. Dict with the entries 'standardError', 'bias' and
+        'averageNumberOfDraws'."""
+
         self.gradientNorm = linalg.norm(self.g) if self.g is not None else None
         """Norm of the gradient"""
 
@@ -786,6 +791,20 @@ class bioResults:
                 [f'{i}: {k}' for i, k in self.data.typesOfDraws.items()],
                 '',
             )
+            diagnostic = getattr(self.data, 'simulationDiagnostic', None)
+            if diagnostic is not None:
+                d['Average number of draws per observation'] = (
+                    diagnostic['averageNumberOfDraws'],
+                    '.1f',
+                )
+                d['Simulation std. error of the log likelihood'] = (
+                    diagnostic['standardError'],
+                    '.3g',
+                )
+                d['Simulation bias of the log likelihood'] = (
+                    diagnostic['bias'],
+                    '.3g',
+                )
         if self.data.bootstrap is not None:
             d['Bootstrapping time'] = self.data.bootstrap_time, ''
         d['Nbr of threads'] = self.data.numberOfThreads, ''
@@ -95,7 +95,123 @@ def findiff_H(theFunction, x):
     return H
 
 
-def checkDerivatives(theFunction, x, names=None, logg=False):
+def findiffSteps(x, central=True):
+    """Calculates the steps for finite differences. The step of each
+    variable is proportional to its magnitude, or to one if it is
+    smaller. The factor is the cubic root of the machine epsilon for
+    central differences, and its square root for forward
+    differences, which balances the truncation and the rounding
+    errors. Each step is adjusted so that the perturbed value is
+    exactly representable.
+
+    :param x: point where the derivatives are approximated.
+    :type x: numpy.array
+
+    :param central: if True, the steps are designed for central
+        differences. Default: True.
+    :type central: bool
+
+    :return: steps, same dimension as x.
+    :rtype: numpy.array
+    """
+    x = np.asarray(x, dtype=float)
+    factor = np.finfo(float).eps ** (1.0 / 3.0 if central else 0.5)
+    h = factor * np.maximum(np.abs(x), 1.0)
+    return (x + h) - x
+
+
+def _findiffSeveral(theFunctions, x, central):
+    """Evaluates the function at all the points needed by the finite
+    differences, using one call, and calculates the differences of
+    the results.
+
+    :return: steps, differences of the values, and differences of the
+        gradients (one row per variable) if available. The
+        differences are not divided by the steps.
+    :rtype: numpy.array, numpy.array, numpy.array
+    """
+    x = np.asarray(x, dtype=float)
+    n = len(x)
+    h = findiffSteps(x, central)
+    if central:
+        points = np.concatenate([x + np.diag(h), x - np.diag(h)])
+    else:
+        points = np.concatenate([x + np.diag(h), [x]])
+        h = h / 2.0
+    result = theFunctions(points)
+    f = np.asarray(result[0])
+    df = f[:n] - f[n:]
+    if len(result) < 2:
+        return h, df, None
+    g = np.asarray(result[1])
+    return h, df, g[:n] - g[n:]
+
+
+def findiff_g_several(theFunctions, x, central=True):
+    """Calculates the gradient of a function :math:`f` using finite
+    differences. All the perturbed points are evaluated by one call
+    of the function, so that they can be processed together, for
+    instance in parallel.
+
+    :param theFunctions: A function object that takes a matrix as an
+                        argument, where each row is a point, and
+                        returns a tuple. The first element of the
+                        tuple is the vector of values of the function
+                        :math:`f` at each point. The other elements
+                        are not used.
+    :type theFunctions: function
+
+    :param x: argument of the function
+    :type x: numpy.array
+
+    :param central: if True, central differences are used, requiring
+        2n evaluations. If False, forward differences are used,
+        requiring n+1 evaluations. Default: True.
+    :type central: bool
+
+    :return: numpy vector, same dimension as x, containing the gradient
+       calculated by finite differences.
+    :rtype: numpy.array
+    """
+    h, df, _ = _findiffSeveral(theFunctions, x, central)
+    return df / (2.0 * h)
+
+
+def findiff_H_several(theFunctions, x, central=True):
+    """Calculates the hessian of a function :math:`f` using finite
+    differences of its gradient. It requires n+1 (forward) or 2n
+    (central) evaluations of the gradient, instead of :math:`n^2`
+    evaluations of the function, and all of them are performed by
+    one call of the function.
+
+    :param theFunctions: A function object that takes a matrix as an
+                        argument, where each row is a point, and
+                        returns a tuple. The first element of the
+                        tuple is the vector of values of the function
+                        :math:`f` at each point, and the second is the
+                        matrix of gradients, one row per point. The
+                        other elements are not used.
+    :type theFunctions: function
+
+    :param x: argument of the function
+    :type x: numpy.array
+
+    :param central: if True, central differences are used. If False,
+        forward differences are used. Default: True.
+    :type central: bool
+
+    :return: numpy matrix containing the hessian calculated by
+             finite differences. It is symmetric.
+    :rtype: numpy.array
+    """
+    h, _, dg = _findiffSeveral(theFunctions, x, central)
+    H = (dg / (2.0 * h)[:, np.newaxis]).T
+    return (H + H.T) / 2.0
+
+
+def checkDerivatives(
+    theFunction, x, names=None, logg=False, theFunctions=None
+):
     """Verifies the analytical derivatives of a function by comparing
     them with finite difference approximations.
 
@@ -117,6 +233,14 @@ def checkDerivatives(theFunction, x, names=None, logg=False):
     :param logg: if True, messages will be displayed.
     :type logg: bool
 
+    :param theFunctions: A function object that takes a matrix as an
+        argument, where each row is a point, and returns a tuple with
+        the vector of values of the function, and the matrix of
+        gradients. If not None, the finite difference approximations
+        are calculated by central differences, from one call of this
+        function. If None, forward differences are used. Default: None.
+    :type theFunctions: function
+
 
     :return: tuple f, g, h, gdiff, hdiff where
 
@@ -133,7 +257,13 @@ def checkDerivatives(theFunction, x, names=None, logg=False):
     """
     x = np.array(x, dtype=float)
     f, g, h = theFunction(x)
-    g_num = findiff_g(theFunction, x)
+    if theFunctions is None:
+        g_num = findiff_g(theFunction, x)
+        h_num = findiff_H(theFunction, x)
+    else:
+        steps, df, dg = _findiffSeveral(theFunctions, x, central=True)
+        g_num = df / (2.0 * steps)
+        h_num = (dg / (2.0 * steps)[:, np.newaxis]).T
     gdiff = g - g_num
     if logg:
         if names is None:
@@ -142,7 +272,6 @@ def checkDerivatives(theFunction, x, names=None, logg=False):
         for k, v in enumerate(gdiff):
             logger.detailed(f'{names[k]:15}\t{g[k]:+E}\t{g_num[k]:+E}\t{v:+E}')
 
-    h_num = findiff_H(theFunction, x)
     hdiff = h - h_num
     if logg:
         logger.detailed('Row\t\tCol\t\tHessian\tFinDiff\t\tDifference')
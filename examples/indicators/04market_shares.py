@@ -40,66 +40,35 @@ simulate = {
 }
 
 biogeme = bio.BIOGEME(database, simulate)
-simulated_values = biogeme.simulate(results.getBetaValues())
+
+# The simulator is prepared once. The market shares are calculated as
+# weighted sums of the individual probabilities, reduced directly by
+# the simulation engine. The per-row probabilities are not needed.
+simulator = biogeme.prepareSimulation(results.getBetaValues())
+sums = {
+    'car': ['weight', 'Prob. car'],
+    'PT': ['weight', 'Prob. PT'],
+    'SM': ['weight', 'Prob. SM'],
+    'total': 'weight',
+}
+ratios = {
+    'Market share car': ('car', 'total'),
+    'Market share PT': ('PT', 'total'),
+    'Market share SM': ('SM', 'total'),
+}
+shares = simulator.simulateAggregates(sums, ratios)
 
 # We also calculate confidence intervals for the calculated quantities
 
 betas = biogeme.freeBetaNames
 b = results.getBetasForSensitivityAnalysis(betas)
-left, right = biogeme.confidenceIntervals(b, 0.9)
-
-
-# Market shares are calculated using the weighted mean of the
-# individual probabilities
-
-# Alternative car
-simulated_values['Weighted prob. car'] = (
-    simulated_values['weight'] * simulated_values['Prob. car']
-)
-left['Weighted prob. car'] = left['weight'] * left['Prob. car']
-right['Weighted prob. car'] = (
-    right['weight'] * right['Prob. car']
-)
-
-marketShare_car = simulated_values['Weighted prob. car'].mean()
-marketShare_car_left = left['Weighted prob. car'].mean()
-marketShare_car_right = right['Weighted prob. car'].mean()
-
-# Alternative public transportation
-simulated_values['Weighted prob. PT'] = (
-    simulated_values['weight'] * simulated_values['Prob. PT']
-)
-left['Weighted prob. PT'] = left['weight'] * left['Prob. PT']
-right['Weighted prob. PT'] = right['weight'] * right['Prob. PT']
-
-marketShare_PT = simulated_values['Weighted prob. PT'].mean()
-marketShare_PT_left = left['Weighted prob. PT'].mean()
-marketShare_PT_right = right['Weighted prob. PT'].mean()
-
-# Alternative slow modes
-simulated_values['Weighted prob. SM'] = (
-    simulated_values['weight'] * simulated_values['Prob. SM']
-)
-left['Weighted prob. SM'] = left['weight'] * left['Prob. SM']
-right['Weighted prob. SM'] = right['weight'] * right['Prob. SM']
-
-marketShare_SM = simulated_values['Weighted prob. SM'].mean()
-marketShare_SM_left = left['Weighted prob. SM'].mean()
-marketShare_SM_right = right['Weighted prob. SM'].mean()
+left, right = simulator.aggregateConfidenceIntervals(b, sums, ratios)
 
 # Reporting
-print(
-    f'Market share for car: {100*marketShare_car:.1f}% '
-    f'[{100*marketShare_car_left:.1f}%, '
-    f'{100*marketShare_car_right:.1f}%]'
-)
-print(
-    f'Market share for PT:  {100*marketShare_PT:.1f}% '
-    f'[{100*marketShare_PT_left:.1f}%, '
-    f'{100*marketShare_PT_right:.1f}%]'
-)
-print(
-    f'Market share for SM:   {100*marketShare_SM:.1f}% '
-    f'[{100*marketShare_SM_left:.1f}%, '
-    f'{100*marketShare_SM_right:.1f}%]'
-)
+for alt in ['car', 'PT', 'SM']:
+    name = f'Market share {alt}'
+    print(
+        f'Market share for {alt}: {100*shares.loc["Total", name]:.1f}% '
+        f'[{100*left.loc["Total", name]:.1f}%, '
+        f'{100*right.loc["Total", name]:.1f}%]'
+    )
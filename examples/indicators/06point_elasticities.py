@@ -156,3 +156,23 @@ print(
     f'Aggregate direct point elasticity of SM wrt distance: '
     f'{direct_elas_term_sm_dist:.3g}'
 )
+
+# The same aggregate elasticities, together with all the cross
+# elasticities, can be obtained in one pass over the data, without
+# defining a Derive expression for each pair of alternative and
+# attribute.
+simulate_probabilities = {
+    'weight': normalizedWeight,
+    'Prob. car': prob_CAR,
+    'Prob. public transportation': prob_PT,
+    'Prob. slow modes': prob_SM,
+}
+biogeme_probabilities = bio.BIOGEME(database, simulate_probabilities)
+simulator = biogeme_probabilities.prepareSimulation(results.getBetaValues())
+disaggregate_elasticities, aggregate_elasticities = simulator.elasticities(
+    formulas=['Prob. public transportation', 'Prob. car', 'Prob. slow modes'],
+    columns=['TimePT', 'MarginalCostPT', 'TimeCar', 'CostCarCHF', 'distance_km'],
+    weight='weight',
+)
+print('Aggregate direct and cross point elasticities:')
+print(aggregate_elasticities)
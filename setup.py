@@ -93,10 +93,15 @@ source = ['src/biogeme.cc',
           'src/bioString.cc',
           'src/bioExprNormalCdf.cc',
           'src/bioExprIntegrate.cc',
-          'src/bioExprGaussHermite.cc',
+          'src/bioGaussHermiteRule.cc',
+          'src/bioSparseGrid.cc',
+          'src/bioExprSparseGridIntegrate.cc',
           'src/bioExprRandomVariable.cc',
           'src/bioExprMontecarlo.cc',
+          'src/bioExprMontecarloControlVariate.cc',
+          'src/bioExprMontecarloImportance.cc',
           'src/bioExprPanelTrajectory.cc',
+          'src/bioExprLogMontecarloPanelTrajectory.cc',
           'src/bioExprDraws.cc',
           'src/bioExprDerive.cc',
           'src/bioExprMin.cc',
@@ -131,9 +136,8 @@ source = ['src/biogeme.cc',
           'src/bioSeveralExpressions.cc',
           'src/bioExceptions.cc',
           'src/bioDerivatives.cc',
-          'src/bioVectorOfDerivatives.cc',
-          'src/bioGaussHermite.cc',
-          'src/bioGhFunction.cc']
+          'src/bioDrawsDerivatives.cc',
+          'src/bioVectorOfDerivatives.cc']
 
 
 extra_compile_args = ['-std=c++11', '-Wall']
@@ -0,0 +1,357 @@
+//-*-c++-*------------------------------------------------------------
+//
+// File name : bioDrawsDerivatives.cc
+// @date   Mon Oct 19 19:52:13 2026
+// @author Michel Bierlaire
+// @version Revision 1.0
+//
+//--------------------------------------------------------------------
+
+#include "bioDrawsDerivatives.h"
+#include <cmath>
+#include "bioConst.h"
+
+bioDrawsDerivatives::bioDrawsDerivatives() :
+  constant(true), with_g(false), with_h(false), size(0) {
+
+}
+
+void bioDrawsDerivatives::resize(bioUInt n,
+				 bioUInt numberOfDraws,
+				 bioBoolean c,
+				 bioBoolean gradient,
+				 bioBoolean hessian) {
+  constant = c ;
+  with_g = gradient ;
+  with_h = hessian ;
+  size = numberOfDraws ;
+  bioUInt m = constant ? 1 : numberOfDraws ;
+  f.resize(m) ;
+  if (gradient) {
+    g.resize(n) ;
+    for (bioUInt i = 0 ; i < n ; ++i) {
+      g[i].resize(m) ;
+    }
+  }
+  if (hessian) {
+    h.resize(n) ;
+    for (bioUInt i = 0 ; i < n ; ++i) {
+      h[i].resize(n) ;
+      for (bioUInt j = i ; j < n ; ++j) {
+	h[i][j].resize(m) ;
+      }
+    }
+  }
+  mask.assign(n,false) ;
+  nonzero.clear() ;
+}
+
+bioUInt bioDrawsDerivatives::stride() const {
+  return constant ? 0 : 1 ;
+}
+
+bioBoolean bioDrawsDerivatives::isNonzero(bioUInt i) const {
+  return mask[i] ;
+}
+
+void bioDrawsDerivatives::setNonzero(const std::vector<bioUInt>& indices) {
+  mask.assign(mask.size(),false) ;
+  for (bioUInt k = 0 ; k < indices.size() ; ++k) {
+    mask[indices[k]] = true ;
+  }
+  nonzero.clear() ;
+  for (bioUInt i = 0 ; i < mask.size() ; ++i) {
+    if (mask[i]) {
+      nonzero.push_back(i) ;
+    }
+  }
+}
+
+void bioDrawsDerivatives::setAllNonzero() {
+  mask.assign(mask.size(),true) ;
+  nonzero.resize(mask.size()) ;
+  for (bioUInt i = 0 ; i < mask.size() ; ++i) {
+    nonzero[i] = i ;
+  }
+}
+
+void bioDrawsDerivatives::setNonzero(const bioDrawsDerivatives& a,
+				     const bioDrawsDerivatives& b) {
+  setNonzero(a.nonzero) ;
+  addNonzero(b) ;
+}
+
+void bioDrawsDerivatives::addNonzero(const bioDrawsDerivatives& a) {
+  bioBoolean changed(false) ;
+  for (bioUInt k = 0 ; k < a.nonzero.size() ; ++k) {
+    if (!mask[a.nonzero[k]]) {
+      mask[a.nonzero[k]] = true ;
+      changed = true ;
+    }
+  }
+  if (changed) {
+    nonzero.clear() ;
+    for (bioUInt i = 0 ; i < mask.size() ; ++i) {
+      if (mask[i]) {
+	nonzero.push_back(i) ;
+      }
+    }
+  }
+}
+
+void bioDrawsDerivatives::chainRule(const bioDrawsDerivatives& a,
+				    const std::vector<bioReal>& d1,
+				    const std::vector<bioReal>* d2) {
+  if (!with_g) {
+    return ;
+  }
+  setNonzero(a.nonzero) ;
+  bioUInt sa = a.stride() ;
+  bioUInt m = nonzero.size() ;
+  for (bioUInt p = 0 ; p < m ; ++p) {
+    bioUInt i = nonzero[p] ;
+    const bioReal* ag = a.g[i].data() ;
+    bioReal* zg = g[i].data() ;
+    for (bioUInt r = 0 ; r < size ; ++r) {
+      zg[r] = d1[r] * ag[sa*r] ;
+    }
+  }
+  if (!with_h) {
+    return ;
+  }
+  for (bioUInt p = 0 ; p < m ; ++p) {
+    bioUInt i = nonzero[p] ;
+    const bioReal* agi = a.g[i].data() ;
+    for (bioUInt q = p ; q < m ; ++q) {
+      bioUInt j = nonzero[q] ;
+      const bioReal* agj = a.g[j].data() ;
+      const bioReal* ah = a.h[i][j].data() ;
+      bioReal* zh = h[i][j].data() ;
+      if (d2 == NULL) {
+	for (bioUInt r = 0 ; r < size ; ++r) {
+	  zh[r] = d1[r] * ah[sa*r] ;
+	}
+      }
+      else {
+	const bioReal* dd = d2->data() ;
+	for (bioUInt r = 0 ; r < size ; ++r) {
+	  zh[r] = d1[r] * ah[sa*r] + dd[r] * agi[sa*r] * agj[sa*r] ;
+	}
+      }
+    }
+  }
+}
+
+void bioDrawsDerivatives::chainRule(const bioDrawsDerivatives& a,
+				    const bioDrawsDerivatives& b,
+				    const std::vector<bioReal>& da,
+				    const std::vector<bioReal>& db,
+				    const std::vector<bioReal>* daa,
+				    const std::vector<bioReal>* dab,
+				    const std::vector<bioReal>* dbb) {
+  if (!with_g) {
+    return ;
+  }
+  setNonzero(a,b) ;
+  bioUInt sa = a.stride() ;
+  bioUInt sb = b.stride() ;
+  bioUInt m = nonzero.size() ;
+  for (bioUInt p = 0 ; p < m ; ++p) {
+    bioUInt i = nonzero[p] ;
+    bioReal* zg = g[i].data() ;
+    if (a.isNonzero(i)) {
+      const bioReal* ag = a.g[i].data() ;
+      for (bioUInt r = 0 ; r < size ; ++r) {
+	zg[r] = da[r] * ag[sa*r] ;
+      }
+    }
+    else {
+      for (bioUInt r = 0 ; r < size ; ++r) {
+	zg[r] = 0.0 ;
+      }
+    }
+    if (b.isNonzero(i)) {
+      const bioReal* bg = b.g[i].data() ;
+      for (bioUInt r = 0 ; r < size ; ++r) {
+	zg[r] += db[r] * bg[sb*r] ;
+      }
+    }
+  }
+  if (!with_h) {
+    return ;
+  }
+  for (bioUInt p = 0 ; p < m ; ++p) {
+    bioUInt i = nonzero[p] ;
+    bioBoolean ai = a.isNonzero(i) ;
+    bioBoolean bi = b.isNonzero(i) ;
+    for (bioUInt q = p ; q < m ; ++q) {
+      bioUInt j = nonzero[q] ;
+      bioBoolean aj = a.isNonzero(j) ;
+      bioBoolean bj = b.isNonzero(j) ;
+      bioReal* zh = h[i][j].data() ;
+      if (ai && aj) {
+	const bioReal* ah = a.h[i][j].data() ;
+	for (bioUInt r = 0 ; r < size ; ++r) {
+	  zh[r] = da[r] * ah[sa*r] ;
+	}
+	if (daa != NULL) {
+	  const bioReal* dd = daa->data() ;
+	  const bioReal* agi = a.g[i].data() ;
+	  const bioReal* agj = a.g[j].data() ;
+	  for (bioUInt r = 0 ; r < size ; ++r) {
+	    zh[r] += dd[r] * agi[sa*r] * agj[sa*r] ;
+	  }
+	}
+      }
+      else {
+	for (bioUInt r = 0 ; r < size ; ++r) {
+	  zh[r] = 0.0 ;
+	}
+      }
+      if (bi && bj) {
+	const bioReal* bh = b.h[i][j].data() ;
+	for (bioUInt r = 0 ; r < size ; ++r) {
+	  zh[r] += db[r] * bh[sb*r] ;
+	}
+	if (dbb != NULL) {
+	  const bioReal* dd = dbb->data() ;
+	  const bioReal* bgi = b.g[i].data() ;
+	  const bioReal* bgj = b.g[j].data() ;
+	  for (bioUInt r = 0 ; r < size ; ++r) {
+	    zh[r] += dd[r] * bgi[sb*r] * bgj[sb*r] ;
+	  }
+	}
+      }
+      if (dab != NULL) {
+	const bioReal* dd = dab->data() ;
+	if (ai && bj) {
+	  const bioReal* agi = a.g[i].data() ;
+	  const bioReal* bgj = b.g[j].data() ;
+	  for (bioUInt r = 0 ; r < size ; ++r) {
+	    zh[r] += dd[r] * agi[sa*r] * bgj[sb*r] ;
+	  }
+	}
+	if (aj && bi) {
+	  const bioReal* agj = a.g[j].data() ;
+	  const bioReal* bgi = b.g[i].data() ;
+	  for (bioUInt r = 0 ; r < size ; ++r) {
+	    zh[r] += dd[r] * agj[sa*r] * bgi[sb*r] ;
+	  }
+	}
+      }
+    }
+  }
+}
+
+void bioDrawsDerivatives::logLogit(const std::vector<const bioDrawsDerivatives*>& V,
+				   bioUInt chosen) {
+  bioUInt K = V.size() ;
+  const bioDrawsDerivatives* Vc = V[chosen] ;
+  // The utilities are shifted, as in the calculation for one draw,
+  // to avoid overflows.
+  maximum.assign(size,-bioMaxReal) ;
+  for (bioUInt k = 0 ; k < K ; ++k) {
+    bioUInt s = V[k]->stride() ;
+    const bioReal* vf = V[k]->f.data() ;
+    for (bioUInt r = 0 ; r < size ; ++r) {
+      if (vf[s*r] > maximum[r]) {
+	maximum[r] = vf[s*r] ;
+      }
+    }
+  }
+  for (bioUInt r = 0 ; r < size ; ++r) {
+    maximum[r] = ceil(maximum[r] / 10.0) * 10.0 ;
+  }
+  probabilities.resize(K) ;
+  denominator.assign(size,0.0) ;
+  for (bioUInt k = 0 ; k < K ; ++k) {
+    probabilities[k].resize(size) ;
+    bioUInt s = V[k]->stride() ;
+    const bioReal* vf = V[k]->f.data() ;
+    for (bioUInt r = 0 ; r < size ; ++r) {
+      probabilities[k][r] = exp(vf[s*r] - maximum[r]) ;
+      denominator[r] += probabilities[k][r] ;
+    }
+  }
+  bioUInt sc = Vc->stride() ;
+  for (bioUInt r = 0 ; r < size ; ++r) {
+    f[r] = Vc->f[sc*r] - log(denominator[r]) - maximum[r] ;
+  }
+  if (!with_g) {
+    return ;
+  }
+  for (bioUInt k = 0 ; k < K ; ++k) {
+    for (bioUInt r = 0 ; r < size ; ++r) {
+      probabilities[k][r] /= denominator[r] ;
+    }
+  }
+  setNonzero(std::vector<bioUInt>()) ;
+  for (bioUInt k = 0 ; k < K ; ++k) {
+    addNonzero(*V[k]) ;
+  }
+  bioUInt m = nonzero.size() ;
+  // Derivatives of the log of the denominator.
+  weightedSum.resize(mask.size()) ;
+  for (bioUInt p = 0 ; p < m ; ++p) {
+    bioUInt i = nonzero[p] ;
+    weightedSum[i].assign(size,0.0) ;
+    bioReal* w = weightedSum[i].data() ;
+    for (bioUInt k = 0 ; k < K ; ++k) {
+      if (V[k]->isNonzero(i)) {
+	bioUInt s = V[k]->stride() ;
+	const bioReal* vg = V[k]->g[i].data() ;
+	const bioReal* pk = probabilities[k].data() ;
+	for (bioUInt r = 0 ; r < size ; ++r) {
+	  w[r] += pk[r] * vg[s*r] ;
+	}
+      }
+    }
+    bioReal* zg = g[i].data() ;
+    if (Vc->isNonzero(i)) {
+      const bioReal* cg = Vc->g[i].data() ;
+      for (bioUInt r = 0 ; r < size ; ++r) {
+	zg[r] = cg[sc*r] - w[r] ;
+      }
+    }
+    else {
+      for (bioUInt r = 0 ; r < size ; ++r) {
+	zg[r] = - w[r] ;
+      }
+    }
+  }
+  if (!with_h) {
+    return ;
+  }
+  for (bioUInt p = 0 ; p < m ; ++p) {
+    bioUInt i = nonzero[p] ;
+    const bioReal* wi = weightedSum[i].data() ;
+    for (bioUInt q = p ; q < m ; ++q) {
+      bioUInt j = nonzero[q] ;
+      const bioReal* wj = weightedSum[j].data() ;
+      bioReal* zh = h[i][j].data() ;
+      if (Vc->isNonzero(i) && Vc->isNonzero(j)) {
+	const bioReal* ch = Vc->h[i][j].data() ;
+	for (bioUInt r = 0 ; r < size ; ++r) {
+	  zh[r] = ch[sc*r] + wi[r] * wj[r] ;
+	}
+      }
+      else {
+	for (bioUInt r = 0 ; r < size ; ++r) {
+	  zh[r] = wi[r] * wj[r] ;
+	}
+      }
+      for (bioUInt k = 0 ; k < K ; ++k) {
+	if (V[k]->isNonzero(i) && V[k]->isNonzero(j)) {
+	  bioUInt s = V[k]->stride() ;
+	  const bioReal* pk = probabilities[k].data() ;
+	  const bioReal* vgi = V[k]->g[i].data() ;
+	  const bioReal* vgj = V[k]->g[j].data() ;
+	  const bioReal* vh = V[k]->h[i][j].data() ;
+	  for (bioUInt r = 0 ; r < size ; ++r) {
+	    zh[r] -= pk[r] * (vgi[s*r] * vgj[s*r] + vh[s*r]) ;
+	  }
+	}
+      }
+    }
+  }
+}
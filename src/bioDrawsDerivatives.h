@@ -0,0 +1,85 @@
+//-*-c++-*------------------------------------------------------------
+//
+// File name : bioDrawsDerivatives.h
+// @date   Mon Oct 19 19:40:26 2026
+// @author Michel Bierlaire
+// @version Revision 1.0
+//
+//--------------------------------------------------------------------
+
+#ifndef bioDrawsDerivatives_h
+#define bioDrawsDerivatives_h
+
+#include <vector>
+#include "bioTypes.h"
+
+// Values and derivatives of an expression for a block of draws of the
+// same individual. The values for the successive draws are
+// contiguous, so that the operations across draws are vectorized:
+//
+//   f[r], g[i][r], h[i][j][r] for j >= i.
+//
+// If the expression does not depend on the draws, the values are
+// stored only once, and the stride is zero.
+//
+// The derivatives are calculated and stored only for the literals
+// listed in nonzero. The others are zero, whatever is stored.
+
+class bioDrawsDerivatives {
+ public:
+  bioDrawsDerivatives() ;
+  void resize(bioUInt n,
+	      bioUInt numberOfDraws,
+	      bioBoolean constant,
+	      bioBoolean gradient,
+	      bioBoolean hessian) ;
+  bioUInt stride() const ;
+  bioBoolean isNonzero(bioUInt i) const ;
+  void setNonzero(const std::vector<bioUInt>& indices) ;
+  void setAllNonzero() ;
+  // Union of the nonzero literals of a and b.
+  void setNonzero(const bioDrawsDerivatives& a, const bioDrawsDerivatives& b) ;
+  void addNonzero(const bioDrawsDerivatives& a) ;
+
+  // Derivatives of F(a), where d1 and d2 are the first and second
+  // derivatives of F for each draw. d2 may be NULL if it is zero.
+  void chainRule(const bioDrawsDerivatives& a,
+		 const std::vector<bioReal>& d1,
+		 const std::vector<bioReal>* d2) ;
+
+  // Derivatives of F(a,b), from the first and second derivatives of F
+  // for each draw. The second derivatives may be NULL if they are
+  // zero.
+  void chainRule(const bioDrawsDerivatives& a,
+		 const bioDrawsDerivatives& b,
+		 const std::vector<bioReal>& da,
+		 const std::vector<bioReal>& db,
+		 const std::vector<bioReal>* daa,
+		 const std::vector<bioReal>* dab,
+		 const std::vector<bioReal>* dbb) ;
+
+  // Value and derivatives of the log of the logit model, from the
+  // utilities V of the available alternatives, the chosen one being
+  // V[chosen].
+  void logLogit(const std::vector<const bioDrawsDerivatives*>& V,
+		bioUInt chosen) ;
+
+ public:
+  bioBoolean constant ;
+  bioBoolean with_g ;
+  bioBoolean with_h ;
+  bioUInt size ;
+  std::vector<bioReal> f ;
+  std::vector<std::vector<bioReal> > g ;
+  std::vector<std::vector<std::vector<bioReal> > > h ;
+  std::vector<bioUInt> nonzero ;
+ private:
+  std::vector<bioBoolean> mask ;
+  // Workspace
+  std::vector<bioReal> maximum ;
+  std::vector<bioReal> denominator ;
+  std::vector<std::vector<bioReal> > probabilities ;
+  std::vector<std::vector<bioReal> > weightedSum ;
+};
+
+#endif
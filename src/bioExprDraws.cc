@@ -29,7 +29,7 @@ void bioExprDraws::setDrawIndex(bioUInt* d) {
   drawIndex = d ;
 }
 
-bioReal bioExprDraws::getLiteralValue() const {
+void bioExprDraws::checkDrawIndex(bioUInt d) const {
   if (draws == NULL) {
       throw bioExceptNullPointer(__FILE__,__LINE__,"draws") ;
   }
@@ -49,17 +49,51 @@ bioReal bioExprDraws::getLiteralValue() const {
   if (*individualIndex >= sampleSize) {
     throw bioExceptOutOfRange<bioUInt>(__FILE__,__LINE__,*individualIndex,0,sampleSize-1) ;
   }
-  if (drawIndex == NULL) {
-    throw bioExceptions(__FILE__,__LINE__,"Draw index is not defined. It may be caused by the use of draws outside a Montecarlo statement.") ;
-  }
-  if (*drawIndex >= numberOfDraws) {
-    throw bioExceptOutOfRange<bioUInt>(__FILE__,__LINE__,*drawIndex,0,numberOfDraws-1) ;
+  if (d >= numberOfDraws) {
+    throw bioExceptOutOfRange<bioUInt>(__FILE__,__LINE__,d,0,numberOfDraws-1) ;
   }
   if (theDrawId == bioBadId || theDrawId >= numberOfDrawVariables) {
     throw bioExceptOutOfRange<bioUInt>(__FILE__,__LINE__,theDrawId,0,numberOfDrawVariables-1) ;
   }
+}
 
+bioReal bioExprDraws::getLiteralValue() const {
+  if (drawIndex == NULL) {
+    throw bioExceptions(__FILE__,__LINE__,"Draw index is not defined. It may be caused by the use of draws outside a Montecarlo statement.") ;
+  }
+  checkDrawIndex(*drawIndex) ;
   return (*draws)[*individualIndex][*drawIndex][theDrawId] ;
 
 }
 
+bioBoolean bioExprDraws::dependsOnDraws() {
+  return true ;
+}
+
+const bioDrawsDerivatives* bioExprDraws::calculateValuesAndDerivativesForDraws(const std::vector<bioUInt>& literalIds,
+									       bioUInt firstDraw,
+									       bioUInt blockSize,
+									       bioBoolean gradient,
+									       bioBoolean hessian) {
+  checkDrawIndex(firstDraw + blockSize - 1) ;
+  bioUInt n = literalIds.size() ;
+  theDrawsDerivatives.resize(n,blockSize,false,gradient,hessian) ;
+  const std::vector< std::vector<bioReal> >& theDraws = (*draws)[*individualIndex] ;
+  for (bioUInt r = 0 ; r < blockSize ; ++r) {
+    theDrawsDerivatives.f[r] = theDraws[firstDraw + r][theDrawId] ;
+  }
+  if (gradient) {
+    std::vector<bioUInt> indices ;
+    for (bioUInt i = 0 ; i < n ; ++i) {
+      if (literalIds[i] == theLiteralId) {
+	theDrawsDerivatives.g[i].assign(blockSize,1.0) ;
+	if (hessian) {
+	  theDrawsDerivatives.h[i][i].assign(blockSize,0.0) ;
+	}
+	indices.push_back(i) ;
+      }
+    }
+    theDrawsDerivatives.setNonzero(indices) ;
+  }
+  return &theDrawsDerivatives ;
+}
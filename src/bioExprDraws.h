@@ -21,7 +21,15 @@ class bioExprDraws: public bioExprLiteral {
   virtual bioString print(bioBoolean hp = false) const ;
   virtual void setDrawIndex(bioUInt* d) ;
   virtual bioReal getLiteralValue() const ;
+  virtual const bioDrawsDerivatives* calculateValuesAndDerivativesForDraws(const std::vector<bioUInt>& literalIds,
+									   bioUInt firstDraw,
+									   bioUInt blockSize,
+									   bioBoolean gradient,
+									   bioBoolean hessian) ;
+  virtual bioBoolean dependsOnDraws() ;
 protected:
+  // Checks that the draw number d of the current individual exists.
+  void checkDrawIndex(bioUInt d) const ;
   bioUInt theDrawId ;
   bioUInt* drawIndex ;
 };
@@ -58,6 +58,30 @@ const bioDerivatives* bioExprExp::getValueAndDerivatives(std::vector<bioUInt> li
   return &theDerivatives ;
 }
 
+const bioDrawsDerivatives* bioExprExp::calculateValuesAndDerivativesForDraws(const std::vector<bioUInt>& literalIds,
+									     bioUInt firstDraw,
+									     bioUInt blockSize,
+									     bioBoolean gradient,
+									     bioBoolean hessian) {
+  if (!dependsOnDraws()) {
+    return bioExpression::calculateValuesAndDerivativesForDraws(literalIds,firstDraw,blockSize,gradient,hessian) ;
+  }
+  const bioDrawsDerivatives* c = child->getValuesAndDerivativesForDraws(literalIds,firstDraw,blockSize,gradient,hessian) ;
+  theDrawsDerivatives.resize(literalIds.size(),blockSize,false,gradient,hessian) ;
+  bioUInt s = c->stride() ;
+  for (bioUInt k = 0 ; k < blockSize ; ++k) {
+    if (c->f[s*k] <= bioLogMaxReal::the()) {
+      theDrawsDerivatives.f[k] = exp(c->f[s*k]) ;
+    }
+    else {
+      theDrawsDerivatives.f[k] = std::numeric_limits<bioReal>::max() ;
+    }
+  }
+  // The first and second derivatives of exp are the value itself.
+  theDrawsDerivatives.chainRule(*c,theDrawsDerivatives.f,&theDrawsDerivatives.f) ;
+  return &theDrawsDerivatives ;
+}
+
 bioString bioExprExp::print(bioBoolean hp) const {
   std::stringstream str ; 
   str << "exp(" << child->print(hp) << ")";
@@ -12,12 +12,13 @@
 #include <cmath>
 #include "bioDebug.h"
 #include "bioExceptions.h"
-#include "bioExprGaussHermite.h"
+#include "bioGaussHermiteRule.h"
 
 
-bioExprIntegrate::bioExprIntegrate(bioExpression* c, bioUInt id) :
-  child(c), rvId(id) {
+bioExprIntegrate::bioExprIntegrate(bioExpression* c, bioUInt id, bioUInt numberOfNodes) :
+  child(c), rvId(id), rvValue(0.0) {
   listOfChildren.push_back(c) ;
+  theRule = bioGaussHermiteRule::get(numberOfNodes) ;
 }
 bioExprIntegrate::~bioExprIntegrate() {
 
@@ -32,32 +33,45 @@ const bioDerivatives* bioExprIntegrate::getValueAndDerivatives(std::vector<bioUI
 
   theDerivatives.resize(literalIds.size()) ;
 
-  bioExprGaussHermite theGh(child,literalIds,rvId,gradient,hessian) ;   
-  bioGaussHermite theGhAlgo(&theGh) ;
-  std::vector<bioReal> r = theGhAlgo.integrate() ;
-  theDerivatives.f = r[0] ;
+  theDerivatives.setEverythingToZero() ;
+
+  // The values of the child are accumulated directly, with the
+  // weights multiplied by exp(x*x), so that no intermediate storage
+  // is needed.
+  child->setRandomVariableValuePtr(rvId,&rvValue) ;
   bioUInt n = literalIds.size() ;
+  const std::vector<bioReal>& nodes = theRule->getNodes() ;
+  const std::vector<bioReal>& weights = theRule->getUnweightedWeights() ;
+  for (bioUInt p = 0 ; p < theRule->size() ; ++p) {
+    rvValue = nodes[p] ;
+    const bioDerivatives* childResult = child->getValueAndDerivatives(literalIds,gradient,hessian) ;
+    bioReal w = weights[p] ;
+    theDerivatives.f += w * childResult->f ;
+    if (gradient) {
+      for (bioUInt i = 0 ; i < n ; ++i) {
+	theDerivatives.g[i] += w * childResult->g[i] ;
+	if (hessian) {
+	  for (bioUInt j = i ; j < n ; ++j) {
+	    theDerivatives.h[i][j] += w * childResult->h[i][j] ;
+	  }
+	}
+      }
+    }
+  }
   if (gradient) {
     for (bioUInt j = 0 ; j < n ; ++j) {
-      if (std::isfinite(r[j+1])) {
-	theDerivatives.g[j] = r[j+1] ;
-      }
-      else {
+      if (!std::isfinite(theDerivatives.g[j])) {
 	theDerivatives.g[j] = bioMaxReal ;
       }
     }
   }
   if (hessian) {
-    bioUInt index = 1 + theDerivatives.g.size() ;
     for (bioUInt i = 0 ; i < n ; ++i) {
       for (bioUInt j = i ; j < n ; ++j) {
-	if (std::isfinite(r[index])) {
-	  theDerivatives.h[i][j] = theDerivatives.h[j][i] = r[index] ;
-	}
-	else {
-	  theDerivatives.h[i][j] = theDerivatives.h[j][i] = bioMaxReal ;
+	if (!std::isfinite(theDerivatives.h[i][j])) {
+	  theDerivatives.h[i][j] = bioMaxReal ;
 	}
-	++index ;
+	theDerivatives.h[j][i] = theDerivatives.h[i][j] ;
       }
     }
   }
@@ -67,7 +81,13 @@ const bioDerivatives* bioExprIntegrate::getValueAndDerivatives(std::vector<bioUI
 
 bioString bioExprIntegrate::print(bioBoolean hp) const {
   std::stringstream str ; 
-  str << "Integrate(" << child->print(hp) << "," << rvId << ")" ;
+  str << "Integrate(" << child->print(hp) << "," << rvId << ",nodes=" << theRule->size() << ")" ;
   return str.str() ;
 
 }
+
+// The integrals involved in the integrand depend on the random
+// variable, and cannot be calculated outside the quadrature.
+void bioExprIntegrate::collectJointIntegrals(std::vector<bioExprMontecarlo*>& integrals) {
+
+}
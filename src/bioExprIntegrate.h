@@ -13,18 +13,27 @@
 #include "bioExpression.h"
 #include "bioString.h"
 
+class bioGaussHermiteRule ;
+
+// Integral of c from -infinity to +infinity with respect to a random
+// variable, approximated with a Gauss-Hermite quadrature.
 class bioExprIntegrate: public bioExpression {
  public:
-  bioExprIntegrate(bioExpression* c, bioUInt lid) ;
+  bioExprIntegrate(bioExpression* c, bioUInt lid, bioUInt numberOfNodes = 100) ;
   ~bioExprIntegrate() ;
   virtual const bioDerivatives* getValueAndDerivatives(std::vector<bioUInt> literalIds,
 						 bioBoolean gradient,
 						 bioBoolean hessian) ;
 
   virtual bioString print(bioBoolean hp = false) const ;
+  virtual void collectJointIntegrals(std::vector<bioExprMontecarlo*>& integrals) ;
 
  protected:
   bioExpression* child ;
   bioUInt rvId ;
+  // The rule is shared by all the expressions with the same number of
+  // nodes, in all the threads.
+  const bioGaussHermiteRule* theRule ;
+  bioReal rvValue ;
 };
 #endif
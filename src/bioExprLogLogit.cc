@@ -164,6 +164,75 @@ const bioDerivatives* bioExprLogLogit::getValueAndDerivatives(std::vector<bioUIn
   return &theDerivatives ;
 }
 
+const bioDrawsDerivatives* bioExprLogLogit::calculateValuesAndDerivativesForDraws(const std::vector<bioUInt>& literalIds,
+										  bioUInt firstDraw,
+										  bioUInt blockSize,
+										  bioBoolean gradient,
+										  bioBoolean hessian) {
+  // The vectorized calculation applies when only the utilities
+  // depend on the draws.
+  bioBoolean vectorized = dependsOnDraws() && !choice->dependsOnDraws() ;
+  for (std::map<bioUInt,bioExpression*>::iterator i = availabilities.begin() ;
+       i != availabilities.end() ;
+       ++i) {
+    if (i->second->dependsOnDraws()) {
+      vectorized = false ;
+    }
+  }
+  if (!vectorized) {
+    return bioExpression::calculateValuesAndDerivativesForDraws(literalIds,firstDraw,blockSize,gradient,hessian) ;
+  }
+  bioUInt chosen = bioUInt(choice->getValue()) ;
+  std::vector<const bioDrawsDerivatives*> Vs ;
+  bioUInt chosenIndex(0) ;
+  bioBoolean found(false) ;
+  for (std::map<bioUInt,bioExpression*>::iterator i = availabilities.begin() ;
+       i != availabilities.end() ;
+       ++i) {
+    bioReal av = i->second->getValue() ;
+    if (av == 0.0) {
+      if (i->first == chosen) {
+	theDrawsDerivatives.resize(literalIds.size(),blockSize,true,gradient,hessian) ;
+	if (std::numeric_limits<bioReal>::has_infinity) {
+	  theDrawsDerivatives.f[0] = -std::numeric_limits<bioReal>::infinity() ;
+	}
+	else {
+	  theDrawsDerivatives.f[0] = std::numeric_limits<bioReal>::lowest() ;
+	}
+	return &theDrawsDerivatives ;
+      }
+    }
+    else {
+      std::map<bioUInt,bioExpression*>::iterator theUtil = utilities.find(i->first) ;
+      if (theUtil == utilities.end()) {
+	std::stringstream str ;
+	str << "Inconsistent dictionaries. Alternative " << i->first << " defined in the availabilities, and not in the utilities" ;
+	throw bioExceptions(__FILE__,__LINE__,str.str()) ;
+      }
+      if (i->first == chosen) {
+	chosenIndex = Vs.size() ;
+	found = true ;
+      }
+      Vs.push_back(theUtil->second->getValuesAndDerivativesForDraws(literalIds,firstDraw,blockSize,gradient,hessian)) ;
+    }
+  }
+  if (!found) {
+    std::stringstream str ;
+    str << "Alternative "
+	<< chosen
+	<< " is not known. The alternatives that have been defined are" ;
+    for (std::map<bioUInt,bioExpression*>::iterator i = utilities.begin() ;
+	 i != utilities.end() ;
+	 ++i) {
+      str << " " << i->first ;
+    }
+    throw bioExceptions(__FILE__,__LINE__,str.str()) ;
+  }
+  theDrawsDerivatives.resize(literalIds.size(),blockSize,false,gradient,hessian) ;
+  theDrawsDerivatives.logLogit(Vs,chosenIndex) ;
+  return &theDrawsDerivatives ;
+}
+
 bioString bioExprLogLogit::print(bioBoolean hp) const {
   std::stringstream str ;
   str << "Logit[" << choice->print(hp) << "](" ;
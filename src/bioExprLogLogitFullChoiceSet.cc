@@ -125,6 +125,44 @@ const bioDerivatives* bioExprLogLogitFullChoiceSet::getValueAndDerivatives(std::
   return &theDerivatives ;
 }
 
+const bioDrawsDerivatives* bioExprLogLogitFullChoiceSet::calculateValuesAndDerivativesForDraws(const std::vector<bioUInt>& literalIds,
+											       bioUInt firstDraw,
+											       bioUInt blockSize,
+											       bioBoolean gradient,
+											       bioBoolean hessian) {
+  if (!dependsOnDraws() || choice->dependsOnDraws()) {
+    return bioExpression::calculateValuesAndDerivativesForDraws(literalIds,firstDraw,blockSize,gradient,hessian) ;
+  }
+  bioUInt chosen = bioUInt(choice->getValue()) ;
+  std::vector<const bioDrawsDerivatives*> Vs ;
+  bioUInt chosenIndex(0) ;
+  bioBoolean found(false) ;
+  for (std::map<bioUInt,bioExpression*>::iterator theUtil = utilities.begin() ;
+       theUtil != utilities.end() ;
+       ++theUtil) {
+    if (theUtil->first == chosen) {
+      chosenIndex = Vs.size() ;
+      found = true ;
+    }
+    Vs.push_back(theUtil->second->getValuesAndDerivativesForDraws(literalIds,firstDraw,blockSize,gradient,hessian)) ;
+  }
+  if (!found) {
+    std::stringstream str ;
+    str << "Alternative "
+	<< chosen
+	<< " is not known. The alternatives that have been defined are" ;
+    for (std::map<bioUInt,bioExpression*>::iterator i = utilities.begin() ;
+	 i != utilities.end() ;
+	 ++i) {
+      str << " " << i->first ;
+    }
+    throw bioExceptions(__FILE__,__LINE__,str.str()) ;
+  }
+  theDrawsDerivatives.resize(literalIds.size(),blockSize,false,gradient,hessian) ;
+  theDrawsDerivatives.logLogit(Vs,chosenIndex) ;
+  return &theDrawsDerivatives ;
+}
+
 bioString bioExprLogLogitFullChoiceSet::print(bioBoolean hp) const {
   std::stringstream str ;
   str << "LogitFullChoiceSet[" << choice->print(hp) << "](" ;
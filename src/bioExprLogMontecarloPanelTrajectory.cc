@@ -0,0 +1,209 @@
+//-*-c++-*------------------------------------------------------------
+//
+// File name : bioExprLogMontecarloPanelTrajectory.cc
+// @date   Mon Oct 19 21:11:52 2026
+// @author Michel Bierlaire
+// @version Revision 1.0
+//
+//--------------------------------------------------------------------
+
+#include "bioExprLogMontecarloPanelTrajectory.h"
+#include <algorithm>
+#include <cmath>
+#include <limits>
+#include <sstream>
+#include "bioExceptions.h"
+#include "bioDebug.h"
+
+const bioUInt bioExprLogMontecarloPanelTrajectory::drawsBlockSize ;
+
+bioExprLogMontecarloPanelTrajectory::bioExprLogMontecarloPanelTrajectory(bioExpression* c) :
+  child(c) {
+  listOfChildren.push_back(c) ;
+}
+
+bioExprLogMontecarloPanelTrajectory::~bioExprLogMontecarloPanelTrajectory() {
+
+}
+
+// For each draw r, the log likelihood of the trajectory is
+//
+//   s_r = sum_t child_tr,
+//
+// and the value of the expression is the log-sum-exp
+//
+//   L = log(sum_r exp(s_r) / R).
+//
+// With the weights w_r = exp(s_r - L) / R, which sum up to one, the
+// derivatives are
+//
+//   dL = sum_r w_r ds_r,
+//   d2L = sum_r w_r (d2s_r + ds_r ds_r') - dL dL'.
+//
+// The sums are accumulated relative to the largest s_r found so far,
+// and rescaled each time it increases.
+const bioDerivatives* bioExprLogMontecarloPanelTrajectory::getValueAndDerivatives(std::vector<bioUInt> literalIds,
+										   bioBoolean gradient,
+										   bioBoolean hessian) {
+
+  theDerivatives.with_g = gradient ;
+  theDerivatives.with_h = hessian ;
+
+  bioUInt n = literalIds.size() ;
+  theDerivatives.resize(n) ;
+  theDerivatives.setEverythingToZero() ;
+
+  if (numberOfDraws == 0) {
+    throw bioExceptions(__FILE__,__LINE__,"Cannot perform Monte-Carlo integration with no draws.") ;
+  }
+  if (dataMap == NULL) {
+    throw bioExceptNullPointer(__FILE__,__LINE__,"data map") ;
+  }
+  if (individualIndex == NULL) {
+    throw bioExceptNullPointer(__FILE__,__LINE__,"individual index") ;
+  }
+  if (*individualIndex >= dataMap->size()) {
+    throw bioExceptOutOfRange<bioUInt>(__FILE__,__LINE__,*individualIndex,0,dataMap->size() - 1) ;
+  }
+
+  child->setRowIndex(&theRowIndex) ;
+  child->setDrawIndex(&drawIndex) ;
+  bioReal largest = -std::numeric_limits<bioReal>::infinity() ;
+  bioReal sum(0.0) ;
+  for (bioUInt first = 0 ; first < numberOfDraws ; first += drawsBlockSize) {
+    bioUInt blockSize = std::min(drawsBlockSize,numberOfDraws - first) ;
+    trajectory.resize(n,blockSize,false,gradient,hessian) ;
+    std::vector<bioReal>& s = trajectory.f ;
+    std::vector<std::vector<bioReal> >& ds = trajectory.g ;
+    std::vector<std::vector<std::vector<bioReal> > >& d2s = trajectory.h ;
+    s.assign(blockSize,0.0) ;
+    for (theRowIndex = (*dataMap)[*individualIndex][0]  ; theRowIndex <= (*dataMap)[*individualIndex][1] ; ++theRowIndex) {
+      try {
+	const bioDrawsDerivatives* c = child->getValuesAndDerivativesForDraws(literalIds,first,blockSize,gradient,hessian) ;
+	bioUInt sc = c->stride() ;
+	for (bioUInt k = 0 ; k < blockSize ; ++k) {
+	  s[k] += c->f[sc*k] ;
+	}
+	if (gradient) {
+	  // The literals that appear for the first time start from zero.
+	  for (bioUInt p = 0 ; p < c->nonzero.size() ; ++p) {
+	    bioUInt i = c->nonzero[p] ;
+	    if (!trajectory.isNonzero(i)) {
+	      ds[i].assign(blockSize,0.0) ;
+	      if (hessian) {
+		for (bioUInt j = 0 ; j < n ; ++j) {
+		  if (j >= i) {
+		    d2s[i][j].assign(blockSize,0.0) ;
+		  }
+		  else {
+		    d2s[j][i].assign(blockSize,0.0) ;
+		  }
+		}
+	      }
+	    }
+	  }
+	  trajectory.addNonzero(*c) ;
+	  bioUInt m = c->nonzero.size() ;
+	  for (bioUInt p = 0 ; p < m ; ++p) {
+	    bioUInt i = c->nonzero[p] ;
+	    const bioReal* cg = c->g[i].data() ;
+	    for (bioUInt k = 0 ; k < blockSize ; ++k) {
+	      ds[i][k] += cg[sc*k] ;
+	    }
+	    if (hessian) {
+	      for (bioUInt q = p ; q < m ; ++q) {
+		bioUInt j = c->nonzero[q] ;
+		const bioReal* ch = c->h[i][j].data() ;
+		for (bioUInt k = 0 ; k < blockSize ; ++k) {
+		  d2s[i][j][k] += ch[sc*k] ;
+		}
+	      }
+	    }
+	  }
+	}
+      }
+      catch(bioExceptions& e) {
+	std::stringstream str ;
+	str << "Error for data entry " << theRowIndex << ": " << e.what() ;
+	throw bioExceptions(__FILE__,__LINE__,str.str()) ;
+      }
+    }
+    bioReal blockLargest = *std::max_element(s.begin(),s.end()) ;
+    if (blockLargest == -std::numeric_limits<bioReal>::infinity()) {
+      // The likelihood is zero for all the draws of the block.
+      continue ;
+    }
+    if (blockLargest > largest) {
+      bioReal scale = exp(largest - blockLargest) ;
+      sum *= scale ;
+      if (gradient) {
+	for (bioUInt i = 0 ; i < n ; ++i) {
+	  theDerivatives.g[i] *= scale ;
+	  if (hessian) {
+	    for (bioUInt j = i ; j < n ; ++j) {
+	      theDerivatives.h[i][j] *= scale ;
+	    }
+	  }
+	}
+      }
+      largest = blockLargest ;
+    }
+    std::vector<bioReal> w(blockSize) ;
+    for (bioUInt k = 0 ; k < blockSize ; ++k) {
+      w[k] = exp(s[k] - largest) ;
+      sum += w[k] ;
+    }
+    if (gradient) {
+      bioUInt m = trajectory.nonzero.size() ;
+      for (bioUInt p = 0 ; p < m ; ++p) {
+	bioUInt i = trajectory.nonzero[p] ;
+	for (bioUInt k = 0 ; k < blockSize ; ++k) {
+	  theDerivatives.g[i] += w[k] * ds[i][k] ;
+	}
+	if (hessian) {
+	  for (bioUInt q = p ; q < m ; ++q) {
+	    bioUInt j = trajectory.nonzero[q] ;
+	    for (bioUInt k = 0 ; k < blockSize ; ++k) {
+	      theDerivatives.h[i][j] += w[k] * (d2s[i][j][k] + ds[i][k] * ds[j][k]) ;
+	    }
+	  }
+	}
+      }
+    }
+  }
+
+  if (sum == 0.0) {
+    // The likelihood is zero for all the draws. As for the log of
+    // zero, a very low value is returned.
+    theDerivatives.setEverythingToZero() ;
+    theDerivatives.f = -std::numeric_limits<bioReal>::max() / 2.0 ;
+    return &theDerivatives ;
+  }
+  theDerivatives.f = largest + log(sum / bioReal(numberOfDraws)) ;
+  if (gradient) {
+    for (bioUInt i = 0 ; i < n ; ++i) {
+      theDerivatives.g[i] /= sum ;
+    }
+    if (hessian) {
+      for (bioUInt i = 0 ; i < n ; ++i) {
+	for (bioUInt j = i ; j < n ; ++j) {
+	  theDerivatives.h[i][j] = theDerivatives.h[i][j] / sum - theDerivatives.g[i] * theDerivatives.g[j] ;
+	  theDerivatives.h[j][i] = theDerivatives.h[i][j] ;
+	}
+      }
+    }
+  }
+  return &theDerivatives ;
+}
+
+bioString bioExprLogMontecarloPanelTrajectory::print(bioBoolean hp) const {
+  std::stringstream str ;
+  str << "LogMonteCarloPanelTrajectory(" << child->print(hp) << ")";
+  return str.str() ;
+}
+
+// As for PanelTrajectory, the row index pointer is not propagated, as
+// the rows of the individual are managed by the expression itself.
+void bioExprLogMontecarloPanelTrajectory::setRowIndex(bioUInt* i) {
+
+}
@@ -0,0 +1,49 @@
+//-*-c++-*------------------------------------------------------------
+//
+// File name : bioExprLogMontecarloPanelTrajectory.h
+// @date   Mon Oct 19 21:04:37 2026
+// @author Michel Bierlaire
+// @version Revision 1.0
+//
+//--------------------------------------------------------------------
+
+#ifndef bioExprLogMontecarloPanelTrajectory_h
+#define bioExprLogMontecarloPanelTrajectory_h
+
+#include "bioExpression.h"
+#include "bioString.h"
+
+// Log of the average over the draws of the likelihood of the sequence
+// of observations of an individual, where the child is the log of the
+// likelihood of each observation. It is equivalent to
+//
+//   log(Montecarlo(PanelTrajectory(exp(child))))
+//
+// but the product over the observations and the average over the
+// draws are both calculated in log space, so that they do not
+// underflow for long sequences.
+
+class bioExprLogMontecarloPanelTrajectory: public bioExpression {
+ public:
+  bioExprLogMontecarloPanelTrajectory(bioExpression* c) ;
+  ~bioExprLogMontecarloPanelTrajectory() ;
+  bioExprLogMontecarloPanelTrajectory(const bioExprLogMontecarloPanelTrajectory&) = delete;
+  void operator=(const bioExprLogMontecarloPanelTrajectory&) = delete;
+  virtual const bioDerivatives* getValueAndDerivatives(std::vector<bioUInt> literalIds,
+						 bioBoolean gradient,
+						 bioBoolean hessian) ;
+
+  virtual bioString print(bioBoolean hp = false) const ;
+  virtual void setRowIndex(bioUInt* i) ;
+
+ protected:
+  // Number of draws for which the integrand is calculated together.
+  static const bioUInt drawsBlockSize = 64 ;
+  bioUInt theRowIndex ;
+  bioUInt drawIndex ;
+  bioExpression* child ;
+  // Log likelihood of the trajectory, and its derivatives, for a
+  // block of draws.
+  bioDrawsDerivatives trajectory ;
+};
+#endif
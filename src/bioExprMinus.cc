@@ -48,6 +48,28 @@ const bioDerivatives* bioExprMinus::getValueAndDerivatives(std::vector<bioUInt>
   return &theDerivatives ;
 }
 
+const bioDrawsDerivatives* bioExprMinus::calculateValuesAndDerivativesForDraws(const std::vector<bioUInt>& literalIds,
+									       bioUInt firstDraw,
+									       bioUInt blockSize,
+									       bioBoolean gradient,
+									       bioBoolean hessian) {
+  if (!dependsOnDraws()) {
+    return bioExpression::calculateValuesAndDerivativesForDraws(literalIds,firstDraw,blockSize,gradient,hessian) ;
+  }
+  const bioDrawsDerivatives* l = left->getValuesAndDerivativesForDraws(literalIds,firstDraw,blockSize,gradient,hessian) ;
+  const bioDrawsDerivatives* r = right->getValuesAndDerivativesForDraws(literalIds,firstDraw,blockSize,gradient,hessian) ;
+  theDrawsDerivatives.resize(literalIds.size(),blockSize,false,gradient,hessian) ;
+  bioUInt sl = l->stride() ;
+  bioUInt sr = r->stride() ;
+  for (bioUInt k = 0 ; k < blockSize ; ++k) {
+    theDrawsDerivatives.f[k] = l->f[sl*k] - r->f[sr*k] ;
+  }
+  std::vector<bioReal> one(blockSize,1.0) ;
+  std::vector<bioReal> minusOne(blockSize,-1.0) ;
+  theDrawsDerivatives.chainRule(*l,*r,one,minusOne,NULL,NULL,NULL) ;
+  return &theDrawsDerivatives ;
+}
+
 bioString bioExprMinus::print(bioBoolean hp) const {
   std::stringstream str ;
   if (hp) {
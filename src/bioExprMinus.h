@@ -20,6 +20,11 @@ class bioExprMinus: public bioExpression {
   virtual const bioDerivatives* getValueAndDerivatives(std::vector<bioUInt> literalIds,
 						 bioBoolean gradient, 
 						bioBoolean hessian) ;
+  virtual const bioDrawsDerivatives* calculateValuesAndDerivativesForDraws(const std::vector<bioUInt>& literalIds,
+									   bioUInt firstDraw,
+									   bioUInt blockSize,
+									   bioBoolean gradient,
+									   bioBoolean hessian) ;
 
 
   virtual bioString print(bioBoolean hp = false) const ;
@@ -9,17 +9,35 @@
 
 #include "bioExprMontecarlo.h"
 #include <sstream>
+#include <cmath>
+#include <algorithm>
 #include "bioDebug.h"
 #include "bioExceptions.h"
 
-bioExprMontecarlo::bioExprMontecarlo(bioExpression* c) :
-  child(c) {
+const bioUInt bioExprMontecarlo::drawsBlockSize ;
+
+bioExprMontecarlo::bioExprMontecarlo(bioExpression* c,
+				     bioReal tol,
+				     bioUInt minDraws,
+				     bioUInt out) :
+  drawIndex(0), child(c), tolerance(tol), minimumDraws(minDraws), output(out), jointValueAvailable(false), jointValue(0.0) {
   listOfChildren.push_back(c) ;
 }
 bioExprMontecarlo::~bioExprMontecarlo() {
 
 }
 
+// Sample variance of the values of the integrand, from their sum and
+// the sum of their squares.
+static bioReal varianceOfDraws(bioReal sum, bioReal sumOfSquares, bioUInt r) {
+  if (r < 2) {
+    return 0.0 ;
+  }
+  bioReal mean = sum / bioReal(r) ;
+  bioReal variance = (sumOfSquares - bioReal(r) * mean * mean) / bioReal(r - 1) ;
+  return std::max(variance,bioReal(0.0)) ;
+}
+
 const bioDerivatives* bioExprMontecarlo::getValueAndDerivatives(std::vector<bioUInt> literalIds,
 							  bioBoolean gradient,
 							  bioBoolean hessian) {
@@ -35,30 +53,102 @@ const bioDerivatives* bioExprMontecarlo::getValueAndDerivatives(std::vector<bioU
     throw bioExceptions(__FILE__,__LINE__,"Cannot perform Monte-Carlo integration with no draws.") ;
   }
 
+  if (jointValueAvailable && !gradient && !hessian) {
+    theDerivatives.f = jointValue ;
+    return &theDerivatives ;
+  }
+
+  if (output != 0) {
+    gradient = false ;
+    hessian = false ;
+  }
+  bioReal sumOfSquares(0.0) ;
+  bioUInt usedDraws(0) ;
   bioUInt n = literalIds.size() ;
-  child->setDrawIndex(&drawIndex) ;
-  for (drawIndex = 0 ; drawIndex < numberOfDraws ; ++drawIndex) {
-    const bioDerivatives* childResult = child->getValueAndDerivatives(literalIds,gradient,hessian) ;
-    theDerivatives.f += childResult->f ;
-    if (gradient) {
-      for (bioUInt i = 0 ; i < n ; ++i) {
-	theDerivatives.g[i] += childResult->g[i] ;
-	if (hessian) {
-	  for (bioUInt j = i ; j < n ; ++j) {
-	    theDerivatives.h[i][j] += childResult->h[i][j] ;
+  if (tolerance == 0.0 && output == 0) {
+    // All the draws are used. The integrand is calculated for blocks
+    // of draws, so that the operations are vectorized across draws,
+    // and the parts of the integrand that do not involve the draws
+    // are calculated only once per block.
+    child->setDrawIndex(&drawIndex) ;
+    for (bioUInt first = 0 ; first < numberOfDraws ; first += drawsBlockSize) {
+      bioUInt blockSize = std::min(drawsBlockSize,numberOfDraws - first) ;
+      const bioDrawsDerivatives* c = child->getValuesAndDerivativesForDraws(literalIds,first,blockSize,gradient,hessian) ;
+      bioUInt s = c->stride() ;
+      for (bioUInt k = 0 ; k < blockSize ; ++k) {
+	theDerivatives.f += c->f[s*k] ;
+      }
+      if (gradient) {
+	bioUInt m = c->nonzero.size() ;
+	for (bioUInt p = 0 ; p < m ; ++p) {
+	  bioUInt i = c->nonzero[p] ;
+	  const bioReal* gi = c->g[i].data() ;
+	  for (bioUInt k = 0 ; k < blockSize ; ++k) {
+	    theDerivatives.g[i] += gi[s*k] ;
+	  }
+	  if (hessian) {
+	    for (bioUInt q = p ; q < m ; ++q) {
+	      bioUInt j = c->nonzero[q] ;
+	      const bioReal* hij = c->h[i][j].data() ;
+	      for (bioUInt k = 0 ; k < blockSize ; ++k) {
+		theDerivatives.h[i][j] += hij[s*k] ;
+	      }
+	    }
+	  }
+	}
+      }
+    }
+    usedDraws = numberOfDraws ;
+  }
+  else {
+    bioBoolean adaptive = (tolerance > 0.0) ;
+    bioUInt nextCheck = std::max(minimumDraws,bioUInt(2)) ;
+    child->setDrawIndex(&drawIndex) ;
+    for (drawIndex = 0 ; drawIndex < numberOfDraws ; ++drawIndex) {
+      const bioDerivatives* childResult = child->getValueAndDerivatives(literalIds,gradient,hessian) ;
+      theDerivatives.f += childResult->f ;
+      sumOfSquares += childResult->f * childResult->f ;
+      usedDraws = drawIndex + 1 ;
+      if (gradient) {
+	for (bioUInt i = 0 ; i < n ; ++i) {
+	  theDerivatives.g[i] += childResult->g[i] ;
+	  if (hessian) {
+	    for (bioUInt j = i ; j < n ; ++j) {
+	      theDerivatives.h[i][j] += childResult->h[i][j] ;
+	    }
 	  }
 	}
       }
+      if (adaptive && usedDraws == nextCheck && usedDraws < numberOfDraws) {
+	// The checks are performed only when the number of draws is
+	// doubled, so that the number of draws used, and therefore the
+	// simulated value, varies only by large steps with the
+	// parameters.
+	bioReal mean = theDerivatives.f / bioReal(usedDraws) ;
+	bioReal variance = varianceOfDraws(theDerivatives.f,sumOfSquares,usedDraws) ;
+	if (sqrt(variance / bioReal(usedDraws)) <= tolerance * std::abs(mean)) {
+	  break ;
+	}
+	nextCheck *= 2 ;
+      }
     }
   }
-  
-  theDerivatives.f /= bioReal(numberOfDraws) ;
+
+  if (output == 1) {
+    theDerivatives.f = varianceOfDraws(theDerivatives.f,sumOfSquares,usedDraws) / bioReal(usedDraws) ;
+    return &theDerivatives ;
+  }
+  if (output == 2) {
+    theDerivatives.f = bioReal(usedDraws) ;
+    return &theDerivatives ;
+  }
+  theDerivatives.f /= bioReal(usedDraws) ;
   if (gradient) {
     for (bioUInt i = 0 ; i < n ; ++i) {
-      theDerivatives.g[i] /= bioReal(numberOfDraws) ;
+      theDerivatives.g[i] /= bioReal(usedDraws) ;
       if (hessian) {
 	for (bioUInt j = i ; j < n ; ++j) {
-	  theDerivatives.h[i][j] /= bioReal(numberOfDraws) ;
+	  theDerivatives.h[i][j] /= bioReal(usedDraws) ;
 	}
       }
     }
@@ -73,9 +163,149 @@ const bioDerivatives* bioExprMontecarlo::getValueAndDerivatives(std::vector<bioU
   return &theDerivatives ;
 }
 
+void bioExprMontecarlo::collectJointIntegrals(std::vector<bioExprMontecarlo*>& integrals) {
+  // Only the integrals using all the draws are calculated by blocks
+  // of draws.
+  if (tolerance != 0.0 || output != 0) {
+    return ;
+  }
+  if (std::find(integrals.begin(),integrals.end(),this) == integrals.end()) {
+    integrals.push_back(this) ;
+  }
+}
+
+void bioExprMontecarlo::integrateJointly(const std::vector<bioExprMontecarlo*>& integrals) {
+  if (integrals.empty()) {
+    return ;
+  }
+  bioUInt R = integrals[0]->numberOfDraws ;
+  if (R == 0) {
+    throw bioExceptions(__FILE__,__LINE__,"Cannot perform Monte-Carlo integration with no draws.") ;
+  }
+  for (std::vector<bioExprMontecarlo*>::const_iterator i = integrals.begin() ;
+       i != integrals.end() ;
+       ++i) {
+    if ((*i)->numberOfDraws != R) {
+      throw bioExceptions(__FILE__,__LINE__,"The integrals calculated jointly must use the same draws.") ;
+    }
+    (*i)->jointValue = 0.0 ;
+    // The integrands may share nodes, such as the draws. They must
+    // all refer to the same index.
+    (*i)->child->setDrawIndex(&integrals[0]->drawIndex) ;
+  }
+  std::vector<bioUInt> noLiterals ;
+  for (bioUInt first = 0 ; first < R ; first += drawsBlockSize) {
+    bioUInt blockSize = std::min(drawsBlockSize,R - first) ;
+    for (std::vector<bioExprMontecarlo*>::const_iterator i = integrals.begin() ;
+	 i != integrals.end() ;
+	 ++i) {
+      const bioDrawsDerivatives* c = (*i)->child->getValuesAndDerivativesForDraws(noLiterals,first,blockSize,false,false) ;
+      bioUInt s = c->stride() ;
+      for (bioUInt k = 0 ; k < blockSize ; ++k) {
+	(*i)->jointValue += c->f[s*k] ;
+      }
+    }
+  }
+  for (std::vector<bioExprMontecarlo*>::const_iterator i = integrals.begin() ;
+       i != integrals.end() ;
+       ++i) {
+    (*i)->jointValue /= bioReal(R) ;
+    (*i)->jointValueAvailable = true ;
+  }
+}
+
+void bioExprMontecarlo::clearJointValue() {
+  jointValueAvailable = false ;
+}
+
+void bioExprMontecarlo::initAccumulator(bioDerivatives& acc,
+					 bioUInt n,
+					 bioBoolean gradient,
+					 bioBoolean hessian) {
+  acc.with_g = gradient ;
+  acc.with_h = hessian ;
+  acc.with_bhhh = false ;
+  acc.resize(n) ;
+  acc.setEverythingToZero() ;
+}
+
+void bioExprMontecarlo::accumulate(bioDerivatives& acc,
+				   const bioDerivatives* x,
+				   const bioDerivatives* y,
+				   bioBoolean gradient,
+				   bioBoolean hessian) {
+  if (y == NULL) {
+    acc.f += x->f ;
+    if (gradient) {
+      bioUInt n = acc.g.size() ;
+      for (bioUInt i = 0 ; i < n ; ++i) {
+	acc.g[i] += x->g[i] ;
+	if (hessian) {
+	  for (bioUInt j = i ; j < n ; ++j) {
+	    acc.h[i][j] += x->h[i][j] ;
+	  }
+	}
+      }
+    }
+    return ;
+  }
+  acc.f += x->f * y->f ;
+  if (gradient) {
+    bioUInt n = acc.g.size() ;
+    for (bioUInt i = 0 ; i < n ; ++i) {
+      acc.g[i] += x->f * y->g[i] + y->f * x->g[i] ;
+      if (hessian) {
+	for (bioUInt j = i ; j < n ; ++j) {
+	  acc.h[i][j] += x->f * y->h[i][j] + y->f * x->h[i][j]
+	    + x->g[i] * y->g[j] + y->g[i] * x->g[j] ;
+	}
+      }
+    }
+  }
+}
+
+void bioExprMontecarlo::compose(const std::vector<const bioDerivatives*>& z,
+				bioReal F,
+				const std::vector<bioReal>& dF,
+				const std::vector<std::vector<bioReal> >& d2F,
+				bioBoolean gradient,
+				bioBoolean hessian) {
+  theDerivatives.f = F ;
+  if (!gradient) {
+    return ;
+  }
+  bioUInt n = theDerivatives.g.size() ;
+  bioUInt m = z.size() ;
+  for (bioUInt i = 0 ; i < n ; ++i) {
+    theDerivatives.g[i] = 0.0 ;
+    for (bioUInt k = 0 ; k < m ; ++k) {
+      theDerivatives.g[i] += dF[k] * z[k]->g[i] ;
+    }
+  }
+  if (!hessian) {
+    return ;
+  }
+  for (bioUInt i = 0 ; i < n ; ++i) {
+    for (bioUInt j = i ; j < n ; ++j) {
+      bioReal v(0.0) ;
+      for (bioUInt k = 0 ; k < m ; ++k) {
+	v += dF[k] * z[k]->h[i][j] ;
+	for (bioUInt l = 0 ; l < m ; ++l) {
+	  v += d2F[k][l] * z[k]->g[i] * z[l]->g[j] ;
+	}
+      }
+      theDerivatives.h[i][j] = theDerivatives.h[j][i] = v ;
+    }
+  }
+}
+
 bioString bioExprMontecarlo::print(bioBoolean hp) const {
   std::stringstream str ; 
-  str << "Montecarlo(" << child->print(hp) << ")";
+  str << "Montecarlo(" << child->print(hp) ;
+  if (tolerance > 0.0) {
+    str << ", tolerance=" << tolerance << ", minimumDraws=" << minimumDraws ;
+  }
+  str << ")";
   return str.str() ;
 
 }
@@ -15,16 +15,63 @@
 
 class bioExprMontecarlo: public bioExpression {
  public:
-  bioExprMontecarlo(bioExpression* c) ;
+  // If tolerance is positive, the integration is adaptive: after
+  // minimumDraws draws, and each time the number of draws is
+  // doubled, the drawing stops if the relative standard error of the
+  // simulated value is below the tolerance. The output is the
+  // simulated value (0), the variance of the simulated value (1), or
+  // the number of draws used (2). The derivatives are calculated
+  // only for the simulated value.
+  bioExprMontecarlo(bioExpression* c,
+		    bioReal tolerance = 0.0,
+		    bioUInt minimumDraws = 0,
+		    bioUInt output = 0) ;
   ~bioExprMontecarlo() ;
   virtual const bioDerivatives* getValueAndDerivatives(std::vector<bioUInt> literalIds,
 						 bioBoolean gradient,
 						 bioBoolean hessian) ;
 
   virtual bioString print(bioBoolean hp = false) const ;
+  virtual void collectJointIntegrals(std::vector<bioExprMontecarlo*>& integrals) ;
+  // Calculates the integrals in the same loop over the blocks of
+  // draws, so that the subexpressions shared by the integrands and
+  // cached by the draws cache are calculated only once per draw. The
+  // values are then returned by the integrals, until
+  // clearJointValue is called.
+  static void integrateJointly(const std::vector<bioExprMontecarlo*>& integrals) ;
+  void clearJointValue() ;
 
  protected:
+  // Adds the value and the derivatives of x to acc, or of the
+  // product of x and y if y is not NULL.
+  static void accumulate(bioDerivatives& acc,
+			 const bioDerivatives* x,
+			 const bioDerivatives* y,
+			 bioBoolean gradient,
+			 bioBoolean hessian) ;
+  // Sets the value and the derivatives of F(z_1,...,z_m), where the
+  // z_k are aggregated quantities, from the first (dF) and second
+  // (d2F) derivatives of F with respect to z, and the derivatives of
+  // the z_k with respect to the literals.
+  void compose(const std::vector<const bioDerivatives*>& z,
+	       bioReal F,
+	       const std::vector<bioReal>& dF,
+	       const std::vector<std::vector<bioReal> >& d2F,
+	       bioBoolean gradient,
+	       bioBoolean hessian) ;
+  // Prepares an accumulator for the aggregated quantities.
+  static void initAccumulator(bioDerivatives& acc,
+			      bioUInt n,
+			      bioBoolean gradient,
+			      bioBoolean hessian) ;
+  // Number of draws for which the integrand is calculated together.
+  static const bioUInt drawsBlockSize = 64 ;
   bioUInt drawIndex ;
   bioExpression* child ;
+  bioReal tolerance ;
+  bioUInt minimumDraws ;
+  bioUInt output ;
+  bioBoolean jointValueAvailable ;
+  bioReal jointValue ;
 };
 #endif
@@ -0,0 +1,138 @@
+//-*-c++-*------------------------------------------------------------
+//
+// File name : bioExprMontecarloControlVariate.cc
+// @date   Mon Oct 19 16:49:30 2026
+// @author Michel Bierlaire
+// @version Revision 1.0
+//
+//--------------------------------------------------------------------
+
+#include "bioExprMontecarloControlVariate.h"
+#include <sstream>
+#include <limits>
+#include "bioDebug.h"
+#include "bioExceptions.h"
+
+bioExprMontecarloControlVariate::bioExprMontecarloControlVariate(bioExpression* c,
+								 bioExpression* h,
+								 bioExpression* i) :
+  bioExprMontecarlo(c), control(h), integral(i) {
+  listOfChildren.push_back(h) ;
+  listOfChildren.push_back(i) ;
+}
+
+bioExprMontecarloControlVariate::~bioExprMontecarloControlVariate() {
+
+}
+
+const bioDerivatives* bioExprMontecarloControlVariate::getValueAndDerivatives(std::vector<bioUInt> literalIds,
+									bioBoolean gradient,
+									bioBoolean hessian) {
+
+  theDerivatives.with_g = gradient ;
+  theDerivatives.with_h = hessian ;
+  bioUInt n = literalIds.size() ;
+  theDerivatives.resize(n) ;
+  theDerivatives.setEverythingToZero() ;
+
+  if (numberOfDraws == 0) {
+    throw bioExceptions(__FILE__,__LINE__,"Cannot perform Monte-Carlo integration with no draws.") ;
+  }
+
+  // The control is centered on its integral, so that its mean is
+  // close to zero. It avoids the cancellations in the calculation of
+  // the variance and the covariance from the sums of squares and
+  // products.
+  initAccumulator(theIntegral,n,gradient,hessian) ;
+  accumulate(theIntegral,integral->getValueAndDerivatives(literalIds,gradient,hessian),NULL,gradient,hessian) ;
+  initAccumulator(centeredControl,n,gradient,hessian) ;
+  initAccumulator(sumOfChild,n,gradient,hessian) ;
+  initAccumulator(sumOfControl,n,gradient,hessian) ;
+  initAccumulator(sumOfProducts,n,gradient,hessian) ;
+  initAccumulator(sumOfSquares,n,gradient,hessian) ;
+  child->setDrawIndex(&drawIndex) ;
+  control->setDrawIndex(&drawIndex) ;
+  for (drawIndex = 0 ; drawIndex < numberOfDraws ; ++drawIndex) {
+    const bioDerivatives* f = child->getValueAndDerivatives(literalIds,gradient,hessian) ;
+    accumulate(sumOfChild,f,NULL,gradient,hessian) ;
+    const bioDerivatives* h = control->getValueAndDerivatives(literalIds,gradient,hessian) ;
+    centeredControl.f = h->f - theIntegral.f ;
+    if (gradient) {
+      for (bioUInt i = 0 ; i < n ; ++i) {
+	centeredControl.g[i] = h->g[i] - theIntegral.g[i] ;
+	if (hessian) {
+	  for (bioUInt j = i ; j < n ; ++j) {
+	    centeredControl.h[i][j] = h->h[i][j] - theIntegral.h[i][j] ;
+	  }
+	}
+      }
+    }
+    accumulate(sumOfControl,&centeredControl,NULL,gradient,hessian) ;
+    accumulate(sumOfSquares,&centeredControl,&centeredControl,gradient,hessian) ;
+    // If the child is an expression involving the control, its value
+    // has been calculated again for the same draw.
+    accumulate(sumOfProducts,f,&centeredControl,gradient,hessian) ;
+  }
+
+  // The value is a function of z = (A, B, C, D), where A is the sum
+  // of the child, B the sum of the centered control, C the sum of
+  // their products, and D the sum of the squares of the centered
+  // control: F = A/R - (N/V) B/R, with N = C - AB/R and V = D - B^2/R.
+  std::vector<const bioDerivatives*> z ;
+  z.push_back(&sumOfChild) ;
+  z.push_back(&sumOfControl) ;
+  z.push_back(&sumOfProducts) ;
+  z.push_back(&sumOfSquares) ;
+  bioReal R = bioReal(numberOfDraws) ;
+  bioReal A = sumOfChild.f ;
+  bioReal B = sumOfControl.f ;
+  bioReal C = sumOfProducts.f ;
+  bioReal D = sumOfSquares.f ;
+  bioReal N = C - A * B / R ;
+  bioReal V = D - B * B / R ;
+  bioReal u = B / R ;
+  std::vector<bioReal> dF(4,0.0) ;
+  std::vector<std::vector<bioReal> > d2F(4,std::vector<bioReal>(4,0.0)) ;
+  if (V <= std::numeric_limits<bioReal>::epsilon() * D || V <= 0.0) {
+    // The control is constant across draws. It is ignored.
+    dF[0] = 1.0 / R ;
+    compose(z,A / R,dF,d2F,gradient,hessian) ;
+    return &theDerivatives ;
+  }
+  bioReal c = N / V ;
+  std::vector<bioReal> dN = {-B / R, -A / R, 1.0, 0.0} ;
+  std::vector<bioReal> dV = {0.0, -2.0 * B / R, 0.0, 1.0} ;
+  std::vector<bioReal> du = {0.0, 1.0 / R, 0.0, 0.0} ;
+  std::vector<bioReal> dc(4) ;
+  for (bioUInt k = 0 ; k < 4 ; ++k) {
+    dc[k] = dN[k] / V - N * dV[k] / (V * V) ;
+  }
+  for (bioUInt k = 0 ; k < 4 ; ++k) {
+    dF[k] = - dc[k] * u - c * du[k] ;
+    for (bioUInt l = 0 ; l < 4 ; ++l) {
+      bioReal d2c = - (dN[k] * dV[l] + dV[k] * dN[l]) / (V * V)
+	+ 2.0 * N * dV[k] * dV[l] / (V * V * V) ;
+      d2F[k][l] = - d2c * u - dc[k] * du[l] - du[k] * dc[l] ;
+    }
+  }
+  dF[0] += 1.0 / R ;
+  // Second derivatives of N and V that are not zero.
+  d2F[0][1] += u / (R * V) ;
+  d2F[1][0] += u / (R * V) ;
+  d2F[1][1] -= 2.0 * N * u / (R * V * V) ;
+  compose(z,A / R - c * u,dF,d2F,gradient,hessian) ;
+  return &theDerivatives ;
+}
+
+bioString bioExprMontecarloControlVariate::print(bioBoolean hp) const {
+  std::stringstream str ;
+  str << "MontecarloControlVariate(" << child->print(hp) << ", "
+      << control->print(hp) << ", " << integral->print(hp) << ")" ;
+  return str.str() ;
+}
+
+// The integral involves the control variate, and is calculated
+// separately.
+void bioExprMontecarloControlVariate::collectJointIntegrals(std::vector<bioExprMontecarlo*>& integrals) {
+
+}
@@ -0,0 +1,42 @@
+//-*-c++-*------------------------------------------------------------
+//
+// File name : bioExprMontecarloControlVariate.h
+// @date   Mon Oct 19 16:48:12 2026
+// @author Michel Bierlaire
+// @version Revision 1.0
+//
+//--------------------------------------------------------------------
+
+#ifndef bioExprMontecarloControlVariate_h
+#define bioExprMontecarloControlVariate_h
+
+#include "bioExprMontecarlo.h"
+
+// Monte-Carlo integration of c, using the control variate h, with
+// known integral i. The coefficient of the control variate is the
+// sample covariance of c and h divided by the sample variance of h,
+// and its derivatives are accounted for.
+class bioExprMontecarloControlVariate: public bioExprMontecarlo {
+ public:
+  bioExprMontecarloControlVariate(bioExpression* c,
+				  bioExpression* h,
+				  bioExpression* i) ;
+  ~bioExprMontecarloControlVariate() ;
+  virtual const bioDerivatives* getValueAndDerivatives(std::vector<bioUInt> literalIds,
+						 bioBoolean gradient,
+						 bioBoolean hessian) ;
+
+  virtual bioString print(bioBoolean hp = false) const ;
+  virtual void collectJointIntegrals(std::vector<bioExprMontecarlo*>& integrals) ;
+
+ protected:
+  bioExpression* control ;
+  bioExpression* integral ;
+  bioDerivatives theIntegral ;
+  bioDerivatives centeredControl ;
+  bioDerivatives sumOfChild ;
+  bioDerivatives sumOfControl ;
+  bioDerivatives sumOfProducts ;
+  bioDerivatives sumOfSquares ;
+};
+#endif
@@ -0,0 +1,92 @@
+//-*-c++-*------------------------------------------------------------
+//
+// File name : bioExprMontecarloImportance.cc
+// @date   Mon Oct 19 17:06:52 2026
+// @author Michel Bierlaire
+// @version Revision 1.0
+//
+//--------------------------------------------------------------------
+
+#include "bioExprMontecarloImportance.h"
+#include <sstream>
+#include "bioDebug.h"
+#include "bioExceptions.h"
+
+bioExprMontecarloImportance::bioExprMontecarloImportance(bioExpression* c,
+							 bioExpression* w,
+							 bioBoolean n) :
+  bioExprMontecarlo(c), weight(w), normalized(n) {
+  listOfChildren.push_back(w) ;
+}
+
+bioExprMontecarloImportance::~bioExprMontecarloImportance() {
+
+}
+
+const bioDerivatives* bioExprMontecarloImportance::getValueAndDerivatives(std::vector<bioUInt> literalIds,
+								    bioBoolean gradient,
+								    bioBoolean hessian) {
+
+  theDerivatives.with_g = gradient ;
+  theDerivatives.with_h = hessian ;
+  bioUInt n = literalIds.size() ;
+  theDerivatives.resize(n) ;
+  theDerivatives.setEverythingToZero() ;
+
+  if (numberOfDraws == 0) {
+    throw bioExceptions(__FILE__,__LINE__,"Cannot perform Monte-Carlo integration with no draws.") ;
+  }
+
+  initAccumulator(sumOfProducts,n,gradient,hessian) ;
+  initAccumulator(sumOfWeights,n,gradient,hessian) ;
+  child->setDrawIndex(&drawIndex) ;
+  weight->setDrawIndex(&drawIndex) ;
+  for (drawIndex = 0 ; drawIndex < numberOfDraws ; ++drawIndex) {
+    const bioDerivatives* f = child->getValueAndDerivatives(literalIds,gradient,hessian) ;
+    const bioDerivatives* w = weight->getValueAndDerivatives(literalIds,gradient,hessian) ;
+    // If the child involves the weight, its value has been
+    // calculated again for the same draw.
+    accumulate(sumOfProducts,f,w,gradient,hessian) ;
+    if (normalized) {
+      accumulate(sumOfWeights,w,NULL,gradient,hessian) ;
+    }
+  }
+
+  // The value is a function of z = (A, W), where A is the sum of the
+  // weighted values, and W the sum of the weights: F = A/W, or A/R if
+  // the weights are not normalized.
+  std::vector<const bioDerivatives*> z ;
+  z.push_back(&sumOfProducts) ;
+  z.push_back(&sumOfWeights) ;
+  std::vector<bioReal> dF(2,0.0) ;
+  std::vector<std::vector<bioReal> > d2F(2,std::vector<bioReal>(2,0.0)) ;
+  bioReal A = sumOfProducts.f ;
+  if (!normalized) {
+    bioReal R = bioReal(numberOfDraws) ;
+    dF[0] = 1.0 / R ;
+    compose(z,A / R,dF,d2F,gradient,hessian) ;
+    return &theDerivatives ;
+  }
+  bioReal W = sumOfWeights.f ;
+  if (W == 0.0) {
+    throw bioExceptions(__FILE__,__LINE__,"The sum of the importance weights is zero.") ;
+  }
+  dF[0] = 1.0 / W ;
+  dF[1] = - A / (W * W) ;
+  d2F[0][1] = d2F[1][0] = - 1.0 / (W * W) ;
+  d2F[1][1] = 2.0 * A / (W * W * W) ;
+  compose(z,A / W,dF,d2F,gradient,hessian) ;
+  return &theDerivatives ;
+}
+
+bioString bioExprMontecarloImportance::print(bioBoolean hp) const {
+  std::stringstream str ;
+  str << "MontecarloImportance(" << child->print(hp) << ", "
+      << weight->print(hp) << ", " << normalized << ")" ;
+  return str.str() ;
+}
+
+// The integral involves the weights, and is calculated separately.
+void bioExprMontecarloImportance::collectJointIntegrals(std::vector<bioExprMontecarlo*>& integrals) {
+
+}
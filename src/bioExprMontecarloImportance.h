@@ -0,0 +1,38 @@
+//-*-c++-*------------------------------------------------------------
+//
+// File name : bioExprMontecarloImportance.h
+// @date   Mon Oct 19 17:05:41 2026
+// @author Michel Bierlaire
+// @version Revision 1.0
+//
+//--------------------------------------------------------------------
+
+#ifndef bioExprMontecarloImportance_h
+#define bioExprMontecarloImportance_h
+
+#include "bioExprMontecarlo.h"
+
+// Monte-Carlo integration of c with importance sampling, where w is
+// the ratio between the density of the random variables and the
+// proposal density. If normalized, the sum of the weighted values is
+// divided by the sum of the weights instead of the number of draws.
+class bioExprMontecarloImportance: public bioExprMontecarlo {
+ public:
+  bioExprMontecarloImportance(bioExpression* c,
+			      bioExpression* w,
+			      bioBoolean normalized) ;
+  ~bioExprMontecarloImportance() ;
+  virtual const bioDerivatives* getValueAndDerivatives(std::vector<bioUInt> literalIds,
+						 bioBoolean gradient,
+						 bioBoolean hessian) ;
+
+  virtual bioString print(bioBoolean hp = false) const ;
+  virtual void collectJointIntegrals(std::vector<bioExprMontecarlo*>& integrals) ;
+
+ protected:
+  bioExpression* weight ;
+  bioBoolean normalized ;
+  bioDerivatives sumOfProducts ;
+  bioDerivatives sumOfWeights ;
+};
+#endif
@@ -109,6 +109,112 @@ const bioDerivatives* bioExprPanelTrajectory::getValueAndDerivatives(std::vector
   return &theDerivatives ;
 }
 
+const bioDrawsDerivatives* bioExprPanelTrajectory::calculateValuesAndDerivativesForDraws(const std::vector<bioUInt>& literalIds,
+											 bioUInt firstDraw,
+											 bioUInt blockSize,
+											 bioBoolean gradient,
+											 bioBoolean hessian) {
+  if (!dependsOnDraws()) {
+    return bioExpression::calculateValuesAndDerivativesForDraws(literalIds,firstDraw,blockSize,gradient,hessian) ;
+  }
+  if (dataMap == NULL) {
+    throw bioExceptNullPointer(__FILE__,__LINE__,"data map") ;
+  }
+  if (individualIndex == NULL) {
+    throw bioExceptNullPointer(__FILE__,__LINE__,"individual index") ;
+  }
+  if (*individualIndex >= dataMap->size()) {
+    throw bioExceptOutOfRange<bioUInt>(__FILE__,__LINE__,*individualIndex,0,dataMap->size() - 1) ;
+  }
+  bioUInt n = literalIds.size() ;
+  theDrawsDerivatives.resize(n,blockSize,false,gradient,hessian) ;
+  std::vector<bioReal>& f = theDrawsDerivatives.f ;
+  std::vector<std::vector<bioReal> >& g = theDrawsDerivatives.g ;
+  std::vector<std::vector<std::vector<bioReal> > >& h = theDrawsDerivatives.h ;
+  f.assign(blockSize,0.0) ;
+  if (gradient) {
+    for (bioUInt i = 0 ; i < n ; ++i) {
+      g[i].assign(blockSize,0.0) ;
+      if (hessian) {
+	for (bioUInt j = i ; j < n ; ++j) {
+	  h[i][j].assign(blockSize,0.0) ;
+	}
+      }
+    }
+  }
+  child->setRowIndex(&theRowIndex) ;
+  // As for one draw, the derivatives of the log of the likelihood of
+  // the trajectory are accumulated first.
+  for (theRowIndex = (*dataMap)[*individualIndex][0]  ; theRowIndex <= (*dataMap)[*individualIndex][1] ; ++theRowIndex) {
+    try {
+      const bioDrawsDerivatives* c = child->getValuesAndDerivativesForDraws(literalIds,firstDraw,blockSize,gradient,hessian) ;
+      bioUInt s = c->stride() ;
+      for (bioUInt k = 0 ; k < blockSize ; ++k) {
+	f[k] += log(c->f[s*k]) ;
+      }
+      if (gradient) {
+	theDrawsDerivatives.addNonzero(*c) ;
+	bioUInt m = c->nonzero.size() ;
+	for (bioUInt p = 0 ; p < m ; ++p) {
+	  bioUInt i = c->nonzero[p] ;
+	  const bioReal* cgi = c->g[i].data() ;
+	  for (bioUInt k = 0 ; k < blockSize ; ++k) {
+	    if (cgi[s*k] != 0.0) {
+	      g[i][k] += cgi[s*k] / c->f[s*k] ;
+	    }
+	  }
+	  if (hessian) {
+	    for (bioUInt q = p ; q < m ; ++q) {
+	      bioUInt j = c->nonzero[q] ;
+	      const bioReal* cgj = c->g[j].data() ;
+	      const bioReal* ch = c->h[i][j].data() ;
+	      bioReal* hij = h[i][j].data() ;
+	      for (bioUInt k = 0 ; k < blockSize ; ++k) {
+		bioReal cf = c->f[s*k] ;
+		if (ch[s*k] != 0.0) {
+		  hij[k] += ch[s*k] / cf ;
+		}
+		if (cgi[s*k] != 0.0 && cgj[s*k] != 0.0) {
+		  hij[k] -= cgi[s*k] * cgj[s*k] / (cf * cf) ;
+		}
+	      }
+	    }
+	  }
+	}
+      }
+    }
+    catch(bioExceptions& e) {
+      std::stringstream str ;
+      str << "Error for data entry " << theRowIndex << ": " << e.what() ;
+      throw bioExceptions(__FILE__,__LINE__,str.str()) ;
+    }
+  }
+  for (bioUInt k = 0 ; k < blockSize ; ++k) {
+    f[k] = exp(f[k]) ;
+  }
+  if (gradient) {
+    bioUInt m = theDrawsDerivatives.nonzero.size() ;
+    for (bioUInt p = 0 ; p < m ; ++p) {
+      bioUInt i = theDrawsDerivatives.nonzero[p] ;
+      if (hessian) {
+	for (bioUInt q = p ; q < m ; ++q) {
+	  bioUInt j = theDrawsDerivatives.nonzero[q] ;
+	  for (bioUInt k = 0 ; k < blockSize ; ++k) {
+	    if (g[i][k] != 0.0 && g[j][k] != 0.0) {
+	      h[i][j][k] += g[i][k] * g[j][k] ;
+	    }
+	    h[i][j][k] *= f[k] ;
+	  }
+	}
+      }
+      for (bioUInt k = 0 ; k < blockSize ; ++k) {
+	g[i][k] *= f[k] ;
+      }
+    }
+  }
+  return &theDrawsDerivatives ;
+}
+
 bioString bioExprPanelTrajectory::print(bioBoolean hp) const {
   std::stringstream str ; 
   str << "PanelLikelihoodTrajectory(" << child->print(hp) << ")";
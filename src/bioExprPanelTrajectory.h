@@ -22,6 +22,11 @@ class bioExprPanelTrajectory: public bioExpression {
   virtual const bioDerivatives* getValueAndDerivatives(std::vector<bioUInt> literalIds,
 						 bioBoolean gradient,
 						 bioBoolean hessian) ;
+  virtual const bioDrawsDerivatives* calculateValuesAndDerivativesForDraws(const std::vector<bioUInt>& literalIds,
+									   bioUInt firstDraw,
+									   bioUInt blockSize,
+									   bioBoolean gradient,
+									   bioBoolean hessian) ;
 
   virtual bioString print(bioBoolean hp = false) const ;
   virtual void setRowIndex(bioUInt* i) ;
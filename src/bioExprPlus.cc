@@ -79,6 +79,27 @@ const bioDerivatives* bioExprPlus::getValueAndDerivatives(std::vector<bioUInt> l
   return &theDerivatives ;
 }
 
+const bioDrawsDerivatives* bioExprPlus::calculateValuesAndDerivativesForDraws(const std::vector<bioUInt>& literalIds,
+									      bioUInt firstDraw,
+									      bioUInt blockSize,
+									      bioBoolean gradient,
+									      bioBoolean hessian) {
+  if (!dependsOnDraws()) {
+    return bioExpression::calculateValuesAndDerivativesForDraws(literalIds,firstDraw,blockSize,gradient,hessian) ;
+  }
+  const bioDrawsDerivatives* l = left->getValuesAndDerivativesForDraws(literalIds,firstDraw,blockSize,gradient,hessian) ;
+  const bioDrawsDerivatives* r = right->getValuesAndDerivativesForDraws(literalIds,firstDraw,blockSize,gradient,hessian) ;
+  theDrawsDerivatives.resize(literalIds.size(),blockSize,false,gradient,hessian) ;
+  bioUInt sl = l->stride() ;
+  bioUInt sr = r->stride() ;
+  for (bioUInt k = 0 ; k < blockSize ; ++k) {
+    theDrawsDerivatives.f[k] = l->f[sl*k] + r->f[sr*k] ;
+  }
+  std::vector<bioReal> one(blockSize,1.0) ;
+  theDrawsDerivatives.chainRule(*l,*r,one,one,NULL,NULL,NULL) ;
+  return &theDrawsDerivatives ;
+}
+
 bioString bioExprPlus::print(bioBoolean hp) const {
   std::stringstream str ;
   if (hp) {
@@ -0,0 +1,90 @@
+//-*-c++-*------------------------------------------------------------
+//
+// File name : bioExprSparseGridIntegrate.cc
+// @date   Mon Oct 19 17:52:40 2026
+// @author Michel Bierlaire
+// @version Revision 1.0
+//
+//--------------------------------------------------------------------
+
+#include "bioExprSparseGridIntegrate.h"
+#include <sstream>
+#include <algorithm>
+#include "bioDebug.h"
+#include "bioExceptions.h"
+#include "bioSparseGrid.h"
+
+bioExprSparseGridIntegrate::bioExprSparseGridIntegrate(bioExpression* c,
+						       std::vector<bioUInt> ids,
+						       bioUInt l) :
+  child(c), rvIds(ids), level(l), rvValues(ids.size(),0.0) {
+  listOfChildren.push_back(c) ;
+  // The grid is shared by all the expressions with the same dimension
+  // and level, in all the threads.
+  theGrid = bioSparseGrid::get(rvIds.size(),level) ;
+}
+
+bioExprSparseGridIntegrate::~bioExprSparseGridIntegrate() {
+
+}
+
+const bioDerivatives* bioExprSparseGridIntegrate::getValueAndDerivatives(std::vector<bioUInt> literalIds,
+									  bioBoolean gradient,
+									  bioBoolean hessian) {
+
+  theDerivatives.with_g = gradient ;
+  theDerivatives.with_h = hessian ;
+
+  theDerivatives.resize(literalIds.size()) ;
+
+  theDerivatives.setEverythingToZero() ;
+
+  for (bioUInt k = 0 ; k < rvIds.size() ; ++k) {
+    child->setRandomVariableValuePtr(rvIds[k],&(rvValues[k])) ;
+  }
+  bioUInt n = literalIds.size() ;
+  const std::vector< std::vector<bioReal> >& nodes = theGrid->getNodes() ;
+  const std::vector<bioReal>& weights = theGrid->getWeights() ;
+  for (bioUInt p = 0 ; p < theGrid->size() ; ++p) {
+    // The values are copied in place, as the random variables keep a
+    // pointer to them.
+    std::copy(nodes[p].begin(),nodes[p].end(),rvValues.begin()) ;
+    const bioDerivatives* childResult = child->getValueAndDerivatives(literalIds,gradient,hessian) ;
+    bioReal w = weights[p] ;
+    theDerivatives.f += w * childResult->f ;
+    if (gradient) {
+      for (bioUInt i = 0 ; i < n ; ++i) {
+	theDerivatives.g[i] += w * childResult->g[i] ;
+	if (hessian) {
+	  for (bioUInt j = i ; j < n ; ++j) {
+	    theDerivatives.h[i][j] += w * childResult->h[i][j] ;
+	  }
+	}
+      }
+    }
+  }
+  if (hessian) {
+    for (bioUInt i = 0 ; i < n ; ++i) {
+      for (bioUInt j = i ; j < n ; ++j) {
+	theDerivatives.h[j][i] = theDerivatives.h[i][j] ;
+      }
+    }
+  }
+  return &theDerivatives ;
+}
+
+bioString bioExprSparseGridIntegrate::print(bioBoolean hp) const {
+  std::stringstream str ;
+  str << "SparseGridIntegrate(" << child->print(hp) << ",level=" << level ;
+  for (bioUInt k = 0 ; k < rvIds.size() ; ++k) {
+    str << "," << rvIds[k] ;
+  }
+  str << ")" ;
+  return str.str() ;
+}
+
+// The integrals involved in the integrand depend on the random
+// variables, and cannot be calculated outside the quadrature.
+void bioExprSparseGridIntegrate::collectJointIntegrals(std::vector<bioExprMontecarlo*>& integrals) {
+
+}
@@ -0,0 +1,40 @@
+//-*-c++-*------------------------------------------------------------
+//
+// File name : bioExprSparseGridIntegrate.h
+// @date   Mon Oct 19 17:48:15 2026
+// @author Michel Bierlaire
+// @version Revision 1.0
+//
+//--------------------------------------------------------------------
+
+#ifndef bioExprSparseGridIntegrate_h
+#define bioExprSparseGridIntegrate_h
+
+#include "bioExpression.h"
+#include "bioString.h"
+
+class bioSparseGrid ;
+
+// Expectation of c with respect to independent standard normal
+// random variables, approximated with a Smolyak sparse grid.
+class bioExprSparseGridIntegrate: public bioExpression {
+ public:
+  bioExprSparseGridIntegrate(bioExpression* c,
+			     std::vector<bioUInt> ids,
+			     bioUInt level) ;
+  ~bioExprSparseGridIntegrate() ;
+  virtual const bioDerivatives* getValueAndDerivatives(std::vector<bioUInt> literalIds,
+						 bioBoolean gradient,
+						 bioBoolean hessian) ;
+
+  virtual bioString print(bioBoolean hp = false) const ;
+  virtual void collectJointIntegrals(std::vector<bioExprMontecarlo*>& integrals) ;
+
+ protected:
+  bioExpression* child ;
+  std::vector<bioUInt> rvIds ;
+  bioUInt level ;
+  const bioSparseGrid* theGrid ;
+  std::vector<bioReal> rvValues ;
+};
+#endif
@@ -147,6 +147,31 @@ const bioDerivatives* bioExprTimes::getValueAndDerivatives(std::vector<bioUInt>
   return &theDerivatives ;
 }
 
+const bioDrawsDerivatives* bioExprTimes::calculateValuesAndDerivativesForDraws(const std::vector<bioUInt>& literalIds,
+									       bioUInt firstDraw,
+									       bioUInt blockSize,
+									       bioBoolean gradient,
+									       bioBoolean hessian) {
+  if (!dependsOnDraws()) {
+    return bioExpression::calculateValuesAndDerivativesForDraws(literalIds,firstDraw,blockSize,gradient,hessian) ;
+  }
+  const bioDrawsDerivatives* l = left->getValuesAndDerivativesForDraws(literalIds,firstDraw,blockSize,gradient,hessian) ;
+  const bioDrawsDerivatives* r = right->getValuesAndDerivativesForDraws(literalIds,firstDraw,blockSize,gradient,hessian) ;
+  theDrawsDerivatives.resize(literalIds.size(),blockSize,false,gradient,hessian) ;
+  bioUInt sl = l->stride() ;
+  bioUInt sr = r->stride() ;
+  std::vector<bioReal> leftValues(blockSize) ;
+  std::vector<bioReal> rightValues(blockSize) ;
+  for (bioUInt k = 0 ; k < blockSize ; ++k) {
+    leftValues[k] = l->f[sl*k] ;
+    rightValues[k] = r->f[sr*k] ;
+    theDrawsDerivatives.f[k] = leftValues[k] * rightValues[k] ;
+  }
+  std::vector<bioReal> one(blockSize,1.0) ;
+  theDrawsDerivatives.chainRule(*l,*r,rightValues,leftValues,NULL,&one,NULL) ;
+  return &theDrawsDerivatives ;
+}
+
 bioString bioExprTimes::print(bioBoolean hp) const {
   std::stringstream str ;
   if (hp) {
@@ -45,6 +45,25 @@ const bioDerivatives* bioExprUnaryMinus::getValueAndDerivatives(std::vector<bioU
   return &theDerivatives ;
 }
 
+const bioDrawsDerivatives* bioExprUnaryMinus::calculateValuesAndDerivativesForDraws(const std::vector<bioUInt>& literalIds,
+										    bioUInt firstDraw,
+										    bioUInt blockSize,
+										    bioBoolean gradient,
+										    bioBoolean hessian) {
+  if (!dependsOnDraws()) {
+    return bioExpression::calculateValuesAndDerivativesForDraws(literalIds,firstDraw,blockSize,gradient,hessian) ;
+  }
+  const bioDrawsDerivatives* c = child->getValuesAndDerivativesForDraws(literalIds,firstDraw,blockSize,gradient,hessian) ;
+  theDrawsDerivatives.resize(literalIds.size(),blockSize,false,gradient,hessian) ;
+  bioUInt s = c->stride() ;
+  for (bioUInt k = 0 ; k < blockSize ; ++k) {
+    theDrawsDerivatives.f[k] = - c->f[s*k] ;
+  }
+  std::vector<bioReal> minusOne(blockSize,-1.0) ;
+  theDrawsDerivatives.chainRule(*c,minusOne,NULL) ;
+  return &theDrawsDerivatives ;
+}
+
 bioString bioExprUnaryMinus::print(bioBoolean hp) const {
   std::stringstream str ; 
   str << "-" << child->print(hp) ;
@@ -10,7 +10,8 @@
 #include "bioExpression.h"
 #include "bioDebug.h"
 #include <sstream>
-bioExpression::bioExpression() : parameters(NULL), fixedParameters(NULL), data(NULL), dataMap(NULL), draws(NULL), sampleSize(0), numberOfDraws(0), numberOfDrawVariables(0), rowIndex(NULL), individualIndex(NULL) {
+#include "bioExceptions.h"
+bioExpression::bioExpression() : parameters(NULL), fixedParameters(NULL), data(NULL), dataMap(NULL), draws(NULL), sampleSize(0), numberOfDraws(0), numberOfDrawVariables(0), rowIndex(NULL), individualIndex(NULL), drawIndexPtr(NULL), drawsDependency(-1), drawsCacheStamp(NULL), cachedDraws(NULL), cachedStamp(0), cachedRow(0), cachedFirstDraw(0), cachedBlockSize(0) {
 }
 
 bioExpression::~bioExpression() {
@@ -80,6 +81,7 @@ void bioExpression::setMissingData(bioReal md) {
 
 
 void bioExpression::setDrawIndex(bioUInt* d) {
+  drawIndexPtr = d ;
   for (std::vector<bioExpression*>::iterator i = listOfChildren.begin() ;
        i != listOfChildren.end() ;
        ++i) {
@@ -87,6 +89,23 @@ void bioExpression::setDrawIndex(bioUInt* d) {
   }
 }
 
+void bioExpression::setDrawsCacheStamp(bioUInt* s) {
+  drawsCacheStamp = s ;
+  for (std::vector<bioExpression*>::iterator i = listOfChildren.begin() ;
+       i != listOfChildren.end() ;
+       ++i) {
+    (*i)->setDrawsCacheStamp(s) ;
+  }
+}
+
+void bioExpression::collectJointIntegrals(std::vector<bioExprMontecarlo*>& integrals) {
+  for (std::vector<bioExpression*>::iterator i = listOfChildren.begin() ;
+       i != listOfChildren.end() ;
+       ++i) {
+    (*i)->collectJointIntegrals(integrals) ;
+  }
+}
+
 void bioExpression::setRandomVariableValuePtr(bioUInt rvId, bioReal* v) {
   for (std::vector<bioExpression*>::iterator i = listOfChildren.begin() ;
        i != listOfChildren.end() ;
@@ -123,3 +142,107 @@ std::map<bioString,bioReal> bioExpression::getAllLiteralValues() {
   return m ;  
 }
 
+
+bioBoolean bioExpression::dependsOnDraws() {
+  if (drawsDependency < 0) {
+    drawsDependency = 0 ;
+    for (std::vector<bioExpression*>::iterator i = listOfChildren.begin() ;
+	 i != listOfChildren.end() ;
+	 ++i) {
+      if ((*i)->dependsOnDraws()) {
+	drawsDependency = 1 ;
+	break ;
+      }
+    }
+  }
+  return (drawsDependency == 1) ;
+}
+
+const bioDrawsDerivatives* bioExpression::getValuesAndDerivativesForDraws(const std::vector<bioUInt>& literalIds,
+									  bioUInt firstDraw,
+									  bioUInt blockSize,
+									  bioBoolean gradient,
+									  bioBoolean hessian) {
+  if (gradient || hessian || drawsCacheStamp == NULL || *drawsCacheStamp == 0) {
+    return calculateValuesAndDerivativesForDraws(literalIds,firstDraw,blockSize,gradient,hessian) ;
+  }
+  // Within the scope of a stamp, the values depend only on the row
+  // (that varies within a panel trajectory) and on the draws.
+  bioUInt row = (rowIndex == NULL) ? 0 : *rowIndex ;
+  if (cachedDraws == NULL ||
+      cachedStamp != *drawsCacheStamp ||
+      cachedRow != row ||
+      cachedFirstDraw != firstDraw ||
+      cachedBlockSize != blockSize) {
+    cachedDraws = calculateValuesAndDerivativesForDraws(literalIds,firstDraw,blockSize,gradient,hessian) ;
+    cachedStamp = *drawsCacheStamp ;
+    cachedRow = row ;
+    cachedFirstDraw = firstDraw ;
+    cachedBlockSize = blockSize ;
+  }
+  return cachedDraws ;
+}
+
+const bioDrawsDerivatives* bioExpression::calculateValuesAndDerivativesForDraws(const std::vector<bioUInt>& literalIds,
+										bioUInt firstDraw,
+										bioUInt blockSize,
+										bioBoolean gradient,
+										bioBoolean hessian) {
+  bioUInt n = literalIds.size() ;
+  if (!dependsOnDraws()) {
+    // The value is the same for all the draws, and is calculated
+    // only once. The literals with zero derivatives are not involved
+    // in the calculation of the derivatives of the parent expression.
+    const bioDerivatives* d = getValueAndDerivatives(literalIds,gradient,hessian) ;
+    theDrawsDerivatives.resize(n,blockSize,true,gradient,hessian) ;
+    theDrawsDerivatives.f[0] = d->f ;
+    if (gradient) {
+      std::vector<bioBoolean> involved(n,false) ;
+      for (bioUInt i = 0 ; i < n ; ++i) {
+	theDrawsDerivatives.g[i][0] = d->g[i] ;
+	if (d->g[i] != 0.0) {
+	  involved[i] = true ;
+	}
+	if (hessian) {
+	  for (bioUInt j = i ; j < n ; ++j) {
+	    theDrawsDerivatives.h[i][j][0] = d->h[i][j] ;
+	    if (d->h[i][j] != 0.0) {
+	      involved[i] = involved[j] = true ;
+	    }
+	  }
+	}
+      }
+      std::vector<bioUInt> indices ;
+      for (bioUInt i = 0 ; i < n ; ++i) {
+	if (involved[i]) {
+	  indices.push_back(i) ;
+	}
+      }
+      theDrawsDerivatives.setNonzero(indices) ;
+    }
+    return &theDrawsDerivatives ;
+  }
+  if (drawIndexPtr == NULL) {
+    throw bioExceptions(__FILE__,__LINE__,"Draw index is not defined. It may be caused by the use of draws outside a Montecarlo statement.") ;
+  }
+  theDrawsDerivatives.resize(n,blockSize,false,gradient,hessian) ;
+  if (gradient) {
+    theDrawsDerivatives.setAllNonzero() ;
+  }
+  for (bioUInt r = 0 ; r < blockSize ; ++r) {
+    *drawIndexPtr = firstDraw + r ;
+    const bioDerivatives* d = getValueAndDerivatives(literalIds,gradient,hessian) ;
+    theDrawsDerivatives.f[r] = d->f ;
+    if (gradient) {
+      for (bioUInt i = 0 ; i < n ; ++i) {
+	theDrawsDerivatives.g[i][r] = d->g[i] ;
+	if (hessian) {
+	  for (bioUInt j = i ; j < n ; ++j) {
+	    theDrawsDerivatives.h[i][j][r] = d->h[i][j] ;
+	  }
+	}
+      }
+    }
+  }
+  return &theDrawsDerivatives ;
+}
@@ -16,6 +16,10 @@
 #include "bioTypes.h"
 #include "bioString.h"
 #include "bioDerivatives.h"
+#include "bioDrawsDerivatives.h"
+
+class bioExprMontecarlo ;
+
 class bioExpression {
  public:
   bioExpression() ;
@@ -39,11 +43,40 @@ class bioExpression {
   virtual const bioDerivatives* getValueAndDerivatives(std::vector<bioUInt> literalIds,
 						       bioBoolean gradient,
 						       bioBoolean hessian) = PURE_VIRTUAL ;
+  // Values and derivatives for the draws firstDraw,...,
+  // firstDraw+blockSize-1 of the current individual. If the draws
+  // cache is active, and the derivatives are not requested, the
+  // values are calculated only once, even if the expression is shared
+  // by several formulas.
+  const bioDrawsDerivatives* getValuesAndDerivativesForDraws(const std::vector<bioUInt>& literalIds,
+							     bioUInt firstDraw,
+							     bioUInt blockSize,
+							     bioBoolean gradient,
+							     bioBoolean hessian) ;
+  // By default, the expression is evaluated draw by draw, or only
+  // once if it does not involve any draw. The expressions that appear
+  // in the integrand of the mixtures of models calculate the values
+  // directly, so that the operations are vectorized across draws.
+  virtual const bioDrawsDerivatives* calculateValuesAndDerivativesForDraws(const std::vector<bioUInt>& literalIds,
+									   bioUInt firstDraw,
+									   bioUInt blockSize,
+									   bioBoolean gradient,
+									   bioBoolean hessian) ;
+  // The values calculated for a block of draws are cached while *s
+  // keeps the same nonzero value. If s is NULL or *s is zero, the
+  // cache is not used.
+  virtual void setDrawsCacheStamp(bioUInt* s) ;
+  // Monte-Carlo integrations involved in the expression that may be
+  // calculated jointly with other ones.
+  virtual void collectJointIntegrals(std::vector<bioExprMontecarlo*>& integrals) ;
+  // Returns true if the value of the expression depends on the draw.
+  virtual bioBoolean dependsOnDraws() ;
   virtual std::map<bioString,bioReal> getAllLiteralValues() ;
  protected:
   std::vector<bioReal>* parameters ;
   std::vector<bioReal>* fixedParameters ;
   bioDerivatives theDerivatives ;
+  bioDrawsDerivatives theDrawsDerivatives ;
   // Dimensons of the data
   // 1. number of rows
   // 2. number of variables
@@ -66,5 +99,15 @@ class bioExpression {
   bioUInt* rowIndex ;
   bioUInt* individualIndex ;
   bioReal missingData ;
+  bioUInt* drawIndexPtr ;
+  // -1 if not yet known, 0 if false, 1 if true.
+  int drawsDependency ;
+  // Cache of the values for a block of draws.
+  bioUInt* drawsCacheStamp ;
+  const bioDrawsDerivatives* cachedDraws ;
+  bioUInt cachedStamp ;
+  bioUInt cachedRow ;
+  bioUInt cachedFirstDraw ;
+  bioUInt cachedBlockSize ;
 };
 #endif
@@ -47,10 +47,14 @@
 #include "bioExprDerive.h"
 #include "bioExprDraws.h"
 #include "bioExprMontecarlo.h"
+#include "bioExprMontecarloControlVariate.h"
+#include "bioExprMontecarloImportance.h"
 #include "bioExprNormalCdf.h"
 #include "bioExprPanelTrajectory.h"
+#include "bioExprLogMontecarloPanelTrajectory.h"
 #include "bioExprRandomVariable.h"
 #include "bioExprIntegrate.h"
+#include "bioExprSparseGridIntegrate.h"
 #include "bioExprMin.h"
 #include "bioExprMax.h"
 
@@ -391,7 +395,41 @@ bioExpression* bioFormula::processFormula(bioString f) {
   else if (typeOfExpression == "MonteCarlo") {
     std::vector<bioString> items = split(f,',') ;
     std::map<bioString,bioExpression*>::iterator e = expressions.find(items[1]) ;
-    theExpression = bioMemoryManagement::the()->get_bioExprMontecarlo(e->second) ;
+    if (items.size() > 2) {
+      // Adaptive integration, or diagnostic output
+      bioReal tolerance = std::stod(items[2]) ;
+      bioUInt minimumDraws = std::stoi(items[3]) ;
+      bioUInt output = std::stoi(items[4]) ;
+      theExpression = bioMemoryManagement::the()->get_bioExprMontecarlo(e->second,
+									tolerance,
+									minimumDraws,
+									output) ;
+    }
+    else {
+      theExpression = bioMemoryManagement::the()->get_bioExprMontecarlo(e->second) ;
+    }
+    expressions[id] = theExpression ;
+    return theExpression ;
+  }
+  else if (typeOfExpression == "MonteCarloControlVariate") {
+    std::vector<bioString> items = split(f,',') ;
+    std::map<bioString,bioExpression*>::iterator e = expressions.find(items[1]) ;
+    std::map<bioString,bioExpression*>::iterator h = expressions.find(items[2]) ;
+    std::map<bioString,bioExpression*>::iterator i = expressions.find(items[3]) ;
+    theExpression = bioMemoryManagement::the()->get_bioExprMontecarloControlVariate(e->second,
+										   h->second,
+										   i->second) ;
+    expressions[id] = theExpression ;
+    return theExpression ;
+  }
+  else if (typeOfExpression == "MonteCarloImportance") {
+    std::vector<bioString> items = split(f,',') ;
+    std::map<bioString,bioExpression*>::iterator e = expressions.find(items[1]) ;
+    std::map<bioString,bioExpression*>::iterator w = expressions.find(items[2]) ;
+    bioBoolean normalized = (std::stoi(items[3]) != 0) ;
+    theExpression = bioMemoryManagement::the()->get_bioExprMontecarloImportance(e->second,
+									       w->second,
+									       normalized) ;
     expressions[id] = theExpression ;
     return theExpression ;
   }
@@ -409,6 +447,13 @@ bioExpression* bioFormula::processFormula(bioString f) {
     expressions[id] = theExpression ;
     return theExpression ;
   }
+  else if (typeOfExpression == "LogMonteCarloPanelTrajectory") {
+    std::vector<bioString> items = split(f,',') ;
+    std::map<bioString,bioExpression*>::iterator e = expressions.find(items[1]) ;
+    theExpression = bioMemoryManagement::the()->get_bioExprLogMontecarloPanelTrajectory(e->second) ;
+    expressions[id] = theExpression ;
+    return theExpression ;
+  }
   else if (typeOfExpression == "exp") {
     std::vector<bioString> items = split(f,',') ;
     std::map<bioString,bioExpression*>::iterator e = expressions.find(items[1]) ;
@@ -428,7 +473,21 @@ bioExpression* bioFormula::processFormula(bioString f) {
     std::vector<bioString> items = split(f,',') ;
     
     std::map<bioString,bioExpression*>::iterator e = expressions.find(items[1]) ;
-    theExpression = bioMemoryManagement::the()->get_bioExprIntegrate(e->second,bioUInt(std::stoi(items[2]))) ;
+    theExpression = bioMemoryManagement::the()->get_bioExprIntegrate(e->second,
+								     bioUInt(std::stoi(items[2])),
+								     bioUInt(std::stoi(items[3]))) ;
+    expressions[id] = theExpression ;
+    return theExpression ;
+  }
+  else if (typeOfExpression == "SparseGridIntegrate") {
+    std::vector<bioString> items = split(f,',') ;
+    std::map<bioString,bioExpression*>::iterator e = expressions.find(items[1]) ;
+    bioUInt level = bioUInt(std::stoi(items[2])) ;
+    std::vector<bioUInt> ids ;
+    for (bioUInt k = 3 ; k < items.size() ; ++k) {
+      ids.push_back(bioUInt(std::stoi(items[k]))) ;
+    }
+    theExpression = bioMemoryManagement::the()->get_bioExprSparseGridIntegrate(e->second,ids,level) ;
     expressions[id] = theExpression ;
     return theExpression ;
   }
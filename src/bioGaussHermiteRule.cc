@@ -0,0 +1,128 @@
+//-*-c++-*------------------------------------------------------------
+//
+// File name : bioGaussHermiteRule.cc
+// @date   Mon Oct 19 17:05:12 2026
+// @author Michel Bierlaire
+// @version Revision 1.0
+//
+//--------------------------------------------------------------------
+
+#include "bioGaussHermiteRule.h"
+#include <cmath>
+#include <limits>
+#include <map>
+#include <memory>
+#include <mutex>
+#include "bioExceptions.h"
+
+const bioGaussHermiteRule* bioGaussHermiteRule::get(bioUInt n) {
+  static std::mutex theMutex ;
+  static std::map<bioUInt,std::unique_ptr<bioGaussHermiteRule> > theRules ;
+  std::lock_guard<std::mutex> lock(theMutex) ;
+  std::unique_ptr<bioGaussHermiteRule>& theRule = theRules[n] ;
+  if (!theRule) {
+    theRule.reset(new bioGaussHermiteRule(n)) ;
+  }
+  return theRule.get() ;
+}
+
+// Number of roots of the Hermite polynomial of degree n that are
+// strictly smaller than x. They are the eigenvalues of the symmetric
+// tridiagonal matrix with zero diagonal and off-diagonal elements
+// sqrt(k/2), k=1,...,n-1, and are counted with a Sturm sequence.
+static bioUInt numberOfRootsBelow(bioReal x, bioUInt n) {
+  bioUInt count = 0 ;
+  bioReal d = -x ;
+  for (bioUInt k = 0 ; k < n ; ++k) {
+    if (k > 0) {
+      d = -x - 0.5 * bioReal(k) / d ;
+    }
+    if (d == 0.0) {
+      d = -std::numeric_limits<bioReal>::min() ;
+    }
+    if (d < 0.0) {
+      ++count ;
+    }
+  }
+  return count ;
+}
+
+// Normalized Hermite polynomial of degree n, and its derivative. The
+// normalization avoids overflows for large values of n.
+static void hermite(bioReal x, bioUInt n, bioReal& value, bioReal& derivative) {
+  const bioReal piToMinusOneQuarter = 1.0 / pow(4.0 * atan(1.0),0.25) ;
+  bioReal p1 = piToMinusOneQuarter ;
+  bioReal p2 = 0.0 ;
+  for (bioUInt j = 0 ; j < n ; ++j) {
+    bioReal p3 = p2 ;
+    p2 = p1 ;
+    p1 = x * sqrt(2.0 / bioReal(j + 1)) * p2 - sqrt(bioReal(j) / bioReal(j + 1)) * p3 ;
+  }
+  value = p1 ;
+  derivative = sqrt(bioReal(2 * n)) * p2 ;
+}
+
+// The nodes are the roots of the Hermite polynomial of degree n. Each
+// positive root is isolated by bisection, which is robust for any
+// value of n, and refined by one iteration of Newton's method. The
+// weights are obtained from the derivative of the polynomial.
+bioGaussHermiteRule::bioGaussHermiteRule(bioUInt n) :
+  nodes(n,0.0), weights(n,0.0), unweightedWeights(n,0.0) {
+  if (n == 0) {
+    throw bioExceptions(__FILE__,__LINE__,"Gauss-Hermite quadrature requires at least one node.") ;
+  }
+  // All the roots are smaller than sqrt(2n+1).
+  const bioReal upper = sqrt(bioReal(2 * n + 2)) ;
+  const bioReal eps = std::numeric_limits<bioReal>::epsilon() ;
+  for (bioUInt i = n / 2 ; i < n ; ++i) {
+    bioReal z(0.0) ;
+    if (2 * i + 1 != n) {
+      // Root number i, in increasing order, lies in [lo,hi].
+      bioReal lo = 0.0 ;
+      bioReal hi = upper ;
+      while (hi - lo > 4.0 * eps * hi) {
+	bioReal mid = 0.5 * (lo + hi) ;
+	if (numberOfRootsBelow(mid,n) > i) {
+	  hi = mid ;
+	}
+	else {
+	  lo = mid ;
+	}
+      }
+      z = 0.5 * (lo + hi) ;
+      bioReal value ;
+      bioReal derivative ;
+      hermite(z,n,value,derivative) ;
+      bioReal newton = z - value / derivative ;
+      if (newton > lo && newton < hi) {
+	z = newton ;
+      }
+    }
+    // Otherwise, middle node of a rule with an odd number of nodes.
+    bioReal value ;
+    bioReal derivative ;
+    hermite(z,n,value,derivative) ;
+    nodes[i] = z ;
+    nodes[n-1-i] = -z ;
+    weights[n-1-i] = weights[i] = 2.0 / (derivative * derivative) ;
+    // Calculated in log scale, as the weights underflow for the
+    // largest nodes.
+    unweightedWeights[n-1-i] = unweightedWeights[i] = exp(log(2.0) - 2.0 * log(std::abs(derivative)) + z * z) ;
+  }
+}
+
+bioUInt bioGaussHermiteRule::size() const {
+  return nodes.size() ;
+}
+
+const std::vector<bioReal>& bioGaussHermiteRule::getNodes() const {
+  return nodes ;
+}
+
+const std::vector<bioReal>& bioGaussHermiteRule::getWeights() const {
+  return weights ;
+}
+
+const std::vector<bioReal>& bioGaussHermiteRule::getUnweightedWeights() const {
+  return unweightedWeights ;
+}
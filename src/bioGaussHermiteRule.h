@@ -0,0 +1,39 @@
+//-*-c++-*------------------------------------------------------------
+//
+// File name : bioGaussHermiteRule.h
+// @date   Mon Oct 19 17:02:44 2026
+// @author Michel Bierlaire
+// @version Revision 1.0
+//
+//--------------------------------------------------------------------
+
+#ifndef bioGaussHermiteRule_h
+#define bioGaussHermiteRule_h
+
+// Nodes and weights of the Gauss-Hermite quadrature with n nodes,
+// approximating the integral from -infinity to +infinity of
+//
+//   f(x) exp(-x*x)
+//
+// Each rule is calculated once, and shared by all the threads and all
+// the expressions.
+
+#include <vector>
+#include "bioTypes.h"
+
+class bioGaussHermiteRule {
+ public:
+  static const bioGaussHermiteRule* get(bioUInt n) ;
+  bioUInt size() const ;
+  const std::vector<bioReal>& getNodes() const ;
+  const std::vector<bioReal>& getWeights() const ;
+  // Weights multiplied by exp(x*x), for the integral of f(x).
+  const std::vector<bioReal>& getUnweightedWeights() const ;
+ private:
+  bioGaussHermiteRule(bioUInt n) ;
+  std::vector<bioReal> nodes ;
+  std::vector<bioReal> weights ;
+  std::vector<bioReal> unweightedWeights ;
+};
+
+#endif
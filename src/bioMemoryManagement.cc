@@ -32,12 +32,16 @@
 #include "bioExprMax.h"
 #include "bioExprUnaryMinus.h"
 #include "bioExprMontecarlo.h"
+#include "bioExprMontecarloControlVariate.h"
+#include "bioExprMontecarloImportance.h"
 #include "bioExprNormalCdf.h"
 #include "bioExprPanelTrajectory.h"
+#include "bioExprLogMontecarloPanelTrajectory.h"
 #include "bioExprExp.h"
 #include "bioExprLog.h"
 #include "bioExprDerive.h"
 #include "bioExprIntegrate.h"
+#include "bioExprSparseGridIntegrate.h"
 #include "bioExprLogLogit.h"
 #include "bioExprLogLogitFullChoiceSet.h"
 #include "bioExprMultSum.h"
@@ -204,6 +208,18 @@ void bioMemoryManagement::releaseAllMemory() {
     delete(*i) ;
   }
   a_bioExprMontecarlo.clear() ;
+  for (std::vector<bioExprMontecarloControlVariate*>::iterator i = a_bioExprMontecarloControlVariate.begin() ;
+       i != a_bioExprMontecarloControlVariate.end() ;
+       ++i) {
+    delete(*i) ;
+  }
+  a_bioExprMontecarloControlVariate.clear() ;
+  for (std::vector<bioExprMontecarloImportance*>::iterator i = a_bioExprMontecarloImportance.begin() ;
+       i != a_bioExprMontecarloImportance.end() ;
+       ++i) {
+    delete(*i) ;
+  }
+  a_bioExprMontecarloImportance.clear() ;
   for (std::vector<bioExprNormalCdf*>::iterator i = a_bioExprNormalCdf.begin() ;
        i != a_bioExprNormalCdf.end() ;
        ++i) {
@@ -216,6 +232,12 @@ void bioMemoryManagement::releaseAllMemory() {
     delete(*i) ;
   }
   a_bioExprPanelTrajectory.clear() ;
+  for (std::vector<bioExprLogMontecarloPanelTrajectory*>::iterator i = a_bioExprLogMontecarloPanelTrajectory.begin() ;
+       i != a_bioExprLogMontecarloPanelTrajectory.end() ;
+       ++i) {
+    delete(*i) ;
+  }
+  a_bioExprLogMontecarloPanelTrajectory.clear() ;
   for (std::vector<bioExprExp*>::iterator i = a_bioExprExp.begin() ;
        i != a_bioExprExp.end() ;
        ++i) {
@@ -240,6 +262,12 @@ void bioMemoryManagement::releaseAllMemory() {
     delete(*i) ;
   }
   a_bioExprIntegrate.clear() ;
+  for (std::vector<bioExprSparseGridIntegrate*>::iterator i = a_bioExprSparseGridIntegrate.begin() ;
+       i != a_bioExprSparseGridIntegrate.end() ;
+       ++i) {
+    delete(*i) ;
+  }
+  a_bioExprSparseGridIntegrate.clear() ;
   for (std::vector<bioExprLinearUtility*>::iterator i = a_bioExprLinearUtility.begin() ;
        i != a_bioExprLinearUtility.end() ;
        ++i) {
@@ -446,12 +474,31 @@ bioExprUnaryMinus* bioMemoryManagement::get_bioExprUnaryMinus(bioExpression* c)
   return ptr ;
 }
 
-bioExprMontecarlo* bioMemoryManagement::get_bioExprMontecarlo(bioExpression* c) {
-  bioExprMontecarlo* ptr = new bioExprMontecarlo(c) ;
+bioExprMontecarlo* bioMemoryManagement::get_bioExprMontecarlo(bioExpression* c,
+								bioReal tolerance,
+								bioUInt minimumDraws,
+								bioUInt output) {
+  bioExprMontecarlo* ptr = new bioExprMontecarlo(c,tolerance,minimumDraws,output) ;
   a_bioExprMontecarlo.push_back(ptr) ;
   return ptr ;
 }
 
+bioExprMontecarloControlVariate* bioMemoryManagement::get_bioExprMontecarloControlVariate(bioExpression* c,
+											     bioExpression* control,
+											     bioExpression* integral) {
+  bioExprMontecarloControlVariate* ptr = new bioExprMontecarloControlVariate(c,control,integral) ;
+  a_bioExprMontecarloControlVariate.push_back(ptr) ;
+  return ptr ;
+}
+
+bioExprMontecarloImportance* bioMemoryManagement::get_bioExprMontecarloImportance(bioExpression* c,
+										     bioExpression* weight,
+										     bioBoolean normalized) {
+  bioExprMontecarloImportance* ptr = new bioExprMontecarloImportance(c,weight,normalized) ;
+  a_bioExprMontecarloImportance.push_back(ptr) ;
+  return ptr ;
+}
+
 bioExprNormalCdf* bioMemoryManagement::get_bioExprNormalCdf(bioExpression* c) {
   bioExprNormalCdf* ptr = new bioExprNormalCdf(c) ;
   a_bioExprNormalCdf.push_back(ptr) ;
@@ -464,6 +511,12 @@ bioExprPanelTrajectory* bioMemoryManagement::get_bioExprPanelTrajectory(bioExpre
   return ptr ;
 }
 
+bioExprLogMontecarloPanelTrajectory* bioMemoryManagement::get_bioExprLogMontecarloPanelTrajectory(bioExpression* c) {
+  bioExprLogMontecarloPanelTrajectory* ptr = new bioExprLogMontecarloPanelTrajectory(c) ;
+  a_bioExprLogMontecarloPanelTrajectory.push_back(ptr) ;
+  return ptr ;
+}
+
 bioExprExp* bioMemoryManagement::get_bioExprExp(bioExpression* c) {
   bioExprExp* ptr = new bioExprExp(c) ;
   a_bioExprExp.push_back(ptr) ;
@@ -482,12 +535,20 @@ bioExprDerive* bioMemoryManagement::get_bioExprDerive(bioExpression* c, bioUInt
   return ptr ;
 }
 
-bioExprIntegrate* bioMemoryManagement::get_bioExprIntegrate(bioExpression* c, bioUInt lid) {
-  bioExprIntegrate* ptr = new bioExprIntegrate(c, lid) ;
+bioExprIntegrate* bioMemoryManagement::get_bioExprIntegrate(bioExpression* c, bioUInt lid, bioUInt numberOfNodes) {
+  bioExprIntegrate* ptr = new bioExprIntegrate(c, lid, numberOfNodes) ;
   a_bioExprIntegrate.push_back(ptr) ;
   return ptr ;
 }
 
+bioExprSparseGridIntegrate* bioMemoryManagement::get_bioExprSparseGridIntegrate(bioExpression* c,
+										   std::vector<bioUInt> ids,
+										   bioUInt level) {
+  bioExprSparseGridIntegrate* ptr = new bioExprSparseGridIntegrate(c,ids,level) ;
+  a_bioExprSparseGridIntegrate.push_back(ptr) ;
+  return ptr ;
+}
+
 bioExprLinearUtility* bioMemoryManagement::get_bioExprLinearUtility(std::vector<bioLinearTerm> t) {
   bioExprLinearUtility* ptr = new bioExprLinearUtility(t) ;
   a_bioExprLinearUtility.push_back(ptr) ;
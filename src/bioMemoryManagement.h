@@ -38,12 +38,16 @@ class bioExprMin ;
 class bioExprMax ;
 class bioExprUnaryMinus ;
 class bioExprMontecarlo ;
+class bioExprMontecarloControlVariate ;
+class bioExprMontecarloImportance ;
 class bioExprNormalCdf ;
 class bioExprPanelTrajectory ;
+class bioExprLogMontecarloPanelTrajectory ;
 class bioExprExp ;
 class bioExprLog ;
 class bioExprDerive ;
 class bioExprIntegrate ;
+class bioExprSparseGridIntegrate ;
 class bioExprLogLogit ;
 class bioExprLogLogitFullChoiceSet ;
 class bioExprMultSum ;
@@ -89,13 +93,26 @@ public:
   bioExprMin* get_bioExprMin(bioExpression* ell, bioExpression* r) ;
   bioExprMax* get_bioExprMax(bioExpression* ell, bioExpression* r) ;
   bioExprUnaryMinus* get_bioExprUnaryMinus(bioExpression* ell) ;
-  bioExprMontecarlo* get_bioExprMontecarlo(bioExpression* ell) ;
+  bioExprMontecarlo* get_bioExprMontecarlo(bioExpression* ell,
+					   bioReal tolerance = 0.0,
+					   bioUInt minimumDraws = 0,
+					   bioUInt output = 0) ;
+  bioExprMontecarloControlVariate* get_bioExprMontecarloControlVariate(bioExpression* ell,
+								       bioExpression* control,
+								       bioExpression* integral) ;
+  bioExprMontecarloImportance* get_bioExprMontecarloImportance(bioExpression* ell,
+							       bioExpression* weight,
+							       bioBoolean normalized) ;
   bioExprNormalCdf* get_bioExprNormalCdf(bioExpression* ell) ;
   bioExprPanelTrajectory* get_bioExprPanelTrajectory(bioExpression* ell) ;
+  bioExprLogMontecarloPanelTrajectory* get_bioExprLogMontecarloPanelTrajectory(bioExpression* ell) ;
   bioExprExp* get_bioExprExp(bioExpression* ell) ;
   bioExprLog* get_bioExprLog(bioExpression* ell) ;
   bioExprDerive* get_bioExprDerive(bioExpression* c, bioUInt lid) ;
-  bioExprIntegrate* get_bioExprIntegrate(bioExpression* c, bioUInt lid) ;
+  bioExprIntegrate* get_bioExprIntegrate(bioExpression* c, bioUInt lid, bioUInt numberOfNodes) ;
+  bioExprSparseGridIntegrate* get_bioExprSparseGridIntegrate(bioExpression* c,
+							     std::vector<bioUInt> ids,
+							     bioUInt level) ;
   bioExprLinearUtility* get_bioExprLinearUtility(std::vector<bioLinearTerm> t) ;
   bioExprLogLogit* get_bioExprLogLogit(bioExpression* c,
 				       std::map<bioUInt,bioExpression*> u,
@@ -130,12 +147,16 @@ private:
   std::vector<bioExprMax*> a_bioExprMax ;
   std::vector<bioExprUnaryMinus*> a_bioExprUnaryMinus ;
   std::vector<bioExprMontecarlo*> a_bioExprMontecarlo ;
+  std::vector<bioExprMontecarloControlVariate*> a_bioExprMontecarloControlVariate ;
+  std::vector<bioExprMontecarloImportance*> a_bioExprMontecarloImportance ;
   std::vector<bioExprNormalCdf*> a_bioExprNormalCdf ;
   std::vector<bioExprPanelTrajectory*> a_bioExprPanelTrajectory ;
+  std::vector<bioExprLogMontecarloPanelTrajectory*> a_bioExprLogMontecarloPanelTrajectory ;
   std::vector<bioExprExp*> a_bioExprExp ;
   std::vector<bioExprLog*> a_bioExprLog ;
   std::vector<bioExprDerive*> a_bioExprDerive ;
   std::vector<bioExprIntegrate*> a_bioExprIntegrate ;
+  std::vector<bioExprSparseGridIntegrate*> a_bioExprSparseGridIntegrate ;
   std::vector<bioExprLinearUtility*> a_bioExprLinearUtility ;
   std::vector<bioExprLogLogit*> a_bioExprLogLogit ;
   std::vector<bioExprLogLogitFullChoiceSet*> a_bioExprLogLogitFullChoiceSet ;
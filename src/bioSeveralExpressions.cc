@@ -10,16 +10,19 @@
 #include "bioSeveralExpressions.h"
 #include "bioExceptions.h"
 #include "bioDebug.h"
+#include "bioExprMontecarlo.h"
 #include <sstream>
 
 bioSeveralExpressions::bioSeveralExpressions(std::vector<bioExpression*> exprs):
-  theExpressions(exprs) {
+  theExpressions(exprs), drawsCacheStamp(0), lastDrawsCacheStamp(0) {
 
   for (std::vector<bioExpression*>::iterator i = exprs.begin() ;
        i != exprs.end();
        ++i) {
     listOfChildren.push_back(*i) ;
   }
+  collectJointIntegrals(jointIntegrals) ;
+  setDrawsCacheStamp(&drawsCacheStamp) ;
 }
 
 bioSeveralExpressions::~bioSeveralExpressions() {
@@ -52,11 +55,34 @@ bioReal bioSeveralExpressions::getValue() {
 }
 
 std::vector<bioReal > bioSeveralExpressions::getValues() {
+  // The formulas that share a mixture, such as the probabilities of
+  // the alternatives of a mixture of logit models, share the
+  // calculation of the integrands for each draw.
+  bioBoolean joint = (jointIntegrals.size() > 1) ;
   std::vector<bioReal > results ;
-  for (std::vector<bioExpression*>::iterator i = theExpressions.begin() ;
-       i != theExpressions.end() ;
-       ++i) {
-    results.push_back((*i)->getValue()) ;
+  try {
+    if (joint) {
+      startDrawsCache() ;
+      bioExprMontecarlo::integrateJointly(jointIntegrals) ;
+      stopDrawsCache() ;
+    }
+    for (std::vector<bioExpression*>::iterator i = theExpressions.begin() ;
+	 i != theExpressions.end() ;
+	 ++i) {
+      results.push_back((*i)->getValue()) ;
+    }
+  }
+  catch(...) {
+    stopDrawsCache() ;
+    for (bioUInt k = 0 ; k < jointIntegrals.size() ; ++k) {
+      jointIntegrals[k]->clearJointValue() ;
+    }
+    throw ;
+  }
+  if (joint) {
+    for (bioUInt k = 0 ; k < jointIntegrals.size() ; ++k) {
+      jointIntegrals[k]->clearJointValue() ;
+    }
   }
   return results ;
 }
@@ -82,3 +108,37 @@ bioSeveralExpressions::getAllValueAndDerivatives(std::vector<bioUInt> literalIds
   }
   return results ;
 }
+
+std::vector<const bioDrawsDerivatives*>
+bioSeveralExpressions::getAllValuesForDraws(bioUInt firstDraw,
+					    bioUInt blockSize) {
+  std::vector<bioUInt> noLiterals ;
+  std::vector<const bioDrawsDerivatives* > results ;
+  startDrawsCache() ;
+  try {
+    for (std::vector<bioExpression*>::iterator i = theExpressions.begin() ;
+	 i != theExpressions.end() ;
+	 ++i) {
+      results.push_back((*i)->getValuesAndDerivativesForDraws(noLiterals, firstDraw, blockSize, false, false)) ;
+    }
+  }
+  catch(...) {
+    stopDrawsCache() ;
+    throw ;
+  }
+  stopDrawsCache() ;
+  return results ;
+}
+
+void bioSeveralExpressions::startDrawsCache() {
+  // Zero means that the cache is not active.
+  ++lastDrawsCacheStamp ;
+  if (lastDrawsCacheStamp == 0) {
+    ++lastDrawsCacheStamp ;
+  }
+  drawsCacheStamp = lastDrawsCacheStamp ;
+}
+
+void bioSeveralExpressions::stopDrawsCache() {
+  drawsCacheStamp = 0 ;
+}
@@ -14,6 +14,8 @@
 #include "bioExpression.h"
 #include "bioString.h"
 
+class bioExprMontecarlo ;
+
 class bioSeveralExpressions: public bioExpression {
 public:
   bioSeveralExpressions(std::vector<bioExpression*> exprs) ;
@@ -28,7 +30,18 @@ public:
   getAllValueAndDerivatives(std::vector<bioUInt> literalIds,
 			    bioBoolean gradient,
 			    bioBoolean hessian) ;
+  // Values of all the expressions for a block of draws.
+  std::vector<const bioDrawsDerivatives*>
+  getAllValuesForDraws(bioUInt firstDraw, bioUInt blockSize) ;
 private:
+  // Activates the draws cache with a new stamp.
+  void startDrawsCache() ;
+  void stopDrawsCache() ;
   std::vector<bioExpression*> theExpressions ;
+  // Monte-Carlo integrals involved in the expressions, calculated
+  // jointly if there are several of them.
+  std::vector<bioExprMontecarlo*> jointIntegrals ;
+  bioUInt drawsCacheStamp ;
+  bioUInt lastDrawsCacheStamp ;
 };
 #endif
@@ -0,0 +1,126 @@
+//-*-c++-*------------------------------------------------------------
+//
+// File name : bioSparseGrid.cc
+// @date   Mon Oct 19 17:26:03 2026
+// @author Michel Bierlaire
+// @version Revision 1.0
+//
+//--------------------------------------------------------------------
+
+#include "bioSparseGrid.h"
+#include <cmath>
+#include <algorithm>
+#include <map>
+#include <memory>
+#include <mutex>
+#include "bioExceptions.h"
+#include "bioGaussHermiteRule.h"
+
+const bioSparseGrid* bioSparseGrid::get(bioUInt dimension, bioUInt level) {
+  static std::mutex theMutex ;
+  static std::map<std::pair<bioUInt,bioUInt>,std::unique_ptr<bioSparseGrid> > theGrids ;
+  std::lock_guard<std::mutex> lock(theMutex) ;
+  std::unique_ptr<bioSparseGrid>& theGrid = theGrids[std::make_pair(dimension,level)] ;
+  if (!theGrid) {
+    theGrid.reset(new bioSparseGrid(dimension,level)) ;
+  }
+  return theGrid.get() ;
+}
+
+static bioReal binomial(bioUInt n, bioUInt k) {
+  bioReal result(1.0) ;
+  for (bioUInt i = 1 ; i <= k ; ++i) {
+    result *= bioReal(n - k + i) / bioReal(i) ;
+  }
+  return result ;
+}
+
+// Smolyak formula: the sum over the multi-indices l such that
+// max(d, k) <= |l| <= q, with q = k + d - 1, of
+//
+//   (-1)^(q - |l|) C(d - 1, q - |l|) Q(l_1) x ... x Q(l_d)
+//
+// where Q(l) is the one-dimensional rule with l nodes. The nodes
+// appearing in several tensor products are merged.
+bioSparseGrid::bioSparseGrid(bioUInt d, bioUInt k) : dimension(d) {
+  if (d == 0) {
+    throw bioExceptions(__FILE__,__LINE__,"Sparse grid with no dimension.") ;
+  }
+  if (k == 0) {
+    throw bioExceptions(__FILE__,__LINE__,"The level of a sparse grid must be at least one.") ;
+  }
+  const bioReal sqrtPi = sqrt(4.0 * atan(1.0)) ;
+  const bioReal sqrtTwo = sqrt(2.0) ;
+  bioUInt q = k + d - 1 ;
+  bioUInt minimumSum = std::max(d,k) ;
+  std::map<std::vector<bioReal>,bioReal> grid ;
+  std::vector<bioUInt> levels(d,1) ;
+  while (true) {
+    bioUInt sum = 0 ;
+    for (bioUInt j = 0 ; j < d ; ++j) {
+      sum += levels[j] ;
+    }
+    if (sum >= minimumSum && sum <= q) {
+      bioReal coefficient = binomial(d - 1,q - sum) ;
+      if ((q - sum) % 2 == 1) {
+	coefficient = -coefficient ;
+      }
+      std::vector<const bioGaussHermiteRule*> rules(d) ;
+      for (bioUInt j = 0 ; j < d ; ++j) {
+	rules[j] = bioGaussHermiteRule::get(levels[j]) ;
+      }
+      // Enumeration of the nodes of the tensor product.
+      std::vector<bioUInt> position(d,0) ;
+      std::vector<bioReal> node(d) ;
+      while (true) {
+	bioReal weight = coefficient ;
+	for (bioUInt j = 0 ; j < d ; ++j) {
+	  node[j] = sqrtTwo * rules[j]->getNodes()[position[j]] ;
+	  weight *= rules[j]->getWeights()[position[j]] / sqrtPi ;
+	}
+	grid[node] += weight ;
+	bioUInt j = 0 ;
+	while (j < d && ++position[j] == rules[j]->size()) {
+	  position[j] = 0 ;
+	  ++j ;
+	}
+	if (j == d) {
+	  break ;
+	}
+      }
+    }
+    // Next multi-index, with each level between 1 and k.
+    bioUInt j = 0 ;
+    while (j < d && ++levels[j] > k) {
+      levels[j] = 1 ;
+      ++j ;
+    }
+    if (j == d) {
+      break ;
+    }
+  }
+  for (std::map<std::vector<bioReal>,bioReal>::iterator i = grid.begin() ;
+       i != grid.end() ;
+       ++i) {
+    if (i->second != 0.0) {
+      nodes.push_back(i->first) ;
+      weights.push_back(i->second) ;
+    }
+  }
+}
+
+bioUInt bioSparseGrid::size() const {
+  return weights.size() ;
+}
+
+bioUInt bioSparseGrid::getDimension() const {
+  return dimension ;
+}
+
+const std::vector< std::vector<bioReal> >& bioSparseGrid::getNodes() const {
+  return nodes ;
+}
+
+const std::vector<bioReal>& bioSparseGrid::getWeights() const {
+  return weights ;
+}
@@ -0,0 +1,43 @@
+//-*-c++-*------------------------------------------------------------
+//
+// File name : bioSparseGrid.h
+// @date   Mon Oct 19 17:21:37 2026
+// @author Michel Bierlaire
+// @version Revision 1.0
+//
+//--------------------------------------------------------------------
+
+#ifndef bioSparseGrid_h
+#define bioSparseGrid_h
+
+// Smolyak sparse grid approximating the expectation of f(x), where x
+// is a vector of independent standard normal random variables. It
+// combines tensor products of one-dimensional Gauss-Hermite rules,
+// where the rule of level l has l nodes. The grid of level k is exact
+// for polynomials of total degree up to 2k-1.
+//
+// Each grid is calculated once, and shared by all the threads and all
+// the expressions.
+
+#include <vector>
+#include "bioTypes.h"
+
+class bioSparseGrid {
+ public:
+  static const bioSparseGrid* get(bioUInt dimension, bioUInt level) ;
+  bioUInt size() const ;
+  bioUInt getDimension() const ;
+  // Dimensions of the nodes
+  // 1. number of nodes
+  // 2. dimension
+  const std::vector< std::vector<bioReal> >& getNodes() const ;
+  // Some weights may be negative.
+  const std::vector<bioReal>& getWeights() const ;
+ private:
+  bioSparseGrid(bioUInt dimension, bioUInt level) ;
+  bioUInt dimension ;
+  std::vector< std::vector<bioReal> > nodes ;
+  std::vector<bioReal> weights ;
+};
+
+#endif
@@ -22,6 +22,7 @@ void bioThreadMemory::resize(bioUInt nThreads, bioUInt dim) {
     inputStructures[i].grad.resize(dim) ;
     inputStructures[i].hessian.resize(dim,inputStructures[i].grad) ;
     inputStructures[i].bhhh.resize(dim,inputStructures[i].grad) ;
+    inputStructures[i].points = NULL ;
   }
 }
 
@@ -33,6 +33,17 @@ typedef struct{
   bioReal result ;
   bioUInt startData ;
   bioUInt endData ;
+  // If not NULL, only the entries of the data with these indices
+  // are used, and startData and endData refer to this vector.
+  std::vector<bioUInt>* sample ;
+  // If not NULL, the function is calculated for each of these
+  // values of the parameters, during the same pass on the data. The
+  // values of the parameters are copied in currentPoint, and the
+  // results are accumulated in pointValues and pointGradients.
+  std::vector< std::vector<bioReal> >* points ;
+  std::vector<bioReal> currentPoint ;
+  std::vector<bioReal> pointValues ;
+  std::vector<bioReal> pointGradients ;
   bioFormula theLoglike ;
   bioFormula theWeight ;
   std::vector<bioUInt>* literalIds ;
@@ -11,14 +11,26 @@
 #include "bioThreadMemorySimul.h"
 #include "bioExceptions.h"
 #include "bioSeveralExpressions.h"
-bioThreadMemorySimul::bioThreadMemorySimul() {
+bioThreadMemorySimul::bioThreadMemorySimul(): nbrOfFormulas(0) {
   
 }
 
 void bioThreadMemorySimul::resize(bioUInt nThreads) {
   inputStructures.resize(nThreads) ;
-  theFormulas.resize(nThreads) ;
   for (bioUInt i = 0 ; i < nThreads ; ++i) {
+    inputStructures[i].aggregate = false ;
+    inputStructures[i].aggregationTerms = NULL ;
+    inputStructures[i].groups = NULL ;
+    inputStructures[i].jacobianLiteralIds = NULL ;
+    inputStructures[i].posteriorQuantiles = NULL ;
+    inputStructures[i].numberOfDraws = 0 ;
+  }
+  theFormulas.resize(nThreads) ;
+  clearResults() ;
+}
+
+void bioThreadMemorySimul::clearResults() {
+  for (bioUInt i = 0 ; i < inputStructures.size() ; ++i) {
     inputStructures[i].results.erase(inputStructures[i].results.begin(),
 				     inputStructures[i].results.end()) ;
   }
@@ -49,6 +61,11 @@ void bioThreadMemorySimul::setFormulas(std::vector<std::vector<bioString> > vect
   for (bioUInt i = 0 ; i < numberOfThreads() ; ++i) {
     theFormulas[i].setExpressions(vectOfExpressionsStrings) ;
   }
+  nbrOfFormulas = vectOfExpressionsStrings.size() ;
+}
+
+bioUInt bioThreadMemorySimul::numberOfFormulas() {
+  return nbrOfFormulas ;
 }
 
 bioUInt bioThreadMemorySimul::numberOfThreads() {
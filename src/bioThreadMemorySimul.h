@@ -29,6 +29,15 @@ typedef struct{
   bioUInt endData ;
   bioSeveralFormulas theFormulas ;
   bioBoolean panel ;
+  bioBoolean aggregate ;
+  std::vector< std::vector<bioUInt> >* aggregationTerms ;
+  std::vector<bioUInt>* groups ;
+  std::vector< std::vector<bioReal> > aggregates ;
+  std::vector<bioUInt>* jacobianLiteralIds ;
+  // Posterior mode: the first formula is the likelihood conditional
+  // on the draws, and the others are random coefficients.
+  std::vector<bioReal>* posteriorQuantiles ;
+  bioUInt numberOfDraws ;
 } bioThreadArgSimul ;
 
 
@@ -38,10 +47,12 @@ class bioThreadMemorySimul {
   bioThreadMemorySimul() ;
   ~bioThreadMemorySimul() ;
   void resize(bioUInt nThreads) ;
+  void clearResults() ;
   bioThreadArgSimul* getInput(bioUInt t) ;
   void setFormulas(std::vector<std::vector<bioString> > vectOfExpressionsStrings) ;
   bioUInt numberOfThreads() ;
   bioUInt dimension() ;
+  bioUInt numberOfFormulas() ;
   void setParameters(std::vector<bioReal>* p) ;
   void setFixedParameters(std::vector<bioReal>* p) ;
   void setData(std::vector< std::vector<bioReal> >* d) ;
@@ -52,6 +63,7 @@ class bioThreadMemorySimul {
  private:
   std::vector<bioThreadArgSimul> inputStructures ;
   std::vector<bioSeveralFormulas> theFormulas ;
+  bioUInt nbrOfFormulas ;
 
 };
 
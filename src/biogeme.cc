@@ -12,6 +12,7 @@
 #include <sstream>
 #include <cmath>
 #include <algorithm>
+#include <limits>
 #include <pthread.h>
 #include "bioMemoryManagement.h"
 #include "bioExceptions.h"
@@ -27,6 +28,8 @@ static std::exception_ptr theExceptionPtr = nullptr ;
 
 void *computeFunctionForThread( void *ptr );
 
+void *computeSeveralPointsForThread( void *ptr );
+
 void *simulFunctionForThread( void *ptr );
 
 biogeme::biogeme(): nbrOfThreads(1),
@@ -34,7 +37,9 @@ biogeme::biogeme(): nbrOfThreads(1),
 		    calculateHessian(false),
 		    calculateBhhh(false),
 		    panel(false),
-		    forceDataPreparation(true) {
+		    forceDataPreparation(true),
+		    simulationPrepared(false),
+		    useSample(false) {
 }
 
 biogeme::~biogeme() {
@@ -245,6 +250,146 @@ bioReal biogeme::calculateLikeAndDerivatives(std::vector<bioReal> betas,
 
 }
 
+void biogeme::calculateHessianVectorProduct(std::vector<bioReal> betas,
+					    std::vector<bioReal> fixedBetas,
+					    std::vector<bioUInt> betaIds,
+					    std::vector<bioReal> direction,
+					    bioReal* hv) {
+
+  bioUInt n = betas.size() ;
+  if (direction.size() != n) {
+    std::stringstream str ;
+    str << "Direction: inconsistent dimensions " << direction.size() << " and " << n ;
+    throw bioExceptions(__FILE__,__LINE__,str.str()) ;
+  }
+  bioReal normDirection(0.0) ;
+  bioReal normBetas(0.0) ;
+  for (bioUInt i = 0 ; i < n ; ++i) {
+    normDirection += direction[i] * direction[i] ;
+    normBetas += betas[i] * betas[i] ;
+  }
+  normDirection = sqrt(normDirection) ;
+  normBetas = sqrt(normBetas) ;
+  if (normDirection == 0.0) {
+    std::fill(hv,hv+n,0.0) ;
+    return ;
+  }
+  
+  ++nbrFctEvaluations ;
+  literalIds = betaIds ;
+  if (forceDataPreparation || (theThreadMemory.dimension() != literalIds.size())) {
+    prepareData() ;
+    forceDataPreparation = false ;
+  }
+  calculateHessian = false ;
+  calculateBhhh = false ;
+  theThreadMemory.setFixedParameters(&fixedBetas) ;
+
+  // The step is scaled so that the perturbation of the parameters
+  // is of the order of the cubic root of the machine epsilon, which
+  // is optimal for central differences.
+  bioReal step = cbrt(std::numeric_limits<bioReal>::epsilon()) *
+    std::max(bioReal(1.0),normBetas) / normDirection ;
+  std::vector<bioReal> betasPlus(betas) ;
+  std::vector<bioReal> betasMinus(betas) ;
+  for (bioUInt i = 0 ; i < n ; ++i) {
+    betasPlus[i] += step * direction[i] ;
+    betasMinus[i] -= step * direction[i] ;
+  }
+  std::vector<bioReal> gPlus(n) ;
+  std::vector<bioReal> gMinus(n) ;
+  theThreadMemory.setParameters(&betasPlus) ;
+  applyTheFormula(&gPlus) ;
+  theThreadMemory.setParameters(&betasMinus) ;
+  applyTheFormula(&gMinus) ;
+  for (bioUInt i = 0 ; i < n ; ++i) {
+    hv[i] = (gPlus[i] - gMinus[i]) / (2.0 * step) ;
+  }
+}
+
+void biogeme::calculateSeveralLikelihoods(std::vector< std::vector<bioReal> > betas,
+					  std::vector<bioReal> fixedBetas,
+					  std::vector<bioUInt> betaIds,
+					  bioBoolean gradient,
+					  bioReal* f,
+					  bioReal* g) {
+
+  bioUInt n = betaIds.size() ;
+  bioUInt nPoints = betas.size() ;
+  for (bioUInt p = 0 ; p < nPoints ; ++p) {
+    if (betas[p].size() != n) {
+      std::stringstream str ;
+      str << "Point " << p << ": inconsistent dimensions " << betas[p].size() << " and " << n ;
+      throw bioExceptions(__FILE__,__LINE__,str.str()) ;
+    }
+  }
+  if (nPoints == 0) {
+    return ;
+  }
+  nbrFctEvaluations += nPoints ;
+  literalIds = betaIds ;
+  if (forceDataPreparation || (theThreadMemory.dimension() != literalIds.size())) {
+    prepareData() ;
+    forceDataPreparation = false ;
+  }
+  calculateHessian = false ;
+  calculateBhhh = false ;
+  theThreadMemory.setFixedParameters(&fixedBetas) ;
+
+  std::vector<pthread_t> theThreads(nbrOfThreads) ;
+  for (bioUInt thread = 0 ; thread < nbrOfThreads ; ++thread) {
+    if (theInput[thread] == NULL) {
+      throw bioExceptNullPointer(__FILE__,__LINE__,"thread") ;
+    }
+    theInput[thread]->points = &betas ;
+    theInput[thread]->calcGradient = gradient ;
+    theInput[thread]->calcHessian = false ;
+    theInput[thread]->calcBhhh = false ;
+    bioUInt diagnostic = pthread_create(&(theThreads[thread]),
+					NULL,
+					computeSeveralPointsForThread,
+					(void*) theInput[thread]) ;
+    if (diagnostic != 0) {
+      std::stringstream str ;
+      str << "Error " << diagnostic << " in creating thread " << thread << "/" << nbrOfThreads ;
+      throw bioExceptions(__FILE__,__LINE__,str.str()) ;
+    }
+  }
+
+  std::fill(f,f+nPoints,0.0) ;
+  if (gradient) {
+    std::fill(g,g+nPoints*n,0.0) ;
+  }
+  for (bioUInt thread = 0 ; thread < nbrOfThreads ; ++thread) {
+    pthread_join( theThreads[thread], NULL);
+    theInput[thread]->points = NULL ;
+    if (theExceptionPtr != nullptr) {
+      std::rethrow_exception(theExceptionPtr);
+    }
+    for (bioUInt p = 0 ; p < nPoints ; ++p) {
+      f[p] += theInput[thread]->pointValues[p] ;
+    }
+    if (gradient) {
+      for (bioUInt i = 0 ; i < nPoints * n ; ++i) {
+	g[i] += theInput[thread]->pointGradients[i] ;
+      }
+    }
+  }
+
+  for (bioUInt p = 0 ; p < nPoints ; ++p) {
+    if (!std::isfinite(f[p])) {
+      f[p] = -std::numeric_limits<bioReal>::max() ;
+    }
+  }
+  if (gradient) {
+    for (bioUInt i = 0 ; i < nPoints * n ; ++i) {
+      if (!std::isfinite(g[i])) {
+	g[i] = -std::numeric_limits<bioReal>::max() ;
+      }
+    }
+  }
+}
+
 // bioReal biogeme::calculateLikeAndDerivatives(std::vector<bioReal>& betas,
 // 					     std::vector<bioReal>& fixedBetas,
 // 					     std::vector<bioUInt>& betaIds,
@@ -318,14 +463,15 @@ void *computeFunctionForThread(void* fctPtr) {
       }
     }
 
+    // The derivatives are available only if they have been requested.
+    bioUInt nGradient = (input->calcGradient) ? input->grad.size() : 0 ;
     bioExpression* myLoglike = input->theLoglike.getExpression() ;
     if (input->panel) {
       // Panel data
       bioUInt individual ;
       myLoglike->setIndividualIndex(&individual) ;
-      for (individual = input->startData ;
-	   individual < input->endData ;
-	   ++individual) {
+      for (bioUInt k = input->startData ; k < input->endData ; ++k) {
+	individual = (input->sample == NULL) ? k : (*input->sample)[k] ;
 	if (input->theWeight.isDefined()) {
 	  w = input->theWeight.getExpression()->getValue() ;
 	}
@@ -336,7 +482,7 @@ void *computeFunctionForThread(void* fctPtr) {
       
 	if (!input->theWeight.isDefined()) {
 	  input->result += fgh->f ;
-	  for (bioUInt i = 0 ; i < input->grad.size() ; ++i) {
+	  for (bioUInt i = 0 ; i < nGradient ; ++i) {
 	    (input->grad)[i] += fgh->g[i] ;
 	    if (input->calcHessian) {
 	      for (bioUInt j = 0 ; j < input->grad.size() ; ++j) {
@@ -352,7 +498,7 @@ void *computeFunctionForThread(void* fctPtr) {
 	}
 	else {
 	  input->result += w * fgh->f ;
-	  for (bioUInt i = 0 ; i < input->grad.size() ; ++i) {
+	  for (bioUInt i = 0 ; i < nGradient ; ++i) {
 	    (input->grad)[i] += w * fgh->g[i] ;
 	    if (input->calcHessian) {
 	      for (bioUInt j = 0 ; j < input->grad.size() ; ++j) {
@@ -382,10 +528,8 @@ void *computeFunctionForThread(void* fctPtr) {
 	input->theWeight.setRowIndex(&row) ;
       }
 
-      for (row = input->startData ;
-	   row < input->endData ;
-	   ++row) {
-	
+      for (bioUInt k = input->startData ; k < input->endData ; ++k) {
+	row = (input->sample == NULL) ? k : (*input->sample)[k] ;
 	try {
 	  if (input->theWeight.isDefined()) {
 	    w = input->theWeight.getExpression()->getValue() ;
@@ -400,7 +544,7 @@ void *computeFunctionForThread(void* fctPtr) {
 	  if (!input->theWeight.isDefined()) {
 	    input->result += fgh->f ;
 
-	    for (bioUInt i = 0 ; i < input->grad.size() ; ++i) {
+	    for (bioUInt i = 0 ; i < nGradient ; ++i) {
                 
 	      (input->grad)[i] += fgh->g[i] ;
 	      if (input->calcHessian) {
@@ -417,7 +561,7 @@ void *computeFunctionForThread(void* fctPtr) {
 	  }
 	  else {
 	    input->result += w * fgh->f ;
-	    for (bioUInt i = 0 ; i < input->grad.size() ; ++i) {
+	    for (bioUInt i = 0 ; i < nGradient ; ++i) {
 	      (input->grad)[i] += w * fgh->g[i] ;
 	      if (input->calcHessian) {
 		for (bioUInt j = 0 ; j < input->grad.size() ; ++j) {
@@ -454,6 +598,224 @@ void *computeFunctionForThread(void* fctPtr) {
 }
 
 
+// Each observation (or individual for panel data) is loaded once,
+// and the function is calculated for all the points before moving to
+// the next one. The formulas of the thread read the parameters from
+// its own copy of the current point.
+void *computeSeveralPointsForThread(void* fctPtr) {
+  try {
+    bioThreadArg *input = (bioThreadArg *) fctPtr;
+    std::vector< std::vector<bioReal> >& points = *(input->points) ;
+    bioUInt nPoints = points.size() ;
+    bioUInt n = input->literalIds->size() ;
+    input->pointValues.assign(nPoints,0.0) ;
+    input->pointGradients.assign((input->calcGradient) ? nPoints * n : 0,0.0) ;
+    input->currentPoint.resize(n) ;
+    input->theLoglike.setParameters(&(input->currentPoint)) ;
+    if (input->theWeight.isDefined()) {
+      input->theWeight.setParameters(&(input->currentPoint)) ;
+    }
+
+    bioExpression* myLoglike = input->theLoglike.getExpression() ;
+    if (myLoglike == NULL) {
+      throw bioExceptNullPointer(__FILE__,__LINE__,"thread memory") ;
+    }
+    bioUInt index ;
+    myLoglike->setIndividualIndex(&index) ;
+    if (!input->panel) {
+      myLoglike->setRowIndex(&index) ;
+      if (input->theWeight.isDefined()) {
+	input->theWeight.setIndividualIndex(&index) ;
+	input->theWeight.setRowIndex(&index) ;
+      }
+    }
+    bioReal w(1.0) ;
+    for (bioUInt k = input->startData ; k < input->endData ; ++k) {
+      index = (input->sample == NULL) ? k : (*input->sample)[k] ;
+      try {
+	for (bioUInt p = 0 ; p < nPoints ; ++p) {
+	  std::copy(points[p].begin(),points[p].end(),input->currentPoint.begin()) ;
+	  if (input->theWeight.isDefined()) {
+	    w = input->theWeight.getExpression()->getValue() ;
+	  }
+	  const bioDerivatives* fgh = myLoglike->getValueAndDerivatives(*input->literalIds,
+									input->calcGradient,
+									false) ;
+	  input->pointValues[p] += w * fgh->f ;
+	  if (input->calcGradient) {
+	    bioReal* gp = &(input->pointGradients[p * n]) ;
+	    for (bioUInt i = 0 ; i < n ; ++i) {
+	      gp[i] += w * fgh->g[i] ;
+	    }
+	  }
+	}
+      }
+      catch(bioExceptions& e) {
+	std::stringstream str ;
+	str << "Error for data entry " << index << " : " << e.what() ;
+	throw bioExceptions(__FILE__,__LINE__,str.str()) ;
+      }
+    }
+    input->theLoglike.setRowIndex(NULL) ;
+    input->theLoglike.setIndividualIndex(NULL) ;
+    if (input->theWeight.isDefined()) {
+      input->theWeight.setRowIndex(NULL) ;
+      input->theWeight.setIndividualIndex(NULL) ;
+    }
+  }
+  catch(...)  {
+    theExceptionPtr = std::current_exception() ;
+  }
+
+  return NULL ;
+}
+
+
+// Either stores the simulated values, or accumulates them in the
+// aggregated indicators, if the aggregation mode is requested.
+static void storeSimulatedValues(bioThreadArgSimul *input,
+				 bioUInt index,
+				 const std::vector<bioReal>& res) {
+  if (!input->aggregate) {
+    input->results.push_back(res) ;
+    return ;
+  }
+  bioUInt group = (input->groups == NULL) ? 0 : (*input->groups)[index] ;
+  std::vector<bioReal>& theAggregates = input->aggregates[group] ;
+  for (bioUInt t = 0 ; t < input->aggregationTerms->size() ; ++t) {
+    bioReal term = 1.0 ;
+    for (std::vector<bioUInt>::const_iterator k = (*input->aggregationTerms)[t].begin() ;
+	 k != (*input->aggregationTerms)[t].end() ;
+	 ++k) {
+      term *= res[*k] ;
+    }
+    theAggregates[t] += term ;
+  }
+}
+
+// Number of draws for which the formulas are calculated together in
+// posterior mode.
+static const bioUInt posteriorBlockSize = 64 ;
+
+// Summary of the distribution of the random coefficients (all the
+// formulas but the first) conditional on the choices of one
+// individual. The first formula is the likelihood of these choices
+// conditional on the draws, and is used to weight the draws. For each
+// coefficient, the mean, the variance and the requested quantiles are
+// stored.
+static void simulatePosteriorOfObservation(bioThreadArgSimul *input,
+					   bioSeveralExpressions* expressions,
+					   bioUInt index) {
+  const std::vector<bioReal>& quantiles = *input->posteriorQuantiles ;
+  bioUInt R = input->numberOfDraws ;
+  bioUInt drawIndex ;
+  bioUInt row ;
+  if (input->panel) {
+    // The coefficients may involve variables, which are supposed to
+    // be constant across the observations of the individual.
+    row = (*input->dataMap)[index][0] ;
+    expressions->setRowIndex(&row) ;
+  }
+  expressions->setDrawIndex(&drawIndex) ;
+  std::vector<bioReal> weights(R) ;
+  std::vector<std::vector<bioReal> > values ;
+  for (bioUInt first = 0 ; first < R ; first += posteriorBlockSize) {
+    bioUInt blockSize = std::min(posteriorBlockSize,R - first) ;
+    std::vector<const bioDrawsDerivatives*> c =
+      expressions->getAllValuesForDraws(first, blockSize) ;
+    values.resize(c.size() - 1,std::vector<bioReal>(R)) ;
+    bioUInt s = c[0]->stride() ;
+    for (bioUInt r = 0 ; r < blockSize ; ++r) {
+      weights[first + r] = c[0]->f[s*r] ;
+    }
+    for (bioUInt k = 0 ; k < values.size() ; ++k) {
+      s = c[k+1]->stride() ;
+      for (bioUInt r = 0 ; r < blockSize ; ++r) {
+	values[k][first + r] = c[k+1]->f[s*r] ;
+      }
+    }
+  }
+  bioReal total(0.0) ;
+  for (bioUInt r = 0 ; r < R ; ++r) {
+    total += weights[r] ;
+  }
+  bioUInt m = 2 + quantiles.size() ;
+  std::vector<bioReal> res(values.size() * m,std::numeric_limits<bioReal>::quiet_NaN()) ;
+  if (total <= 0.0 || !std::isfinite(total)) {
+    // The choices of the individual have zero likelihood for all
+    // draws, so that the posterior is not defined.
+    storeSimulatedValues(input, index, res) ;
+    return ;
+  }
+  std::vector<bioUInt> order(R) ;
+  for (bioUInt k = 0 ; k < values.size() ; ++k) {
+    const std::vector<bioReal>& beta = values[k] ;
+    bioReal mean(0.0) ;
+    for (bioUInt r = 0 ; r < R ; ++r) {
+      mean += weights[r] * beta[r] ;
+    }
+    mean /= total ;
+    bioReal variance(0.0) ;
+    for (bioUInt r = 0 ; r < R ; ++r) {
+      variance += weights[r] * (beta[r] - mean) * (beta[r] - mean) ;
+    }
+    res[k * m] = mean ;
+    res[k * m + 1] = variance / total ;
+    if (quantiles.empty()) {
+      continue ;
+    }
+    // The quantile p is the smallest value such that the posterior
+    // probability of the smaller or equal values is at least p.
+    for (bioUInt r = 0 ; r < R ; ++r) {
+      order[r] = r ;
+    }
+    std::sort(order.begin(),order.end(),
+	      [&beta](bioUInt a, bioUInt b) { return beta[a] < beta[b] ; }) ;
+    for (bioUInt q = 0 ; q < quantiles.size() ; ++q) {
+      bioReal target = quantiles[q] * total ;
+      bioReal cumulative(0.0) ;
+      bioUInt r = 0 ;
+      while (r + 1 < R) {
+	cumulative += weights[order[r]] ;
+	if (cumulative >= target) {
+	  break ;
+	}
+	++r ;
+      }
+      res[k * m + 2 + q] = beta[order[r]] ;
+    }
+  }
+  storeSimulatedValues(input, index, res) ;
+}
+
+// Calculates the values of the formulas for one observation (or one
+// individual for panel data). If the Jacobian is requested, the
+// derivatives with respect to the requested literals are calculated
+// in the same pass, and stored after the values.
+static void simulateOneObservation(bioThreadArgSimul *input,
+				   bioSeveralExpressions* expressions,
+				   bioUInt index) {
+  if (input->posteriorQuantiles != NULL) {
+    simulatePosteriorOfObservation(input, expressions, index) ;
+    return ;
+  }
+  if (input->jacobianLiteralIds == NULL) {
+    storeSimulatedValues(input, index, expressions->getValues()) ;
+    return ;
+  }
+  std::vector<const bioDerivatives*> fg =
+    expressions->getAllValueAndDerivatives(*input->jacobianLiteralIds, true, false) ;
+  bioUInt nc = input->jacobianLiteralIds->size() ;
+  std::vector<bioReal> res(fg.size() * (1 + nc)) ;
+  for (bioUInt j = 0 ; j < fg.size() ; ++j) {
+    res[j] = fg[j]->f ;
+    for (bioUInt k = 0 ; k < nc ; ++k) {
+      res[fg.size() + j * nc + k] = fg[j]->g[k] ;
+    }
+  }
+  storeSimulatedValues(input, index, res) ;
+}
+
 void *simulFunctionForThread(void* fctPtr) {
   try {
     bioThreadArgSimul *input = (bioThreadArgSimul *) fctPtr;
@@ -465,8 +827,7 @@ void *simulFunctionForThread(void* fctPtr) {
 	   individual < input->endData ;
 	   ++individual) {
 	try {
-	  std::vector<bioReal > res = expressions->getValues() ;
-	  input->results.push_back(res) ;
+	  simulateOneObservation(input, expressions, individual) ;
 	}
 	catch(bioExceptions& e) {
 	  std::stringstream str ;
@@ -487,8 +848,7 @@ void *simulFunctionForThread(void* fctPtr) {
 	   row < input->endData ;
 	   ++row) {
 	try {
-	  std::vector<bioReal > res = expressions->getValues() ;
-	  input->results.push_back(res) ;
+	  simulateOneObservation(input, expressions, row) ;
 	}
 	catch(bioExceptions& e) {
 	  std::stringstream str ;
@@ -592,43 +952,60 @@ void biogeme::simulateSeveralFormulas(std::vector<std::vector<bioString> > formu
 				      std::vector< std::vector<bioReal> > data,
 				      bioReal* results) {
 
+  prepareSimulation(formulas, t) ;
+  setSimulationBetas(betas, fixedBetas) ;
+  simulatePrepared(results) ;
+  return ;
+}
+
+void biogeme::prepareSimulation(std::vector<std::vector<bioString> > formulas,
+				bioUInt t) {
   nbrOfThreads = t ;
   theThreadMemorySimul.resize(nbrOfThreads) ;
   theThreadMemorySimul.setFormulas(formulas) ;
   prepareDataSimul() ;
-  theThreadMemorySimul.setParameters(&betas) ;
-  theThreadMemorySimul.setFixedParameters(&fixedBetas) ;
-  
-  std::vector<pthread_t> theThreads(nbrOfThreads) ;
-  for (bioUInt thread = 0 ; thread < nbrOfThreads ; ++thread) {
-    bioSeveralExpressions* theFormulas = theSimulInput[thread]->theFormulas.getExpressions() ;
-    theFormulas->setData(theSimulInput[thread]->data) ;
-    if (panel) {
-      theFormulas->setDataMap(theSimulInput[thread]->dataMap) ;
-    }
-    theFormulas->setMissingData(theSimulInput[thread]->missingData) ;
-    if (theSimulInput[thread] == NULL) {
-      throw bioExceptNullPointer(__FILE__,__LINE__,"thread") ;
-    }
-    bioUInt diagnostic = pthread_create(&(theThreads[thread]),
-					NULL,
-					simulFunctionForThread,
-					(void*) theSimulInput[thread]) ;
-    
-    if (diagnostic != 0) {
-      std::stringstream str ;
-      str << "Error " << diagnostic << " in creating thread " << thread << "/" << nbrOfThreads ;
-      throw bioExceptions(__FILE__,__LINE__,str.str()) ;
+  theThreadMemorySimul.setParameters(&theSimulBetas) ;
+  theThreadMemorySimul.setFixedParameters(&theSimulFixedBetas) ;
+  simulationPrepared = true ;
+}
+
+void biogeme::setSimulationBetas(std::vector<bioReal> betas,
+				 std::vector<bioReal> fixedBetas) {
+  // The expressions keep a pointer to these vectors, so that the
+  // values can be updated without parsing the formulas again.
+  theSimulBetas = betas ;
+  theSimulFixedBetas = fixedBetas ;
+}
+
+void biogeme::setDataColumn(bioUInt column, std::vector<bioReal> values) {
+  if (values.size() != theData.size()) {
+    std::stringstream str ;
+    str << "Inconsistent dimensions: " << values.size()
+	<< " values for " << theData.size() << " rows" ;
+    throw bioExceptions(__FILE__,__LINE__,str.str()) ;
+  }
+  for (bioUInt row = 0 ; row < theData.size() ; ++row) {
+    if (column >= theData[row].size()) {
+      throw bioExceptOutOfRange<bioUInt>(__FILE__,__LINE__,column,0,theData[row].size() - 1) ;
     }
+    // The data is modified in place, so that the pointers stored in
+    // the thread memory remain valid.
+    theData[row][column] = values[row] ;
   }
+}
 
-  bioUInt N = data.size() ;
+void biogeme::simulatePrepared(bioReal* results) {
 
-  for (bioUInt thread = 0 ; thread < nbrOfThreads ; ++thread) {
-    pthread_join( theThreads[thread], NULL);
-    if (theExceptionPtr != nullptr) {
-      std::rethrow_exception(theExceptionPtr);
-    }
+  if (!simulationPrepared) {
+    throw bioExceptions(__FILE__,__LINE__,"The function prepareSimulation must be called first") ;
+  }
+  theThreadMemorySimul.clearResults() ;
+  for (bioUInt thread = 0 ; thread < theSimulInput.size() ; ++thread) {
+    theSimulInput[thread]->aggregate = false ;
+  }
+  runSimulationThreads() ;
+  bioUInt N = theData.size() ;
+  for (bioUInt thread = 0 ; thread < theSimulInput.size() ; ++thread) {
     if (theSimulInput[thread]->results.size() !=
 	theSimulInput[thread]->endData - theSimulInput[thread]->startData) {
       std::stringstream str ;
@@ -648,6 +1025,177 @@ void biogeme::simulateSeveralFormulas(std::vector<std::vector<bioString> > formu
   return ;
 }
 
+void biogeme::simulateJacobian(std::vector<bioUInt> literalIds,
+			       bioReal* values,
+			       bioReal* jacobian) {
+
+  if (!simulationPrepared) {
+    throw bioExceptions(__FILE__,__LINE__,"The function prepareSimulation must be called first") ;
+  }
+  theThreadMemorySimul.clearResults() ;
+  for (bioUInt thread = 0 ; thread < theSimulInput.size() ; ++thread) {
+    theSimulInput[thread]->aggregate = false ;
+    theSimulInput[thread]->jacobianLiteralIds = &literalIds ;
+  }
+  try {
+    runSimulationThreads() ;
+  }
+  catch(...) {
+    for (bioUInt thread = 0 ; thread < theSimulInput.size() ; ++thread) {
+      theSimulInput[thread]->jacobianLiteralIds = NULL ;
+    }
+    throw ;
+  }
+  bioUInt N = theData.size() ;
+  bioUInt nf = theThreadMemorySimul.numberOfFormulas() ;
+  bioUInt nc = literalIds.size() ;
+  for (bioUInt thread = 0 ; thread < theSimulInput.size() ; ++thread) {
+    theSimulInput[thread]->jacobianLiteralIds = NULL ;
+    for (bioUInt i = 0 ; i < theSimulInput[thread]->results.size() ; ++i) {
+      bioUInt row = theSimulInput[thread]->startData + i ;
+      const std::vector<bioReal>& res = theSimulInput[thread]->results[i] ;
+      for (bioUInt j = 0 ; j < nf ; ++j) {
+	values[j * N + row] = res[j] ;
+	for (bioUInt k = 0 ; k < nc ; ++k) {
+	  jacobian[(j * nc + k) * N + row] = res[nf + j * nc + k] ;
+	}
+      }
+    }
+  }
+  return ;
+}
+
+void biogeme::simulateAggregates(std::vector<std::vector<bioUInt> > terms,
+				 std::vector<bioUInt> groups,
+				 bioUInt numberOfGroups,
+				 bioReal* results) {
+
+  if (!simulationPrepared) {
+    throw bioExceptions(__FILE__,__LINE__,"The function prepareSimulation must be called first") ;
+  }
+  if (numberOfGroups == 0) {
+    throw bioExceptions(__FILE__,__LINE__,"At least one group is needed for the aggregation") ;
+  }
+  bioUInt numberOfFormulas = theThreadMemorySimul.numberOfFormulas() ;
+  for (bioUInt t = 0 ; t < terms.size() ; ++t) {
+    for (bioUInt k = 0 ; k < terms[t].size() ; ++k) {
+      if (terms[t][k] >= numberOfFormulas) {
+	throw bioExceptOutOfRange<bioUInt>(__FILE__,__LINE__,terms[t][k],0,numberOfFormulas - 1) ;
+      }
+    }
+  }
+  bioUInt N = (panel) ? theDataMap.size() : theData.size() ;
+  if (!groups.empty()) {
+    if (groups.size() != N) {
+      std::stringstream str ;
+      str << "Inconsistent dimensions: " << groups.size()
+	  << " groups for " << N << " observations" ;
+      throw bioExceptions(__FILE__,__LINE__,str.str()) ;
+    }
+    for (bioUInt i = 0 ; i < N ; ++i) {
+      if (groups[i] >= numberOfGroups) {
+	throw bioExceptOutOfRange<bioUInt>(__FILE__,__LINE__,groups[i],0,numberOfGroups - 1) ;
+      }
+    }
+  }
+  
+  theThreadMemorySimul.clearResults() ;
+  for (bioUInt thread = 0 ; thread < theSimulInput.size() ; ++thread) {
+    theSimulInput[thread]->aggregate = true ;
+    theSimulInput[thread]->aggregationTerms = &terms ;
+    theSimulInput[thread]->groups = (groups.empty()) ? NULL : &groups ;
+    theSimulInput[thread]->aggregates.assign(numberOfGroups,
+					     std::vector<bioReal>(terms.size(),0.0)) ;
+  }
+  runSimulationThreads() ;
+  // Only the aggregates computed by each thread are reduced here.
+  std::fill(results, results + numberOfGroups * terms.size(), 0.0) ;
+  for (bioUInt thread = 0 ; thread < theSimulInput.size() ; ++thread) {
+    for (bioUInt g = 0 ; g < numberOfGroups ; ++g) {
+      for (bioUInt t = 0 ; t < terms.size() ; ++t) {
+	results[g * terms.size() + t] += theSimulInput[thread]->aggregates[g][t] ;
+      }
+    }
+    theSimulInput[thread]->aggregate = false ;
+    theSimulInput[thread]->aggregationTerms = NULL ;
+    theSimulInput[thread]->groups = NULL ;
+  }
+  return ;
+}
+
+void biogeme::simulatePosterior(std::vector<bioReal> quantiles,
+				bioReal* results) {
+
+  if (!simulationPrepared) {
+    throw bioExceptions(__FILE__,__LINE__,"The function prepareSimulation must be called first") ;
+  }
+  if (theThreadMemorySimul.numberOfFormulas() < 2) {
+    throw bioExceptions(__FILE__,__LINE__,"The likelihood and at least one coefficient are needed to calculate the posterior distribution") ;
+  }
+  if (theDraws.empty() || theDraws[0].empty()) {
+    throw bioExceptions(__FILE__,__LINE__,"The posterior distribution cannot be simulated without draws.") ;
+  }
+  for (bioUInt q = 0 ; q < quantiles.size() ; ++q) {
+    if (quantiles[q] < 0.0 || quantiles[q] > 1.0) {
+      std::stringstream str ;
+      str << "Quantile " << quantiles[q] << " is not between 0 and 1" ;
+      throw bioExceptions(__FILE__,__LINE__,str.str()) ;
+    }
+  }
+  theThreadMemorySimul.clearResults() ;
+  for (bioUInt thread = 0 ; thread < theSimulInput.size() ; ++thread) {
+    theSimulInput[thread]->aggregate = false ;
+    theSimulInput[thread]->posteriorQuantiles = &quantiles ;
+    theSimulInput[thread]->numberOfDraws = theDraws[0].size() ;
+  }
+  try {
+    runSimulationThreads() ;
+  }
+  catch(...) {
+    for (bioUInt thread = 0 ; thread < theSimulInput.size() ; ++thread) {
+      theSimulInput[thread]->posteriorQuantiles = NULL ;
+    }
+    throw ;
+  }
+  // For each individual, the results of each coefficient are
+  // contiguous.
+  for (bioUInt thread = 0 ; thread < theSimulInput.size() ; ++thread) {
+    theSimulInput[thread]->posteriorQuantiles = NULL ;
+    for (bioUInt i = 0 ; i < theSimulInput[thread]->results.size() ; ++i) {
+      bioUInt individual = theSimulInput[thread]->startData + i ;
+      const std::vector<bioReal>& res = theSimulInput[thread]->results[i] ;
+      std::copy(res.begin(), res.end(), results + individual * res.size()) ;
+    }
+  }
+  return ;
+}
+
+void biogeme::runSimulationThreads() {
+  bioUInt nThreads = theSimulInput.size() ;
+  std::vector<pthread_t> theThreads(nThreads) ;
+  for (bioUInt thread = 0 ; thread < nThreads ; ++thread) {
+    if (theSimulInput[thread] == NULL) {
+      throw bioExceptNullPointer(__FILE__,__LINE__,"thread") ;
+    }
+    bioUInt diagnostic = pthread_create(&(theThreads[thread]),
+					NULL,
+					simulFunctionForThread,
+					(void*) theSimulInput[thread]) ;
+    
+    if (diagnostic != 0) {
+      std::stringstream str ;
+      str << "Error " << diagnostic << " in creating thread " << thread << "/" << nThreads ;
+      throw bioExceptions(__FILE__,__LINE__,str.str()) ;
+    }
+  }
+  for (bioUInt thread = 0 ; thread < nThreads ; ++thread) {
+    pthread_join( theThreads[thread], NULL);
+    if (theExceptionPtr != nullptr) {
+      std::rethrow_exception(theExceptionPtr);
+    }
+  }
+}
+
 // void biogeme::simulateSeveralFormulas(std::vector<std::vector<bioString> > formulas,
 // 				      std::vector<bioReal> beta,
 // 				      std::vector<bioReal> fixedBeta,
@@ -685,15 +1233,47 @@ void biogeme::simulateSeveralFormulas(std::vector<std::vector<bioString> > formu
 
 void biogeme::setData(std::vector< std::vector<bioReal> >& d) {
   theData = d ;
+  theSample.clear() ;
+  useSample = false ;
   forceDataPreparation = true ;
 }
 
 void biogeme::setDataMap(std::vector< std::vector<bioUInt> >& dm) {
   theDataMap = dm ;
+  theSample.clear() ;
+  useSample = false ;
   forceDataPreparation = true ;
   panel = true ;
 }
 
+void biogeme::setSample(std::vector<bioUInt> s) {
+  bioUInt n = (panel) ? theDataMap.size() : theData.size() ;
+  for (std::vector<bioUInt>::const_iterator i = s.begin() ;
+       i != s.end() ;
+       ++i) {
+    if (*i >= n) {
+      std::stringstream str ;
+      str << "Index " << *i << " out of range [0," << n-1 << "]" ;
+      throw bioExceptions(__FILE__,__LINE__,str.str()) ;
+    }
+  }
+  theSample = s ;
+  useSample = true ;
+  // If the data has not been prepared yet, the threads will be
+  // assigned when it is.
+  if (!forceDataPreparation) {
+    assignDataToThreads() ;
+  }
+}
+
+void biogeme::useFullSample() {
+  theSample.clear() ;
+  useSample = false ;
+  if (!forceDataPreparation) {
+    assignDataToThreads() ;
+  }
+}
+
 void biogeme::setMissingData(bioReal md) {
   missingData = md ;
   forceDataPreparation = true ;
@@ -756,13 +1336,6 @@ void biogeme::prepareData() {
       theInput[thread]->dataMap = &theDataMap ;
     }
     theInput[thread]->missingData = missingData ;
-    theInput[thread]->startData = thread * sizeOfEachBlock ;
-    if (panel) {
-      theInput[thread]->endData = (thread == nbrOfThreads-1) ? theDataMap.size() : (thread+1) * sizeOfEachBlock ;
-    }
-    else {
-      theInput[thread]->endData = (thread == nbrOfThreads-1) ? theData.size() : (thread+1) * sizeOfEachBlock ;
-    }
     theInput[thread]->literalIds = &literalIds ;
     bioExpression* theLoglike = theInput[thread]->theLoglike.getExpression() ;
     theLoglike->setData(theInput[thread]->data) ;
@@ -778,6 +1351,27 @@ void biogeme::prepareData() {
       theInput[thread]->theWeight.setMissingData(theInput[thread]->missingData) ;
     }
   }
+  assignDataToThreads() ;
+}
+
+// Distributes the observations (or the individuals for panel data)
+// among the threads. If a sample is defined, only its entries are
+// distributed. The number of threads is not modified, so that some
+// threads may have nothing to do for very small samples.
+void biogeme::assignDataToThreads() {
+  bioUInt n ;
+  if (useSample) {
+    n = theSample.size() ;
+  }
+  else {
+    n = (panel) ? theDataMap.size() : theData.size() ;
+  }
+  bioUInt sizeOfEachBlock = ceil(bioReal(n)/bioReal(nbrOfThreads)) ;
+  for (bioUInt thread = 0 ; thread < nbrOfThreads ; ++thread) {
+    theInput[thread]->sample = (useSample) ? &theSample : NULL ;
+    theInput[thread]->startData = std::min(thread * sizeOfEachBlock, n) ;
+    theInput[thread]->endData = (thread == nbrOfThreads-1) ? n : std::min((thread+1) * sizeOfEachBlock, n) ;
+  }
 }
 
 void biogeme::prepareDataSimul() {
@@ -49,6 +49,28 @@ class biogeme {
 				      bioBoolean hessian,
 				      bioBoolean bhhh) ;
 
+  // Product of the second derivatives matrix of the log likelihood
+  // with a direction, approximated by central differences of the
+  // analytical gradient along the direction. It costs two gradient
+  // evaluations, and the second derivatives matrix is never formed.
+  void calculateHessianVectorProduct(std::vector<bioReal> beta,
+				     std::vector<bioReal> fixedBeta,
+				     std::vector<bioUInt> betaIds,
+				     std::vector<bioReal> direction,
+				     bioReal* hv) ;
+
+  // Value, and optionally gradient, of the log likelihood at several
+  // values of the parameters, in one pass on the data: each
+  // observation is loaded once, and used for all the points. Each
+  // row of beta is a point. The values are stored in f, and the
+  // gradients, row by row, in g.
+  void calculateSeveralLikelihoods(std::vector< std::vector<bioReal> > beta,
+				   std::vector<bioReal> fixedBeta,
+				   std::vector<bioUInt> betaIds,
+				   bioBoolean gradient,
+				   bioReal* f,
+				   bioReal* g) ;
+
   // This version is called from C++ (by CFSQP).
   // bioReal calculateLikeAndDerivatives(std::vector<bioReal>& beta,
   // 				      std::vector<bioReal>& fixedBeta,
@@ -91,6 +113,36 @@ class biogeme {
 			       std::vector< std::vector<bioReal> > data,
 			       bioReal* results) ;
 
+  // Prepare once, simulate many: the formulas are parsed and the
+  // thread memory is prepared only once. Then, the values of the
+  // parameters and the columns of the data can be updated in place
+  // before each simulation.
+  void prepareSimulation(std::vector<std::vector<bioString> > formulas,
+			 bioUInt t) ;
+  void setSimulationBetas(std::vector<bioReal> beta,
+			  std::vector<bioReal> fixedBeta) ;
+  void setDataColumn(bioUInt column, std::vector<bioReal> values) ;
+  void simulatePrepared(bioReal* results) ;
+  // Calculates the values of the formulas, and their derivatives
+  // with respect to the literals (typically, variables), in one pass.
+  void simulateJacobian(std::vector<bioUInt> literalIds,
+			bioReal* values,
+			bioReal* jacobian) ;
+  // Aggregation mode: for each group and each term, the sum over the
+  // observations of the product of the formulas listed in the term
+  // is accumulated by the threads. Only the aggregates are returned.
+  void simulateAggregates(std::vector<std::vector<bioUInt> > terms,
+			  std::vector<bioUInt> groups,
+			  bioUInt numberOfGroups,
+			  bioReal* results) ;
+  // Posterior mode: the first formula is the likelihood of the
+  // choices of each individual conditional on the draws, and the
+  // others are random coefficients. For each individual and each
+  // coefficient, the mean, the variance and the requested quantiles
+  // of the coefficient conditional on the choices are calculated in
+  // one pass over the draws.
+  void simulatePosterior(std::vector<bioReal> quantiles,
+			 bioReal* results) ;
   
   void setExpressions(std::vector<bioString> ll,
 		      std::vector<bioString> w,
@@ -99,6 +151,12 @@ class biogeme {
   void setDataMap(std::vector< std::vector<bioUInt> >& dm) ;
   void setMissingData(bioReal md) ;
   void setDraws(std::vector< std::vector< std::vector<bioReal> > >& draws) ;
+  // Only the observations (or the individuals for panel data) with
+  // the given indices are involved in the calculation of the log
+  // likelihood, until the full sample is restored. The data is not
+  // copied.
+  void setSample(std::vector<bioUInt> s) ;
+  void useFullSample() ;
   bioUInt getDimension() const ;
   void setBounds(std::vector<bioReal> lb, std::vector<bioReal> ub) ;
   std::vector<bioReal> getLowerBounds() ;
@@ -107,9 +165,11 @@ class biogeme {
   void resetFunctionEvaluations() ;
 private: // methods
   void prepareData() ;
+  void assignDataToThreads() ;
   void prepareDataSimul() ;
   void prepareMemoryForThreads(bioBoolean force = false) ;
   void prepareSimulMemoryForThreads(bioBoolean force = false) ;
+  void runSimulationThreads() ;
   bioReal applyTheFormula(std::vector<bioReal>* g = NULL,
 			  std::vector< std::vector<bioReal> >* h = NULL,
 			  std::vector< std::vector<bioReal> >* bh = NULL) ;
@@ -136,6 +196,11 @@ private: // data
   bioUInt nbrFctEvaluations ;
   bioBoolean panel ;
   bioBoolean forceDataPreparation ; 
+  std::vector<bioReal> theSimulBetas ;
+  std::vector<bioReal> theSimulFixedBetas ;
+  bioBoolean simulationPrepared ;
+  std::vector<bioUInt> theSample ;
+  bioBoolean useSample ;
 
 };
   
@@ -37,6 +37,19 @@ cdef extern from "biogeme.h":
 			bool_t hessian,
 			bool_t bhhh) except +
 
+		void calculateHessianVectorProduct(double_vector betas,
+			double_vector fixedBetas,
+			uint_vector betaIds,
+			double_vector direction,
+			double* hv) except +
+
+		void calculateSeveralLikelihoods(double_matrix betas,
+			double_vector fixedBetas,
+			uint_vector betaIds,
+			bool_t gradient,
+			double* f,
+			double* g) except +
+
 		void setPanel(bool_t p)
 
 		void setBounds(double_vector lb, double_vector ub)
@@ -63,6 +76,29 @@ cdef extern from "biogeme.h":
 				     double_matrix& data,
 				     double* results) except +
 
+		void prepareSimulation(vector[string_vector] loglikeSignatures,
+				       unsigned long numberOfThreads) except +
+
+		void setSimulationBetas(double_vector betas, 
+					double_vector fixedBetas) except +
+
+		void setDataColumn(unsigned long column,
+				   double_vector values) except +
+
+		void simulatePrepared(double* results) except +
+
+		void simulateJacobian(uint_vector literalIds,
+				      double* values,
+				      double* jacobian) except +
+
+		void simulateAggregates(uint_matrix terms,
+					uint_vector groups,
+					unsigned long numberOfGroups,
+					double* results) except +
+
+		void simulatePosterior(vector[double] quantiles,
+				       double* results) except +
+
 		void setExpressions(vector[string] loglikeSignatures, 
 						vector[string] weightSignatures,
 						unsigned long numberOfThreads)
@@ -75,6 +111,10 @@ cdef extern from "biogeme.h":
 		
 		void setDraws(double_tensor& draws)
 
+		void setSample(uint_vector s) except +
+
+		void useFullSample()
+
 
 cdef class pyBiogeme:
 	cdef biogeme theBiogeme
@@ -123,6 +163,40 @@ cdef class pyBiogeme:
 								bhhh)
 		return f, gmem, hmem, bmem
 
+	def calculateSeveralLikelihoods(self,
+					betas,
+					fixedBetas,
+					betaIds,
+					gradient=False):
+		betas = np.ascontiguousarray(betas, dtype=float)
+		f = np.empty(len(betas))
+		g = np.zeros([len(betas), len(betaIds)])
+		if len(betas) == 0:
+			return f, g
+		cdef double_vector_view f_view = f
+		cdef double_matrix_view g_view = g
+		self.theBiogeme.calculateSeveralLikelihoods(betas,
+							    fixedBetas,
+							    betaIds,
+							    gradient,
+							    &f_view[0],
+							    &g_view[0,0])
+		return f, g
+
+	def calculateHessianVectorProduct(self,
+					  betas,
+					  fixedBetas,
+					  betaIds,
+					  direction):
+		hv = np.empty(len(betas))
+		cdef double_vector_view hv_view = hv
+		self.theBiogeme.calculateHessianVectorProduct(betas,
+							      fixedBetas,
+							      betaIds,
+							      direction,
+							      &hv_view[0])
+		return hv
+
 	def setBounds(self,lb,ub):
 		self.theBiogeme.setBounds(lb,ub)
 
@@ -190,6 +264,51 @@ cdef class pyBiogeme:
 						      d, 
 						      &r_view[0,0])
 		return r
+
+	def prepareSimulation(self, formulas, nThreads):
+		self.theBiogeme.prepareSimulation(formulas, nThreads)
+
+	def setSimulationBetas(self, betas, fixedBetas):
+		self.theBiogeme.setSimulationBetas(betas, fixedBetas)
+
+	def setDataColumn(self, column, values):
+		values = np.ascontiguousarray(values, dtype=float)
+		self.theBiogeme.setDataColumn(column, values)
+
+	def simulatePrepared(self, nf, n):
+		r = np.zeros([nf, n])
+		cdef double_matrix_view r_view = r
+		self.theBiogeme.simulatePrepared(&r_view[0,0])
+		return r
+
+	def simulateJacobian(self, literalIds, nf, n):
+		values = np.zeros([nf, n])
+		jacobian = np.zeros([nf, len(literalIds), n])
+		cdef double_matrix_view v_view = values
+		cdef double[:, :, ::1] j_view = jacobian
+		self.theBiogeme.simulateJacobian(literalIds,
+						 &v_view[0,0],
+						 &j_view[0,0,0])
+		return values, jacobian
+
+	def simulateAggregates(self, terms, groups, numberOfGroups):
+		r = np.zeros([numberOfGroups, len(terms)])
+		cdef double_matrix_view r_view = r
+		cdef uint_vector g
+		if groups is not None:
+			g = groups
+		self.theBiogeme.simulateAggregates(terms,
+						   g,
+						   numberOfGroups,
+						   &r_view[0,0])
+		return r
+
+	def simulatePosterior(self, quantiles, n, k):
+		r = np.zeros([n, k, 2 + len(quantiles)])
+		cdef double[:, :, ::1] r_view = r
+		self.theBiogeme.simulatePosterior(quantiles,
+						  &r_view[0,0,0])
+		return r
 	
 	def setExpressions(self,loglikeFormulas,nbrOfThreads,weightFormulas=None):
 		cdef vector[string] w
@@ -213,6 +332,12 @@ cdef class pyBiogeme:
 		draws = np.ascontiguousarray(draws)
 		self.theBiogeme.setDraws(draws)
 
+	def setSample(self, s):
+		self.theBiogeme.setSample(s)
+
+	def useFullSample(self):
+		self.theBiogeme.useFullSample()
+
 				
 
 
@@ -0,0 +1,126 @@
+"""
+Benchmark of the numerical integration with Gauss-Hermite quadrature,
+on a choice model with a latent variable, similar to
+examples/latent/03choiceOnly.py. The time needed to calculate the log
+likelihood, its gradient and its hessian is reported for various
+numbers of quadrature nodes, together with the difference of the log
+likelihood with the default quadrature.
+
+Usage: python benchmarkIntegrate.py
+
+:author: Michel Bierlaire
+:date: Mon Oct 19 18:31:20 2026
+"""
+
+# Too constraining
+# pylint: disable=invalid-name
+
+import os
+import timeit
+import pandas as pd
+import biogeme.database as db
+import biogeme.biogeme as bio
+import biogeme.distributions as dist
+from biogeme import models
+from biogeme.expressions import (
+    Beta,
+    Variable,
+    RandomVariable,
+    Integrate,
+    exp,
+    log,
+)
+
+DATA = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    '..',
+    '..',
+    'examples',
+    'latent',
+    'optima.dat',
+)
+
+
+def latentModel(numberOfNodes=None):
+    """Log likelihood of the choice model with a latent variable.
+
+    :param numberOfNodes: number of nodes of the quadrature. If None,
+        the default of Integrate is used.
+    :type numberOfNodes: int
+
+    :return: log likelihood.
+    :rtype: biogeme.expressions.Expression
+    """
+    omega = RandomVariable('omega')
+    CARLOVERS = (
+        Beta('coef_age_65_more', 0.1, None, None, 0)
+        * (Variable('age') >= 65)
+        + Beta('coef_moreThanOneCar', 0.5, None, None, 0)
+        * (Variable('NbCar') > 1)
+        + Beta('coef_male', 0.1, None, None, 0) * (Variable('Gender') == 1)
+        + Beta('coef_haveGA', -0.5, None, None, 0)
+        * (Variable('GenAbST') == 1)
+        + Beta('sigma_s', 1, None, None, 0) * omega
+    )
+    BETA_TIME_PT = Beta('BETA_TIME_PT_REF', -0.5, None, 0, 0) * exp(
+        Beta('BETA_TIME_PT_CL', -1.0, None, None, 0) * CARLOVERS
+    )
+    BETA_TIME_CAR = Beta('BETA_TIME_CAR_REF', -1.0, None, 0, 0) * exp(
+        Beta('BETA_TIME_CAR_CL', -0.5, None, None, 0) * CARLOVERS
+    )
+    BETA_COST = Beta('BETA_COST', -0.5, None, None, 0)
+    V = {
+        0: BETA_TIME_PT * Variable('TimePT') / 200
+        + BETA_COST * Variable('MarginalCostPT') / 10,
+        1: Beta('ASC_CAR', 0.5, None, None, 0)
+        + BETA_TIME_CAR * Variable('TimeCar') / 200
+        + BETA_COST * Variable('CostCarCHF') / 10,
+        2: Beta('ASC_SM', -1.0, None, None, 0)
+        + Beta('BETA_DIST', -1.0, None, None, 0)
+        * Variable('distance_km')
+        / 5,
+    }
+    condprob = models.logit(V, None, Variable('Choice'))
+    integrand = condprob * dist.normalpdf(omega)
+    if numberOfNodes is None:
+        return log(Integrate(integrand, 'omega'))
+    return log(Integrate(integrand, 'omega', numberOfNodes=numberOfNodes))
+
+
+def run(nodes=(None, 50, 30, 20, 10), number=5):
+    """Runs the benchmark and prints a table."""
+    df = pd.read_csv(DATA, sep='\t')
+    df = df[df['Choice'] != -1]
+    print(f'{"nodes":>7} {"time [ms]":>10} {"loglike":>14} {"difference":>11}')
+    reference = None
+    for n in nodes:
+        myBiogeme = bio.BIOGEME(
+            db.Database('optima', df),
+            latentModel(n),
+            numberOfThreads=1,
+            suggestScales=False,
+        )
+        myBiogeme.saveIterations = False
+        x = myBiogeme.betaInitValues
+        f, _, _, _ = myBiogeme.calculateLikelihoodAndDerivatives(
+            x, scaled=False, hessian=True
+        )
+        t = (
+            timeit.timeit(
+                lambda b=myBiogeme: b.calculateLikelihoodAndDerivatives(
+                    x, scaled=False, hessian=True
+                ),
+                number=number,
+            )
+            / number
+        )
+        if reference is None:
+            reference = f
+        name = 'default' if n is None else str(n)
+        print(
+            f'{name:>7} {1000 * t:10.1f} {f:14.6f} {f - reference:11.2g}'
+        )
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,156 @@
+"""
+Benchmark of the Monte-Carlo integration of a panel mixture of logit
+models, similar to examples/swissmetro/12panel.py. The time needed to
+calculate the log likelihood, its gradient, and optionally its
+hessian, is reported for various numbers of draws, with the
+composition of MonteCarlo and PanelLikelihoodTrajectory, and with the
+fused operator LogMonteCarloPanelTrajectory.
+
+Usage: python benchmarkPanelMonteCarlo.py
+
+:author: Michel Bierlaire
+:date: Mon Oct 19 19:12:05 2026
+"""
+
+# Too constraining
+# pylint: disable=invalid-name
+
+import os
+import itertools
+import timeit
+import numpy as np
+import pandas as pd
+import biogeme.database as db
+import biogeme.biogeme as bio
+from biogeme import models
+from biogeme.expressions import (
+    Beta,
+    Variable,
+    bioDraws,
+    PanelLikelihoodTrajectory,
+    MonteCarlo,
+    LogMonteCarloPanelTrajectory,
+    log,
+)
+
+DATA = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    '..',
+    '..',
+    'examples',
+    'swissmetro',
+    'swissmetro.dat',
+)
+
+
+def panelDatabase():
+    """Panel database of the swissmetro data.
+
+    :return: database
+    :rtype: biogeme.database.Database
+    """
+    df = pd.read_csv(DATA, sep='\t')
+    df = df[
+        ((df['PURPOSE'] == 1) | (df['PURPOSE'] == 3)) & (df['CHOICE'] != 0)
+    ]
+    df = df.assign(
+        TRAIN_AV_SP=df['TRAIN_AV'] * (df['SP'] != 0),
+        CAR_AV_SP=df['CAR_AV'] * (df['SP'] != 0),
+        TRAIN_TT_SCALED=df['TRAIN_TT'] / 100,
+        TRAIN_COST_SCALED=df['TRAIN_CO'] * (df['GA'] == 0) / 100,
+        SM_TT_SCALED=df['SM_TT'] / 100,
+        SM_COST_SCALED=df['SM_CO'] * (df['GA'] == 0) / 100,
+        CAR_TT_SCALED=df['CAR_TT'] / 100,
+        CAR_CO_SCALED=df['CAR_CO'] / 100,
+    )
+    database = db.Database('swissmetro', df)
+    database.panel('ID')
+    return database
+
+
+def panelModel(fused=False):
+    """Log likelihood of the panel mixture of logit models.
+
+    :param fused: if True, the operator LogMonteCarloPanelTrajectory
+        is used.
+    :type fused: bool
+
+    :return: log likelihood.
+    :rtype: biogeme.expressions.Expression
+    """
+    B_COST = Beta('B_COST', 0, None, None, 0)
+    B_TIME_RND = Beta('B_TIME', 0, None, None, 0) + Beta(
+        'B_TIME_S', 1, None, None, 0
+    ) * bioDraws('B_TIME_RND', 'NORMAL_ANTI')
+    ASC_CAR_RND = Beta('ASC_CAR', 0, None, None, 0) + Beta(
+        'ASC_CAR_S', 1, None, None, 0
+    ) * bioDraws('ASC_CAR_RND', 'NORMAL_ANTI')
+    ASC_TRAIN_RND = Beta('ASC_TRAIN', 0, None, None, 0) + Beta(
+        'ASC_TRAIN_S', 1, None, None, 0
+    ) * bioDraws('ASC_TRAIN_RND', 'NORMAL_ANTI')
+    ASC_SM_RND = Beta('ASC_SM_S', 1, None, None, 0) * bioDraws(
+        'ASC_SM_RND', 'NORMAL_ANTI'
+    )
+    V = {
+        1: ASC_TRAIN_RND
+        + B_TIME_RND * Variable('TRAIN_TT_SCALED')
+        + B_COST * Variable('TRAIN_COST_SCALED'),
+        2: ASC_SM_RND
+        + B_TIME_RND * Variable('SM_TT_SCALED')
+        + B_COST * Variable('SM_COST_SCALED'),
+        3: ASC_CAR_RND
+        + B_TIME_RND * Variable('CAR_TT_SCALED')
+        + B_COST * Variable('CAR_CO_SCALED'),
+    }
+    av = {
+        1: Variable('TRAIN_AV_SP'),
+        2: Variable('SM_AV'),
+        3: Variable('CAR_AV_SP'),
+    }
+    obsprob = models.logit(V, av, Variable('CHOICE'))
+    if fused:
+        return LogMonteCarloPanelTrajectory(obsprob)
+    return log(MonteCarlo(PanelLikelihoodTrajectory(obsprob)))
+
+
+def run(draws=(100, 400), number=3):
+    """Runs the benchmark and prints a table."""
+    print(
+        f'{"draws":>6} {"fused":>6} {"f,g [ms]":>10} {"f,g,h [ms]":>11} '
+        f'{"loglike":>14}'
+    )
+    for R, fused in itertools.product(draws, (False, True)):
+        np.random.seed(0)
+        myBiogeme = bio.BIOGEME(
+            panelDatabase(),
+            panelModel(fused),
+            numberOfDraws=R,
+            numberOfThreads=1,
+            suggestScales=False,
+        )
+        myBiogeme.saveIterations = False
+        x = myBiogeme.betaInitValues
+        f, _, _, _ = myBiogeme.calculateLikelihoodAndDerivatives(
+            x, scaled=False
+        )
+        times = []
+        for hessian in (False, True):
+            times.append(
+                timeit.timeit(
+                    lambda b=myBiogeme, h=hessian: (
+                        b.calculateLikelihoodAndDerivatives(
+                            x, scaled=False, hessian=h
+                        )
+                    ),
+                    number=number,
+                )
+                / number
+            )
+        print(
+            f'{R:6} {str(fused):>6} {1000 * times[0]:10.1f} '
+            f'{1000 * times[1]:11.1f} {f:14.6f}'
+        )
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,194 @@
+"""
+Microbenchmark of the modified Cholesky factorization by Schnabel and
+Eskow. The implementation of :func:`biogeme.algorithms.schnabelEskow`
+is compared with the original implementation, based on Python loops,
+on positive definite and indefinite matrices of increasing size. Both
+the time and the difference between the factorizations are reported.
+
+Usage: python benchmarkSchnabelEskow.py
+
+:author: Michel Bierlaire
+:date: Mon Oct 19 16:05:12 2026
+"""
+
+# Too constraining
+# pylint: disable=invalid-name
+
+import timeit
+import numpy as np
+import biogeme.algorithms as algo
+
+
+def schnabelEskowLoops(
+    A,
+    tau=np.finfo(np.float64).eps ** 0.3333,
+    taubar=np.finfo(np.float64).eps ** 0.6666,
+    mu=0.1,
+):
+    """Original implementation of the modified Cholesky factorization,
+    used as a reference.
+    """
+
+    def pivot(j):
+        A[j, j] = np.sqrt(A[j, j])
+        for i in range(j + 1, dim):
+            A[j, i] = A[i, j] = A[i, j] / A[j, j]
+            A[i, j + 1 : i + 1] -= A[i, j] * A[j + 1 : i + 1, j]
+            A[j + 1 : i + 1, i] = A[i, j + 1 : i + 1]
+
+    def permute(i, j):
+        A[[i, j]] = A[[j, i]]
+        E[[i, j]] = E[[j, i]]
+        A[:, [i, j]] = A[:, [j, i]]
+        P[:, [i, j]] = P[:, [j, i]]
+
+    A = A.astype(np.float64)
+    dim = A.shape[0]
+    if A.shape[1] != dim:
+        raise excep.biogemeError('The matrix must be square')
+
+    if not np.all(np.abs(A - A.T) < np.sqrt(np.finfo(np.float64).eps)):
+        raise excep.biogemeError('The matrix must be symmetric')
+
+    E = np.zeros(dim, dtype=np.float64)
+    P = np.identity(dim)
+    phaseOne = True
+    gamma = abs(A.diagonal()).max()
+    j = 0
+    while j < dim and phaseOne is True:
+        a_max = A.diagonal()[j:].max()
+        a_min = A.diagonal()[j:].min()
+        if a_max < taubar * gamma or a_min < -mu * a_max:
+            phaseOne = False
+            break
+
+        # Pivot on maximum diagonal of remaining submatrix
+        i = j + np.argmax(A.diagonal()[j:])
+        if i != j:
+            # Switch rows and columns of i and j of A
+            permute(i, j)
+        if j < dim - 1 and (
+            (
+                A.diagonal()[j + 1 :] - A[j + 1 :, j] ** 2 / A.diagonal()[j]
+            ).min()
+            < -mu * gamma
+        ):
+            phaseOne = False  # go to phase two
+        else:
+            # perform jth iteration of factorization
+            pivot(j)
+            j += 1
+
+    # Phase two, A not positive-definite
+    if not phaseOne:
+        if j == dim - 1:
+            E[-1] = delta = -A[-1, -1] + max(
+                tau * (-A[-1, -1]) / (1 - tau), taubar * gamma
+            )
+            A[-1, -1] += delta
+            A[-1, -1] = np.sqrt(A[-1, -1])
+        else:
+            deltaPrev = 0.0
+            g = np.zeros(dim)
+            k = j - 1  # k = number of iterations performed in phase one
+            # Calculate lower Gerschgorin bounds of A[k+1]
+            for i in range(k + 1, dim):
+                g[i] = (
+                    A[i, i]
+                    - abs(A[i, k + 1 : i]).sum()
+                    - abs(A[i + 1 : dim, i]).sum()
+                )
+            # Modified Cholesky Decomposition
+            for j in range(k + 1, dim - 2):
+                # Pivot on maximum lower Gerschgorin bound estimate
+                i = j + np.argmax(g[j:])
+                if i != j:
+                    # Switch rows and columns of i and j of A
+                    permute(i, j)
+                # Calculate E[j, j] and add to diagonal
+                norm_j = abs(A[j + 1 : dim, j]).sum()
+                E[j] = delta = max(
+                    0, -A[j, j] + max(norm_j, taubar * gamma), deltaPrev
+                )
+                if delta > 0:
+                    A[j, j] += delta
+                    deltaPrev = delta  # deltaPrev will contain E_inf
+                # Update Gerschgorin bound estimates
+                if A[j, j] != norm_j:
+                    temp = 1.0 - norm_j / A[j, j]
+                    g[j + 1 :] += abs(A[j + 1 :, j]) * temp
+                # perform jth iteration of factorization
+                pivot(j)
+
+            # Final 2 by 2 submatrix
+            e = np.linalg.eigvalsh(A[-2:, -2:])
+            e.sort()
+            E[-2] = E[-1] = delta = max(
+                0,
+                -e[0] + max(tau * (e[1] - e[0]) / (1 - tau), taubar * gamma),
+                deltaPrev,
+            )
+            if delta > 0:
+                A[-2, -2] += delta
+                A[-1, -1] += delta
+                deltaPrev = delta
+            A[-2, -2] = np.sqrt(A[-2, -2])  # overwrites A[-2, -2]
+            A[-1, -2] = A[-1, -2] / A[-2, -2]  # overwrites A[-1, -2]
+            A[-2, -1] = A[-1, -2]
+            # overwrites A[-1, -1]
+            A[-1, -1] = np.sqrt(A[-1, -1] - A[-1, -2] * A[-1, -2])
+
+    return np.tril(A), np.diag(P @ E), P
+
+
+def randomMatrices(dim, seed=0):
+    """Generates a positive definite and an indefinite symmetric matrix.
+
+    :param dim: dimension of the matrices.
+    :type dim: int
+
+    :param seed: seed of the random number generator.
+    :type seed: int
+
+    :return: positive definite matrix, indefinite matrix
+    :rtype: numpy.array, numpy.array
+    """
+    rng = np.random.default_rng(seed)
+    B = rng.standard_normal((dim, dim))
+    positive = B @ B.T + dim * np.identity(dim)
+    indefinite = (B + B.T) / 2.0
+    return positive, indefinite
+
+
+def error(A, L, E, P):
+    """Relative error of the factorization :math:`A + E = PLL^TP^T`."""
+    return np.linalg.norm(A + E - P @ L @ L.T @ P.T) / np.linalg.norm(A)
+
+
+def run(dims=(5, 10, 20, 50, 100, 200), number=5):
+    """Runs the benchmark and prints a table."""
+    print(
+        f'{"dim":>5} {"matrix":>11} {"loops [ms]":>12} {"new [ms]":>10} '
+        f'{"speedup":>8} {"max|dE|":>9} {"error":>9}'
+    )
+    for dim in dims:
+        for name, A in zip(('definite', 'indefinite'), randomMatrices(dim)):
+            told = (
+                timeit.timeit(lambda: schnabelEskowLoops(A), number=number)
+                / number
+            )
+            tnew = (
+                timeit.timeit(lambda: algo.schnabelEskow(A), number=number)
+                / number
+            )
+            _, Eold, _ = schnabelEskowLoops(A)
+            L, E, P = algo.schnabelEskow(A)
+            print(
+                f'{dim:5} {name:>11} {1000 * told:12.3f} {1000 * tnew:10.3f} '
+                f'{told / tnew:8.1f} {np.abs(E - Eold).max():9.2g} '
+                f'{error(A, L, E, P):9.2g}'
+            )
+
+
+if __name__ == '__main__':
+    run()
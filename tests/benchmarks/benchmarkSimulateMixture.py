@@ -0,0 +1,128 @@
+"""
+Benchmark of the simulation of several formulas sharing the same
+mixture of logit models, similar to a forecast with
+examples/swissmetro/05normalMixture.py: the choice probabilities of
+the three alternatives, and the expected revenues of the train. The
+time needed to simulate the formulas together, where the integrals are
+calculated jointly and the utilities once per draw, is compared with
+the time needed to simulate each formula separately.
+
+Usage: python benchmarkSimulateMixture.py
+
+:author: Michel Bierlaire
+:date: Mon Oct 19 21:14:37 2026
+"""
+
+# Too constraining
+# pylint: disable=invalid-name
+
+import os
+import timeit
+import numpy as np
+import pandas as pd
+import biogeme.database as db
+import biogeme.biogeme as bio
+from biogeme import models
+from biogeme.expressions import Beta, Variable, bioDraws, MonteCarlo
+
+DATA = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    '..',
+    '..',
+    'examples',
+    'swissmetro',
+    'swissmetro.dat',
+)
+
+
+def database():
+    """Database of the swissmetro data, with the observations where
+    all the alternatives are available.
+
+    :return: database
+    :rtype: biogeme.database.Database
+    """
+    df = pd.read_csv(DATA, sep='\t')
+    df = df[
+        ((df['PURPOSE'] == 1) | (df['PURPOSE'] == 3)) & (df['CHOICE'] != 0)
+    ]
+    df = df.assign(
+        TRAIN_AV_SP=df['TRAIN_AV'] * (df['SP'] != 0),
+        CAR_AV_SP=df['CAR_AV'] * (df['SP'] != 0),
+        TRAIN_TT_SCALED=df['TRAIN_TT'] / 100,
+        TRAIN_COST_SCALED=df['TRAIN_CO'] * (df['GA'] == 0) / 100,
+        SM_TT_SCALED=df['SM_TT'] / 100,
+        SM_COST_SCALED=df['SM_CO'] * (df['GA'] == 0) / 100,
+        CAR_TT_SCALED=df['CAR_TT'] / 100,
+        CAR_CO_SCALED=df['CAR_CO'] / 100,
+    )
+    df = df[(df['TRAIN_AV_SP'] != 0) & (df['CAR_AV_SP'] != 0)]
+    return db.Database('swissmetro', df)
+
+
+def formulas():
+    """Choice probabilities and revenues of the mixture of logit
+    models.
+
+    :return: formulas to simulate.
+    :rtype: dict(str, biogeme.expressions.Expression)
+    """
+    ASC_CAR = Beta('ASC_CAR', 0.137, None, None, 0)
+    ASC_TRAIN = Beta('ASC_TRAIN', -0.402, None, None, 0)
+    B_COST = Beta('B_COST', -1.28, None, None, 0)
+    B_TIME_RND = Beta('B_TIME', -2.26, None, None, 0) + Beta(
+        'B_TIME_S', 1.66, None, None, 0
+    ) * bioDraws('B_TIME_RND', 'NORMAL')
+    V = {
+        1: ASC_TRAIN
+        + B_TIME_RND * Variable('TRAIN_TT_SCALED')
+        + B_COST * Variable('TRAIN_COST_SCALED'),
+        2: B_TIME_RND * Variable('SM_TT_SCALED')
+        + B_COST * Variable('SM_COST_SCALED'),
+        3: ASC_CAR
+        + B_TIME_RND * Variable('CAR_TT_SCALED')
+        + B_COST * Variable('CAR_CO_SCALED'),
+    }
+    av = {
+        1: Variable('TRAIN_AV_SP'),
+        2: Variable('SM_AV'),
+        3: Variable('CAR_AV_SP'),
+    }
+    P = {i: MonteCarlo(models.logit(V, av, i)) for i in V}
+    return {
+        'Prob. train': P[1],
+        'Prob. Swissmetro': P[2],
+        'Prob. car': P[3],
+        'Revenue train': Variable('TRAIN_CO') * P[1],
+    }
+
+
+def run(draws=(100, 1000), number=3):
+    """Runs the benchmark and prints a table."""
+    print(f'{"draws":>6} {"together [ms]":>14} {"separately [ms]":>16}')
+    for R in draws:
+        theFormulas = formulas()
+        times = []
+        for group in ([theFormulas], [{k: f} for k, f in theFormulas.items()]):
+            simulations = []
+            for theGroup in group:
+                np.random.seed(0)
+                myBiogeme = bio.BIOGEME(
+                    database(),
+                    theGroup,
+                    numberOfDraws=R,
+                    numberOfThreads=1,
+                    suggestScales=False,
+                )
+                simulations.append(myBiogeme.prepareSimulation())
+            times.append(
+                sum(
+                    timeit.timeit(s.simulate, number=number) / number
+                    for s in simulations
+                )
+            )
+        print(f'{R:6} {1000 * times[0]:14.1f} {1000 * times[1]:16.1f}')
+
+
+if __name__ == '__main__':
+    run()
@@ -92,6 +92,24 @@ class testDatabase(unittest.TestCase):
         dim = theDrawsTable.shape
         self.assertTupleEqual(dim, (5, 10, 2))
 
+    def test_generateSequenceDraws(self):
+        types = {
+            'd1': 'NORMAL_SHALTON',
+            'd2': 'UNIFORM_SHALTON',
+            'd3': 'UNIFORMSYM_SOBOL',
+            'd4': 'NORMAL_SOBOL',
+        }
+        theDrawsTable = self.myData1.generateDraws(
+            types, ['d1', 'd2', 'd3', 'd4'], 100
+        )
+        self.assertTupleEqual(theDrawsTable.shape, (5, 100, 4))
+        # The second variable uses base 3, and its first 9 elements
+        # are in distinct intervals of length 1/9.
+        block = np.sort(np.floor(theDrawsTable[0, 8:17, 1] * 9))
+        self.assertListEqual(block.tolist(), list(range(9)))
+        self.assertTrue(np.min(theDrawsTable[:, :, 2]) > -1)
+        self.assertTrue(np.max(theDrawsTable[:, :, 2]) < 1)
+
     def test_setRandomGenerators(self):
         def logNormalDraws(sampleSize, numberOfDraws):
             return np.exp(np.random.randn(sampleSize, numberOfDraws))
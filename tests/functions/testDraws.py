@@ -198,6 +198,41 @@ class testDraws(unittest.TestCase):
         norm = np.linalg.norm(diff)
         self.assertAlmostEqual(norm, 0, 7)
 
+    def test_scrambledHalton(self):
+        draws = dr.getScrambledHaltonDraws(
+            sampleSize=10, numberOfDraws=1000, base=13
+        )
+        self.assertTupleEqual(draws.shape, (10, 1000))
+        self.assertTrue(np.min(draws) > 0)
+        self.assertTrue(np.max(draws) < 1)
+        self.assertAlmostEqual(np.mean(draws), 0.5, 3)
+        # Each block of 13 consecutive elements contains one element
+        # in each interval [k/13, (k+1)/13].
+        block = np.sort(np.floor(draws[0, 12:25] * 13))
+        self.assertListEqual(block.tolist(), list(range(13)))
+        symmetric = dr.getScrambledHaltonDraws(
+            sampleSize=10, numberOfDraws=1000, symmetric=True, base=13
+        )
+        self.assertTrue(np.min(symmetric) > -1)
+        self.assertAlmostEqual(np.mean(symmetric), 0, 3)
+
+    def test_sobol(self):
+        draws = dr.getSobolDraws(sampleSize=8, numberOfDraws=128, dimension=3)
+        self.assertTupleEqual(draws.shape, (8, 128))
+        self.assertTrue(np.min(draws) > 0)
+        self.assertTrue(np.max(draws) < 1)
+        # The first 1024 elements of a base 2 sequence are evenly
+        # spread.
+        counts = np.bincount(np.floor(draws.ravel() * 1024).astype(int))
+        self.assertListEqual(counts.tolist(), [1] * 1024)
+        plain = dr.getSobolDraws(
+            sampleSize=1, numberOfDraws=7, scrambled=False
+        )
+        self.assertListEqual(
+            plain[0].tolist(),
+            [0.5, 0.75, 0.25, 0.375, 0.875, 0.625, 0.125],
+        )
+
     def test_antithetic(self):
         draws = dr.getAntithetic(
             dr.getHaltonDraws, sampleSize=1, numberOfDraws=10
@@ -23,6 +23,7 @@ import biogeme.biogeme as bio
 from biogeme import models
 import biogeme.algorithms as algo
 import biogeme.optimization as opt
+import biogeme.hamabs as hamabs
 import biogeme.exceptions as excep
 from biogeme.expressions import Variable, Beta
 from testData import getData
@@ -82,6 +83,15 @@ class rosenbrock(algo.functionToMinimize):
         raise excep.biogemeError('This function is not data driven.')
 
 
+class rosenbrockWithStates(rosenbrock):
+    def __init__(self):
+        super().__init__()
+        self.states = []
+
+    def saveOptimizationState(self, state):
+        self.states.append(state)
+
+
 class testOptimization(unittest.TestCase):
     def setUp(self):
         np.random.seed(90267)
@@ -134,6 +144,35 @@ class testOptimization(unittest.TestCase):
         for i in list(diff.flatten()):
             self.assertAlmostEqual(i, 0.0, 5)
 
+    def testSchnabelEskowPositiveDefinite(self):
+        rng = np.random.default_rng(0)
+        B = rng.standard_normal((30, 30))
+        A = B @ B.T + np.identity(30)
+        L, E, P = algo.schnabelEskow(A)
+        self.assertEqual(np.abs(E).max(), 0.0)
+        # Diagonal pivoting: the diagonal of the factor is decreasing
+        self.assertTrue(np.all(np.diff(np.diag(L)) <= 0))
+        np.testing.assert_allclose(P @ L @ L.T @ P.T, A, atol=1.0e-10)
+
+    def testSchnabelEskowIndefinite(self):
+        rng = np.random.default_rng(0)
+        B = rng.standard_normal((30, 30))
+        A = (B + B.T) / 2.0
+        L, E, P = algo.schnabelEskow(A)
+        self.assertTrue(np.all(np.diag(E) > 0))
+        np.testing.assert_allclose(P @ L @ L.T @ P.T, A + E, atol=1.0e-10)
+        self.assertTrue(np.all(np.linalg.eigvalsh(A + E) > 0))
+
+    def testDoglegPoints(self):
+        g = np.array([1.0, -2.0])
+        H = np.array([[2.0, 0.5], [0.5, 1.0]])
+        points = algo.cauchyNewtonDogleg(g, H)
+        for delta in [10.0, 1.0, 0.1]:
+            d1, diag1 = algo.dogleg(g, H, delta)
+            d2, diag2 = algo.dogleg(g, H, delta, points)
+            self.assertEqual(diag1, diag2)
+            np.testing.assert_array_equal(d1, d2)
+
     def testLineSearch(self):
         x = np.array([-1.5, 1.5])
         self.theFunction.setVariables(x)
@@ -153,6 +192,109 @@ class testOptimization(unittest.TestCase):
         for i in list(xstar):
             self.assertAlmostEqual(i, 1, 4)
 
+    def testResume(self):
+        x0 = np.array([-1.5, 1.5])
+        for algorithm in [algo.newtonTrustRegion, algo.bfgsTrustRegion]:
+            theFunction = rosenbrockWithStates()
+            xstar, messages = algorithm(theFunction, x0)
+            state = theFunction.states[4]
+            self.assertEqual(state['k'], 5)
+            xresumed, resumedMessages = algorithm(
+                rosenbrock(), x0, state=state
+            )
+            np.testing.assert_array_equal(xstar, xresumed)
+            self.assertEqual(
+                messages['Number of iterations'],
+                resumedMessages['Number of iterations'],
+            )
+            with self.assertRaises(excep.biogemeError):
+                algorithm(
+                    rosenbrock(), np.array([-1.5, 1.5, 1.0]), state=state
+                )
+
+    def testBioHamabs(self):
+        # The sample is too small to be split into batches.
+        results = self.myBiogeme.estimate(
+            algorithm=hamabs.hamabsForBiogeme,
+            algoParameters={'firstBatch': 1.0},
+        )
+        beta = results.getBetaValues()
+        self.assertAlmostEqual(beta['beta1'], 0.144546, 3)
+        self.assertAlmostEqual(beta['beta2'], 0.023502, 3)
+
+    def testLbfgsb(self):
+        x0 = np.array([-1.5, 1.5])
+        bounds = algo.bioBounds([(-1000, 1000), (-1000, 1000)])
+        xstar, _ = algo.lbfgsb(self.theFunction, bounds, x0, tol=1.0e-8)
+        for i in list(xstar):
+            self.assertAlmostEqual(i, 1, 4)
+        bounds = algo.bioBounds([(-1000, 0.5), (-1000, 1000)])
+        xstar, _ = algo.lbfgsb(self.theFunction, bounds, x0, tol=1.0e-8)
+        self.assertAlmostEqual(xstar[0], 0.5, 4)
+        self.assertAlmostEqual(xstar[1], 0.25, 4)
+        theFunction = rosenbrockWithStates()
+        xstar, messages = algo.lbfgsb(theFunction, bounds, x0)
+        xresumed, resumedMessages = algo.lbfgsb(
+            rosenbrock(), bounds, x0, state=theFunction.states[3]
+        )
+        np.testing.assert_array_equal(xstar, xresumed)
+        self.assertEqual(
+            messages['Number of function evaluations'],
+            resumedMessages['Number of function evaluations'],
+        )
+
+    def testHessianFree(self):
+        x0 = np.array([-1.5, 1.5])
+        bounds = algo.bioBounds([(-1000, 1000), (-1000, 1000)])
+        xstar, messages = algo.simpleBoundsNewtonAlgorithm(
+            self.theFunction, bounds, x0, hessianFree=True
+        )
+        for i in list(xstar):
+            self.assertAlmostEqual(i, 1, 4)
+        self.assertGreater(messages['Number of hessian-vector products'], 0)
+        self.assertEqual(messages['Number of hessian evaluations'], 0)
+
+    def testBioNewtonHessianFree(self):
+        results = self.myBiogeme.estimate(algorithm=opt.bioNewtonHessianFree)
+        beta = results.getBetaValues()
+        self.assertAlmostEqual(beta['beta1'], 0.144546, 3)
+        self.assertAlmostEqual(beta['beta2'], 0.023502, 3)
+
+    def testBioLbfgsb(self):
+        results = self.myBiogeme.estimate(algorithm=opt.lbfgsbForBiogeme)
+        beta = results.getBetaValues()
+        self.assertAlmostEqual(beta['beta1'], 0.144546, 3)
+        self.assertAlmostEqual(beta['beta2'], 0.023502, 3)
+
+    def testBioAdam(self):
+        results = self.myBiogeme.estimate(
+            algorithm=opt.adamForBiogeme,
+            algoParameters={'firstBatch': 0.5, 'maximumBatch': 1.0},
+        )
+        beta = results.getBetaValues()
+        self.assertAlmostEqual(beta['beta1'], 0.144546, 3)
+        self.assertAlmostEqual(beta['beta2'], 0.023502, 3)
+        messages = results.data.optimizationMessages
+        self.assertEqual(messages['Number of stochastic iterations'], 50)
+
+    def testBioSvrg(self):
+        results = self.myBiogeme.estimate(
+            algorithm=opt.svrgForBiogeme,
+            algoParameters={'firstBatch': 0.2, 'maximumBatch': 0.5},
+        )
+        beta = results.getBetaValues()
+        self.assertAlmostEqual(beta['beta1'], 0.144546, 3)
+        self.assertAlmostEqual(beta['beta2'], 0.023502, 3)
+        messages = results.data.optimizationMessages
+        self.assertEqual(messages['Number of stochastic iterations'], 100)
+        with self.assertRaises(excep.biogemeError):
+            algo.stochasticGradient(
+                self.theFunction,
+                algo.bioBounds([(None, None), (None, None)]),
+                np.array([-1.5, 1.5]),
+                method='sgd',
+            )
+
     def testBioScipy(self):
         results = self.myBiogeme.estimate(algorithm=opt.scipy)
         beta = results.getBetaValues()
@@ -15,11 +15,31 @@ Test the biogeme module
 # pylint: disable=missing-function-docstring, missing-class-docstring
 
 import os
+import itertools
 import unittest
 import random as rnd
 import numpy as np
+import pandas as pd
+import biogeme.database as db
 import biogeme.biogeme as bio
-from biogeme.expressions import Variable, Beta, exp, bioDraws
+import biogeme.models as models
+import biogeme.algorithms as alg
+import biogeme.optimization as opt
+import biogeme.exceptions as excep
+from biogeme.expressions import (
+    Variable,
+    Beta,
+    exp,
+    log,
+    bioDraws,
+    MonteCarlo,
+    MonteCarloControlVariate,
+    MonteCarloImportance,
+    PanelLikelihoodTrajectory,
+    LogMonteCarloPanelTrajectory,
+    RandomVariable,
+    SparseGridIntegrate,
+)
 from testData import getData
 
 
@@ -50,6 +70,11 @@ class test_biogeme(unittest.TestCase):
         self.myBiogeme.generatePickle = False
         self.myBiogeme.modelName = 'simpleExample'
 
+    def tearDown(self):
+        stateFile = self.myBiogeme._saveStateFileName()
+        if os.path.exists(stateFile):
+            os.remove(stateFile)
+
     def test_saveIterationsFileName(self):
         f = self.myBiogeme._saveIterationsFileName()
         self.assertEqual(f, '__simpleExample.iter')
@@ -104,27 +129,101 @@ class test_biogeme(unittest.TestCase):
         self.assertListEqual(h_true, h.tolist())
         self.assertListEqual(bhhh_true, bhhh.tolist())
 
+    def test_calculateSeveralLikelihoods(self):
+        points = [[-1.0, 2.0], [0.0, 3.0], [1.5, -0.5]]
+        f = self.myBiogeme.calculateSeveralLikelihoods(points, scaled=False)
+        f, g = self.myBiogeme.calculateSeveralLikelihoods(
+            points, scaled=False, gradient=True
+        )
+        for x, fx, gx in zip(points, f, g):
+            f_true, g_true, _, _ = (
+                self.myBiogeme.calculateLikelihoodAndDerivatives(
+                    x, scaled=False
+                )
+            )
+            self.assertAlmostEqual(fx, f_true, 8)
+            np.testing.assert_almost_equal(gx, g_true, 8)
+        f_scaled = self.myBiogeme.calculateSeveralLikelihoods(
+            points, scaled=True
+        )
+        N = self.myData.getSampleSize()
+        np.testing.assert_almost_equal(f_scaled, f / N, 8)
+        weighted = bio.BIOGEME(
+            self.myData,
+            {'loglike': self.likelihood, 'weight': Variable('Variable1')},
+        )
+        f = weighted.calculateSeveralLikelihoods(points, scaled=False)
+        for x, fx in zip(points, f):
+            f_true = weighted.calculateLikelihood(x, scaled=False)
+            self.assertAlmostEqual(fx, f_true, 8)
+        with self.assertRaises(ValueError):
+            self.myBiogeme.calculateSeveralLikelihoods(
+                [[1.0, 2.0, 3.0]], scaled=False
+            )
+
+    def test_calculateLikelihoodBatch(self):
+        x = self.myBiogeme.betaInitValues
+        xplus = [v + 1 for v in x]
+        # Contribution of each observation
+        rows = [-91.0, -101.0, -111.0, -121.0, -131.0]
+        pairs = {a + b for a, b in itertools.combinations(rows, 2)}
+        f, g, _, _ = self.myBiogeme.calculateLikelihoodAndDerivatives(
+            xplus, scaled=False, batch=0.4
+        )
+        self.assertIn(f, pairs)
+        f2, g2, _, _ = self.myBiogeme.calculateLikelihoodAndDerivatives(
+            xplus, scaled=False, batch=0.4, sameBatch=True
+        )
+        self.assertEqual(f, f2)
+        np.testing.assert_array_equal(g, g2)
+        f = self.myBiogeme.calculateLikelihood(xplus, scaled=True, batch=0.4)
+        self.assertIn(2 * f, pairs)
+        f = self.myBiogeme.calculateLikelihood(xplus, scaled=False)
+        self.assertEqual(f, -555)
+        # The same batch cannot be used for another size
+        self.myBiogeme.calculateLikelihoodAndDerivatives(
+            xplus, scaled=False, batch=0.6
+        )
+        with self.assertRaises(excep.biogemeError):
+            self.myBiogeme.calculateLikelihoodAndDerivatives(
+                xplus, scaled=False, batch=0.4, sameBatch=True
+            )
+
     def test_likelihoodFiniteDifferenceHessian(self):
         x = self.myBiogeme.betaInitValues
         xplus = [v + 1 for v in x]
         h = self.myBiogeme.likelihoodFiniteDifferenceHessian(xplus)
-        h_true = [[-1380.00020229, -150.0], [-150.0000451, -540.00005396]]
+        h_true = [[-1380.0, -150.0], [-150.0, -540.0]]
         for row, row_true in zip(h, h_true):
             for col, col_true in zip(row, row_true):
                 self.assertAlmostEqual(col, col_true, 5)
 
+    def test_calculateHessianVectorProduct(self):
+        x = self.myBiogeme.betaInitValues
+        xplus = [v + 1 for v in x]
+        h_true = [[-1380.00020229, -150.0], [-150.0000451, -540.00005396]]
+        for v, hv_true in zip([[1.0, 0.0], [0.0, 1.0]], h_true):
+            hv = self.myBiogeme.calculateHessianVectorProduct(
+                xplus, v, scaled=False
+            )
+            for value, value_true in zip(hv, hv_true):
+                self.assertAlmostEqual(value, value_true, 3)
+        hv = self.myBiogeme.calculateHessianVectorProduct(
+            xplus, [2.0, -1.0], scaled=True
+        )
+        N = self.myData.getSampleSize()
+        self.assertAlmostEqual(hv[0], (-2760.0004 + 150.0) / N, 3)
+        with self.assertRaises(ValueError):
+            self.myBiogeme.calculateHessianVectorProduct(xplus, [1.0], False)
+
     def test_checkDerivatives(self):
         _, _, _, gdiff, hdiff = self.myBiogeme.checkDerivatives()
-        gdiff_true = [-5.42793187e-06, 2.60800035e-05]
-        hdiff_true = [
-            [-8.04552171e-06, 7.36597983e-09],
-            [-1.61387920e-07, 2.22928137e-05],
-        ]
-        for col, col_true in zip(gdiff, gdiff_true):
-            self.assertAlmostEqual(col, col_true, 5)
-        for row, row_true in zip(hdiff, hdiff_true):
-            for col, col_true in zip(row, row_true):
-                self.assertAlmostEqual(col, col_true, 5)
+        # Central differences are accurate up to the rounding errors
+        for col in gdiff:
+            self.assertAlmostEqual(col, 0.0, 7)
+        for row in hdiff:
+            for col in row:
+                self.assertAlmostEqual(col, 0.0, 7)
 
     def test_estimate(self):
         self.myBiogeme.numberOfThreads = 1
@@ -132,12 +231,768 @@ class test_biogeme(unittest.TestCase):
         self.assertAlmostEqual(results.data.logLike, -67.0654904797005, 5)
         os.remove(self.myBiogeme._saveIterationsFileName())
 
+    def test_checkpointClosed(self):
+        self.myBiogeme.checkpointDelay = 3600.0
+        self.myBiogeme.calculateLikelihoodAndDerivatives(
+            [-1.0, 2.0], scaled=True
+        )
+        self.myBiogeme.calculateLikelihoodAndDerivatives(
+            [-1.0, 1.0], scaled=True
+        )
+        # The last iteration is written before the call returns, and no
+        # thread is left running.
+        self.assertIsNone(self.myBiogeme.checkpoint._thread)
+        filename = self.myBiogeme._saveIterationsFileName()
+        with open(filename) as f:
+            self.assertListEqual(
+                f.read().split(), ['beta1', '=', '-1.0', 'beta2', '=', '1.0']
+            )
+        os.remove(filename)
+
+    def test_estimateResume(self):
+        self.myBiogeme.checkpointDelay = 0.0
+        for algorithm in [opt.bioNewton, opt.bioBfgs]:
+            self.myBiogeme.changeInitValues({'beta1': -1.0, 'beta2': 2.0})
+            results = self.myBiogeme.quickEstimate(algorithm=algorithm)
+            self.myBiogeme.checkpoint.reset()
+            full = results.data.optimizationMessages
+            os.remove(self.myBiogeme._saveIterationsFileName())
+            os.remove(self.myBiogeme._saveStateFileName())
+            self.myBiogeme.changeInitValues({'beta1': -1.0, 'beta2': 2.0})
+            self.myBiogeme.estimate(
+                algorithm=algorithm, algoParameters={'maxiter': 2}
+            )
+            self.assertEqual(
+                self.myBiogeme.optimizationMessages['Number of iterations'], 2
+            )
+            initLogLike = self.myBiogeme.initLogLike
+            self.myBiogeme.initLogLike = None
+            results = self.myBiogeme.estimate(algorithm=algorithm, resume=True)
+            self.assertEqual(self.myBiogeme.initLogLike, initLogLike)
+            resumed = results.data.optimizationMessages
+            self.assertEqual(
+                resumed['Number of iterations'], full['Number of iterations']
+            )
+            self.assertEqual(
+                resumed['Number of function evaluations'],
+                full['Number of function evaluations'],
+            )
+            self.assertAlmostEqual(
+                results.data.logLike, -67.0654904797005, 5
+            )
+            os.remove(self.myBiogeme._saveIterationsFileName())
+            os.remove(self.myBiogeme._saveStateFileName())
+        with self.assertRaises(excep.biogemeError):
+            alg.checkOptimizationState(
+                {'algorithm': 'hamabs', 'x': [0, 0]}, 'bfgsTrustRegion', 2
+            )
+
+    def test_estimateAutomaticScaling(self):
+        self.myBiogeme.checkpointDelay = 0.0
+        self.myBiogeme.automaticScaling = True
+        results = self.myBiogeme.quickEstimate(algorithm=opt.bioBfgs)
+        self.assertAlmostEqual(results.data.logLike, -67.0654904797005, 5)
+        scales = self.myBiogeme.parameterScales
+        self.assertEqual(len(scales), 2)
+        np.testing.assert_almost_equal(np.log10(scales) % 1, 0)
+        self.myBiogeme.checkpoint.reset()
+        os.remove(self.myBiogeme._saveIterationsFileName())
+        os.remove(self.myBiogeme._saveStateFileName())
+        # The resumed estimation uses the scales of the interrupted one.
+        self.myBiogeme.estimate(
+            algorithm=opt.bioBfgs, algoParameters={'maxiter': 2}
+        )
+        self.myBiogeme.automaticScaling = False
+        results = self.myBiogeme.estimate(algorithm=opt.bioBfgs, resume=True)
+        np.testing.assert_array_equal(self.myBiogeme.parameterScales, scales)
+        self.assertAlmostEqual(results.data.logLike, -67.0654904797005, 5)
+        os.remove(self.myBiogeme._saveIterationsFileName())
+        os.remove(self.myBiogeme._saveStateFileName())
+
+    def test_negLikelihoodScales(self):
+        scales = np.array([10.0, 0.1])
+        x = np.array([-0.1, 20.0])
+        function = bio.negLikelihood(
+            like=self.myBiogeme.calculateLikelihood,
+            like_deriv=self.myBiogeme.calculateLikelihoodAndDerivatives,
+            scaled=False,
+            like_hv=self.myBiogeme.calculateHessianVectorProduct,
+            parameterScales=scales,
+        )
+        function.setVariables(x)
+        f, g, h = function.f_g_h()
+        f_true, g_true, h_true, _ = (
+            self.myBiogeme.calculateLikelihoodAndDerivatives(
+                x * scales, scaled=False, hessian=True
+            )
+        )
+        self.assertAlmostEqual(f, -f_true, 8)
+        np.testing.assert_almost_equal(g, -g_true * scales, 8)
+        np.testing.assert_almost_equal(
+            h, -h_true * np.outer(scales, scales), 8
+        )
+        hv = function.hessianVectorProduct(x, [1.0, 0.0])
+        np.testing.assert_almost_equal(hv, h[:, 0], 2)
+
+    def test_drawContinuation(self):
+        rng = np.random.default_rng(0)
+        x1 = rng.normal(size=200)
+        x2 = rng.normal(size=200)
+        df = pd.DataFrame(
+            {
+                'X1': x1,
+                'X2': x2,
+                'CHOICE': np.where(x1 + rng.gumbel(size=200) > 0, 1, 2),
+            }
+        )
+        B1 = Beta('B1', 0, None, None, 0)
+        S1 = Beta('S1', 0.1, None, None, 0)
+        B2 = Beta('B2', 0, None, None, 0)
+        V = {
+            1: (B1 + S1 * bioDraws('e', 'NORMAL')) * Variable('X1'),
+            2: B2 * Variable('X2'),
+        }
+        loglike = log(MonteCarlo(models.logit(V, None, Variable('CHOICE'))))
+        results = []
+        for initialNumberOfDraws in [None, 8]:
+            np.random.seed(1)
+            myBiogeme = bio.BIOGEME(
+                db.Database('mixed', df), loglike, numberOfDraws=64
+            )
+            myBiogeme.saveIterations = False
+            myBiogeme.generateHtml = False
+            myBiogeme.generatePickle = False
+            myBiogeme.initialNumberOfDraws = initialNumberOfDraws
+            results.append(myBiogeme.estimate())
+        messages = results[1].data.optimizationMessages
+        # 8, 16 and 32 draws, before the last stage with 64 draws.
+        self.assertEqual(messages['Number of draws stages'], 3)
+        self.assertAlmostEqual(
+            results[0].data.logLike, results[1].data.logLike, 5
+        )
+        x = results[1].getBetaValues()
+        f = myBiogeme.calculateLikelihood(
+            [x[name] for name in myBiogeme.freeBetaNames], scaled=False
+        )
+        self.assertAlmostEqual(f, results[1].data.logLike, 8)
+
+    def test_adaptiveMonteCarlo(self):
+        rng = np.random.default_rng(0)
+        x1 = rng.normal(size=200)
+        x2 = rng.normal(size=200)
+        df = pd.DataFrame(
+            {
+                'X1': x1,
+                'X2': x2,
+                'CHOICE': np.where(x1 + rng.gumbel(size=200) > 0, 1, 2),
+            }
+        )
+        B1 = Beta('B1', 0, None, None, 0)
+        S1 = Beta('S1', 0.5, None, None, 0)
+        B2 = Beta('B2', 0, None, None, 0)
+        V = {
+            1: (B1 + S1 * bioDraws('e', 'NORMAL')) * Variable('X1'),
+            2: B2 * Variable('X2'),
+        }
+        prob = models.logit(V, None, Variable('CHOICE'))
+        with self.assertRaises(excep.biogemeError):
+            MonteCarlo(prob, tolerance=0)
+        results = []
+        for tolerance in [None, 0.01]:
+            np.random.seed(1)
+            myBiogeme = bio.BIOGEME(
+                db.Database('mixed', df),
+                log(MonteCarlo(prob, tolerance=tolerance, minimumDraws=16)),
+                numberOfDraws=256,
+            )
+            myBiogeme.saveIterations = False
+            myBiogeme.generateHtml = False
+            myBiogeme.generatePickle = False
+            results.append(myBiogeme.estimate())
+        full = results[0].data.simulationDiagnostic
+        adaptive = results[1].data.simulationDiagnostic
+        self.assertEqual(full['averageNumberOfDraws'], 256)
+        self.assertLess(adaptive['averageNumberOfDraws'], 256)
+        self.assertGreaterEqual(adaptive['averageNumberOfDraws'], 16)
+        self.assertGreater(full['standardError'], 0)
+        self.assertLess(full['bias'], 0)
+        self.assertAlmostEqual(
+            results[0].data.logLike, results[1].data.logLike, 0
+        )
+        stats = results[1].getGeneralStatistics()
+        self.assertIn('Simulation std. error of the log likelihood', stats)
+
+    def test_monteCarloVarianceReduction(self):
+        df = pd.DataFrame({'X': [0.5, 1.0, -0.3]})
+        a = Beta('a', 0.7, None, None, 0)
+        s = Beta('s', 0.4, None, None, 0)
+        X = Variable('X')
+
+        def integrals():
+            # The draws cannot be shared by several formulas.
+            xi = bioDraws('e', 'NORMAL')
+            f = exp(a * X + s * xi) / (1 + exp(a * X + s * xi))
+            return {
+                'plain': MonteCarlo(f),
+                'control': MonteCarloControlVariate(f, s * xi, 0),
+                'nonlinear': MonteCarloControlVariate(
+                    f, a * s * xi * xi + s * s * xi, a * s
+                ),
+                'importance': MonteCarloImportance(f, exp(a * s * xi)),
+                'normalized': MonteCarloImportance(
+                    f, exp(a * s * xi), normalized=True
+                ),
+            }
+
+        values = {}
+        for seed in range(5):
+            for name, integral in integrals().items():
+                np.random.seed(seed)
+                myBiogeme = bio.BIOGEME(
+                    db.Database('integrals', df),
+                    log(integral),
+                    numberOfDraws=20,
+                    suggestScales=False,
+                )
+                myBiogeme.saveIterations = False
+                f, _, _, gdiff, hdiff = myBiogeme.checkDerivatives(
+                    verbose=False
+                )
+                self.assertLess(np.abs(gdiff).max(), 1.0e-6)
+                self.assertLess(np.abs(hdiff).max(), 1.0e-6)
+                values.setdefault(name, []).append(f)
+        self.assertLess(
+            np.std(values['control']), 0.5 * np.std(values['plain'])
+        )
+
+        xi = bioDraws('e', 'NORMAL')
+        wrong = MonteCarloControlVariate(xi, xi, bioDraws('e', 'NORMAL'))
+        listOfErrors, _ = wrong.audit()
+        self.assertEqual(len(listOfErrors), 1)
+        xi = bioDraws('e', 'NORMAL')
+        nested = MonteCarloImportance(xi, MonteCarlo(xi * xi))
+        listOfErrors, _ = nested.audit()
+        self.assertTrue(listOfErrors)
+
+    def test_monteCarloBlocksOfDraws(self):
+        rng = np.random.default_rng(0)
+        df = pd.DataFrame(
+            {
+                'ID': np.repeat(np.arange(4), 3),
+                'X': rng.normal(size=12),
+                'AV': [1, 1, 0, 1, 1, 1, 1, 1, 1, 0, 1, 1],
+                'CHOICE': [1, 2, 1, 3, 1, 2, 2, 3, 1, 1, 3, 2],
+            }
+        )
+        a = Beta('a', 0.5, None, None, 0)
+        b = Beta('b', -0.3, None, None, 0)
+        s = Beta('s', 0.8, None, None, 0)
+
+        def logLikelihood(tolerance):
+            xi = bioDraws('xi', 'NORMAL')
+            eta = bioDraws('eta', 'NORMAL')
+            V = {
+                1: (a + s * xi) * Variable('X'),
+                2: b - exp(s * eta) / 2,
+                3: -s * xi * eta,
+            }
+            av = {1: 1, 2: Variable('AV'), 3: 1}
+            obsprob = models.logit(V, av, Variable('CHOICE'))
+            # A tiny tolerance forces the integral to be calculated
+            # draw by draw, with all the draws.
+            return log(
+                MonteCarlo(PanelLikelihoodTrajectory(obsprob), tolerance)
+            )
+
+        results = []
+        for tolerance in (None, 1.0e-300):
+            np.random.seed(0)
+            database = db.Database('panel', df)
+            database.panel('ID')
+            # The draws are calculated by blocks of 64
+            myBiogeme = bio.BIOGEME(
+                database,
+                logLikelihood(tolerance),
+                numberOfDraws=70,
+                suggestScales=False,
+            )
+            myBiogeme.saveIterations = False
+            results.append(myBiogeme.checkDerivatives(verbose=False))
+        f, g, h, gdiff, hdiff = results[0]
+        self.assertLess(np.abs(gdiff).max(), 1.0e-6)
+        self.assertLess(np.abs(hdiff).max(), 1.0e-6)
+        self.assertAlmostEqual(f, results[1][0], 10)
+        np.testing.assert_allclose(g, results[1][1], rtol=1.0e-10)
+        np.testing.assert_allclose(h, results[1][2], rtol=1.0e-10)
+
+    def test_logMonteCarloPanelTrajectory(self):
+        rng = np.random.default_rng(0)
+        df = pd.DataFrame(
+            {
+                'ID': np.repeat(np.arange(4), 3),
+                'X': rng.normal(size=12),
+                'CHOICE': [1, 2, 1, 3, 1, 2, 2, 3, 1, 1, 3, 2],
+            }
+        )
+        a = Beta('a', 0.5, None, None, 0)
+        s = Beta('s', 0.8, None, None, 0)
+
+        def probability():
+            xi = bioDraws('xi', 'NORMAL')
+            V = {1: (a + s * xi) * Variable('X'), 2: s * xi, 3: 0}
+            return models.logit(V, None, Variable('CHOICE'))
+
+        results = []
+        for fused in (False, True):
+            np.random.seed(0)
+            database = db.Database('panel', df)
+            database.panel('ID')
+            if fused:
+                logprob = LogMonteCarloPanelTrajectory(probability())
+            else:
+                logprob = log(
+                    MonteCarlo(PanelLikelihoodTrajectory(probability()))
+                )
+            myBiogeme = bio.BIOGEME(
+                database, logprob, numberOfDraws=70, suggestScales=False
+            )
+            myBiogeme.saveIterations = False
+            results.append(myBiogeme.checkDerivatives(verbose=False))
+        f, g, h, gdiff, hdiff = results[1]
+        self.assertLess(np.abs(gdiff).max(), 1.0e-6)
+        self.assertLess(np.abs(hdiff).max(), 1.0e-6)
+        self.assertAlmostEqual(f, results[0][0], 10)
+        np.testing.assert_allclose(g, results[0][1], rtol=1.0e-10)
+        np.testing.assert_allclose(h, results[0][2], rtol=1.0e-10)
+
+        # The likelihood of these long sequences of observations
+        # underflows. As the draws have no impact, the log likelihood
+        # is the sum of the log of the logit probabilities.
+        x = rng.normal(size=2000)
+        choice = rng.integers(1, 4, size=2000)
+        database = db.Database(
+            'long',
+            pd.DataFrame(
+                {'ID': np.repeat([1, 2], 1000), 'X': x, 'CHOICE': choice}
+            ),
+        )
+        database.panel('ID')
+        xi = bioDraws('xi', 'NORMAL')
+        s = Beta('s', 0, None, None, 1)
+        V = {1: (a + s * xi) * Variable('X'), 2: 0, 3: 0}
+        myBiogeme = bio.BIOGEME(
+            database,
+            LogMonteCarloPanelTrajectory(
+                models.logit(V, None, Variable('CHOICE'))
+            ),
+            numberOfDraws=10,
+            suggestScales=False,
+        )
+        myBiogeme.saveIterations = False
+        f, g, _, _ = myBiogeme.calculateLikelihoodAndDerivatives(
+            [0.5], scaled=False
+        )
+        utilities = np.column_stack([0.5 * x, np.zeros(2000), np.zeros(2000)])
+        logProbabilities = utilities - np.log(
+            np.exp(utilities).sum(axis=1, keepdims=True)
+        )
+        self.assertAlmostEqual(
+            f, logProbabilities[np.arange(2000), choice - 1].sum(), 8
+        )
+        self.assertTrue(np.isfinite(g).all())
+
+        errors, _ = LogMonteCarloPanelTrajectory(probability()).audit(
+            db.Database('notPanel', df)
+        )
+        self.assertTrue(errors)
+
+    def test_simulatePosterior(self):
+        rng = np.random.default_rng(1)
+        df = pd.DataFrame(
+            {
+                'ID': np.repeat(np.arange(4), 3),
+                'X': rng.normal(size=12),
+                'CHOICE': [1, 2, 1, 3, 1, 2, 2, 3, 1, 1, 3, 2],
+            }
+        )
+        a = Beta('a', 0.5, None, None, 0)
+        s = Beta('s', 0.8, None, None, 0)
+        xi = bioDraws('xi', 'NORMAL')
+        B = a + s * xi
+        V = {1: B * Variable('X'), 2: s * xi, 3: 0}
+        prob = models.logit(V, None, Variable('CHOICE'))
+        database = db.Database('panel', df)
+        database.panel('ID')
+        np.random.seed(0)
+        myBiogeme = bio.BIOGEME(
+            database,
+            LogMonteCarloPanelTrajectory(prob),
+            numberOfDraws=70,
+            suggestScales=False,
+        )
+        betas = {'a': 0.3, 's': 1.2}
+        theDraws = database.theDraws
+        parent = prob.parent
+        signature = myBiogeme.loglike.getSignature()
+        randomState = np.random.get_state()
+        post = myBiogeme.simulatePosterior(
+            {'B': B, 'C': 2 * Variable('X') * xi},
+            betas,
+            quantiles=[0, 0.5, 1],
+        )
+        self.assertEqual(post.shape, (4, 2, 5))
+        # Neither the draws, nor the random state, nor the expressions
+        # are modified.
+        self.assertIs(database.theDraws, theDraws)
+        np.testing.assert_array_equal(
+            np.random.get_state()[1], randomState[1]
+        )
+        self.assertIs(prob.parent, parent)
+        self.assertListEqual(myBiogeme.loglike.getSignature(), signature)
+
+        # Ratios of separate Monte-Carlo simulations with the same draws.
+        L = PanelLikelihoodTrajectory(prob)
+        C = 2 * Variable('X') * xi
+        simulDatabase = db.Database('panel', df)
+        simulDatabase.panel('ID')
+        np.random.seed(0)
+        simulBiogeme = bio.BIOGEME(
+            simulDatabase,
+            {
+                'L': MonteCarlo(L),
+                'BL': MonteCarlo(B * L),
+                'BBL': MonteCarlo(B * B * L),
+                'CL': MonteCarlo(C * L),
+            },
+            numberOfDraws=70,
+            suggestScales=False,
+        )
+        np.testing.assert_array_equal(
+            simulBiogeme.database.theDraws, database.theDraws
+        )
+        simulated = simulBiogeme.simulate(betas).to_numpy()[:4]
+        mean = simulated[:, 1] / simulated[:, 0]
+        np.testing.assert_allclose(post[:, 0, 0], mean, rtol=1.0e-10)
+        np.testing.assert_allclose(
+            post[:, 0, 1],
+            simulated[:, 2] / simulated[:, 0] - mean**2,
+            rtol=1.0e-8,
+        )
+        # The coefficient C involves the first observation of each
+        # individual.
+        np.testing.assert_allclose(
+            post[:, 1, 0], simulated[:, 3] / simulated[:, 0], rtol=1.0e-10
+        )
+        draws = database.theDraws[:, :, 0]
+        np.testing.assert_allclose(post[:, 0, 2], 0.3 + 1.2 * draws.min(1))
+        np.testing.assert_allclose(post[:, 0, 4], 0.3 + 1.2 * draws.max(1))
+        self.assertTrue((post[:, 0, 2] <= post[:, 0, 3]).all())
+        self.assertTrue((post[:, 0, 3] <= post[:, 0, 4]).all())
+
+        # The model is not modified.
+        f = myBiogeme.calculateLikelihood([0.3, 1.2], scaled=False)
+        self.assertAlmostEqual(f, np.log(simulated[:, 0]).sum(), 10)
+        with self.assertRaises(excep.biogemeError):
+            myBiogeme.simulatePosterior({'B': B}, quantiles=[2])
+        with self.assertRaises(excep.biogemeError):
+            myBiogeme.simulatePosterior({'D': bioDraws('other', 'NORMAL')})
+
+    def test_simulateSharedMixture(self):
+        rng = np.random.default_rng(2)
+        df = pd.DataFrame(
+            {
+                'ID': np.repeat(np.arange(4), 3),
+                'X': rng.normal(size=12),
+                'PRICE': rng.uniform(1, 2, size=12),
+                'CHOICE': [1, 2, 1, 3, 1, 2, 2, 3, 1, 1, 3, 2],
+            }
+        )
+        a = Beta('a', 0.5, None, None, 0)
+        b = Beta('b', -0.3, None, None, 0)
+        s = Beta('s', 0.8, None, None, 0)
+        xi = bioDraws('xi', 'NORMAL')
+        eta = bioDraws('eta', 'NORMAL')
+        V = {
+            1: (a + s * xi) * Variable('X'),
+            2: b - exp(s * eta) / 2,
+            3: -s * xi * eta,
+        }
+        av = {1: 1, 2: 1, 3: 1}
+        P = {i: MonteCarlo(models.logit(V, av, i)) for i in V}
+        trajectory = {
+            i: MonteCarlo(PanelLikelihoodTrajectory(models.logit(V, av, i)))
+            for i in V
+        }
+
+        def simulate(formulas, panel):
+            database = db.Database('mixture', df)
+            if panel:
+                database.panel('ID')
+            np.random.seed(0)
+            myBiogeme = bio.BIOGEME(
+                database, formulas, numberOfDraws=70, suggestScales=False
+            )
+            return myBiogeme.simulate(), database.theDraws
+
+        # The integrals of the formulas are calculated jointly, and
+        # the utilities are calculated once per draw.
+        for formulas, panel in (
+            (
+                {
+                    'P1': P[1],
+                    'P2': P[2],
+                    'P3': P[3],
+                    'revenue': Variable('PRICE') * P[1],
+                    'adaptive': MonteCarlo(
+                        models.logit(V, av, 2), tolerance=1.0e-300
+                    ),
+                },
+                False,
+            ),
+            ({f'L{i}': trajectory[i] for i in V}, True),
+            # The division is calculated draw by draw.
+            (
+                {
+                    'f1': MonteCarlo(1 / (1 + exp(-V[1]))),
+                    'f2': MonteCarlo(1 / (1 + exp(V[1]))),
+                },
+                False,
+            ),
+            (
+                {
+                    'L1': MonteCarlo(
+                        PanelLikelihoodTrajectory(1 / (1 + exp(-V[1])))
+                    ),
+                    'L2': MonteCarlo(
+                        PanelLikelihoodTrajectory(1 / (1 + exp(V[1])))
+                    ),
+                },
+                True,
+            ),
+        ):
+            joint, draws = simulate(formulas, panel)
+            if 'P1' in formulas:
+                np.testing.assert_allclose(
+                    joint[['P1', 'P2', 'P3']].sum(axis=1), 1.0
+                )
+            if 'f1' in formulas:
+                np.testing.assert_allclose(joint['f1'] + joint['f2'], 1.0)
+            for name, f in formulas.items():
+                alone, aloneDraws = simulate({name: f}, panel)
+                np.testing.assert_array_equal(aloneDraws, draws)
+                np.testing.assert_allclose(
+                    joint[name], alone[name], rtol=1.0e-12
+                )
+
+    def test_sparseGridIntegrate(self):
+        df = pd.DataFrame({'X': [0.5, 1.0, -0.3]})
+        a = Beta('a', 0.7, None, None, 0)
+        s1 = Beta('s1', 0.4, None, None, 0)
+        s2 = Beta('s2', 0.6, None, None, 0)
+        V = (a + s1 * RandomVariable('omega1')) * Variable(
+            'X'
+        ) + s2 * RandomVariable('omega2')
+        prob = SparseGridIntegrate(
+            exp(V) / (1 + exp(V)), ['omega1', 'omega2'], level=5
+        )
+        myBiogeme = bio.BIOGEME(
+            db.Database('sparse', df), log(prob), suggestScales=False
+        )
+        myBiogeme.saveIterations = False
+        _, _, _, gdiff, hdiff = myBiogeme.checkDerivatives(verbose=False)
+        self.assertLess(np.abs(gdiff).max(), 1.0e-6)
+        self.assertLess(np.abs(hdiff).max(), 1.0e-6)
+
+    def test_estimateMultiStart(self):
+        self.myBiogeme.saveIterations = False
+        best, ranking = self.myBiogeme.estimateMultiStart(
+            numberOfStarts=6, pruningIterations=2, survivalRate=0.5
+        )
+        self.assertAlmostEqual(best.data.logLike, -67.0654904797005, 5)
+        self.assertIs(best, ranking[0])
+        messages = best.data.optimizationMessages
+        self.assertEqual(messages['Number of starts'], 6)
+        # Three starts are pruned, and the others reach the same optimum
+        self.assertEqual(len(ranking), 1)
+        self.assertEqual(messages['Number of starts reaching this solution'], 3)
+        best, ranking = self.myBiogeme.estimateMultiStart(
+            numberOfStarts=3, algorithm=opt.bioBfgs, pruningIterations=0
+        )
+        self.assertEqual(
+            sum(
+                r.data.optimizationMessages[
+                    'Number of starts reaching this solution'
+                ]
+                for r in ranking
+            ),
+            3,
+        )
+        logLikes = [r.data.logLike for r in ranking]
+        self.assertListEqual(logLikes, sorted(logLikes, reverse=True))
+        with self.assertRaises(excep.biogemeError):
+            self.myBiogeme.estimateMultiStart(numberOfStarts=0)
+        with self.assertRaises(excep.biogemeError):
+            self.myBiogeme.estimateMultiStart(survivalRate=0.0)
+
+    def test_estimateEM(self):
+        rng = np.random.default_rng(0)
+        ids = np.repeat(np.arange(100), 4)
+        x1 = rng.normal(size=400)
+        x2 = rng.normal(size=400)
+        beta = np.repeat(np.where(rng.random(100) < 0.3, 2.0, -1.0), 4)
+        u1 = beta * x1 + rng.gumbel(size=400)
+        u2 = 0.5 * x2 + rng.gumbel(size=400)
+        df = pd.DataFrame(
+            {
+                'ID': ids,
+                'X1': x1,
+                'X2': x2,
+                'CHOICE': np.where(u1 > u2, 1, 2),
+            }
+        )
+        database = db.Database('latentClass', df)
+        database.panel('ID')
+        X1 = Variable('X1')
+        X2 = Variable('X2')
+        CHOICE = Variable('CHOICE')
+        B2 = Beta('B2', 0, None, None, 0)
+        P0 = Beta('P0', 0.5, 0.001, 0.999, 0)
+        likelihoods = [
+            PanelLikelihoodTrajectory(
+                models.logit(
+                    {
+                        1: Beta(f'B_class{c}', 0.5 - c, None, None, 0) * X1,
+                        2: B2 * X2,
+                    },
+                    None,
+                    CHOICE,
+                )
+            )
+            for c in range(2)
+        ]
+        loglike = log(models.latentClass([P0, 1 - P0], likelihoods))
+        myBiogeme = bio.BIOGEME(database, loglike)
+        myBiogeme.modelName = 'latentClass'
+        myBiogeme.saveIterations = False
+        myBiogeme.generateHtml = False
+        myBiogeme.generatePickle = False
+        columns = list(database.data.columns)
+        results = myBiogeme.estimate()
+        data = database.data
+        parents = [ell.parent for ell in likelihoods]
+        signature = loglike.getSignature()
+        resultsEM = myBiogeme.estimateEM()
+        self.assertAlmostEqual(
+            resultsEM.data.logLike, results.data.logLike, 4
+        )
+        messages = resultsEM.data.optimizationMessages
+        self.assertGreater(messages['Number of EM iterations'], 0)
+        self.assertGreaterEqual(
+            messages['EM log likelihood'], resultsEM.data.initLogLike
+        )
+        # Neither the database nor the expressions are modified.
+        self.assertIs(database.data, data)
+        self.assertListEqual(list(database.data.columns), columns)
+        for ell, parent in zip(likelihoods, parents):
+            self.assertIs(ell.parent, parent)
+        self.assertListEqual(loglike.getSignature(), signature)
+        with self.assertRaises(excep.biogemeError):
+            self.myBiogeme.estimateEM()
+        with self.assertRaises(excep.biogemeError):
+            models.latentClass([P0, 1 - P0], likelihoods[:1])
+
     def test_simulate(self):
         results = self.myBiogeme.estimate()
         os.remove(self.myBiogeme._saveIterationsFileName())
         s = self.myBiogeme.simulate(results.getBetaValues())
         self.assertAlmostEqual(s.loc[0, 'loglike'], -6.092208083991222, 3)
 
+    def test_prepareSimulation(self):
+        betas = {'beta1': -1.5, 'beta2': 2.5}
+        simulator = self.myBiogeme.prepareSimulation(betas)
+        s = simulator.simulate()
+        s_ref = self.myBiogeme.simulate(betas)
+        for k in ['loglike', 'beta1', 'simul']:
+            np.testing.assert_array_almost_equal(s[k], s_ref[k])
+        simulator.setBetas({'beta1': -1.0})
+        s = simulator.simulate()
+        s_ref = self.myBiogeme.simulate({'beta1': -1.0, 'beta2': 2.5})
+        np.testing.assert_array_almost_equal(s['simul'], s_ref['simul'])
+        newValues = 2 * self.myData.data['Variable1']
+        simulator.setColumn('Variable1', newValues)
+        s = simulator.simulate()
+        expected = -1.0 / newValues + 2.5 / self.myData.data['Variable2']
+        np.testing.assert_array_almost_equal(s['simul'], expected)
+        # The database itself is not modified
+        s_ref = self.myBiogeme.simulate({'beta1': -1.0, 'beta2': 2.5})
+        self.assertNotAlmostEqual(s.loc[0, 'simul'], s_ref.loc[0, 'simul'])
+        with self.assertRaises(excep.biogemeError):
+            simulator.setColumn('Unknown', newValues)
+        with self.assertRaises(excep.biogemeError):
+            simulator.setColumn('Variable1', [1.0, 2.0])
+        with self.assertRaises(excep.biogemeError):
+            simulator.setBetas({'unknown': 1.0})
+
+    def test_simulateJacobian(self):
+        betas = {'beta1': -1.5, 'beta2': 2.5}
+        simulator = self.myBiogeme.prepareSimulation(betas)
+        values, jacobian = simulator.simulateJacobian(
+            ['Variable1', 'Variable2']
+        )
+        self.assertTupleEqual(jacobian.shape, (5, 3, 2))
+        s = self.myBiogeme.simulate(betas)
+        np.testing.assert_array_almost_equal(values['simul'], s['simul'])
+        v1 = self.myData.data['Variable1'].to_numpy()
+        v2 = self.myData.data['Variable2'].to_numpy()
+        np.testing.assert_array_almost_equal(jacobian[:, 2, 0], 1.5 / v1 ** 2)
+        np.testing.assert_array_almost_equal(
+            jacobian[:, 2, 1], -2.5 / v2 ** 2
+        )
+        np.testing.assert_array_almost_equal(jacobian[:, 1, :], 0)
+        point, aggregate = simulator.elasticities(
+            ['simul'], ['Variable1', 'Variable2']
+        )
+        expected = 1.5 / v1 / s['simul']
+        np.testing.assert_array_almost_equal(
+            point[('simul', 'Variable1')], expected
+        )
+        self.assertAlmostEqual(
+            aggregate.loc['simul', 'Variable1'],
+            (1.5 / v1).sum() / s['simul'].sum(),
+        )
+        with self.assertRaises(excep.biogemeError):
+            simulator.simulateJacobian(['unknown'])
+
+    def test_simulateAggregates(self):
+        betas = {'beta1': -1.5, 'beta2': 2.5}
+        simulator = self.myBiogeme.prepareSimulation(betas)
+        s = self.myBiogeme.simulate(betas)
+        agg = simulator.simulateAggregates(
+            sums={'num': ['beta1', 'simul'], 'den': 'beta1'},
+            ratios={'ratio': ('num', 'den')},
+        )
+        num = (s['beta1'] * s['simul']).sum()
+        den = s['beta1'].sum()
+        self.assertAlmostEqual(agg.loc['Total', 'num'], num)
+        self.assertAlmostEqual(agg.loc['Total', 'den'], den)
+        self.assertAlmostEqual(agg.loc['Total', 'ratio'], num / den)
+        agg = simulator.simulateAggregates(
+            sums={'simul': 'simul'}, groupBy='Person'
+        )
+        expected = s['simul'].groupby(self.myData.data['Person']).sum()
+        for person, value in expected.items():
+            self.assertAlmostEqual(agg.loc[person, 'simul'], value)
+        with self.assertRaises(excep.biogemeError):
+            simulator.simulateAggregates(sums={'x': 'unknown'})
+        with self.assertRaises(excep.biogemeError):
+            simulator.simulateAggregates(sums={'x': 'simul'}, groupBy='unknown')
+        left, right = simulator.aggregateConfidenceIntervals(
+            [{'beta1': -1.4}, {'beta1': -1.6}], sums={'simul': 'simul'}
+        )
+        self.assertLessEqual(left.loc['Total', 'simul'],
+                             right.loc['Total', 'simul'])
+        self.assertListEqual(simulator.betaValues, [-1.5, 2.5])
+
     def test_changeInitValues(self):
         self.myBiogeme.changeInitValues({'beta2': -100, 'beta1': 3.14156})
         self.assertListEqual(self.myBiogeme.betaInitValues, [3.14156, -100])
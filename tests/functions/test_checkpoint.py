@@ -0,0 +1,117 @@
+"""
+Test the checkpoint module
+
+:author: Michel Bierlaire
+:date: Mon Oct 19 10:25:12 2026
+
+"""
+# Too constraining
+# pylint: disable=invalid-name
+#
+# Not needed in test
+# pylint: disable=missing-function-docstring, missing-class-docstring
+
+import os
+import pickle
+import tempfile
+import threading
+import unittest
+import biogeme.checkpoint as ckp
+
+
+def readBetas(filename):
+    betas = {}
+    with open(filename) as f:
+        for line in f:
+            ell = line.split('=')
+            betas[ell[0].strip()] = float(ell[1])
+    return betas
+
+
+class test_checkpoint(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.directory.name, '__test.iter')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_synchronous(self):
+        c = ckp.bioCheckpoint(
+            self.filename, minimumDelay=3600, asynchronous=False
+        )
+        c.update({'b1': 1.0, 'b2': 2.0})
+        self.assertDictEqual(readBetas(self.filename), {'b1': 1.0, 'b2': 2.0})
+        # Throttled: the file is not modified before the delay expires
+        c.update({'b1': 3.0, 'b2': 4.0})
+        self.assertDictEqual(readBetas(self.filename), {'b1': 1.0, 'b2': 2.0})
+        self.assertEqual(c.numberOfWritings, 1)
+        c.flush()
+        self.assertDictEqual(readBetas(self.filename), {'b1': 3.0, 'b2': 4.0})
+        self.assertEqual(c.numberOfWritings, 2)
+
+    def test_maximumUpdates(self):
+        c = ckp.bioCheckpoint(
+            self.filename,
+            minimumDelay=3600,
+            maximumUpdates=2,
+            asynchronous=False,
+        )
+        for i in range(5):
+            c.update({'b1': float(i)})
+        self.assertEqual(c.numberOfWritings, 3)
+        self.assertDictEqual(readBetas(self.filename), {'b1': 4.0})
+
+    def test_asynchronous(self):
+        stateFilename = os.path.join(self.directory.name, '__test.state')
+        c = ckp.bioCheckpoint(
+            self.filename, stateFilename=stateFilename, minimumDelay=3600
+        )
+        for i in range(100):
+            c.update({'b1': float(i)}, state={'iteration': i})
+        c.flush()
+        self.assertDictEqual(readBetas(self.filename), {'b1': 99.0})
+        with open(stateFilename, 'rb') as f:
+            self.assertDictEqual(pickle.load(f), {'iteration': 99})
+        self.assertLessEqual(c.numberOfWritings, 2)
+
+    def test_close(self):
+        c = ckp.bioCheckpoint(self.filename, minimumDelay=3600)
+        c.update({'b1': 1.0})
+        c.update({'b1': 2.0})
+        c.close()
+        self.assertIsNone(c._thread)
+        self.assertDictEqual(readBetas(self.filename), {'b1': 2.0})
+        # The checkpoint can be used after being closed.
+        c.update({'b1': 3.0})
+        c.close()
+        self.assertDictEqual(readBetas(self.filename), {'b1': 3.0})
+        self.assertIsNone(c._thread)
+
+    def test_concurrent(self):
+        checkpoints = [
+            ckp.bioCheckpoint(self.filename, minimumDelay=0)
+            for _ in range(4)
+        ]
+
+        def run(c, k):
+            for i in range(50):
+                c.update({'b1': float(k), 'b2': float(i)})
+            c.flush()
+
+        threads = [
+            threading.Thread(target=run, args=(c, k))
+            for k, c in enumerate(checkpoints)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        betas = readBetas(self.filename)
+        self.assertEqual(betas['b2'], 49.0)
+        # No temporary file is left behind
+        self.assertListEqual(os.listdir(self.directory.name), ['__test.iter'])
+
+
+if __name__ == '__main__':
+    unittest.main()
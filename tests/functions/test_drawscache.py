@@ -0,0 +1,112 @@
+"""
+Test the drawscache module
+
+:author: Michel Bierlaire
+:date: Mon Oct 19 16:02:47 2026
+
+"""
+# Too constraining
+# pylint: disable=invalid-name
+#
+# Not needed in test
+# pylint: disable=missing-function-docstring, missing-class-docstring
+
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+import biogeme.database as db
+import biogeme.drawscache as dc
+import biogeme.exceptions as excep
+
+
+class test_drawscache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.table = np.arange(100.0).reshape(10, 10)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_memory(self):
+        c = dc.bioDrawsCache(maximumSize=2 * self.table.nbytes)
+        self.assertIsNone(c.get(('NORMAL', 10, 10, 1, None)))
+        c.put(('NORMAL', 10, 10, 1, None), self.table)
+        c.put(('NORMAL', 10, 10, 2, None), self.table + 1)
+        np.testing.assert_array_equal(
+            c.get(('NORMAL', 10, 10, 1, None)), self.table
+        )
+        # The least recently used table is evicted.
+        c.put(('NORMAL', 10, 10, 3, None), self.table + 2)
+        self.assertIsNone(c.get(('NORMAL', 10, 10, 2, None)))
+        self.assertIsNotNone(c.get(('NORMAL', 10, 10, 1, None)))
+        self.assertEqual(c.size(), 2 * self.table.nbytes)
+        self.assertEqual(c.hits, 2)
+        self.assertEqual(c.misses, 2)
+        c.clear()
+        self.assertEqual(c.size(), 0)
+        with self.assertRaises(excep.biogemeError):
+            dc.bioDrawsCache(maximumSize=0)
+
+    def test_disk(self):
+        c = dc.bioDrawsCache(directory=self.directory.name)
+        c.put(('UNIFORM', 10, 10, 1, None), self.table)
+        # Another cache reuses the tables of the directory.
+        other = dc.bioDrawsCache(directory=self.directory.name)
+        table = other.get(('UNIFORM', 10, 10, 1, None))
+        np.testing.assert_array_equal(table, self.table)
+        self.assertIsInstance(table, np.memmap)
+        small = dc.bioDrawsCache(maximumSize=10, directory=self.directory.name)
+        self.assertEqual(small.size(), 0)
+        self.assertIsNone(c.get(('UNIFORM', 10, 10, 1, None)))
+
+    def test_database(self):
+        df = pd.DataFrame({'x': np.arange(30)})
+        types = {
+            'd1': 'NORMAL',
+            'd2': 'UNIFORM_MLHS',
+            'd3': 'NORMAL_SHALTON',
+        }
+        names = ['d1', 'd2', 'd3']
+        myData = db.Database('test', df)
+        myData.drawsSeed = 123
+        myData._drawsChunkSize = 100
+        draws = myData.generateDraws(types, names, 20)
+        # The draws do not depend on the number of threads.
+        parallel = myData.generateDraws(types, names, 20, numberOfThreads=4)
+        np.testing.assert_array_equal(draws, parallel)
+        # The draws of a variable do not depend on the other variables.
+        alone = myData.generateDraws({'d1': 'NORMAL'}, ['d1'], 20)
+        np.testing.assert_array_equal(draws[:, :, 0], alone[:, :, 0])
+        myData.drawsCache = dc.bioDrawsCache()
+        myData.generateDraws(types, names, 20)
+        self.assertEqual(myData.drawsCache.misses, 3)
+        cached = myData.generateDraws(types, names, 20)
+        self.assertEqual(myData.drawsCache.hits, 3)
+        np.testing.assert_array_equal(draws, cached)
+
+    def test_databaseWithoutSeed(self):
+        df = pd.DataFrame({'x': np.arange(30)})
+        types = {'d1': 'NORMAL', 'd2': 'UNIFORM_MLHS'}
+        names = ['d1', 'd2']
+        myData = db.Database('test', df)
+        myData.drawsCache = dc.bioDrawsCache()
+        draws = myData.generateDraws(types, names, 20)
+        self.assertEqual(myData.drawsCache.misses, 2)
+        # The seed drawn the first time is reused.
+        cached = myData.generateDraws(types, names, 20)
+        self.assertEqual(myData.drawsCache.hits, 2)
+        np.testing.assert_array_equal(draws, cached)
+        # The seed is drawn from the global state of numpy.
+        generated = []
+        for name in ['first', 'second']:
+            other = db.Database(name, df)
+            other.drawsCache = myData.drawsCache
+            np.random.seed(0)
+            generated.append(other.generateDraws(types, names, 20))
+        np.testing.assert_array_equal(generated[0], generated[1])
+        self.assertEqual(myData.drawsCache.hits, 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
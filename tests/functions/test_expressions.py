@@ -850,6 +850,15 @@ class test_expressions(unittest.TestCase):
         for v in res:
             self.assertAlmostEqual(v, 1.0 / 3.0, 2)
 
+    def test_expr3Adaptive(self):
+        myDraws = ex.bioDraws('myDraws', 'UNIFORM')
+        expr = ex.MonteCarlo(myDraws * myDraws, tolerance=0.01)
+        res = expr.getValue_c(database=self.myData, numberOfDraws=100000)
+        for v in res:
+            self.assertAlmostEqual(v, 1.0 / 3.0, 1)
+        with self.assertRaises(excep.biogemeError):
+            ex.MonteCarlo(myDraws, tolerance=-1)
+
     def test_expr4(self):
         omega = ex.RandomVariable('omega')
         a = 0
@@ -862,6 +871,48 @@ class test_expressions(unittest.TestCase):
         for v in res:
             self.assertAlmostEqual(v, 1.0 / 3.0, 2)
 
+    def test_integrateNodes(self):
+        omega = ex.RandomVariable('omega')
+        # The quadrature with n nodes is exact for polynomials of
+        # degree up to 2n-1, multiplied by exp(-omega^2).
+        weight = ex.exp(-omega * omega)
+        for n in [1, 2, 10, 100, 200]:
+            expr = ex.Integrate(
+                (1 + omega * omega) * weight, 'omega', numberOfNodes=n
+            )
+            res = expr.getValue_c(database=self.myData)
+            for v in res:
+                expected = 1.0 if n == 1 else 1.5
+                self.assertAlmostEqual(v, expected * np.sqrt(np.pi), 10)
+        with self.assertRaises(excep.biogemeError):
+            ex.Integrate(weight, 'omega', numberOfNodes=0)
+
+    def test_sparseGridIntegrate(self):
+        omega1 = ex.RandomVariable('omega1')
+        omega2 = ex.RandomVariable('omega2')
+        expr = ex.SparseGridIntegrate(
+            omega1 * omega1 * omega2 * omega2 + omega1**4 + omega2**4,
+            ['omega1', 'omega2'],
+            level=3,
+        )
+        res = expr.getValue_c(database=self.myData)
+        for v in res:
+            self.assertAlmostEqual(v, 7.0, 10)
+        expr = ex.SparseGridIntegrate(
+            ex.exp(0.3 * omega1 - 0.5 * omega2), ['omega1', 'omega2']
+        )
+        res = expr.getValue_c(database=self.myData)
+        for v in res:
+            self.assertAlmostEqual(v, np.exp(0.17), 4)
+        with self.assertRaises(excep.biogemeError):
+            ex.SparseGridIntegrate(omega1, ['omega1', 'omega1'])
+        with self.assertRaises(excep.biogemeError):
+            ex.SparseGridIntegrate(omega1, ['omega1'], level=0)
+        listOfErrors, _ = ex.SparseGridIntegrate(
+            omega1, ['omega1', 'omega2']
+        ).audit()
+        self.assertEqual(len(listOfErrors), 1)
+
     def test_expr5(self):
         expr1 = 2 * self.beta1 - ex.exp(-self.beta2) / (
             self.beta3 * (self.beta2 >= self.beta1)
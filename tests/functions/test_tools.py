@@ -33,6 +33,13 @@ def myFunction(x):
     return f, g, H
 
 
+def myFunctions(points):
+    results = [myFunction(x) for x in points]
+    f = np.array([r[0] for r in results])
+    g = np.array([r[1] for r in results])
+    return f, g
+
+
 class TestTools(unittest.TestCase):
     def test_findiff_g(self):
         x = np.array([1.1, 1.1])
@@ -56,6 +63,21 @@ class TestTools(unittest.TestCase):
             ],
         )
 
+    def test_findiff_several(self):
+        x = np.array([1.1, 1.1])
+        g_true = [1.0 / 1.1, np.exp(1.1)]
+        H_true = [[-1.0 / 1.1 ** 2, 0], [0, np.exp(1.1)]]
+        g_fd = tools.findiff_g_several(myFunctions, x)
+        np.testing.assert_almost_equal(g_fd, g_true, 9)
+        H_fd = tools.findiff_H_several(myFunctions, x)
+        np.testing.assert_almost_equal(H_fd, H_true, 9)
+        g_fd = tools.findiff_g_several(myFunctions, x, central=False)
+        np.testing.assert_almost_equal(g_fd, g_true, 6)
+        H_fd = tools.findiff_H_several(myFunctions, x, central=False)
+        np.testing.assert_almost_equal(H_fd, H_true, 6)
+        steps = tools.findiffSteps([0.0, -1.0e3])
+        self.assertGreater(steps[1], 1.0e3 * steps[0] / 2)
+
     def test_checkDerivatives(self):
         x = np.array([1.1, -1.5])
         _, _, _, gdiff, hdiff = tools.checkDerivatives(
@@ -70,6 +92,11 @@ class TestTools(unittest.TestCase):
         )
         np.testing.assert_almost_equal(gdiff, [0, 0], decimal=5)
         np.testing.assert_almost_equal(hdiff, [[0, 0], [0, 0]], decimal=5)
+        _, _, _, gdiff, hdiff = tools.checkDerivatives(
+            myFunction, x, theFunctions=myFunctions
+        )
+        np.testing.assert_almost_equal(gdiff, [0, 0], decimal=8)
+        np.testing.assert_almost_equal(hdiff, [[0, 0], [0, 0]], decimal=8)
 
     def test_getPrimeNumbers(self):
         result = tools.getPrimeNumbers(7)